@@ -806,7 +806,8 @@ function AddTeams({
     }
   
     if (data.team_data) {
-      setTeamData(data.team_data);
+      // Progress messages only carry the teams that changed: merge by team name
+      setTeamData(prev => ({ ...prev, ...data.team_data }));
       
       // Debug log to show actual team data structure
       Object.entries(data.team_data).forEach(([teamName, teamInfo]) => {
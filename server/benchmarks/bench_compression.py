@@ -0,0 +1,61 @@
+"""
+Response size and gzip cost of the FC25 tables as served by the API.
+
+Run from the server/ directory:
+    python -m benchmarks.bench_compression [--repeat N] [--tables DIR]
+
+For every fifa_ng_db table: size of the JSON response body, size after gzip
+(as sent by the compression middleware), time to compress it on a cache miss,
+and time to serve it from the per-ETag compressed cache.
+"""
+
+import argparse
+import glob
+import os
+import time
+
+from endpoints.utils import compression, etag, json_codec
+
+DEFAULT_TABLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fc25", "data", "fifa_ng_db")
+
+
+def best_of(repeat, fn):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--tables", default=DEFAULT_TABLES_DIR)
+    args = parser.parse_args()
+
+    files = sorted(glob.glob(os.path.join(args.tables, "*.json")))
+    if not files:
+        raise SystemExit(f"No JSON tables found in {args.tables}")
+
+    print(f"gzip level {compression.GZIP_LEVEL}, best of {args.repeat} runs, times in ms")
+    print(f"{'table':<28}{'raw KB':>9}{'gzip KB':>9}{'ratio':>8}{'gzip':>9}{'cached':>9}")
+    total_raw = total_gzip = 0
+    for path in files:
+        body = json_codec.dumpb(json_codec.load_file(path))
+        tag = etag.body_etag(body)
+        compressed = compression.compress(body)
+        compression._remember(tag, compressed)
+        t_gzip = best_of(args.repeat, lambda: compression.compress(body))
+        t_cached = best_of(args.repeat, lambda: compression._cached(tag))
+        total_raw += len(body)
+        total_gzip += len(compressed)
+        print(f"{os.path.basename(path):<28}{len(body) // 1024:>9}{len(compressed) // 1024:>9}"
+              f"{len(body) / max(len(compressed), 1):>7.1f}x{t_gzip:>9.1f}{t_cached:>9.3f}")
+
+    print()
+    print(f"{'TOTAL':<28}{total_raw // 1024:>9}{total_gzip // 1024:>9}{total_raw / max(total_gzip, 1):>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Parse/dump timings of the JSON codec backends on the FC25 tables.
+
+Run from the server/ directory:
+    python -m benchmarks.bench_json_codec [--repeat N] [--tables DIR]
+
+Compares the stdlib json module with orjson (when installed) for parsing,
+compact dumps and pretty (indent=4) dumps of every fifa_ng_db table.
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+
+from endpoints.utils import json_codec
+
+DEFAULT_TABLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fc25", "data", "fifa_ng_db")
+
+
+def best_of(repeat, fn):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def stdlib_cases(raw, data):
+    text = raw.decode("utf-8-sig")
+    return {
+        "parse": lambda: json.loads(text),
+        "dump compact": lambda: json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode("utf-8"),
+        "dump indent=4": lambda: json.dumps(data, ensure_ascii=False, indent=4).encode("utf-8"),
+    }
+
+
+def codec_cases(raw, data):
+    return {
+        "parse": lambda: json_codec.loads(raw),
+        "dump compact": lambda: json_codec.dumpb(data),
+        "dump indent=4": lambda: json_codec.dumpb(data, 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--tables", default=DEFAULT_TABLES_DIR)
+    args = parser.parse_args()
+
+    files = sorted(glob.glob(os.path.join(args.tables, "*.json")))
+    if not files:
+        raise SystemExit(f"No JSON tables found in {args.tables}")
+
+    print(f"codec backend: {json_codec.BACKEND}, best of {args.repeat} runs, times in ms")
+    print(f"{'table':<28}{'size KB':>9}  {'operation':<14}{'stdlib':>9}{'codec':>9}{'speedup':>9}")
+    totals = {}
+    for path in files:
+        with open(path, "rb") as file:
+            raw = file.read()
+        data = json_codec.loads(raw)
+        baseline, codec = stdlib_cases(raw, data), codec_cases(raw, data)
+        for operation in baseline:
+            t_std = best_of(args.repeat, baseline[operation])
+            t_codec = best_of(args.repeat, codec[operation])
+            total = totals.setdefault(operation, [0.0, 0.0])
+            total[0] += t_std
+            total[1] += t_codec
+            print(f"{os.path.basename(path):<28}{len(raw) // 1024:>9}  {operation:<14}"
+                  f"{t_std:>9.1f}{t_codec:>9.1f}{t_std / max(t_codec, 1e-9):>8.1f}x")
+
+    print()
+    for operation, (t_std, t_codec) in totals.items():
+        print(f"{'TOTAL':<28}{'':>9}  {operation:<14}{t_std:>9.1f}{t_codec:>9.1f}{t_std / max(t_codec, 1e-9):>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Server cold-start import time, from `python -X importtime`.
+
+Run from the server/ directory:
+    python -m benchmarks.bench_startup [--repeat N] [--top N] [--module server]
+
+Imports the module (the FastAPI app by default) in fresh interpreters and
+reports the wall time, the slowest top-level packages by cumulative import
+time and which of the heavy optional libraries (torch, scikit-learn, numpy,
+Pillow, scraping stack) were loaded eagerly. They should all load on first use
+(see endpoints/utils/lazy_import.py), leaving only the data API on the start path.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_PACKAGES = ("torch", "torchvision", "sklearn", "scipy", "numpy", "PIL", "cloudscraper", "bs4", "requests", "nameparser")
+
+
+def parse_importtime(stderr):
+    """[(depth, package, self_us, cumulative_us)] from -X importtime output."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        name = name.rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        imports.append((depth, name.strip(), int(self_us), int(cumulative_us)))
+    return imports
+
+
+def run_import(module):
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SERVER_DIR, capture_output=True, text=True,
+    )
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        tail = "\n".join(line for line in proc.stderr.splitlines() if not line.startswith("import time:"))
+        raise SystemExit(f"import {module} failed:\n{tail}")
+    return elapsed, parse_importtime(proc.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--module", default="server")
+    args = parser.parse_args()
+
+    runs = [run_import(args.module) for _ in range(args.repeat)]
+    best_elapsed, imports = min(runs, key=lambda run: run[0])
+
+    # Cumulative time per top-level package, counted where it is first imported
+    by_package = defaultdict(int)
+    for depth, name, _, cumulative_us in imports:
+        package = name.split(".")[0]
+        if name == package:
+            by_package[package] = max(by_package[package], cumulative_us)
+    total_us = sum(self_us for _, _, self_us, _ in imports)
+
+    print(f"import {args.module}: best of {args.repeat} fresh interpreters")
+    print(f"  wall time (incl. interpreter start) {best_elapsed * 1000:8.1f} ms")
+    print(f"  import time                         {total_us / 1000:8.1f} ms, {len(imports)} modules")
+    print()
+    print(f"{'package':<32}{'cumulative ms':>14}")
+    for package, cumulative_us in sorted(by_package.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{package:<32}{cumulative_us / 1000:>14.1f}")
+
+    loaded = {name.split(".")[0] for _, name, _, _ in imports}
+    eager = [package for package in HEAVY_PACKAGES if package in loaded]
+    print()
+    print(f"heavy packages imported at startup: {', '.join(eager) if eager else 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, HTTPException
 from pathlib import Path
-import json
+import os
 import re
 from typing import List, Dict, Optional
+from .utils.tables import read_table, upsert_rows
 
 router = APIRouter()
 
@@ -45,20 +46,6 @@ async def add_team_language_strings(
     try:
         language_strings2_file = Path("projects") / project_name / "data/loc/LanguageStrings2.json"
         
-        # Ensure directory exists
-        language_strings2_file.parent.mkdir(parents=True, exist_ok=True)
-        
-        # Load existing language strings or create empty list
-        language_strings2 = []
-        if language_strings2_file.exists():
-            try:
-                with open(language_strings2_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    if content.strip():
-                        language_strings2 = json.loads(content)
-            except Exception as e:
-                print(f"Error reading LanguageStrings2.json: {str(e)}. Starting with empty file.")
-        
         # Remove " (number)" from the end of team_name if it exists
         team_name_clean = re.sub(r'\s*\(\d+\)$', '', team_name)
         
@@ -86,17 +73,8 @@ async def add_team_language_strings(
             }
         ]
         
-        # Update or add each entry
-        for entry in team_entries:
-            existing_entry = next((e for e in language_strings2 if e['stringid'] == entry['stringid']), None)
-            if existing_entry:
-                existing_entry.update(entry)
-            else:
-                language_strings2.append(entry)
-        
-        # Save the updated language strings
-        with open(language_strings2_file, 'w', encoding='utf-8') as f:
-            json.dump(language_strings2, f, ensure_ascii=False, indent=2)
+        # Update or add each entry (journaled upsert keyed by stringid, no full rewrite)
+        upsert_rows(os.path.abspath(language_strings2_file), "stringid", team_entries, 2)
             
         return True
         
@@ -109,10 +87,8 @@ async def get_language_strings(project_id: str) -> List[Dict]:
     """Get all language strings for a project."""
     try:
         language_strings2_file = Path("projects") / project_id / "data/loc/LanguageStrings2.json"
-        if not language_strings2_file.exists():
-            return []
-            
-        with open(language_strings2_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return read_table(os.path.abspath(language_strings2_file))
+    except FileNotFoundError:
+        return []
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error reading language strings: {str(e)}")
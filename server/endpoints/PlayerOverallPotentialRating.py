@@ -9,11 +9,11 @@ This module calculates overall rating and potential for players based on:
 - Player attributes (if available)
 """
 
-import json
 import os
 import re
 from typing import Dict, Any, Optional, Tuple
 from pathlib import Path
+from .utils.tables import read_table, table_exists
 
 
 def parse_player_age(player_data: Dict[str, Any], default_age: int = 25) -> int:
@@ -53,11 +53,14 @@ def parse_player_age(player_data: Dict[str, Any], default_age: int = 25) -> int:
 
 
 def load_league_ratings() -> Dict[str, Any]:
-    """Load league ratings from db_leagues_ratings.json"""
+    """
+    Load league ratings from db_leagues_ratings.json.
+    Called once per rated player: served from the table cache (parsed once,
+    re-read only when the file changes) instead of parsing the file each time.
+    """
     try:
         ratings_file = Path(__file__).parent.parent / "db" / "db_leagues_ratings.json"
-        with open(ratings_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return read_table(str(ratings_file))
     except Exception as e:
         print(f"Warning: Could not load league ratings: {e}")
         return {}
@@ -69,14 +72,12 @@ def load_leagues_data(project_id: str = None) -> Dict[str, Any]:
         if project_id:
             # Try to load from project first
             leagues_file = Path(__file__).parent.parent / "projects" / project_id / "data" / "fifa_ng_db" / "leagues.json"
-            if leagues_file.exists():
-                with open(leagues_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+            if table_exists(str(leagues_file)):
+                return read_table(str(leagues_file))
         
         # Fallback to fc25 data
         leagues_file = Path(__file__).parent.parent / "fc25" / "data" / "fifa_ng_db" / "leagues.json"
-        with open(leagues_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return read_table(str(leagues_file))
     except Exception as e:
         print(f"Warning: Could not load leagues data: {e}")
         return []
@@ -88,14 +89,12 @@ def load_nations_data(project_id: str = None) -> Dict[str, Any]:
         if project_id:
             # Try to load from project first
             nations_file = Path(__file__).parent.parent / "projects" / project_id / "data" / "fifa_ng_db" / "nations.json"
-            if nations_file.exists():
-                with open(nations_file, 'r', encoding='utf-8-sig') as f:  # Use utf-8-sig to handle BOM
-                    return json.load(f)
+            if table_exists(str(nations_file)):
+                return read_table(str(nations_file))
         
         # Fallback to fc25 data
         nations_file = Path(__file__).parent.parent / "fc25" / "data" / "fifa_ng_db" / "nations.json"
-        with open(nations_file, 'r', encoding='utf-8-sig') as f:  # Use utf-8-sig to handle BOM
-            return json.load(f)
+        return read_table(str(nations_file))  # A leading BOM is skipped by the codec
     except Exception as e:
         print(f"Warning: Could not load nations data: {e}")
         return []
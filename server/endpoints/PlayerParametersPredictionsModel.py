@@ -1,6 +1,9 @@
 """
 Unified Player Parameter Predictions Model with PyTorch and Mock fallback.
 Uses parameter_ranges.json for class information and model configuration.
+
+Imports torch/torchvision: use it through player_parameters.py (the router and
+facade), which loads this module on the first prediction.
 """
 
 # Try to import PyTorch, fall back to mock mode if not available
@@ -34,21 +37,19 @@ except ImportError:
 
 import os
 import re
-import json
 import random
 import hashlib
+import threading
 from pathlib import Path
 from typing import Dict, Optional, List, Any
 import asyncio
-from fastapi import APIRouter, HTTPException
 import logging
+from .utils import json_codec
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
-
 # Base paths
 MODELS_DIR = Path(__file__).parent.parent / "models"
 PARAMETER_RANGES_FILE = MODELS_DIR / "parameter_ranges.json"
@@ -232,7 +233,7 @@ class PlayerParameterPredictor:
         try:
             if PARAMETER_RANGES_FILE.exists():
                 with open(PARAMETER_RANGES_FILE, 'r', encoding='utf-8') as f:
-                    ranges = json.load(f)
+                    ranges = json_codec.load(f)
                 logger.info(f"Loaded parameter ranges for {len(ranges)} parameters from {PARAMETER_RANGES_FILE}")
                 return ranges
             else:
@@ -463,12 +464,15 @@ class PlayerParameterPredictor:
 
 # Global predictor instance
 _predictor_instance = None
+_predictor_lock = threading.Lock()  # Startup warm-up and requests may create it concurrently
 
 def get_predictor() -> PlayerParameterPredictor:
     """Get or create the global predictor instance."""
     global _predictor_instance
     if _predictor_instance is None:
-        _predictor_instance = PlayerParameterPredictor()
+        with _predictor_lock:
+            if _predictor_instance is None:
+                _predictor_instance = PlayerParameterPredictor()
     return _predictor_instance
 
 async def predict_player_parameters_from_photo(image_path: str, parameters: Optional[List[str]] = None) -> Dict[str, str]:
@@ -573,45 +577,3 @@ async def enhance_player_data_with_predictions(player_data: Dict[str, Any], imag
     except Exception as e:
         print(f"        ❌ Ошибка ML предсказания: {str(e)}")
         return player_data
-
-# FastAPI endpoints
-@router.get("/player-parameters/available-models", tags=["player-parameters"])
-async def get_available_models():
-    """Get list of available parameter prediction models."""
-    predictor = get_predictor()
-    return {
-        "available_parameters": predictor.get_available_parameters(),
-        "pytorch_available": predictor.pytorch_available,
-        "total_parameters": len(predictor.parameter_ranges)
-    }
-
-@router.get("/player-parameters/parameter-info/{parameter_name}", tags=["player-parameters"])
-async def get_parameter_info(parameter_name: str):
-    """Get detailed information about a specific parameter."""
-    predictor = get_predictor()
-    
-    if parameter_name not in predictor.parameter_ranges:
-        raise HTTPException(status_code=404, detail=f"Parameter '{parameter_name}' not found")
-    
-    param_info = predictor.parameter_ranges[parameter_name]
-    return {
-        "parameter_name": parameter_name,
-        "has_model": parameter_name in predictor.available_models,
-        "info": param_info
-    }
-
-@router.post("/player-parameters/predict", tags=["player-parameters"])
-async def predict_parameters(image_path: str, parameters: Optional[List[str]] = None):
-    """Predict player parameters from image."""
-    if not os.path.exists(image_path):
-        raise HTTPException(status_code=404, detail="Image file not found")
-    
-    try:
-        predictions = await predict_player_parameters_from_photo(image_path, parameters)
-        return {
-            "image_path": image_path,
-            "predictions": predictions,
-            "total_predictions": len(predictions)
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
\ No newline at end of file
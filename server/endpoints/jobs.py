@@ -0,0 +1,372 @@
+"""
+Background jobs.
+
+Long operations (adding teams, Transfermarkt squad/league scrapes, SoFIFA ->
+Transfermarkt link resolution) run as jobs instead of holding the HTTP request
+open or running as FastAPI BackgroundTasks. submit_job() queues the job and
+returns at once; JOB_WORKERS workers on the server event loop take jobs by
+priority (higher first, then submission order). Coroutine functions run on
+the loop, plain functions in a worker thread.
+
+Every job has an ID, status, priority, progress and result, kept in the job
+table (db/jobs.json) so GET /jobs/{id} still answers after a restart. Jobs
+that were queued or running when the server stopped are marked interrupted.
+
+Progress is taken from the job's own WebSocket progress messages (see
+websocket.send_progress_sync). Cancellation cancels a queued job right away;
+a running coroutine job is cancelled at its next await, a running thread job
+stops at its next cancel_requested() check.
+"""
+
+import asyncio
+import contextvars
+import itertools
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException
+
+from .utils.tables import get_row, read_table, upsert_rows, write_table
+
+router = APIRouter()
+
+JOBS_TABLE = '../db/jobs.json'
+
+JOB_WORKERS = int(os.environ.get("FIFA_JOB_WORKERS", "2"))  # Jobs running at the same time
+MAX_FINISHED_JOBS = 200  # Finished jobs kept in the job table
+PROGRESS_SAVE_INTERVAL = 1.0  # Seconds between job table writes for progress only
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED, INTERRUPTED = (
+    "queued", "running", "succeeded", "failed", "cancelled", "interrupted")
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+
+def _utc_now_iso() -> str:
+    return datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+
+
+class Job:
+    """State of one job; the job table holds to_row() of it."""
+
+    def __init__(self, kind: str, fn: Callable[..., Any], args: tuple, priority: int, params: Optional[Dict[str, Any]]):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.priority = priority
+        self.params = params or {}
+        self.status = QUEUED
+        self.progress: Dict[str, Any] = {}
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = _utc_now_iso()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.fn = fn
+        self.args = args
+        self.is_coroutine = asyncio.iscoroutinefunction(fn)
+        self.cancel_event = threading.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.saved_at = 0.0
+
+    @property
+    def finished(self) -> bool:
+        return self.status not in ACTIVE_STATUSES
+
+    def to_row(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id, "kind": self.kind, "priority": self.priority, "status": self.status,
+            "progress": dict(self.progress), "result": self.result, "error": self.error,
+            "params": self.params, "cancel_requested": self.cancel_event.is_set(),
+            "created_at": self.created_at, "started_at": self.started_at, "finished_at": self.finished_at,
+        }
+
+
+_jobs: Dict[str, Job] = {}  # Active jobs of this server run and the latest job of each kind
+_jobs_lock = threading.RLock()
+_current_job: contextvars.ContextVar[Optional[Job]] = contextvars.ContextVar("current_job", default=None)
+_order = itertools.count()
+_queue: Optional[asyncio.PriorityQueue] = None
+_workers: List[asyncio.Task] = []
+_table_loaded = False
+
+
+# --- Job table ---
+
+def _save(job: Job) -> None:
+    job.saved_at = time.monotonic()
+    try:
+        upsert_rows(JOBS_TABLE, "job_id", [job.to_row()])
+    except Exception as e:
+        print(f"[JOBS] Could not save job {job.id}: {e}")
+
+
+def _pruned(rows: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+    """Rows without the oldest finished jobs beyond MAX_FINISHED_JOBS (None: nothing to drop)"""
+    finished = [row for row in rows if row.get("status") not in ACTIVE_STATUSES]
+    if len(finished) <= MAX_FINISHED_JOBS:
+        return None
+    finished.sort(key=lambda row: row.get("created_at") or "")
+    dropped = {id(row) for row in finished[:len(finished) - MAX_FINISHED_JOBS]}
+    return [row for row in rows if id(row) not in dropped]
+
+
+def _evict_finished() -> None:
+    """Drop finished jobs from memory (their row is in the job table) except the latest of each kind"""
+    latest = {job.kind: job for job in _jobs.values()}
+    for job_id in [job.id for job in _jobs.values() if job.finished and latest[job.kind] is not job]:
+        del _jobs[job_id]
+
+
+def _prune_table() -> None:
+    """Keep the job table at MAX_FINISHED_JOBS finished jobs (called as jobs finish)"""
+    with _jobs_lock:
+        _evict_finished()
+        try:
+            rows = _pruned(read_table(JOBS_TABLE))
+            if rows is not None:
+                write_table(JOBS_TABLE, rows)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[JOBS] Could not prune the job table: {e}")
+
+
+def _load_table() -> None:
+    """Mark jobs left active by the previous server run as interrupted and prune old ones"""
+    global _table_loaded
+    if _table_loaded:
+        return
+    _table_loaded = True
+    try:
+        rows = read_table(JOBS_TABLE)
+    except FileNotFoundError:
+        return
+    except Exception as e:
+        print(f"[JOBS] Could not read the job table: {e}")
+        return
+    # New rows: the ones read are shared with the table cache
+    interrupted = {"status": INTERRUPTED, "error": "Server stopped before the job finished", "finished_at": _utc_now_iso()}
+    changed = any(row.get("status") in ACTIVE_STATUSES for row in rows)
+    rows = [{**row, **interrupted} if row.get("status") in ACTIVE_STATUSES else row for row in rows]
+    pruned = _pruned(rows)
+    if pruned is not None:
+        rows, changed = pruned, True
+    if changed:
+        write_table(JOBS_TABLE, rows)
+        interrupted_count = sum(1 for row in rows if row.get("status") == INTERRUPTED)
+        print(f"[JOBS] Job table loaded, {interrupted_count} interrupted job(s)")
+
+
+# --- Workers ---
+
+def _ensure_workers() -> asyncio.PriorityQueue:
+    global _queue, _workers
+    loop = asyncio.get_running_loop()
+    if _queue is None or not _workers or _workers[0].get_loop() is not loop:
+        _queue = asyncio.PriorityQueue()
+        _workers = [loop.create_task(_worker(_queue)) for _ in range(max(1, JOB_WORKERS))]
+    return _queue
+
+
+def start_job_workers() -> None:
+    """Start the worker pool (called on server startup; submit_job() also starts it)"""
+    _load_table()
+    _ensure_workers()
+
+
+async def _run(job: Job) -> Any:
+    _current_job.set(job)
+    if job.is_coroutine:
+        return await job.fn(*job.args)
+    # to_thread copies the context: current_job() works in the thread too
+    return await asyncio.to_thread(job.fn, *job.args)
+
+
+async def _worker(queue: asyncio.PriorityQueue) -> None:
+    while True:
+        _, _, job = await queue.get()
+        try:
+            if job.status != QUEUED:  # Cancelled while queued
+                continue
+            with _jobs_lock:
+                job.status, job.started_at = RUNNING, _utc_now_iso()
+                _save(job)
+            # Own task (and context) per job: cancel_job() cancels the job, not the worker
+            job.task = asyncio.get_running_loop().create_task(_run(job))
+            try:
+                job.result = await asyncio.shield(job.task)
+                job.status = CANCELLED if job.cancel_event.is_set() else SUCCEEDED
+            except asyncio.CancelledError:
+                # cancel_job() sets the event before cancelling the task; anything else is the
+                # worker (and its job) being cancelled at shutdown, even if the job task went first
+                if not (job.task.cancelled() and job.cancel_event.is_set()):
+                    raise
+                job.status = CANCELLED
+            except Exception as e:
+                job.status, job.error = FAILED, getattr(e, "detail", None) or str(e)
+                print(f"[JOBS] {job.kind} job {job.id} failed: {job.error}")
+            with _jobs_lock:
+                job.finished_at = _utc_now_iso()
+                _save(job)
+                _prune_table()
+            print(f"[JOBS] {job.kind} job {job.id}: {job.status}")
+        finally:
+            job.fn = job.args = None  # Drop references to the request data
+            queue.task_done()
+
+
+# --- API for the endpoints ---
+
+def submit_job(kind: str, fn: Callable[..., Any], *args: Any, priority: int = 0,
+               params: Optional[Dict[str, Any]] = None, unique: bool = False) -> Job:
+    """
+    Queue fn(*args) as a job of `kind` and return it. With unique=True an
+    already queued or running job of the same kind is returned instead of
+    starting a second one (scrapes writing the same output file).
+    Must be called from the server event loop.
+    """
+    queue = _ensure_workers()
+    _load_table()
+    with _jobs_lock:
+        if unique:
+            for job in _jobs.values():
+                if job.kind == kind and not job.finished:
+                    return job
+        job = Job(kind, fn, args, priority, params)
+        _jobs[job.id] = job
+        _save(job)
+    queue.put_nowait((-priority, next(_order), job))
+    return job
+
+
+def current_job() -> Optional[Job]:
+    """The job the calling code runs in (None outside jobs)"""
+    return _current_job.get()
+
+
+def _active_job(kind: Optional[str] = None) -> Optional[Job]:
+    job = _current_job.get()
+    if job is not None or kind is None:
+        return job
+    # Threads started by the job itself (scraper pools) don't inherit its context
+    with _jobs_lock:
+        running = [job for job in _jobs.values() if job.kind == kind and job.status == RUNNING]
+    return running[0] if len(running) == 1 else None
+
+
+def cancel_requested(kind: Optional[str] = None) -> bool:
+    """True when cancellation of the current job (or the running job of `kind`) was requested"""
+    job = _active_job(kind)
+    return job is not None and job.cancel_event.is_set()
+
+
+def record_progress(progress_data: Dict[str, Any]) -> None:
+    """Update the progress of the job a progress message belongs to (see send_progress_sync)"""
+    job = _active_job(progress_data.get("function_name"))
+    if job is None or job.status != RUNNING:
+        return
+    with _jobs_lock:
+        for field in ("percentage", "current", "total", "message"):
+            if progress_data.get(field) is not None:
+                job.progress[field] = progress_data[field]
+        if time.monotonic() - job.saved_at >= PROGRESS_SAVE_INTERVAL:
+            _save(job)
+
+
+def cancel_job(job: Job) -> None:
+    with _jobs_lock:
+        if job.finished:
+            return
+        job.cancel_event.set()
+        if job.status == QUEUED:
+            job.status, job.finished_at = CANCELLED, _utc_now_iso()
+        _save(job)
+        if job.finished:
+            _prune_table()
+    if job.task is not None and job.is_coroutine:
+        # Thread jobs stop at their next cancel_requested() check: the thread can't be interrupted
+        job.task.get_loop().call_soon_threadsafe(job.task.cancel)
+
+
+def cancel_jobs(kind: str) -> int:
+    """Cancel every queued or running job of `kind`; returns how many there were"""
+    with _jobs_lock:
+        active = [job for job in _jobs.values() if job.kind == kind and not job.finished]
+    for job in active:
+        cancel_job(job)
+    return len(active)
+
+
+def kind_status(kind: str) -> Dict[str, Any]:
+    """Status of the latest job of `kind` (for the legacy process_status endpoints)"""
+    with _jobs_lock:
+        jobs = [job for job in _jobs.values() if job.kind == kind]
+    if not jobs:
+        return {"cancelled": False, "running": False, "job_id": None}
+    job = jobs[-1]
+    return {"cancelled": job.cancel_event.is_set(), "running": not job.finished, "job_id": job.id, "status": job.status}
+
+
+def result_summary(result: Any, output_file: str) -> Dict[str, Any]:
+    """Job result of a scrape: record count and output file (the records stay in the file)"""
+    return {"records": len(result) if isinstance(result, (list, dict)) else 0,
+            "output_file": os.path.basename(output_file)}
+
+
+def accepted_response(job: Job, message: str) -> Dict[str, Any]:
+    """Body of the 202 response of an endpoint that submitted `job`"""
+    return {"status": "processing", "message": message, "job_id": job.id, "job_status": job.status,
+            "status_url": f"/jobs/{job.id}"}
+
+
+def get_job(job_id: str) -> Dict[str, Any]:
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is not None:
+            return job.to_row()
+    try:
+        row = get_row(JOBS_TABLE, job_id, "job_id")
+    except FileNotFoundError:
+        row = None
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return row
+
+
+# FastAPI endpoints
+@router.get("/jobs", tags=["jobs"])
+async def list_jobs(status: Optional[str] = None, kind: Optional[str] = None, limit: int = 50):
+    """Jobs, newest first (this run and the job table), optionally filtered by status/kind"""
+    try:
+        rows = {row["job_id"]: row for row in read_table(JOBS_TABLE)}
+    except FileNotFoundError:
+        rows = {}
+    with _jobs_lock:
+        rows.update((job.id, job.to_row()) for job in _jobs.values())
+    jobs = [row for row in rows.values()
+            if (status is None or row.get("status") == status) and (kind is None or row.get("kind") == kind)]
+    jobs.sort(key=lambda row: row.get("created_at") or "", reverse=True)
+    return jobs[:limit]
+
+
+@router.get("/jobs/{job_id}", tags=["jobs"])
+async def get_job_status(job_id: str):
+    """Status, progress and result of a job"""
+    return get_job(job_id)
+
+
+@router.post("/jobs/{job_id}/cancel", tags=["jobs"])
+async def cancel_job_endpoint(job_id: str):
+    """Cancel a queued or running job"""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+    if job is None:
+        get_job(job_id)  # 404 for unknown IDs
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is not active")
+    if job.finished:
+        raise HTTPException(status_code=409, detail=f"Job {job_id} already {job.status}")
+    cancel_job(job)
+    return job.to_row()
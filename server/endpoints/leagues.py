@@ -23,24 +23,25 @@ class LeagueCreate(BaseModel):
     iswithintransferwindow: str = "0"
 
 @router.get("/leagues", tags=["leagues"])
-async def get_leagues(project_id: str = Query(None, description="Project ID to load leagues from")):
+async def get_leagues(project_id: str = Query(None, description="Project ID to load leagues from"),
+                      fields: str = Query(None, description="Comma-separated columns to return (default: all)")):
     """Get leagues data from project folder or default file"""
     
     if project_id:
         try:
-            data = load_json_file(f'../projects/{project_id}/data/fifa_ng_db/leagues.json')
+            data = load_json_file(f'../projects/{project_id}/data/fifa_ng_db/leagues.json', fields)
             return JSONResponse(content=data, headers={"Content-Type": "application/json"})
         except HTTPException as e:
             if e.status_code != 404:
                 print(f"[ERROR] Error loading project leagues: {e.detail}")
     
-    data = load_json_file('../fc25/data/fifa_ng_db/leagues.json')
+    data = load_json_file('../fc25/data/fifa_ng_db/leagues.json', fields)
     return JSONResponse(content=data, headers={"Content-Type": "application/json"})
 
 @router.get("/leagues/original", tags=["leagues"])
-async def get_original_leagues():
+async def get_original_leagues(fields: str = Query(None, description="Comma-separated columns to return (default: all)")):
     """Get original leagues data from fc25 folder"""
-    data = load_json_file('../fc25/data/fifa_ng_db/leagues.json')
+    data = load_json_file('../fc25/data/fifa_ng_db/leagues.json', fields)
     return JSONResponse(content=data, headers={"Content-Type": "application/json"})
 
 @router.get("/leagues/validate", tags=["leagues"])
@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Query, HTTPException, Body
 from .utils import load_json_file, save_json_file
+from .utils.tables import get_multi_index, get_rows, append_rows, table_len, table_exists
+from .utils.id_allocator import allocate_ids
 from pydantic import BaseModel
 from typing import List, Dict
 from pathlib import Path
 import json
 import time
 import asyncio
-import aiofiles
 
 # Define workspace root relative to this file's location
 # Assuming leagueteamlinks.py is in /<workspace_root>/server/endpoints/
@@ -22,19 +23,20 @@ class TeamTransfer(BaseModel):
     to_leagueid: str
 
 @router.get("/leagueteamlinks", tags=["leagueteamlinks"])
-async def get_leagueteamlinks(project_id: str = Query(None, description="Project ID to load leagueteamlinks from")):
+async def get_leagueteamlinks(project_id: str = Query(None, description="Project ID to load leagueteamlinks from"),
+                              fields: str = Query(None, description="Comma-separated columns to return (default: all)")):
     """Get leagueteamlinks data from project folder or default file"""
     
     if project_id:
         try:
             project_links_path = WORKSPACE_ROOT / "projects" / project_id / "data" / "fifa_ng_db" / "leagueteamlinks.json"
-            return load_json_file(str(project_links_path))
+            return load_json_file(str(project_links_path), fields)
         except HTTPException as e:
             if e.status_code != 404:
                 print(f"[ERROR] Error loading project leagueteamlinks: {e.detail}")
     
     default_links_path = WORKSPACE_ROOT / "fc25" / "data" / "fifa_ng_db" / "leagueteamlinks.json"
-    return load_json_file(str(default_links_path))
+    return load_json_file(str(default_links_path), fields)
 
 @router.get("/leagueteamlinks/transferable-teams", tags=["leagueteamlinks"])
 async def get_transferable_teams(
@@ -54,17 +56,16 @@ async def get_transferable_teams(
         if not country_teams:
             return []
         
-        # Load current leagueteamlinks to get current league assignments
+        # Current league assignments come from the leagueteamlinks teamid index
+        links_path = WORKSPACE_ROOT / "fc25" / "data" / "fifa_ng_db" / "leagueteamlinks.json"
         if project_id:
-            try:
-                links_path = WORKSPACE_ROOT / "projects" / project_id / "data" / "fifa_ng_db" / "leagueteamlinks.json"
-                leagueteamlinks = load_json_file(str(links_path))
-            except HTTPException:
-                default_links_path = WORKSPACE_ROOT / "fc25" / "data" / "fifa_ng_db" / "leagueteamlinks.json"
-                leagueteamlinks = load_json_file(str(default_links_path))
-        else:
-            default_links_path = WORKSPACE_ROOT / "fc25" / "data" / "fifa_ng_db" / "leagueteamlinks.json"
-            leagueteamlinks = load_json_file(str(default_links_path))
+            project_links_path = WORKSPACE_ROOT / "projects" / project_id / "data" / "fifa_ng_db" / "leagueteamlinks.json"
+            if table_exists(str(project_links_path)):
+                links_path = project_links_path
+        try:
+            links_by_team = get_multi_index(str(links_path), "teamid")
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail=f"File {links_path} not found")
         
         # Load leagues to get league names
         if project_id:
@@ -87,18 +88,17 @@ async def get_transferable_teams(
                 'level': league.get('level', '')
             }
         
-        # Create a map of team assignments
-        team_assignments = {}
-        for link in leagueteamlinks:
-            team_assignments[str(link['teamid'])] = {
-                'current_leagueid': str(link['leagueid']),
-                'current_prevleagueid': str(link['prevleagueid'])
-            }
-        
         # Add current league info to teams
         transferable_teams = []
         for team in country_teams:
-            team_assignment = team_assignments.get(str(team['teamid']))
+            team_links = links_by_team.get(team['teamid'])
+            team_assignment = None
+            if team_links:
+                link = team_links[-1]
+                team_assignment = {
+                    'current_leagueid': str(link['leagueid']),
+                    'current_prevleagueid': str(link['prevleagueid'])
+                }
             
             if team_assignment:
                 current_league_id = team_assignment.get('current_leagueid', 'Not Assigned')
@@ -140,7 +140,7 @@ async def transfer_teams(
         
         # Load current leagueteamlinks
         file_path_obj = WORKSPACE_ROOT / "projects" / project_id / "data" / "fifa_ng_db" / "leagueteamlinks.json"
-        if not file_path_obj.exists():
+        if not table_exists(str(file_path_obj)):
             raise HTTPException(status_code=404, detail=f"File not found: {file_path_obj}")
         leagueteamlinks = load_json_file(str(file_path_obj))
         
@@ -148,8 +148,10 @@ async def transfer_teams(
         
         # Update team league assignments
         for transfer in transfers:
-            for link in leagueteamlinks:
+            for i, link in enumerate(leagueteamlinks):
                 if str(link['teamid']) == str(transfer.teamid) and str(link['leagueid']) == str(transfer.from_leagueid):
+                    # Rows may be shared with the table cache: edit a copy
+                    link = leagueteamlinks[i] = dict(link)
                     link['leagueid'] = transfer.to_leagueid
                     link['prevleagueid'] = transfer.to_leagueid
                     transferred_count += 1
@@ -197,55 +199,37 @@ async def connect_team_league(
     links_file = WORKSPACE_ROOT / "projects" / project_name / "data" / "fifa_ng_db" / "leagueteamlinks.json"
     
     
-    if not links_file.exists():
+    if not table_exists(str(links_file)):
         raise HTTPException(status_code=404, detail="Файл leagueteamlinks.json не найден")
     
     try:
         start_time = time.time()
         
-        # Асинхронно читаем данные из файла
-        async with aiofiles.open(links_file, 'r', encoding='utf-8') as f:
-            content = await f.read()
-            links = json.loads(content)
+        links_path = str(links_file)
         
-        read_time = time.time() - start_time
+        # Индекс leagueteamlinks: teamid -> связи
+        links_by_team = await asyncio.to_thread(get_multi_index, links_path, "teamid")
         
-        # Находим максимальный artificialkey и создаем индекс существующих соединений
-        max_key = 0
-        existing_connections = set()
-        
-        # Обрабатываем записи пакетами для лучшей производительности
-        batch_size = 1000
-        for i in range(0, len(links), batch_size):
-            batch = links[i:i + batch_size]
-            for link in batch:
-                try:
-                    current_key = int(link.get("artificialkey", "0"))
-                    max_key = max(max_key, current_key)
-                    
-                    # Создаем набор существующих соединений для быстрой проверки
-                    team_id = link.get("teamid")
-                    league_id_link = link.get("leagueid")
-                    if team_id and league_id_link:
-                        existing_connections.add(f"{team_id}_{league_id_link}")
-                except (ValueError, TypeError):
-                    continue
-            
-            # Даем возможность другим задачам выполниться
-            if i % (batch_size * 10) == 0:
-                await asyncio.sleep(0.001)
+        # artificialkey резервируются диапазоном у аллокатора проекта (без прохода по таблице);
+        # повторы команд в запросе учитываются один раз
+        teams_to_link = {str(team_id) for team_id in team_ids
+                         if not any(str(link.get("leagueid")) == str(league_id) for link in links_by_team.get(team_id))}
+        max_key = await asyncio.to_thread(
+            allocate_ids, project_name, "leagueteamlinks.artificialkey", len(teams_to_link)) - 1
         
+        read_time = time.time() - start_time
         
         # Счетчик добавленных команд
         added_count = 0
         new_links = []
+        added_team_ids = set()
         
         # Добавляем новые записи для каждой команды
         for team_id in team_ids:
-            connection_key = f"{team_id}_{league_id}"
-            
-            # Быстрая проверка существования связи
-            if connection_key not in existing_connections:
+            # Быстрая проверка существования связи по индексу teamid
+            if str(team_id) in added_team_ids:
+                continue
+            if not any(str(link.get("leagueid")) == str(league_id) for link in links_by_team.get(team_id)):
                 # Увеличиваем artificialkey для новой записи
                 max_key += 1
                 
@@ -289,22 +273,17 @@ async def connect_team_league(
                 
                 # Добавляем запись в список новых записей
                 new_links.append(new_link)
+                added_team_ids.add(str(team_id))
                 added_count += 1
         
         # Если были добавлены команды, сохраняем файл
         if added_count > 0:
             
-            # Добавляем новые записи к существующим
-            links.extend(new_links)
-            
-            # Асинхронно сохраняем файл
+            # Добавляем новые записи к существующим (индексы обновляются инкрементально)
             write_start = time.time()
             
             # Сериализуем JSON с минимальными отступами для экономии места и времени
-            json_content = json.dumps(links, ensure_ascii=False, separators=(',', ':'))
-            
-            async with aiofiles.open(links_file, 'w', encoding='utf-8') as f:
-                await f.write(json_content)
+            await asyncio.to_thread(append_rows, links_path, new_links, None)
             
             write_time = time.time() - write_start
         
@@ -314,7 +293,7 @@ async def connect_team_league(
             "status": "success",
             "message": f"Добавлено {added_count} команд в лигу {league_id}",
             "added_count": added_count,
-            "total_records": len(links),
+            "total_records": table_len(links_path),
             "processing_time": f"{total_time:.2f}s"
         }
         
@@ -339,44 +318,28 @@ async def connect_team_to_league_direct(project_name: str, league_id: str, team_
         links_file = WORKSPACE_ROOT / "projects" / project_name / "data" / "fifa_ng_db" / "leagueteamlinks.json"
         
 
-        if not links_file.exists():
+        if not table_exists(str(links_file)):
             return {"status": "error", "message": "Файл leagueteamlinks.json не найден"}
         
         start_time = time.time()
         
-        # Читаем данные из файла
-        # Note: This is synchronous file I/O. Consider making it async if performance is critical for this direct call.
-        with open(links_file, 'r', encoding='utf-8') as f:
-            links = json.load(f)
-        
+        links_path = str(links_file)
         
-        # Быстрая проверка существования связи
-        connection_key = f"{team_id}_{league_id}"
-        existing_connections = set()
-        max_key = 0
-        
-        for link in links:
-            try:
-                current_key = int(link.get("artificialkey", "0"))
-                max_key = max(max_key, current_key)
-                
-                team_id_link = link.get("teamid")
-                league_id_link = link.get("leagueid")
-                if team_id_link and league_id_link:
-                    existing_connections.add(f"{team_id_link}_{league_id_link}")
-            except (ValueError, TypeError):
-                continue
+        # Быстрая проверка существования связи по индексу teamid
+        team_links = get_rows(links_path, "teamid", team_id)
         
         # Проверяем, не существует ли уже связь
-        if connection_key in existing_connections:
+        if any(str(link.get("leagueid")) == str(league_id) for link in team_links):
             return {
                 "status": "success", 
                 "message": f"Команда {team_id} уже подключена к лиге {league_id}",
                 "added_count": 0
             }
         
+        # artificialkey резервируется у аллокатора проекта, без прохода по всем связям
+        max_key = allocate_ids(project_name, "leagueteamlinks.artificialkey")
+        
         # Создаем новую запись
-        max_key += 1
         new_link = {
             "teamshortform": "0",
             "hasachievedobjective": "0",
@@ -414,14 +377,10 @@ async def connect_team_to_league_direct(project_name: str, league_id: str, team_
             "teamlongform": "0"
         }
         
-        # Добавляем новую запись
-        links.append(new_link)
-        
-        # Сохраняем файл с минимальным форматированием для скорости
+        # Добавляем новую запись и сохраняем файл с минимальным форматированием для скорости
         # Note: This is synchronous file I/O.
         write_start = time.time()
-        with open(links_file, 'w', encoding='utf-8') as f:
-            json.dump(links, f, ensure_ascii=False, separators=(',', ':'))
+        append_rows(links_path, [new_link], indent=None)
         
         write_time = time.time() - write_start
         total_time = time.time() - start_time
@@ -1,11 +1,13 @@
 from fastapi import APIRouter, Query, HTTPException, Body
 from .utils import load_json_file
+from .utils.tables import get_row, table_exists, table_len
+from .utils.unit_of_work import UnitOfWork
+from .utils.id_allocator import allocate_ids
 from pathlib import Path
 import json
 from typing import List, Dict, Any
 from datetime import datetime
 import asyncio
-import aiofiles
 import time
 
 router = APIRouter()
@@ -28,17 +30,18 @@ def convert_dob_to_fifa_int(dob: datetime) -> str:
     return str((dob - epoch).days + offset)
 
 @router.get("/manager", tags=["manager"])
-async def get_manager(project_id: str = Query(None, description="Project ID to load manager from")):
+async def get_manager(project_id: str = Query(None, description="Project ID to load manager from"),
+                      fields: str = Query(None, description="Comma-separated columns to return (default: all)")):
     """Get manager data from project folder or default file"""
     
     if project_id:
         try:
-            return load_json_file(f'../projects/{project_id}/data/fifa_ng_db/manager.json')
+            return load_json_file(f'../projects/{project_id}/data/fifa_ng_db/manager.json', fields)
         except HTTPException as e:
             if e.status_code != 404:
                 print(f"[ERROR] Error loading project manager: {e.detail}")
     
-    return load_json_file('../fc25/data/fifa_ng_db/manager.json')
+    return load_json_file('../fc25/data/fifa_ng_db/manager.json', fields)
 
 @router.post("/{project_name}/add-managers")
 async def add_managers(
@@ -58,119 +61,105 @@ async def add_managers(
     
     # Путь к файлу manager.json
     manager_file = Path("projects") / project_name / "data" / "fifa_ng_db" / "manager.json"
-    
-    
-    # Создаем папки если они не существуют
-    manager_file.parent.mkdir(parents=True, exist_ok=True)
-    
-    # Если файл не существует, создаем пустой список
-    if not manager_file.exists():
-        async with aiofiles.open(manager_file, 'w', encoding='utf-8') as f:
-            await f.write('[]')
+    manager_path = str(manager_file.resolve())
     
     try:
         start_time = time.time()
         
-        # Асинхронно читаем данные из файла
-        async with aiofiles.open(manager_file, 'r', encoding='utf-8') as f:
-            content = await f.read()
-            managers = json.loads(content)
-        
-        read_time = time.time() - start_time
-        
         # Проверяем, что мы получили валидные данные
         if not data:
             raise HTTPException(status_code=400, detail="Не указаны данные менеджеров для добавления")
         
-        # Добавляем новых менеджеров
-        added_count = 0
-        for manager_data in data:
-            # Проверяем обязательные поля
-            if not manager_data.get("full_name"):
-                continue
+        # ID резервируются диапазоном у аллокатора проекта: без прохода по таблице и без дублей
+        # при параллельных запросах
+        valid_count = sum(1 for manager_data in data if manager_data.get("full_name"))
+        first_manager_id = await asyncio.to_thread(allocate_ids, project_name, "managerid", valid_count)
+        
+        async with UnitOfWork(manager_path) as uow:
+            # Добавляем новых менеджеров
+            new_managers = []
+            added_count = 0
+            for manager_data in data:
+                # Проверяем обязательные поля
+                if not manager_data.get("full_name"):
+                    continue
                 
-            # Получаем следующий доступный ID
-            manager_id = get_next_manager_id(managers)
+                # Следующий ID из зарезервированного диапазона
+                manager_id = first_manager_id + added_count
             
-            # Обрабатываем дату рождения
-            birth_dt = manager_data.get("birth_dt")
-            if hasattr(birth_dt, 'strftime'):  # Если это datetime объект
-                birthdate_fifa = convert_dob_to_fifa_int(birth_dt)
-            else:
-                # Если это строка или другой формат, используем дату по умолчанию
-                default_date = datetime(1970, 1, 1)
-                birthdate_fifa = convert_dob_to_fifa_int(default_date)
+                # Обрабатываем дату рождения
+                birth_dt = manager_data.get("birth_dt")
+                if hasattr(birth_dt, 'strftime'):  # Если это datetime объект
+                    birthdate_fifa = convert_dob_to_fifa_int(birth_dt)
+                else:
+                    # Если это строка или другой формат, используем дату по умолчанию
+                    default_date = datetime(1970, 1, 1)
+                    birthdate_fifa = convert_dob_to_fifa_int(default_date)
             
-            # Создаем запись менеджера с правильной структурой
-            new_manager = {
-                "haircolorcode": "0",
-                "facialhairtypecode": "243",
-                "managerid": str(manager_id),
-                "accessorycode4": "0",
-                "hairtypecode": "160",
-                "lipcolor": "0",
-                "skinsurfacepack": "232001",
-                "accessorycode3": "0",
-                "accessorycolourcode1": "0",
-                "headtypecode": "2521",
-                "firstname": manager_data.get("firstname", "Manager"),
-                "height": "175",
-                "seasonaloutfitid": "5557",
-                "birthdate": birthdate_fifa,
-                "skinmakeup": "0",
-                "weight": "75",
-                "hashighqualityhead": "0",
-                "eyedetail": "2",
-                "gender": "0",
-                "commonname": manager_data.get("full_name", "Manager Unknown"),
-                "headassetid": str(manager_id),
-                "ethnicity": "4",
-                "surname": manager_data.get("surname", "Unknown"),
-                "faceposerpreset": "3",
-                "teamid": manager_data.get("team_id", "1"),
-                "eyebrowcode": "2150301",
-                "eyecolorcode": "5",
-                "personalityid": "1",
-                "accessorycolourcode3": "0",
-                "accessorycode1": "0",
-                "headclasscode": "0",
-                "nationality": manager_data.get("nationality_id", "45"),
-                "sideburnscode": "0",
-                "skintypecode": "0",
-                "accessorycolourcode4": "0",
-                "headvariation": "0",
-                "skintonecode": "3",
-                "outfitid": "5566",
-                "skincomplexion": "4",
-                "accessorycode2": "0",
-                "hairstylecode": "0",
-                "bodytypecode": "81",
-                "managerjointeamdate": birthdate_fifa,
-                "accessorycolourcode2": "0",
-                "facialhaircolorcode": "0"
-            }
+                # Создаем запись менеджера с правильной структурой
+                new_manager = {
+                    "haircolorcode": "0",
+                    "facialhairtypecode": "243",
+                    "managerid": str(manager_id),
+                    "accessorycode4": "0",
+                    "hairtypecode": "160",
+                    "lipcolor": "0",
+                    "skinsurfacepack": "232001",
+                    "accessorycode3": "0",
+                    "accessorycolourcode1": "0",
+                    "headtypecode": "2521",
+                    "firstname": manager_data.get("firstname", "Manager"),
+                    "height": "175",
+                    "seasonaloutfitid": "5557",
+                    "birthdate": birthdate_fifa,
+                    "skinmakeup": "0",
+                    "weight": "75",
+                    "hashighqualityhead": "0",
+                    "eyedetail": "2",
+                    "gender": "0",
+                    "commonname": manager_data.get("full_name", "Manager Unknown"),
+                    "headassetid": str(manager_id),
+                    "ethnicity": "4",
+                    "surname": manager_data.get("surname", "Unknown"),
+                    "faceposerpreset": "3",
+                    "teamid": manager_data.get("team_id", "1"),
+                    "eyebrowcode": "2150301",
+                    "eyecolorcode": "5",
+                    "personalityid": "1",
+                    "accessorycolourcode3": "0",
+                    "accessorycode1": "0",
+                    "headclasscode": "0",
+                    "nationality": manager_data.get("nationality_id", "45"),
+                    "sideburnscode": "0",
+                    "skintypecode": "0",
+                    "accessorycolourcode4": "0",
+                    "headvariation": "0",
+                    "skintonecode": "3",
+                    "outfitid": "5566",
+                    "skincomplexion": "4",
+                    "accessorycode2": "0",
+                    "hairstylecode": "0",
+                    "bodytypecode": "81",
+                    "managerjointeamdate": birthdate_fifa,
+                    "accessorycolourcode2": "0",
+                    "facialhaircolorcode": "0"
+                }
             
-            managers.append(new_manager)
-            added_count += 1
+                # Новые менеджеры дописываются одним вызовом при выходе из блока (JSON с отступами для читаемости)
+                uow.append(manager_path, [new_manager], 2)
+                new_managers.append(new_manager)
+                added_count += 1
         
-        # Если были добавлены менеджеры, сохраняем файл асинхронно
-        if added_count > 0:
-            write_start = time.time()
-            
-            # Сериализуем JSON с отступами для читаемости
-            json_content = json.dumps(managers, ensure_ascii=False, indent=2)
-            
-            async with aiofiles.open(manager_file, 'w', encoding='utf-8') as f:
-                await f.write(json_content)
-            
-            write_time = time.time() - write_start
-            total_time = time.time() - start_time
+        try:
+            total_records = await asyncio.to_thread(table_len, manager_path)
+        except FileNotFoundError:
+            total_records = 0
         
         return {
             "status": "success",
             "message": f"Добавлено {added_count} менеджеров",
             "added_count": added_count,
-            "total_records": len(managers),
+            "total_records": total_records,
             "processing_time": f"{time.time() - start_time:.2f}s"
         }
         
@@ -210,22 +199,19 @@ async def get_manager_by_id(project_name: str, manager_id: str) -> dict:
     # Путь к файлу manager.json
     manager_file = Path("projects") / project_name / "data/fifa_ng_db/manager.json"
     
-    if not manager_file.exists():
+    if not table_exists(str(manager_file.resolve())):
         raise HTTPException(status_code=404, detail="Файл manager.json не найден")
     
     try:
-        with open(manager_file, 'r', encoding='utf-8') as f:
-            managers = json.load(f)
-            
-            # Ищем менеджера по ID
-            manager = next((m for m in managers if m.get("managerid") == manager_id), None)
-            
-            if not manager:
-                raise HTTPException(status_code=404, detail=f"Менеджер с ID {manager_id} не найден")
-            
-            return manager
+        # Ищем менеджера по индексу managerid (строится один раз на версию файла)
+        manager = get_row(str(manager_file.resolve()), manager_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка при чтении файла: {str(e)}")
+    
+    if not manager:
+        raise HTTPException(status_code=404, detail=f"Менеджер с ID {manager_id} не найден")
+    
+    return manager
 
 # Функция для добавления менеджеров без HTTP запроса
 async def add_managers_internal(project_name: str, managers_data: List[Dict[str, Any]]) -> Dict[str, Any]:
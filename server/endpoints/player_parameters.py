@@ -0,0 +1,77 @@
+"""
+Player parameter prediction endpoints and facade over the ML engine
+(PlayerParametersPredictionsModel). The engine imports torch/torchvision and
+scans models/, so it is loaded on first use instead of at server start.
+"""
+
+import os
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException
+
+router = APIRouter()
+
+
+def _engine():
+    from . import PlayerParametersPredictionsModel
+    return PlayerParametersPredictionsModel
+
+
+def get_predictor():
+    """Get or create the global predictor instance (loads the ML engine)."""
+    return _engine().get_predictor()
+
+
+async def predict_player_parameters_from_photo(image_path: str, parameters: Optional[List[str]] = None) -> Dict[str, str]:
+    """Predict player parameters from photo (see PlayerParametersPredictionsModel)."""
+    return await _engine().predict_player_parameters_from_photo(image_path, parameters)
+
+
+async def enhance_player_data_with_predictions(player_data: Dict[str, Any], image_path: str) -> Dict[str, Any]:
+    """Enhance player data dictionary with ML predictions from photo (see PlayerParametersPredictionsModel)."""
+    if not os.path.exists(image_path):
+        return player_data  # No photo: no need to load the engine
+    return await _engine().enhance_player_data_with_predictions(player_data, image_path)
+
+
+# FastAPI endpoints
+@router.get("/player-parameters/available-models", tags=["player-parameters"])
+async def get_available_models():
+    """Get list of available parameter prediction models."""
+    predictor = get_predictor()
+    return {
+        "available_parameters": predictor.get_available_parameters(),
+        "pytorch_available": predictor.pytorch_available,
+        "total_parameters": len(predictor.parameter_ranges)
+    }
+
+@router.get("/player-parameters/parameter-info/{parameter_name}", tags=["player-parameters"])
+async def get_parameter_info(parameter_name: str):
+    """Get detailed information about a specific parameter."""
+    predictor = get_predictor()
+    
+    if parameter_name not in predictor.parameter_ranges:
+        raise HTTPException(status_code=404, detail=f"Parameter '{parameter_name}' not found")
+    
+    param_info = predictor.parameter_ranges[parameter_name]
+    return {
+        "parameter_name": parameter_name,
+        "has_model": parameter_name in predictor.available_models,
+        "info": param_info
+    }
+
+@router.post("/player-parameters/predict", tags=["player-parameters"])
+async def predict_parameters(image_path: str, parameters: Optional[List[str]] = None):
+    """Predict player parameters from image."""
+    if not os.path.exists(image_path):
+        raise HTTPException(status_code=404, detail="Image file not found")
+    
+    try:
+        predictions = await predict_player_parameters_from_photo(image_path, parameters)
+        return {
+            "image_path": image_path,
+            "predictions": predictions,
+            "total_predictions": len(predictions)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
@@ -1,5 +1,8 @@
 from fastapi import APIRouter, Query, HTTPException
 from .utils import load_json_file, save_json_file
+from .utils.tables import get_name_index, get_row
+from .utils.unit_of_work import UnitOfWork
+import asyncio
 import os
 from typing import List, Dict, Any
 
@@ -21,6 +24,11 @@ async def initialize_playernames_file(project_name: str) -> bool:
         # Create directory if it doesn't exist
         os.makedirs(os.path.dirname(playernames_file), exist_ok=True)
         
+        # Fast path: empty name record found through the cached nameid index
+        empty_record = await asyncio.to_thread(get_row, playernames_file, "0")
+        if empty_record is not None and empty_record.get("name") == "":
+            return True
+        
         # Check if file exists and has content
         try:
             existing_data = load_json_file(playernames_file)
@@ -51,18 +59,62 @@ async def initialize_playernames_file(project_name: str) -> bool:
         print(f"    ❌ Error initializing playernames.json: {str(e)}")
         return False
 
+async def resolve_names(project_name: str, names: List[str]) -> List[int]:
+    """
+    Resolve a batch of names to playernames.json name IDs, creating the missing ones.
+    
+    Lookups go through the case-insensitive name index cached with the table
+    (built once per version of the file and patched on append), new IDs continue
+    from its high-water mark, and all new names are appended in one write.
+    
+    Args:
+        project_name: Name of the project
+        names: Names to resolve (empty names map to 0)
+    
+    Returns:
+        List[int]: Name ID for each input name, in order
+    """
+    playernames_file = f'../projects/{project_name}/data/fifa_ng_db/playernames.json'
+    
+    async with UnitOfWork(playernames_file) as uow:
+        await initialize_playernames_file(project_name)
+        name_index = await asyncio.to_thread(get_name_index, playernames_file)
+        
+        new_ids: Dict[str, int] = {}
+        new_entries = []
+        next_id = name_index.max_id
+        name_ids = []
+        for name in names:
+            if not name or name.strip() == "":
+                name_ids.append(0)
+                continue
+            name_id = name_index.get(name, new_ids.get(name.lower()))
+            if name_id is None:
+                next_id += 1
+                name_id = new_ids[name.lower()] = next_id
+                new_entries.append({"nameid": str(name_id), "commentaryid": "900000", "name": name})
+            name_ids.append(name_id)
+        
+        # Appended in one write when the unit of work commits; the index is patched, not rebuilt
+        uow.append(playernames_file, new_entries)
+    
+    for entry in new_entries:
+        print(f"    ✨ Added new name to playernames.json: '{entry['name']}' (ID: {entry['nameid']})")
+    return name_ids
+
 @router.get("/playernames", tags=["playernames"])
-async def get_playernames(project_id: str = Query(None, description="Project ID to load playernames from")):
+async def get_playernames(project_id: str = Query(None, description="Project ID to load playernames from"),
+                          fields: str = Query(None, description="Comma-separated columns to return (default: all)")):
     """Get playernames data from project folder or default file"""
     
     if project_id:
         try:
-            return load_json_file(f'../projects/{project_id}/data/fifa_ng_db/playernames.json')
+            return load_json_file(f'../projects/{project_id}/data/fifa_ng_db/playernames.json', fields)
         except HTTPException as e:
             if e.status_code != 404:
                 print(f"[ERROR] Error loading project playernames: {e.detail}")
     
-    return load_json_file('../fc25/data/fifa_ng_db/playernames.json')
+    return load_json_file('../fc25/data/fifa_ng_db/playernames.json', fields)
 
 @router.post("/playernames/{project_name}/initialize", tags=["playernames"])
 async def initialize_playernames_endpoint(project_name: str):
@@ -1,5 +1,8 @@
 from fastapi import APIRouter, Query, HTTPException
-from .utils import load_json_file, save_json_file
+from .utils import load_json_file, save_json_file, clear_table_cache, select_fields
+from .utils.tables import get_index, get_multi_index, append_rows
+from .utils.id_allocator import allocate_ids
+from .utils.player_query import PlayerFilters, query_players
 from typing import List, Optional, Dict, Any
 import asyncio
 import time
@@ -7,20 +10,23 @@ from .websocket import send_progress_sync
 import random
 from datetime import datetime
 import os
-import requests
-from PIL import Image
 from io import BytesIO
 from pathlib import Path
 from pydantic import BaseModel
 # Import the new save function from teamplayerlinks endpoint
 from .teamplayerlinks import save_teamplayerlinks_with_jersey_numbers as save_tpl_extended
-from .playernames import initialize_playernames_file
-# Import ML prediction functionality
-from .PlayerParametersPredictionsModel import enhance_player_data_with_predictions
+from .playernames import resolve_names
+# Import ML prediction functionality (facade: torch loads on first prediction)
+from .player_parameters import enhance_player_data_with_predictions
 # Import player attributes calculation functionality  
 from .PlayerAttributesCalculationModel import generate_player_attributes, calculate_balance
 # Import player overall rating and potential calculation
 from .PlayerOverallPotentialRating import calculate_player_rating_from_league_id, get_rating_breakdown_details, calculate_overall_rating_and_potential, get_league_info_from_id
+from .utils.lazy_import import lazy_module
+
+# HTTP/image libraries load on first use (see utils/lazy_import.py)
+requests = lazy_module("requests")
+Image = lazy_module("PIL.Image")
 
 router = APIRouter()
 
@@ -28,10 +34,6 @@ router = APIRouter()
 class PlayerIdsRequest(BaseModel):
     player_ids: List[str]
 
-# Cache for loaded data to avoid repeated file reads
-_players_cache = {}
-_teamplayerlinks_cache = {} # This cache remains for the GET /players endpoint's internal use if needed
-
 # Load nationality mapping
 _nationality_map = None
 def get_nationality_map():
@@ -47,6 +49,7 @@ def get_nationality_map():
 async def get_or_create_nameid(project_name: str, name_string: str) -> int:
     """
     Gets existing name ID or creates new one for the given name.
+    Prefer resolve_names() for several names: it writes new names in one batch.
     
     Args:
         project_name: Name of the project
@@ -55,79 +58,8 @@ async def get_or_create_nameid(project_name: str, name_string: str) -> int:
     Returns:
         int: Name ID
     """
-    if not name_string or name_string.strip() == "":
-        return 0  # Default ID for empty names
-    
-    playernames_file = f'../projects/{project_name}/data/fifa_ng_db/playernames.json'
-    
     try:
-        # Initialize playernames file if needed
-        await initialize_playernames_file(project_name)
-        
-        # Load existing playernames
-        playernames = await asyncio.to_thread(load_json_file, playernames_file)
-        
-        # Create name to ID mapping
-        name_to_id_map = {}
-        max_nameid = 999  # Start below 1000
-        
-        for entry in playernames:
-            try:
-                name_str = entry.get("name", "")
-                name_id_val = int(entry.get("nameid", -1))
-                
-                if name_id_val == 0 and name_str == "":
-                    name_to_id_map[""] = 0
-                    continue
-                elif name_str:
-                    name_lower = name_str.lower()
-                    if name_lower not in name_to_id_map:
-                        name_to_id_map[name_lower] = name_id_val
-                    max_nameid = max(max_nameid, name_id_val)
-            except (ValueError, TypeError):
-                continue
-        
-        # Check if name already exists
-        name_lower = name_string.lower()
-        if name_lower in name_to_id_map:
-            return name_to_id_map[name_lower]
-        
-        # Create new name ID
-        new_id = max_nameid + 1
-        new_entry = {
-            "nameid": str(new_id),
-            "commentaryid": "900000",
-            "name": name_string
-        }
-        
-        # Only append and save if name doesn't exist
-        playernames.append(new_entry)
-        
-        # Re-read the current file to make sure we don't overwrite other changes
-        try:
-            current_playernames = await asyncio.to_thread(load_json_file, playernames_file)
-            # Check if our new name was already added by another process
-            name_exists_in_current = any(
-                entry.get("name", "").lower() == name_lower 
-                for entry in current_playernames
-            )
-            
-            if name_exists_in_current:
-                # Name was added by another process, find its ID
-                for entry in current_playernames:
-                    if entry.get("name", "").lower() == name_lower:
-                        return int(entry.get("nameid", 0))
-            else:
-                # Add our new entry to the current list
-                current_playernames.append(new_entry)
-                await asyncio.to_thread(save_json_file, playernames_file, current_playernames)
-                print(f"    ✨ Added new name to playernames.json: '{name_string}' (ID: {new_id})")
-        except Exception as save_error:
-            print(f"    ⚠️ Error saving name '{name_string}': {str(save_error)}")
-            # Return the ID anyway, as we generated it
-        
-        return new_id
-        
+        return (await resolve_names(project_name, [name_string]))[0]
     except Exception as e:
         print(f"    ❌ Error managing name ID for '{name_string}': {str(e)}")
         return 0
@@ -207,31 +139,25 @@ def get_position_map():
     return _position_map
 
 
-def get_cached_players(file_path: str):
-    """Get players from cache or load from file"""
-    if file_path not in _players_cache:
-        players = load_json_file(file_path)
-        print(f"[get_cached_players] Loaded {len(players)} players from {file_path}")
-        # Check if player 300482 is in the loaded data
-        player_300482_found = any(p.get('playerid') == '300482' for p in players)
-        print(f"[get_cached_players] Player 300482 found in loaded data: {player_300482_found}")
-        if player_300482_found:
-            p300482 = next(p for p in players if p.get('playerid') == '300482')
-            print(f"[get_cached_players] Player 300482 details: rating={p300482.get('overallrating')}, position={p300482.get('preferredposition1')}")
-        _players_cache[file_path] = players
-    return _players_cache[file_path]
+def get_cached_players(file_path: str, fields: Optional[str] = None):
+    """Get players through the shared table cache (re-read only when the file changes)"""
+    return load_json_file(file_path, fields)
 
-def get_cached_teamplayerlinks(file_path: str):
-    """Get teamplayerlinks from cache or load from file"""
-    if file_path not in _teamplayerlinks_cache:
-        _teamplayerlinks_cache[file_path] = load_json_file(file_path)
-    return _teamplayerlinks_cache[file_path]
+def get_team_players(players_file: str, teamplayerlinks_file: str, team_id: str) -> List[Dict]:
+    """Players linked to a team, via the teamplayerlinks teamid index and the players playerid index"""
+    team_links = get_multi_index(teamplayerlinks_file, 'teamid').get(team_id)
+    if not team_links:
+        return []
+    players_index = get_index(players_file)
+    team_player_ids = dict.fromkeys(link['playerid'] for link in team_links)
+    return [players_index.get(pid) for pid in team_player_ids if pid in players_index]
 
 @router.get("/players", tags=["players"])
 async def get_players(
     project_id: str = Query(None, description="Project ID to load players from"),
     team_id: str = Query(None, description="Filter players by team ID"),
-    limit: Optional[int] = Query(None, description="Number of players to return (optional)", ge=1, le=500)
+    limit: Optional[int] = Query(None, description="Number of players to return (optional)", ge=1, le=500),
+    fields: str = Query(None, description="Comma-separated columns to return (default: all)")
 ):
     """Get players data with optional filtering and limits"""
     
@@ -251,47 +177,88 @@ async def get_players(
         # If filtering by team_id, use teamplayerlinks to get player IDs first
         if team_id:
             try:
-                teamplayerlinks = get_cached_teamplayerlinks(teamplayerlinks_file)
-                # Get player IDs for this team
-                team_player_ids = [link['playerid'] for link in teamplayerlinks if link['teamid'] == team_id]
-                
-                if not team_player_ids:
-                    return []
+                # Index lookups: cost is proportional to the team size, not to all links
+                team_players = select_fields(get_team_players(players_file, teamplayerlinks_file, team_id), fields)
                 
                 # Apply limit only if specified
-                if limit is not None:
-                    team_player_ids = team_player_ids[:limit]
-                
-                # Load players and filter only needed ones
-                all_players = get_cached_players(players_file)
-                team_players = [player for player in all_players if player['playerid'] in team_player_ids]
-                
-                return team_players
+                return team_players[:limit] if limit is not None else team_players
                 
             except Exception as e:
                 print(f"[WARNING] Could not use teamplayerlinks optimization: {e}")
                 # Fallback to loading all players and filtering
                 all_players = get_cached_players(players_file)
-                filtered_players = [player for player in all_players if player.get('teamid') == team_id]
+                filtered_players = select_fields([player for player in all_players if player.get('teamid') == team_id], fields)
                 return filtered_players[:limit] if limit is not None else filtered_players
         else:
             # No team filter - return all players or limited number
-            all_players = get_cached_players(players_file)
+            all_players = get_cached_players(players_file, fields)
             return all_players[:limit] if limit is not None else all_players
             
     except HTTPException as e:
         if project_id and e.status_code == 404:
             print(f"[WARNING] Project players not found, falling back to default")
             # Retry with default files
-            return await get_players(None, team_id, limit)
+            return await get_players(None, team_id, limit, fields)
         raise e
 
+@router.get("/players/query", tags=["players"])
+async def query_players_page(
+    project_id: str = Query(None, description="Project ID to load players from"),
+    team_id: str = Query(None, description="Filter by team ID"),
+    nationality: str = Query(None, description="Filter by nation ID"),
+    position: str = Query(None, description="Filter by preferredposition1 code"),
+    min_overall: Optional[int] = Query(None, ge=0, le=99),
+    max_overall: Optional[int] = Query(None, ge=0, le=99),
+    min_potential: Optional[int] = Query(None, ge=0, le=99),
+    max_potential: Optional[int] = Query(None, ge=0, le=99),
+    min_age: Optional[int] = Query(None, ge=0, le=100),
+    max_age: Optional[int] = Query(None, ge=0, le=100),
+    sort: str = Query("overallrating", description="Sort key: overallrating, potentialrating, age or playerid"),
+    order: str = Query("desc", description="Sort order: asc or desc"),
+    limit: int = Query(50, ge=1, le=500, description="Page size"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    fields: str = Query(None, description="Comma-separated columns to return (default: all)")
+):
+    """
+    One page of players matching the filters, with the total match count.
+    Pages are keyset-paginated: pass the returned next_cursor to get the next
+    page (null on the last one). Served from the cached table indexes.
+    """
+    if project_id:
+        players_file = f'../projects/{project_id}/data/fifa_ng_db/players.json'
+        teamplayerlinks_file = f'../projects/{project_id}/data/fifa_ng_db/teamplayerlinks.json'
+    else:
+        players_file = '../fc25/data/fifa_ng_db/players.json'
+        teamplayerlinks_file = '../fc25/data/fifa_ng_db/teamplayerlinks.json'
+    
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
+    
+    filters = PlayerFilters(
+        team_id=team_id, nationality=nationality, position=position,
+        min_overall=min_overall, max_overall=max_overall,
+        min_potential=min_potential, max_potential=max_potential,
+        min_age=min_age, max_age=max_age
+    )
+    try:
+        page = await asyncio.to_thread(
+            query_players, players_file, teamplayerlinks_file, filters, sort, order, limit, cursor)
+        page["items"] = select_fields(page["items"], fields)
+        return page
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError:
+        if project_id:
+            print(f"[WARNING] Project players not found, falling back to default")
+            return await query_players_page(None, team_id, nationality, position, min_overall, max_overall,
+                                            min_potential, max_potential, min_age, max_age, sort, order, limit, cursor,
+                                            fields)
+        raise HTTPException(status_code=404, detail=f"File {players_file} not found")
+
 @router.delete("/players/cache", tags=["players"])
 async def clear_players_cache():
     """Clear players cache (useful for development)"""
-    global _players_cache, _teamplayerlinks_cache
-    _players_cache.clear()
-    _teamplayerlinks_cache.clear()
+    clear_table_cache()
     return {"message": "Players cache cleared successfully"}
 
 @router.post("/players/by-ids", tags=["players"])
@@ -314,38 +281,18 @@ async def get_players_by_ids(
         players_file = '../fc25/data/fifa_ng_db/players.json'
     
     try:
-        # Load all players
-        all_players = get_cached_players(players_file)
-        print(f"[get_players_by_ids] Total players loaded: {len(all_players)}")
-        
-        # Filter players by IDs
-        players_dict = {p['playerid']: p for p in all_players}
-        print(f"[get_players_by_ids] Players dict created with {len(players_dict)} entries")
+        # Look players up through the playerid index (built once per file version)
+        try:
+            players_index = await asyncio.to_thread(get_index, players_file)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail=f"File {players_file} not found")
+        print(f"[get_players_by_ids] Players index has {len(players_index)} entries")
         
-        # Special check for player 300482
-        if "300482" in player_ids:
-            print(f"[get_players_by_ids] Player 300482 requested")
-            print(f"[get_players_by_ids] Player 300482 in players_dict: {'300482' in players_dict}")
-            
-        found_players = []
-        
-        for player_id in player_ids:
-            if player_id in players_dict:
-                found_players.append(players_dict[player_id])
-            else:
-                # Special debug for player 300482
-                if player_id == "300482":
-                    print(f"[get_players_by_ids] DEBUG: Player 300482 not found in players_dict")
-                    print(f"[get_players_by_ids] DEBUG: Checking if '300482' exists in dict keys...")
-                    print(f"[get_players_by_ids] DEBUG: First 10 player IDs in dict: {list(players_dict.keys())[:10]}")
-                    # Check if the ID exists with different formatting
-                    for pid in players_dict.keys():
-                        if "300482" in str(pid):
-                            print(f"[get_players_by_ids] DEBUG: Found similar ID: {pid}")
+        found_players = [players_index.get(pid) for pid in player_ids if pid in players_index]
         
         print(f"[get_players_by_ids] Found {len(found_players)} out of {len(player_ids)} requested players")
         if len(found_players) < len(player_ids):
-            missing_ids = [pid for pid in player_ids if pid not in players_dict]
+            missing_ids = [pid for pid in player_ids if pid not in players_index]
             print(f"[get_players_by_ids] Missing player IDs: {missing_ids}")
         
         return found_players
@@ -363,7 +310,8 @@ async def get_players_by_ids(
 async def get_players_lazy(
     project_id: str = Query(None, description="Project ID to load players from"),
     batch_size: int = Query(1000, description="Batch size for lazy loading", ge=100, le=2000),
-    team_id: str = Query(None, description="Filter players by team ID")
+    team_id: str = Query(None, description="Filter players by team ID"),
+    fields: str = Query(None, description="Comma-separated columns to return (default: all)")
 ):
     """Get all players data with lazy loading and WebSocket progress updates"""
     
@@ -394,16 +342,15 @@ async def get_players_lazy(
         })
         
         # Load all players first
-        all_players = get_cached_players(players_file)
+        all_players = get_cached_players(players_file, fields)
         total_players = len(all_players)
         
         # If filtering by team_id, get player IDs first
         if team_id:
             try:
-                teamplayerlinks = get_cached_teamplayerlinks(teamplayerlinks_file)
-                team_player_ids = set(link['playerid'] for link in teamplayerlinks if link['teamid'] == team_id)
+                team_players = get_team_players(players_file, teamplayerlinks_file, team_id)
                 
-                if not team_player_ids:
+                if not team_players:
                     send_progress_sync({
                         "type": "progress",
                         "current": 0,
@@ -415,9 +362,7 @@ async def get_players_lazy(
                     })
                     return []
                 
-                # Filter players for this team
-                filtered_players = [player for player in all_players if player['playerid'] in team_player_ids]
-                all_players = filtered_players
+                all_players = select_fields(team_players, fields)
                 total_players = len(all_players)
                 
             except Exception as e:
@@ -475,8 +420,6 @@ async def get_players_lazy(
                 "function_name": function_name
             })
             
-            # Small delay to prevent overwhelming the WebSocket
-            await asyncio.sleep(0.05)  # 50ms delay between batches
         
         # Send completion message
         total_elapsed = time.time() - start_time
@@ -497,7 +440,7 @@ async def get_players_lazy(
         if project_id and e.status_code == 404:
             print(f"[WARNING] Project players not found, falling back to default")
             # Retry with default files
-            return await get_players_lazy(None, batch_size, team_id)
+            return await get_players_lazy(None, batch_size, team_id, fields)
         
         # Send error through WebSocket
         send_progress_sync({
@@ -517,23 +460,6 @@ async def get_players_lazy(
         })
         raise HTTPException(status_code=500, detail=str(e))
 
-def get_next_player_id(players_list: List[Dict]) -> str:
-    """Generate next player ID based on existing players"""
-    if not players_list:
-        return "300000"  # Start from 300000 for custom players
-    
-    # Find the highest player ID
-    max_id = 0
-    for player in players_list:
-        try:
-            player_id = int(player.get('playerid', 0))
-            if player_id >= 300000:  # Only consider custom player IDs
-                max_id = max(max_id, player_id)
-        except:
-            continue
-    
-    return str(max_id + 1) if max_id >= 300000 else "300000"
-
 def map_transfermarkt_position_to_fifa(tm_position: str) -> Dict[str, str]:
     """Map Transfermarkt position to FIFA position codes"""
     position_mapping = get_position_map()
@@ -555,25 +481,23 @@ def map_transfermarkt_position_to_fifa(tm_position: str) -> Dict[str, str]:
     # Default to CM (14) if position not found
     return {"preferredposition1": "14", "preferredposition2": "-1", "preferredposition3": "-1", "preferredposition4": "-1"}
 
-async def save_players_to_project(project_name: str, players_data: List[Dict[str, Any]], team_id: str, team_name: str = "", league_id: str = None) -> Dict[str, Any]:
-    """Save player data to project's players.json file with progress tracking"""
+async def save_players_to_project(project_name: str, players_data: List[Dict[str, Any]], team_id: str, team_name: str = "", league_id: str = None, first_player_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Save player data to project's players.json file with progress tracking.
+    first_player_id: start of player IDs the caller already reserved for the squad;
+    players of that range already in players.json (an earlier save stopped before
+    writing the team-player links) are kept instead of being added again.
+    """
     if not project_name:
         return {"status": "error", "message": "Project name is required"}
     
     players_file_path = f'../projects/{project_name}/data/fifa_ng_db/players.json'
     
     try:
-        # Load existing players or create empty list
-        try:
-            existing_players = load_json_file(players_file_path)
-        except:
-            existing_players = []
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(players_file_path), exist_ok=True)
-        
-        # Clear cache for this file
-        if players_file_path in _players_cache:
-            del _players_cache[players_file_path]
+        # The squad's player IDs are reserved up front: concurrent saves get disjoint ranges
+        first_new_player_id = first_player_id
+        if first_new_player_id is None:
+            first_new_player_id = await asyncio.to_thread(allocate_ids, project_name, "playerid", len(players_data))
         
         added_players_details = [] # To store details needed for teamplayerlinks
         players_processing_progress = {}
@@ -588,7 +512,18 @@ async def save_players_to_project(project_name: str, players_data: List[Dict[str
             "players_processing_progress": players_processing_progress
         })
         
-        all_created_player_objects = [] # To update existing_players list before saving
+        all_created_player_objects = [] # Appended to players.json in one write at the end
+
+        # Name IDs of the whole squad are resolved in one batch (new names: one write to playernames.json)
+        squad_names = []
+        for i, tm_player in enumerate(players_data):
+            name_parts = tm_player.get('player_name', f'Player {i+1}').split(' ', 1)
+            squad_names.extend([name_parts[0], name_parts[1] if len(name_parts) > 1 else ""])
+        try:
+            name_ids = dict(zip(squad_names, await resolve_names(project_name, squad_names)))
+        except Exception as e:
+            print(f"    ❌ Error resolving player names for {team_name}: {str(e)}")
+            name_ids = {}
 
         for i, tm_player in enumerate(players_data):
             player_name = tm_player.get('player_name', f'Player {i+1}')
@@ -615,9 +550,7 @@ async def save_players_to_project(project_name: str, players_data: List[Dict[str
                 "total_players": len(players_data)
             })
             
-            await asyncio.sleep(0.1)
-            
-            new_player_id = get_next_player_id(existing_players + all_created_player_objects)
+            new_player_id = str(first_new_player_id + len(all_created_player_objects))
             
             players_processing_progress[player_key]["progress"] = 20
             players_processing_progress[player_key]["message"] = "Mapping position..."
@@ -641,9 +574,9 @@ async def save_players_to_project(project_name: str, players_data: List[Dict[str
             players_processing_progress[player_key]["progress"] = 60
             players_processing_progress[player_key]["message"] = "Processing player names..."
             
-            # Generate name IDs
-            firstname_id = await get_or_create_nameid(project_name, first_name)
-            lastname_id = await get_or_create_nameid(project_name, last_name)
+            # Name IDs (resolved for the whole squad above)
+            firstname_id = name_ids.get(first_name, 0)
+            lastname_id = name_ids.get(last_name, 0)
             # For commonname, use lastname_id (don't create separate record for full name)
             commonname_id = lastname_id if lastname_id != 0 else firstname_id
             # Jersey name typically uses last name
@@ -966,12 +899,13 @@ async def save_players_to_project(project_name: str, players_data: List[Dict[str
                 "player_status": "saved",
                 "players_processing_progress": players_processing_progress
             })
-            
-            await asyncio.sleep(0.05)
         
-        # Add all newly created players to the existing (or new) list
-        existing_players.extend(all_created_player_objects)
-        await asyncio.to_thread(save_json_file, players_file_path, existing_players)
+        # Append the newly created players (keeps the playerid index in sync)
+        new_player_objects = all_created_player_objects
+        if first_player_id is not None:
+            saved_players = await asyncio.to_thread(get_index, players_file_path)
+            new_player_objects = [p for p in all_created_player_objects if p["playerid"] not in saved_players]
+        await asyncio.to_thread(append_rows, players_file_path, new_player_objects)
         
         # Note: Player names are now automatically saved during name ID generation
         print(f"        📋 Player names processed and saved automatically during ID generation")
@@ -979,6 +913,8 @@ async def save_players_to_project(project_name: str, players_data: List[Dict[str
         if added_players_details:
             links_result = await save_tpl_extended(project_name, team_id, added_players_details)
             print(f"        📋 Team-player links save result (extended): {links_result}")
+            if links_result.get("status") != "success":
+                return {"status": "error", "message": links_result.get("message", "Error saving team-player links"), "added_count": 0}
         
         send_progress_sync({
             "type": "progress",
@@ -1,7 +1,7 @@
-from fastapi import APIRouter, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Query, status, BackgroundTasks
 from fastapi.responses import FileResponse
 from pydantic import BaseModel, Field, validator
-from typing import List, Optional
+from typing import List, Optional, Literal
 from datetime import datetime
 import os
 import shutil
@@ -10,6 +10,11 @@ import re
 import tempfile
 import zipfile
 from pathlib import Path
+from .utils import clear_table_cache, parse_fields
+from .utils.tables import read_table, table_exists, compact_journals, project_table
+from .utils import sqlite_store, json_codec, cow, overlay, id_allocator, team_checkpoints
+from .utils.journal import JOURNAL_SUFFIX
+from .utils.overlay import OVERLAY_SUFFIX
 
 router = APIRouter()
 
@@ -26,6 +31,7 @@ PROJECTS_DIR.mkdir(exist_ok=True)
 class CreateProjectRequest(BaseModel):
     name: str = Field(..., min_length=1, max_length=100)
     description: Optional[str] = Field(None, max_length=500)
+    storage: Optional[Literal["json", "sqlite", "overlay"]] = None  # Storage engine for fifa_ng_db tables (default: json)
     
     @validator('name')
     def validate_name(cls, v):
@@ -43,6 +49,10 @@ class ProjectResponse(BaseModel):
     path: str
     created_at: str
     updated_at: str
+    storage: str = "json"
+
+class StorageEngineRequest(BaseModel):
+    engine: Literal["json", "sqlite", "overlay"]
 
 class ProjectListResponse(BaseModel):
     projects: List[ProjectResponse]
@@ -53,16 +63,14 @@ def load_projects_metadata():
     """Load projects metadata from JSON file"""
     if PROJECTS_METADATA_FILE.exists():
         try:
-            with open(PROJECTS_METADATA_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return json_codec.load_file(str(PROJECTS_METADATA_FILE))
         except Exception:
             return {}
     return {}
 
 def save_projects_metadata(metadata):
     """Save projects metadata to JSON file"""
-    with open(PROJECTS_METADATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(metadata, f, indent=2, ensure_ascii=False)
+    json_codec.dump_file(str(PROJECTS_METADATA_FILE), metadata, indent=2)
 
 def format_value_for_export(value) -> str:
     """Format a value for export, replacing decimal points with commas"""
@@ -104,8 +112,7 @@ def get_expected_headers(filename: str) -> list:
 def convert_json_to_txt(json_file_path: str, txt_file_path: str) -> bool:
     """Convert JSON file to TXT format for FC25 compdata"""
     try:
-        with open(json_file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = json_codec.load_file(json_file_path)
         
         with open(txt_file_path, 'w', encoding='utf-8') as f:
             if isinstance(data, list):
@@ -167,7 +174,7 @@ def generate_project_id(name: str) -> str:
     return f"{base_id}-{counter}"
 
 def create_project_directory(project_id: str) -> Path:
-    """Create project directory and copy FC25 data"""
+    """Create project directory and clone FC25 data (files are shared copy-on-write, see utils/cow.py)"""
     project_path = PROJECTS_DIR / project_id
     
     # Check if directory already exists
@@ -181,9 +188,10 @@ def create_project_directory(project_id: str) -> Path:
         # Create project directory
         project_path.mkdir(parents=True, exist_ok=True)
         
-        # Copy FC25 data directory
+        # Clone FC25 data directory (reflinks/hardlinks where supported, copies otherwise)
         if FC25_DATA_DIR.exists():
-            shutil.copytree(FC25_DATA_DIR, project_path / "data")
+            clone_stats = cow.clone_tree(str(FC25_DATA_DIR), str(project_path / "data"))
+            print(f"Cloned FC25 data into project '{project_id}': {clone_stats}")
         else:
             # If FC25 data doesn't exist, create empty data structure
             (project_path / "data").mkdir(exist_ok=True)
@@ -201,10 +209,39 @@ def create_project_directory(project_id: str) -> Path:
             detail=f"Failed to create project: {str(e)}"
         )
 
+def set_storage_engine(project_path: Path, engine: str) -> List[str]:
+    """
+    Convert a project's fifa_ng_db tables to the given storage engine
+    ("json": one JSON file per table, "sqlite": one project.sqlite file,
+    "overlay": row-level deltas over the FC25 tables).
+    Returns the converted table names.
+    """
+    try:
+        # Pending table journals are folded in first; the converters read the JSON files directly
+        compact_journals(str(project_path / "data"))
+        # JSON files are the common format: leave the current engine, then enter the new one
+        converted = []
+        if engine != "sqlite":
+            converted += sqlite_store.convert_project_to_json(str(project_path))
+        if engine != "overlay":
+            converted += overlay.convert_project_to_json(str(project_path))
+        if engine == "sqlite":
+            converted = sqlite_store.convert_project_to_sqlite(str(project_path))
+        elif engine == "overlay":
+            converted = overlay.convert_project_to_overlay(str(project_path))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to convert project storage to {engine}: {str(e)}"
+        )
+    finally:
+        clear_table_cache()
+    return converted
+
 # API Endpoints
 @router.post("/", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED, tags=["projects"])
 async def create_project(project_data: CreateProjectRequest):
-    """Create a new project by copying the FC25 data directory"""
+    """Create a new project from the FC25 data directory"""
     
     # Generate project ID
     project_id = generate_project_id(project_data.name)
@@ -212,6 +249,10 @@ async def create_project(project_data: CreateProjectRequest):
     # Create project directory
     project_path = create_project_directory(project_id)
     
+    storage = project_data.storage or "json"
+    if storage != "json":
+        set_storage_engine(project_path, storage)
+    
     # Create project metadata
     now = datetime.utcnow().isoformat()
     project_info = {
@@ -220,7 +261,8 @@ async def create_project(project_data: CreateProjectRequest):
         "description": project_data.description,
         "path": str(project_path.relative_to(BASE_DIR)),
         "created_at": now,
-        "updated_at": now
+        "updated_at": now,
+        "storage": storage
     }
     
     # Save to metadata file
@@ -272,7 +314,10 @@ async def delete_project(project_id: str):
     project_path = PROJECTS_DIR / project_id
     if project_path.exists():
         try:
+            sqlite_store.close_store(str(project_path))
             shutil.rmtree(project_path)
+            id_allocator.forget_project(project_id)
+            team_checkpoints.forget_project(project_id)
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -307,6 +352,27 @@ async def update_project(project_id: str, project_data: CreateProjectRequest):
     
     return ProjectResponse(**project_info)
 
+@router.put("/{project_id}/storage", response_model=ProjectResponse, tags=["projects"])
+async def update_project_storage(project_id: str, request: StorageEngineRequest):
+    """Switch the storage engine of a project's tables (json / sqlite / overlay)"""
+    metadata = load_projects_metadata()
+    
+    if project_id not in metadata:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Project '{project_id}' not found"
+        )
+    
+    converted = set_storage_engine(PROJECTS_DIR / project_id, request.engine)
+    print(f"Converted {len(converted)} tables of project '{project_id}' to {request.engine}")
+    
+    project_info = metadata[project_id]
+    project_info["storage"] = request.engine
+    project_info["updated_at"] = datetime.utcnow().isoformat()
+    save_projects_metadata(metadata)
+    
+    return ProjectResponse(**project_info)
+
 @router.get("/{project_name}/export-data", tags=["projects"])
 async def export_project_data(project_name: str, background_tasks: BackgroundTasks):
     """
@@ -328,9 +394,12 @@ async def export_project_data(project_name: str, background_tasks: BackgroundTas
         temp_zip_path = temp_dir_path / f"{project_name}_data_export.zip"
 
         conversion_count = 0
+        compact_journals(str(source_data_dir))
         # Walk through the source data directory
         for root, _, files in os.walk(source_data_dir):
             for filename in files:
+                if filename.endswith((JOURNAL_SUFFIX, OVERLAY_SUFFIX)):
+                    continue
                 source_path = Path(root) / filename
                 # Calculate relative path to maintain structure inside temp dir and zip
                 relative_path = source_path.relative_to(source_data_dir)
@@ -352,6 +421,29 @@ async def export_project_data(project_name: str, background_tasks: BackgroundTas
                     except Exception as e:
                         print(f"Error copying file {source_path}: {e}")
 
+        # Overlay tables: materialize FC25 base + delta as JSON, then convert them like files
+        temp_json_dir = temp_dir_path / "materialized_json"
+        for table_path in overlay.overlay_tables(str(source_data_dir / "fifa_ng_db")):
+            table_name = os.path.basename(table_path)
+            json_path = temp_json_dir / table_name
+            json_path.parent.mkdir(parents=True, exist_ok=True)
+            overlay.materialize(table_path, str(json_path))
+            target_txt_path = (temp_txt_dir / "fifa_ng_db" / table_name).with_suffix('.txt')
+            target_txt_path.parent.mkdir(parents=True, exist_ok=True)
+            if convert_json_to_txt(str(json_path), str(target_txt_path)):
+                conversion_count += 1
+
+        # SQLite-backed projects: materialize the stored tables as JSON, then convert them like files
+        store = sqlite_store.open_store(str(project_dir))
+        if store is not None:
+            for table_name in store.table_names():
+                json_path = temp_json_dir / table_name
+                store.export_table(table_name, str(json_path))
+                target_txt_path = (temp_txt_dir / "fifa_ng_db" / table_name).with_suffix('.txt')
+                target_txt_path.parent.mkdir(parents=True, exist_ok=True)
+                if convert_json_to_txt(str(json_path), str(target_txt_path)):
+                    conversion_count += 1
+
         print(f"Converted {conversion_count} JSON files and copied other files for project '{project_name}'")
         if not any(temp_txt_dir.iterdir()): # Check if the temp directory is actually empty
             raise HTTPException(status_code=404, detail=f"No convertible JSON files found in data directory for project '{project_name}'")
@@ -382,17 +474,17 @@ async def export_project_data(project_name: str, background_tasks: BackgroundTas
         raise HTTPException(status_code=500, detail=f"Error exporting project data: {str(e)}")
 
 @router.get("/{project_id}/formations")
-async def get_project_formations(project_id: str):
+async def get_project_formations(project_id: str, fields: str = Query(None, description="Comma-separated columns to return (default: all)")):
     """Get formations data for a specific project"""
     try:
         project_dir = PROJECTS_DIR / project_id / "data" / "fifa_ng_db"
         formations_file = project_dir / "formations.json"
         
-        if not formations_file.exists():
+        if not table_exists(str(formations_file)):
             raise HTTPException(status_code=404, detail=f"Formations file not found for project {project_id}")
             
-        with open(formations_file, 'r', encoding='utf-8') as f:
-            formations_data = json.load(f)
+        columns = parse_fields(fields)
+        formations_data = project_table(str(formations_file), columns) if columns else read_table(str(formations_file))
             
         return formations_data
         
@@ -404,17 +496,17 @@ async def get_project_formations(project_id: str):
         raise HTTPException(status_code=500, detail=f"Error retrieving formations data: {str(e)}")
 
 @router.get("/{project_id}/teamsheets")
-async def get_project_teamsheets(project_id: str):
+async def get_project_teamsheets(project_id: str, fields: str = Query(None, description="Comma-separated columns to return (default: all)")):
     """Get teamsheets data for a specific project"""
     try:
         project_dir = PROJECTS_DIR / project_id / "data" / "fifa_ng_db"
         teamsheets_file = project_dir / "default_teamsheets.json"
         
-        if not teamsheets_file.exists():
+        if not table_exists(str(teamsheets_file)):
             raise HTTPException(status_code=404, detail=f"Teamsheets file not found for project {project_id}")
             
-        with open(teamsheets_file, 'r', encoding='utf-8') as f:
-            teamsheets_data = json.load(f)
+        columns = parse_fields(fields)
+        teamsheets_data = project_table(str(teamsheets_file), columns) if columns else read_table(str(teamsheets_file))
             
         return teamsheets_data
         
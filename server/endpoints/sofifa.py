@@ -1,33 +1,33 @@
-from fastapi import APIRouter, BackgroundTasks
+from fastapi import APIRouter, status
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel # Added for PlayerPosition
 from typing import List # Added for List[PlayerPosition]
-import threading
 import os
-import json
-import cloudscraper # type: ignore
-from bs4 import BeautifulSoup, Tag # Added Tag for type hint
 import time
 import logging
 import random
 import re
 from datetime import datetime, timedelta
 from .websocket import send_progress_sync
+from .jobs import accepted_response, cancel_jobs, cancel_requested, kind_status, result_summary, submit_job
+from .utils import json_codec
+from .utils.lazy_import import lazy_module
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import queue
 from threading import Lock
 
+# Scraping libraries load on first use (see utils/lazy_import.py)
+cloudscraper = lazy_module("cloudscraper")
+bs4 = lazy_module("bs4")
+
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Глобальные флаги для отмены процессов
-_cancel_flags = {
-    "process_teams_and_save_links_simple": False,
-    "process_players_and_save_links": False
-}
-
-# Блокировка для безопасного доступа к флагам
-_cancel_lock = threading.Lock()
+# Процессы, запускаемые как фоновые задачи (jobs); имя процесса = kind задачи
+CANCELLABLE_PROCESSES = (
+    "process_teams_and_save_links_simple",
+    "process_players_and_save_links"
+)
 
 # Пул scrapers для повторного использования
 _scraper_pool = queue.Queue()
@@ -53,21 +53,9 @@ def return_scraper(scraper):
     if _scraper_pool.qsize() < _max_scrapers:
         _scraper_pool.put(scraper)
 
-def set_cancel_flag(function_name: str, value: bool = True):
-    """Установить флаг отмены для функции"""
-    with _cancel_lock:
-        if function_name in _cancel_flags:
-            _cancel_flags[function_name] = value
-            logger.info(f"Cancel flag for {function_name} set to {value}")
-
 def get_cancel_flag(function_name: str) -> bool:
-    """Проверить флаг отмены для функции"""
-    with _cancel_lock:
-        return _cancel_flags.get(function_name, False)
-
-def reset_cancel_flag(function_name: str):
-    """Сбросить флаг отмены для функции"""
-    set_cancel_flag(function_name, False)
+    """Проверить, запрошена ли отмена задачи (job), в которой выполняется функция"""
+    return cancel_requested(function_name)
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 # Исправляем пути к файлам
@@ -157,7 +145,7 @@ def get_transfermarkt_teamlink(teamid: int, scraper=None) -> str:
             try:
                 resp = scraper.get(url, timeout=10)  # Добавлен timeout
                 if resp.status_code == 200:
-                    soup = BeautifulSoup(resp.text, "html.parser")
+                    soup = bs4.BeautifulSoup(resp.text, "html.parser")
                     a_tag = soup.find("a", string="Transfermarkt")
                     if not a_tag:
                         return ""
@@ -216,7 +204,7 @@ def get_transfermarkt_playerlink(playerid: int, scraper=None) -> str:
                 try:
                     resp = scraper.get(url_format, timeout=15)  # Increased timeout
                     if resp.status_code == 200:
-                        soup = BeautifulSoup(resp.text, "html.parser")
+                        soup = bs4.BeautifulSoup(resp.text, "html.parser")
                         
                         # Strategy 1: Direct link with "Transfermarkt" text
                         transfermarkt_urls = []
@@ -350,7 +338,6 @@ def get_transfermarkt_playerlink(playerid: int, scraper=None) -> str:
 
 def process_teams_and_save_links_simple():
     function_name = "process_teams_and_save_links_simple"
-    reset_cancel_flag(function_name)  # Сбрасываем флаг отмены в начале
     
     try:
         # Проверяем флаг отмены
@@ -387,7 +374,7 @@ def process_teams_and_save_links_simple():
         if os.path.exists(RESULT_FILE):
             with open(RESULT_FILE, "r", encoding="utf-8") as f:
                 try:
-                    all_results = json.load(f)
+                    all_results = json_codec.load(f)
                     for entry in all_results:
                         if isinstance(entry, dict) and "teamid" in entry:
                             processed_team_ids.add(str(entry["teamid"]))
@@ -404,7 +391,7 @@ def process_teams_and_save_links_simple():
         # Чтение исходных команд
         logger.info(f"Reading teams from: {TEAMS_FILE}")
         with open(TEAMS_FILE, "r", encoding="utf-8") as f:
-            teams_data_from_source = json.load(f)
+            teams_data_from_source = json_codec.load(f)
         
         logger.info(f"Total teams in source file: {len(teams_data_from_source)}")
         
@@ -540,7 +527,7 @@ def process_teams_and_save_links_simple():
                     if completed_count % 10 == 0 or completed_count == len(teams_to_process):
                         try:
                             with open(RESULT_FILE, "w", encoding="utf-8") as f:
-                                json.dump(all_results, f, indent=2, ensure_ascii=False)
+                                json_codec.dump(all_results, f, indent=2)
                         except Exception as e:
                             logger.error(f"Error saving results: {e}")
                     
@@ -640,7 +627,6 @@ def process_teams_and_save_links_simple():
 def process_players_and_save_links():
     """Обрабатывает игроков и сохраняет ссылки Transfermarkt"""
     function_name = "process_players_and_save_links"
-    reset_cancel_flag(function_name)  # Сбрасываем флаг отмены в начале
     
     try:
         # Проверяем флаг отмены
@@ -677,7 +663,7 @@ def process_players_and_save_links():
         if os.path.exists(PLAYERS_RESULT_FILE):
             with open(PLAYERS_RESULT_FILE, "r", encoding="utf-8") as f:
                 try:
-                    all_results = json.load(f)
+                    all_results = json_codec.load(f)
                     if not isinstance(all_results, list):
                         logger.warning(f"Content of {PLAYERS_RESULT_FILE} is not a list. Starting fresh.")
                         all_results = []
@@ -697,7 +683,7 @@ def process_players_and_save_links():
         # Чтение исходных игроков
         logger.info(f"Reading players from: {PLAYERS_FILE}")
         with open(PLAYERS_FILE, "r", encoding="utf-8") as f:
-            players_data_from_source = json.load(f)
+            players_data_from_source = json_codec.load(f)
         
         logger.info(f"Total players in source file: {len(players_data_from_source)}")
         
@@ -838,7 +824,7 @@ def process_players_and_save_links():
                     if completed_count % 10 == 0 or completed_count == len(players_to_process):
                         try:
                             with open(PLAYERS_RESULT_FILE, "w", encoding="utf-8") as f:
-                                json.dump(all_results, f, indent=2, ensure_ascii=False)
+                                json_codec.dump(all_results, f, indent=2)
                         except Exception as e:
                             logger.error(f"Error saving players results: {e}")
                     
@@ -935,30 +921,30 @@ def process_players_and_save_links():
 # Фоновая задача для команд
 def background_scrape_links():
     logger.info("Starting background scrape task")
-    process_teams_and_save_links_simple()
+    return result_summary(process_teams_and_save_links_simple(), RESULT_FILE)
 
 # Фоновая задача для игроков
 def background_scrape_player_links():
     logger.info("Starting background player scrape task")
-    process_players_and_save_links()
+    return result_summary(process_players_and_save_links(), PLAYERS_RESULT_FILE)
 
-@router.post("/teams/sofifa/scrape_transfermarkt", tags=["teams"])
-def scrape_transfermarkt_teamlinks(background_tasks: BackgroundTasks):
+@router.post("/teams/sofifa/scrape_transfermarkt", status_code=status.HTTP_202_ACCEPTED, tags=["teams"])
+async def scrape_transfermarkt_teamlinks():
     """
-    Запускает процесс сбора ссылок Transfermarkt для команд в фоне.
+    Запускает процесс сбора ссылок Transfermarkt для команд в фоне (job, см. GET /jobs/{job_id}).
     """
-    background_tasks.add_task(background_scrape_links)
-    logger.info("Scrape task added to background tasks")
-    return {"status": "processing", "message": "Загрузка начата в фоне. Проверьте файл teamlinks_from_tm.json позже."}
+    job = submit_job("process_teams_and_save_links_simple", background_scrape_links, unique=True)
+    logger.info(f"Team links scrape job {job.id} queued")
+    return accepted_response(job, "Загрузка начата в фоне. Проверьте файл teamlinks_from_tm.json позже.")
 
-@router.post("/players/sofifa/scrape_transfermarkt", tags=["players"])
-def scrape_transfermarkt_playerlinks(background_tasks: BackgroundTasks):
+@router.post("/players/sofifa/scrape_transfermarkt", status_code=status.HTTP_202_ACCEPTED, tags=["players"])
+async def scrape_transfermarkt_playerlinks():
     """
-    Запускает процесс сбора ссылок Transfermarkt для игроков в фоне.
+    Запускает процесс сбора ссылок Transfermarkt для игроков в фоне (job, см. GET /jobs/{job_id}).
     """
-    background_tasks.add_task(background_scrape_player_links)
-    logger.info("Player scrape task added to background tasks")
-    return {"status": "processing", "message": "Загрузка ссылок игроков начата в фоне. Проверьте файл playerlinks_from_tm.json позже."}
+    job = submit_job("process_players_and_save_links", background_scrape_player_links, unique=True)
+    logger.info(f"Player links scrape job {job.id} queued")
+    return accepted_response(job, "Загрузка ссылок игроков начата в фоне. Проверьте файл playerlinks_from_tm.json позже.")
 
 @router.get("/teams/sofifa/transfermarkt_links", tags=["teams"])
 def get_transfermarkt_links():
@@ -967,7 +953,7 @@ def get_transfermarkt_links():
     """
     if os.path.exists(RESULT_FILE):
         with open(RESULT_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
+            data = json_codec.load(f)
         return data
     else:
         return []
@@ -979,7 +965,7 @@ def get_transfermarkt_player_links():
     """
     if os.path.exists(PLAYERS_RESULT_FILE):
         with open(PLAYERS_RESULT_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
+            data = json_codec.load(f)
         return data
     else:
         return []
@@ -989,13 +975,13 @@ def cancel_process(function_name: str):
     """
     Отменить выполняющийся процесс по имени функции.
     """
-    if function_name not in _cancel_flags:
+    if function_name not in CANCELLABLE_PROCESSES:
         return JSONResponse(
             status_code=400,
             content={"status": "error", "message": f"Unknown process: {function_name}"}
         )
     
-    set_cancel_flag(function_name, True)
+    cancel_jobs(function_name)
     
     # Отправляем уведомление об отмене через WebSocket
     send_progress_sync({
@@ -1013,17 +999,15 @@ def get_process_status():
     """
     Получить статус всех процессов (активные/отмененные).
     """
-    with _cancel_lock:
-        status = {name: {"cancelled": flag} for name, flag in _cancel_flags.items()}
-    return status
+    return {name: kind_status(name) for name in CANCELLABLE_PROCESSES}
 
 def parse_sofifa_player_positions_from_html() -> List[PlayerPosition]:
     html_content = """<div class="choices-list" aria-multiselectable="true" role="listbox"><div id="choices--pn1-g1-item-choice-1" class="choices-item choices-item-choice choices-item-selectable" role="option" data-choice="" data-id="1" data-value="27" data-select-text="" data-choice-selectable="">LW</div><div id="choices--pn1-g1-item-choice-2" class="choices-item choices-item-choice choices-item-selectable" role="option" data-choice="" data-id="2" data-value="25" data-select-text="" data-choice-selectable="">ST</div><div id="choices--pn1-g1-item-choice-3" class="choices-item choices-item-choice choices-item-selectable" role="option" data-choice="" data-id="3" data-value="23" data-select-text="" data-choice-selectable="">RW</div><div id="choices--pn1-g1-item-choice-4" class="choices-item choices-item-choice choices-item-selectable" role="option" data-choice="" data-id="4" data-value="22" data-select-text="" data-choice-selectable="">LF</div><div id="choices--pn1-g1-item-choice-5" class="choices-item choices-item-choice choices-item-selectable" role="option" data-choice="" data-id="5" data-value="21" data-select-text="" data-choice-selectable="">CF</div><div id="choices--pn1-g1-item-choice-6" class="choices-item choices-item-choice choices-item-selectable" role="option" data-choice="" data-id="6" data-value="20" data-select-text="" data-choice-selectable="">RF</div><div id="choices--pn1-g1-item-choice-7" class="choices-item choices-item-choice choices-item-selectable" role="option" data-choice="" data-id="7" data-value="18" data-select-text="" data-choice-selectable="">CAM</div><div id="choices--pn1-g1-item-choice-8" class="choices-item choices-item-choice choices-item-selectable" role="option" data-choice="" data-id="8" data-value="16" data-select-text="" data-choice-selectable="">LM</div><div id="choices--pn1-g1-item-choice-9" class="choices-item choices-item-choice choices-item-selectable" role="option" data-choice="" data-id="9" data-value="14" data-select-text="" data-choice-selectable="">CM</div><div id="choices--pn1-g1-item-choice-10" class="choices-item choices-item-choice choices-item-selectable" role="option" data-choice="" data-id="10" data-value="12" data-select-text="" data-choice-selectable="" aria-selected="false">RM</div><div id="choices--pn1-g1-item-choice-11" class="choices-item choices-item-choice choices-item-selectable" role="option" data-choice="" data-id="11" data-value="10" data-select-text="" data-choice-selectable="" aria-selected="false">CDM</div><div id="choices--pn1-g1-item-choice-12" class="choices-item choices-item-choice choices-item-selectable is-highlighted" role="option" data-choice="" data-id="12" data-value="8" data-select-text="" data-choice-selectable="" aria-selected="true">LWB</div><div id="choices--pn1-g1-item-choice-13" class="choices-item choices-item-choice choices-item-selectable" role="option" data-choice="" data-id="13" data-value="7" data-select-text="" data-choice-selectable="">LB</div><div id="choices--pn1-g1-item-choice-14" class="choices-item choices-item-choice choices-item-selectable" role="option" data-choice="" data-id="14" data-value="5" data-select-text="" data-choice-selectable="">CB</div><div id="choices--pn1-g1-item-choice-15" class="choices-item choices-item-choice choices-item-selectable" role="option" data-choice="" data-id="15" data-value="3" data-select-text="" data-choice-selectable="">RB</div><div id="choices--pn1-g1-item-choice-16" class="choices-item choices-item-choice choices-item-selectable" role="option" data-choice="" data-id="16" data-value="2" data-select-text="" data-choice-selectable="" aria-selected="false">RWB</div><div id="choices--pn1-g1-item-choice-17" class="choices-item choices-item-choice choices-item-selectable" role="option" data-choice="" data-id="17" data-value="0" data-select-text="" data-choice-selectable="">GK</div></div>"""
-    soup = BeautifulSoup(html_content, "html.parser")
+    soup = bs4.BeautifulSoup(html_content, "html.parser")
     positions: List[PlayerPosition] = []
     choice_items = soup.find_all("div", class_="choices-item")
     for item in choice_items:
-        if isinstance(item, Tag):
+        if isinstance(item, bs4.Tag):
             value = item.get("data-value")
             name = item.get_text(strip=True)
             if value and name:
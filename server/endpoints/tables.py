@@ -0,0 +1,63 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Any, Iterator, List, Optional
+import asyncio
+import re
+
+from .utils import json_codec, parse_fields
+from .utils.tables import iter_rows, project_table
+
+router = APIRouter()
+
+TABLE_NAME_RE = re.compile(r'^[A-Za-z0-9_]+$')
+STREAM_BATCH_SIZE = 1000  # Rows serialized per chunk
+
+def _ndjson(batches: Iterator[List[Any]]) -> Iterator[bytes]:
+    """One JSON document per line; a chunk per batch of rows."""
+    for batch in batches:
+        yield b"".join(json_codec.dumpb(row) + b"\n" for row in batch)
+
+def _batches(rows: List[Any]) -> Iterator[List[Any]]:
+    for start in range(0, len(rows), STREAM_BATCH_SIZE):
+        yield rows[start:start + STREAM_BATCH_SIZE]
+
+def _read_batches(path: str, fields: Optional[List[str]]) -> Iterator[List[Any]]:
+    if fields:
+        # Served from the cached projection of the table (built once per table version)
+        rows = project_table(path, fields)
+        return _batches(rows if isinstance(rows, list) else [rows])
+    return iter_rows(path, STREAM_BATCH_SIZE)
+
+@router.get("/tables/{name}/stream", tags=["tables"])
+async def stream_table(
+    name: str,
+    project_id: str = Query(None, description="Project ID to stream the table from"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return (default: all)"),
+    columns: Optional[str] = Query(None, description="Alias of fields")
+):
+    """
+    Stream a fifa_ng_db table as newline-delimited JSON (one row per line).
+    Rows are read batch by batch from the project's storage (falls back to FC25
+    when the project has no such table), so the response starts right away and
+    memory use does not grow with the table size. With ?fields= the rows come
+    from the table's cached column projection, as on the other table endpoints.
+    """
+    if not TABLE_NAME_RE.match(name):
+        raise HTTPException(status_code=400, detail=f"Invalid table name: {name}")
+    selected = parse_fields(fields or columns)
+
+    paths = [f'../fc25/data/fifa_ng_db/{name}.json']
+    if project_id:
+        paths.insert(0, f'../projects/{project_id}/data/fifa_ng_db/{name}.json')
+
+    for path in paths:
+        try:
+            batches = await asyncio.to_thread(_read_batches, path, selected)
+        except FileNotFoundError:
+            continue
+        except Exception as e:
+            print(f"[ERROR] Error streaming table {path}: {e}")
+            raise HTTPException(status_code=500, detail=f"Error reading table {name}: {str(e)}")
+        return StreamingResponse(_ndjson(batches), media_type="application/x-ndjson")
+
+    raise HTTPException(status_code=404, detail=f"Table {name} not found")
@@ -1,5 +1,7 @@
 from fastapi import APIRouter, Query, HTTPException, Path, Body, Depends
 from .utils import load_json_file, save_json_file
+from .utils.tables import read_table, write_table, append_rows, get_row
+from .utils.id_allocator import allocate_ids
 from pydantic import BaseModel, Field
 from typing import List, Dict, Optional, Any, Tuple
 from collections import OrderedDict
@@ -156,30 +158,34 @@ def get_project_data_dir(project_name: str) -> str:
     return data_dir
 
 def read_json_file(file_path: str) -> List[Dict]:
-    """Reads a JSON file and returns its content, handling file not found and errors."""
-    if os.path.exists(file_path):
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = json.load(f)
-                return content if isinstance(content, list) else []
-        except json.JSONDecodeError:
-            logger.warning(f"Empty or invalid JSON in {os.path.basename(file_path)}, initializing as empty list.")
-            return []
-        except Exception as e:
-            logger.error(f"Error reading {os.path.basename(file_path)}: {e}", exc_info=True)
-            raise HTTPException(status_code=500, detail=f"Error reading {os.path.basename(file_path)}")
-    return []
+    """Reads a JSON file (through the shared table cache) and returns its content, handling file not found and errors."""
+    try:
+        content = read_table(os.path.abspath(file_path))
+        return content if isinstance(content, list) else []
+    except FileNotFoundError:
+        return []
+    except json.JSONDecodeError:
+        logger.warning(f"Empty or invalid JSON in {os.path.basename(file_path)}, initializing as empty list.")
+        return []
+    except Exception as e:
+        logger.error(f"Error reading {os.path.basename(file_path)}: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error reading {os.path.basename(file_path)}")
 
 def write_json_file(file_path: str, data: List[Dict]):
     """Writes data to a JSON file, ensuring the directory exists."""
     try:
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+        write_table(os.path.abspath(file_path), data)
     except Exception as e:
         logger.error(f"Error writing to {os.path.basename(file_path)}: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error writing to {os.path.basename(file_path)}")
 
+def find_team_row(file_path: str, team_id: str) -> Optional[Dict]:
+    """Looks up a team's row via the table's teamid index; None if absent or the file is unreadable."""
+    try:
+        return get_row(os.path.abspath(file_path), team_id)
+    except json.JSONDecodeError:
+        return None
+
 def sort_players(players: List[Dict], positions_needed: Dict[int, int]) -> tuple[Dict[int, Optional[Dict]], Optional[Dict], List[Dict]]:
     """Sorts players according to the specified criteria."""
     if not players:
@@ -238,25 +244,24 @@ def sort_players(players: List[Dict], positions_needed: Dict[int, int]) -> tuple
 def _add_team_formation(data_dir: str, team_id: str, tactic: str = '4-4-2') -> Dict:
     """Internal logic to add a formation entry to formations.json."""
     formations_file = os.path.join(data_dir, 'formations.json')
-    formations = read_json_file(formations_file)
-
-    if any(f.get("teamid") == team_id for f in formations):
+    existing = find_team_row(formations_file, team_id)
+    if existing is not None:
         logger.info(f"Formation for team ID '{team_id}' already exists in {formations_file}. Skipping.")
-        existing = next((f for f in formations if f.get("teamid") == team_id), None)
-        return existing or {"error": "Existing formation found but could not be retrieved"}
+        return existing
 
     if tactic == '4-4-2':
         new_formation = FORMATION_442.copy()
         new_formation["teamid"] = team_id
+        # formationid is unique per row (the overlay engine keys formations by it): the
+        # template's ID belongs to an FC25 team, so every new formation gets its own
+        project_name = os.path.basename(os.path.dirname(os.path.dirname(os.path.abspath(data_dir))))
+        new_formation["formationid"] = str(allocate_ids(project_name, "formations.formationid"))
     else:
         logger.error(f"Tactic '{tactic}' not recognized for team {team_id}.")
         raise ValueError(f"Tactic '{tactic}' not recognized.")
 
-    formations.append(new_formation)
     try:
-        os.makedirs(os.path.dirname(formations_file), exist_ok=True)
-        with open(formations_file, 'w', encoding='utf-8') as f:
-            json.dump(formations, f, indent=4, ensure_ascii=False)
+        append_rows(os.path.abspath(formations_file), [new_formation])
         logger.info(f"Formation '{tactic}' added successfully for team {team_id}.")
         return new_formation
     except Exception as e:
@@ -266,12 +271,10 @@ def _add_team_formation(data_dir: str, team_id: str, tactic: str = '4-4-2') -> D
 def _add_default_teamdata(data_dir: str, team_id: str, tactic: str = '4-4-2') -> Dict:
     """Internal logic to add default team data to defaultteamdata.json."""
     defaultteamdata_file = os.path.join(data_dir, 'defaultteamdata.json')
-    defaultteamdata = read_json_file(defaultteamdata_file)
-
-    if any(d.get("teamid") == team_id for d in defaultteamdata):
+    existing = find_team_row(defaultteamdata_file, team_id)
+    if existing is not None:
         logger.info(f"Default team data for team ID '{team_id}' already exists in {defaultteamdata_file}. Skipping.")
-        existing = next((d for d in defaultteamdata if d.get("teamid") == team_id), None)
-        return existing or {"error": "Existing teamdata found but could not be retrieved"}
+        return existing
 
     if tactic == '4-4-2':
         new_teamdata = TEAMDATA_442.copy()
@@ -280,11 +283,8 @@ def _add_default_teamdata(data_dir: str, team_id: str, tactic: str = '4-4-2') ->
         logger.error(f"Tactic '{tactic}' not recognized for team {team_id}.")
         raise ValueError(f"Tactic '{tactic}' not recognized.")
 
-    defaultteamdata.append(new_teamdata)
     try:
-        os.makedirs(os.path.dirname(defaultteamdata_file), exist_ok=True)
-        with open(defaultteamdata_file, 'w', encoding='utf-8') as f:
-            json.dump(defaultteamdata, f, indent=4, ensure_ascii=False)
+        append_rows(os.path.abspath(defaultteamdata_file), [new_teamdata])
         logger.info(f"Default team data '{tactic}' added successfully for team {team_id}.")
         return new_teamdata
     except Exception as e:
@@ -294,17 +294,16 @@ def _add_default_teamdata(data_dir: str, team_id: str, tactic: str = '4-4-2') ->
 def _add_default_teamsheet(data_dir: str, team_id: str, players: List[Dict] = [], tactic: str = '4-4-2') -> Dict:
     """Internal logic to add a default teamsheet to default_teamsheets.json."""
     default_teamsheets_file = os.path.join(data_dir, 'default_teamsheets.json')
-    teamsheets = read_json_file(default_teamsheets_file)
     
     # Debug logging
     if players:
         logger.info(f"_add_default_teamsheet: Received {len(players)} players for team {team_id}")
         logger.info(f"First 3 player IDs: {[p.get('playerid') for p in players[:3]]}")
 
-    if any(ts.get("teamid") == team_id for ts in teamsheets):
+    existing = find_team_row(default_teamsheets_file, team_id)
+    if existing is not None:
         logger.info(f"Default teamsheet for team ID '{team_id}' already exists in {default_teamsheets_file}. Skipping.")
-        existing = next((ts for ts in teamsheets if ts.get("teamid") == team_id), None)
-        return existing or {"error": "Existing teamsheet found but could not be retrieved"}
+        return existing
 
     new_teamsheet = TEAMSHEET_BASE.copy()
     new_teamsheet["teamid"] = team_id
@@ -360,11 +359,8 @@ def _add_default_teamsheet(data_dir: str, team_id: str, players: List[Dict] = []
                 if field in new_teamsheet:
                     new_teamsheet[field] = captain_id
 
-    teamsheets.append(new_teamsheet)
     try:
-        os.makedirs(os.path.dirname(default_teamsheets_file), exist_ok=True)
-        with open(default_teamsheets_file, 'w', encoding='utf-8') as f:
-            json.dump(teamsheets, f, indent=4, ensure_ascii=False)
+        append_rows(os.path.abspath(default_teamsheets_file), [new_teamsheet])
         logger.info(f"Default teamsheet '{tactic}' added successfully for team {team_id}.")
         return new_teamsheet
     except Exception as e:
@@ -442,13 +438,10 @@ def _add_default_mentalities(data_dir: str, team_id: str, players: List[Dict] =
             new_mentality = MENTALITY_INACTIVE.copy()
             new_mentality["mentalityid"] = str(mentalityid)
 
-        mentalities.append(new_mentality)
         new_mentalities_added.append(new_mentality)
 
     try:
-        os.makedirs(os.path.dirname(default_mentalities_file), exist_ok=True)
-        with open(default_mentalities_file, 'w', encoding='utf-8') as f:
-            json.dump(mentalities, f, indent=4, ensure_ascii=False)
+        append_rows(os.path.abspath(default_mentalities_file), new_mentalities_added)
         logger.info(f"Default mentalities '{tactic}' added successfully for team {team_id}.")
         return new_mentalities_added
     except Exception as e:
@@ -603,66 +596,71 @@ async def add_default_mentalities_endpoint(
 # --- Original endpoints ---
 
 @router.get("/default_mentalities", tags=["tactics"])
-async def get_default_mentalities(project_id: str = Query(None, description="Project ID to load default_mentalities from")):
+async def get_default_mentalities(project_id: str = Query(None, description="Project ID to load default_mentalities from"),
+                                  fields: str = Query(None, description="Comma-separated columns to return (default: all)")):
     """Get default_mentalities data from project folder or default file"""
     
     if project_id:
         try:
-            return load_json_file(f'../projects/{project_id}/data/fifa_ng_db/default_mentalities.json')
+            return load_json_file(f'../projects/{project_id}/data/fifa_ng_db/default_mentalities.json', fields)
         except HTTPException as e:
             if e.status_code != 404:
                 print(f"[ERROR] Error loading project default_mentalities: {e.detail}")
     
-    return load_json_file('../fc25/data/fifa_ng_db/default_mentalities.json')
+    return load_json_file('../fc25/data/fifa_ng_db/default_mentalities.json', fields)
 
 @router.get("/default_teamsheets", tags=["tactics"])
-async def get_default_teamsheets(project_id: str = Query(None, description="Project ID to load default_teamsheets from")):
+async def get_default_teamsheets(project_id: str = Query(None, description="Project ID to load default_teamsheets from"),
+                                 fields: str = Query(None, description="Comma-separated columns to return (default: all)")):
     """Get default_teamsheets data from project folder or default file"""
     
     if project_id:
         try:
-            return load_json_file(f'../projects/{project_id}/data/fifa_ng_db/default_teamsheets.json')
+            return load_json_file(f'../projects/{project_id}/data/fifa_ng_db/default_teamsheets.json', fields)
         except HTTPException as e:
             if e.status_code != 404:
                 print(f"[ERROR] Error loading project default_teamsheets: {e.detail}")
     
-    return load_json_file('../fc25/data/fifa_ng_db/default_teamsheets.json')
+    return load_json_file('../fc25/data/fifa_ng_db/default_teamsheets.json', fields)
 
 @router.get("/defaultteamdata", tags=["tactics"])
-async def get_defaultteamdata(project_id: str = Query(None, description="Project ID to load defaultteamdata from")):
+async def get_defaultteamdata(project_id: str = Query(None, description="Project ID to load defaultteamdata from"),
+                              fields: str = Query(None, description="Comma-separated columns to return (default: all)")):
     """Get defaultteamdata data from project folder or default file"""
     
     if project_id:
         try:
-            return load_json_file(f'../projects/{project_id}/data/fifa_ng_db/defaultteamdata.json')
+            return load_json_file(f'../projects/{project_id}/data/fifa_ng_db/defaultteamdata.json', fields)
         except HTTPException as e:
             if e.status_code != 404:
                 print(f"[ERROR] Error loading project defaultteamdata: {e.detail}")
     
-    return load_json_file('../fc25/data/fifa_ng_db/defaultteamdata.json')
+    return load_json_file('../fc25/data/fifa_ng_db/defaultteamdata.json', fields)
 
 @router.get("/formations", tags=["tactics"])
-async def get_formations(project_id: str = Query(None, description="Project ID to load formations from")):
+async def get_formations(project_id: str = Query(None, description="Project ID to load formations from"),
+                         fields: str = Query(None, description="Comma-separated columns to return (default: all)")):
     """Get formations data from project folder or default file"""
     
     if project_id:
         try:
-            return load_json_file(f'../projects/{project_id}/data/fifa_ng_db/formations.json')
+            return load_json_file(f'../projects/{project_id}/data/fifa_ng_db/formations.json', fields)
         except HTTPException as e:
             if e.status_code != 404:
                 print(f"[ERROR] Error loading project formations: {e.detail}")
     
-    return load_json_file('../fc25/data/fifa_ng_db/formations.json')
+    return load_json_file('../fc25/data/fifa_ng_db/formations.json', fields)
 
 @router.get("/mentalities", tags=["tactics"])
-async def get_mentalities(project_id: str = Query(None, description="Project ID to load mentalities from")):
+async def get_mentalities(project_id: str = Query(None, description="Project ID to load mentalities from"),
+                          fields: str = Query(None, description="Comma-separated columns to return (default: all)")):
     """Get mentalities data from project folder or default file"""
     
     if project_id:
         try:
-            return load_json_file(f'../projects/{project_id}/data/fifa_ng_db/mentalities.json')
+            return load_json_file(f'../projects/{project_id}/data/fifa_ng_db/mentalities.json', fields)
         except HTTPException as e:
             if e.status_code != 404:
                 print(f"[ERROR] Error loading project mentalities: {e.detail}")
     
-    return load_json_file('../fc25/data/fifa_ng_db/mentalities.json')
+    return load_json_file('../fc25/data/fifa_ng_db/mentalities.json', fields)
@@ -0,0 +1,103 @@
+from fastapi import APIRouter, HTTPException
+from typing import Any, Dict, List, Optional
+import asyncio
+import os
+
+from .utils.tables import get_index, get_row, get_rows, resolve_data_path, table_exists
+
+router = APIRouter()
+
+# players.json name id column -> key of the resolved name in the bundle
+PLAYER_NAME_COLUMNS = {
+    "firstnameid": "firstname",
+    "lastnameid": "lastname",
+    "commonnameid": "commonname",
+    "playerjerseynameid": "playerjerseyname",
+}
+
+TEAM_STRING_IDS = ("TeamName_{}", "TeamName_Abbr15_{}", "TeamName_Abbr10_{}", "TeamName_Abbr3_{}")
+
+def _project_exists(project_id: str) -> bool:
+    return os.path.isdir(resolve_data_path(f'../projects/{project_id}'))
+
+def _table_path(project_id: str, table: str) -> str:
+    """Project table, or the FC25 one when the (existing) project has no such table."""
+    project_path = f'../projects/{project_id}/data/fifa_ng_db/{table}'
+    return project_path if table_exists(project_path) else f'../fc25/data/fifa_ng_db/{table}'
+
+def _with_names(player: Dict[str, Any], names_index) -> Dict[str, Any]:
+    # Copy: rows are shared with the table cache
+    player = dict(player)
+    for id_column, name_key in PLAYER_NAME_COLUMNS.items():
+        name_row = names_index.get(player.get(id_column)) if names_index is not None else None
+        player[name_key] = name_row.get("name", "") if name_row else ""
+    return player
+
+def build_team_bundle(project_id: str, team_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Everything needed to render one team, assembled from index lookups
+    (no full-table scans). None when the team does not exist.
+    """
+    team = get_row(_table_path(project_id, "teams.json"), team_id)
+    if team is None:
+        return None
+
+    player_links = get_rows(_table_path(project_id, "teamplayerlinks.json"), "teamid", team_id)
+    try:
+        players_index = get_index(_table_path(project_id, "players.json"))
+    except FileNotFoundError:
+        players_index = {}
+    try:
+        names_index = get_index(_table_path(project_id, "playernames.json"))
+    except FileNotFoundError:
+        names_index = None
+    player_ids = dict.fromkeys(link.get("playerid") for link in player_links)
+    players: List[Dict[str, Any]] = [
+        _with_names(players_index.get(player_id), names_index)
+        for player_id in player_ids if player_id in players_index
+    ]
+
+    stadium_links = get_rows(_table_path(project_id, "teamstadiumlinks.json"), "teamid", team_id)
+    managers = get_rows(_table_path(project_id, "manager.json"), "teamid", team_id)
+
+    language_strings: Dict[str, str] = {}
+    strings_path = f'../projects/{project_id}/data/loc/LanguageStrings2.json'
+    for string_id in (template.format(team_id) for template in TEAM_STRING_IDS):
+        row = get_row(strings_path, string_id, "stringid")
+        if row is not None:
+            language_strings[string_id] = row.get("sourcetext", "")
+
+    return {
+        "team": team,
+        "players": players,
+        "links": {
+            "teamplayerlinks": player_links,
+            "leagueteamlinks": get_rows(_table_path(project_id, "leagueteamlinks.json"), "teamid", team_id),
+            "teamnationlinks": get_rows(_table_path(project_id, "teamnationlinks.json"), "teamid", team_id),
+        },
+        "kits": get_rows(_table_path(project_id, "teamkits.json"), "teamtechid", team_id),
+        "stadium": stadium_links[0] if stadium_links else None,
+        "manager": managers[0] if managers else None,
+        "formation": get_row(_table_path(project_id, "formations.json"), team_id),
+        "teamsheet": get_row(_table_path(project_id, "default_teamsheets.json"), team_id),
+        "language_strings": language_strings,
+    }
+
+@router.get("/projects/{project_id}/teams/{team_id}/bundle", tags=["teams"])
+async def get_team_bundle(project_id: str, team_id: str):
+    """
+    One team with its players (names resolved from playernames), league/nation/
+    player links, kits, stadium link, manager, formation, teamsheet and name
+    strings in a single response. Missing tables of the project fall back to
+    FC25; an unknown project is a 404.
+    """
+    if not _project_exists(project_id):
+        raise HTTPException(status_code=404, detail=f"Project {project_id} not found")
+    try:
+        bundle = await asyncio.to_thread(build_team_bundle, project_id, team_id)
+    except Exception as e:
+        print(f"[ERROR] Error building bundle for team {team_id} in project {project_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Error building team bundle: {str(e)}")
+    if bundle is None:
+        raise HTTPException(status_code=404, detail=f"Team {team_id} not found in project {project_id}")
+    return bundle
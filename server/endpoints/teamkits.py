@@ -1,14 +1,21 @@
 from fastapi import APIRouter, Query, HTTPException, Body
+from .utils.tables import read_table, write_table, get_rows, table_exists, table_len, transaction
+from .utils.unit_of_work import UnitOfWork
+from .utils.id_allocator import allocate_ids
+from .utils import json_codec
 from pathlib import Path
 import json
 from typing import List, Dict, Any, Optional
 from collections import OrderedDict
-import numpy as np
 import os
-from PIL import Image
 import asyncio
 import aiofiles
 import time
+from .utils.lazy_import import lazy_module
+
+# Image/numeric libraries load on first use (see utils/lazy_import.py)
+np = lazy_module("numpy")
+Image = lazy_module("PIL.Image")
 
 router = APIRouter()
 
@@ -41,22 +48,15 @@ def create_ordered_kit(kit_data: Dict[str, Any]) -> OrderedDict:
         ordered_kit[key] = kit_data.get(key, "0")  # По умолчанию "0" если ключ отсутствует
     return ordered_kit
 
-# Пользовательский JSONEncoder для сохранения порядка ключей в OrderedDict
-class OrderedDictJSONEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, OrderedDict):
-            return obj
-        return super().default(obj)
-
 async def write_json_file(file_path: Path, data: List[OrderedDict]):
     """Асинхронная запись JSON файла с сохранением порядка ключей"""
     # Сериализуем JSON с минимальными отступами для экономии места и времени
-    json_content = json.dumps(data, ensure_ascii=False, separators=(',', ':'), cls=OrderedDictJSONEncoder)
+    json_content = json_codec.dumps(data)
     
     async with aiofiles.open(file_path, 'w', encoding='utf-8') as f:
         await f.write(json_content)
 
-def extract_dominant_colors(image_path: str, num_colors: int = 3) -> np.ndarray:
+def extract_dominant_colors(image_path: str, num_colors: int = 3) -> "np.ndarray":
     """Извлекает доминирующие цвета из изображения логотипа"""
     try:
         from sklearn.cluster import KMeans
@@ -91,7 +91,7 @@ def extract_dominant_colors(image_path: str, num_colors: int = 3) -> np.ndarray:
         # Возвращаем цвета по умолчанию
         return np.array([[255, 0, 0], [255, 255, 255], [0, 0, 0]])
 
-def sort_colors_by_importance(colors: np.ndarray) -> List[List[int]]:
+def sort_colors_by_importance(colors: "np.ndarray") -> List[List[int]]:
     """Сортирует цвета по важности (яркость, насыщенность)"""
     sorted_colors = []
     
@@ -111,7 +111,7 @@ def sort_colors_by_importance(colors: np.ndarray) -> List[List[int]]:
     
     return [color[1] for color in sorted_colors]
 
-def get_contrasting_text_color(background_color: List[int]) -> np.ndarray:
+def get_contrasting_text_color(background_color: List[int]) -> "np.ndarray":
     """Возвращает контрастный цвет текста для фона"""
     r, g, b = background_color
     # Вычисляем яркость фона
@@ -170,19 +170,13 @@ async def get_team_kits_by_team(project_name: str, team_tech_id: str) -> List[di
     # Путь к файлу teamkits.json
     kits_file = Path("projects") / project_name / "data/fifa_ng_db/teamkits.json"
     
-    if not kits_file.exists():
+    kits_path = str(kits_file.resolve())
+    if not table_exists(kits_path):
         raise HTTPException(status_code=404, detail="Файл teamkits.json не найден")
     
     try:
-        # Преобразуем team_tech_id в строку для правильного сравнения
-        team_tech_id_str = str(team_tech_id)
-        
-        with open(kits_file, 'r', encoding='utf-8') as f:
-            kits = json.load(f)
-            # Фильтруем формы для конкретной команды
-            team_kits = [kit for kit in kits if kit.get("teamtechid") == team_tech_id_str]
-            
-            return team_kits
+        # Формы конкретной команды по индексу teamtechid
+        return get_rows(kits_path, "teamtechid", str(team_tech_id))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка при чтении файла: {str(e)}")
 
@@ -204,26 +198,11 @@ async def add_team_kits(
     
     # Путь к файлу teamkits.json
     kits_file = Path("projects") / project_name / "data" / "fifa_ng_db" / "teamkits.json"
-    
-    
-    # Создаем папки если они не существуют
-    kits_file.parent.mkdir(parents=True, exist_ok=True)
-    
-    # Если файл не существует, создаем пустой список
-    if not kits_file.exists():
-        async with aiofiles.open(kits_file, 'w', encoding='utf-8') as f:
-            await f.write('[]')
+    kits_path = str(kits_file.resolve())
     
     try:
         start_time = time.time()
         
-        # Асинхронно читаем данные из файла
-        async with aiofiles.open(kits_file, 'r', encoding='utf-8') as f:
-            content = await f.read()
-            kits = json.loads(content)
-        
-        read_time = time.time() - start_time
-        
         # Проверяем, что мы получили валидные данные
         team_ids = []
         for item in data:
@@ -234,17 +213,6 @@ async def add_team_kits(
         if not team_ids:
             raise HTTPException(status_code=400, detail="Не указаны ID команд для добавления форм")
         
-        
-        # Определяем последний использованный teamkitid
-        max_kit_id = 0
-        for kit in kits:
-            try:
-                current_id = int(kit.get("teamkitid", "0"))
-                max_kit_id = max(max_kit_id, current_id)
-            except (ValueError, TypeError):
-                continue
-                
-        
         # Шаблоны для домашней, выездной и альтернативной формы
         kit_templates = [
             # Домашняя форма (teamkittypetechid=0)
@@ -464,59 +432,48 @@ async def add_team_kits(
             }
         ]
         
-        # Создаем новый список форм, с правильным порядком ключей
-        ordered_kits = []
-        for kit in kits:
-            ordered_kits.append(create_ordered_kit(kit))
-        
-        # Добавляем формы для каждой команды
-        added_kits_count = 0
-        teams_processed = 0
-        
-        for team_id in team_ids:
-            # Проверяем, есть ли уже формы для этой команды
-            existing_kits = [kit for kit in ordered_kits if kit.get("teamtechid") == team_id]
-            
-            # Если у команды уже есть 3 или более формы, пропускаем
-            if len(existing_kits) >= 3:
-                continue
-                
-            # Добавляем формы для команды
-            for template in kit_templates:
-                max_kit_id += 1
-                
-                # Копируем данные из шаблона с указанием teamkitid и teamtechid
-                template_copy = template.copy()
-                template_copy["teamkitid"] = str(max_kit_id)
-                template_copy["teamtechid"] = team_id
-                
-                # Создаем OrderedDict с правильным порядком ключей
-                ordered_kit = create_ordered_kit(template_copy)
-                
-                ordered_kits.append(ordered_kit)
-                added_kits_count += 1
+        # Таблица заблокирована от проверки до записи: параллельные запросы не добавят формы дважды
+        async with UnitOfWork(kits_path) as uow:
+            # Команды без полного комплекта форм (индекс teamtechid); повторы в запросе учитываются один раз
+            teams_to_kit = []
+            for team_id in team_ids:
+                if team_id not in teams_to_kit and len(get_rows(kits_path, "teamtechid", team_id)) < 3:
+                    teams_to_kit.append(team_id)
+            teams_processed = len(teams_to_kit)
             
-            teams_processed += 1
-        
-        # Сохраняем обновленные данные, если были добавлены формы
-        if added_kits_count > 0:
-            write_start = time.time()
-            
-            # Сериализуем JSON с отступами для читаемости
-            json_content = json.dumps(ordered_kits, ensure_ascii=False, indent=2, cls=OrderedDictJSONEncoder)
+            # teamkitid резервируются диапазоном у аллокатора проекта (без прохода по таблице)
+            next_kit_id = await asyncio.to_thread(
+                allocate_ids, project_name, "teamkitid", len(teams_to_kit) * len(kit_templates))
             
-            async with aiofiles.open(kits_file, 'w', encoding='utf-8') as f:
-                await f.write(json_content)
+            # Новые формы (с правильным порядком ключей) дописываются в конец таблицы
+            new_kits = []
+            for team_id in teams_to_kit:
+                # Добавляем формы для команды
+                for template in kit_templates:
+                    # Копируем данные из шаблона с указанием teamkitid и teamtechid
+                    template_copy = template.copy()
+                    template_copy["teamkitid"] = str(next_kit_id)
+                    template_copy["teamtechid"] = team_id
+                    next_kit_id += 1
+                    
+                    # Создаем OrderedDict с правильным порядком ключей
+                    new_kits.append(create_ordered_kit(template_copy))
+            added_kits_count = len(new_kits)
             
-            write_time = time.time() - write_start
-            total_time = time.time() - start_time
+            # Новые формы дописываются одним вызовом при выходе из блока (JSON с отступами для читаемости)
+            uow.append(kits_path, new_kits, 2)
+        
+        try:
+            total_records = await asyncio.to_thread(table_len, kits_path)
+        except FileNotFoundError:
+            total_records = 0
         
         return {
             "status": "success",
             "message": f"Добавлено {added_kits_count} комплекта(ов) формы для {teams_processed} команд(ы)",
             "added_kits_count": added_kits_count,
             "teams_processed": teams_processed,
-            "total_records": len(ordered_kits),
+            "total_records": total_records,
             "processing_time": f"{time.time() - start_time:.2f}s"
         }
                 
@@ -558,21 +515,18 @@ def directly_fix_team_colors(project_name: str, team_id: str, team_name: str = N
     teamkits_file = os.path.join(base_dir, 'projects', project_name, 'data', 'fifa_ng_db', 'teamkits.json')
     
     # Check if files exist
-    if not os.path.exists(teams_file):
+    if not table_exists(teams_file):
         print(f"Error: teams.json not found at {teams_file}")
         return False
     
-    if not os.path.exists(teamkits_file):
+    if not table_exists(teamkits_file):
         print(f"Error: teamkits.json not found at {teamkits_file}")
         return False
     
-    # Load JSON data
+    # Load JSON data (private copies of the cached rows: they are modified below)
     try:
-        with open(teams_file, 'r', encoding='utf-8') as f:
-            teams_data = json.load(f)
-        
-        with open(teamkits_file, 'r', encoding='utf-8') as f:
-            teamkits_data = json.load(f)
+        teams_data = [dict(t) for t in read_table(teams_file)]
+        teamkits_data = [dict(tk) for tk in read_table(teamkits_file)]
     except Exception as e:
         print(f"Error loading JSON data: {e}")
         return False
@@ -786,15 +740,14 @@ def directly_fix_team_colors(project_name: str, team_id: str, team_name: str = N
     # Then add our updated kits
     teamkits_data.extend(final_kits)
     
-    # Save the updated files
+    # Save the updated files (one transaction for SQLite-backed projects)
     try:
-        print(f"Saving updated team data to: {teams_file}")
-        with open(teams_file, 'w', encoding='utf-8') as f:
-            json.dump(teams_data, f, indent=2, ensure_ascii=False)
-        
-        print(f"Saving updated teamkit data with {len(final_kits)} kits to: {teamkits_file}")
-        with open(teamkits_file, 'w', encoding='utf-8') as f:
-            json.dump(teamkits_data, f, indent=2, ensure_ascii=False)
+        with transaction(teams_file):
+            print(f"Saving updated team data to: {teams_file}")
+            write_table(teams_file, teams_data, indent=2)
+            
+            print(f"Saving updated teamkit data with {len(final_kits)} kits to: {teamkits_file}")
+            write_table(teamkits_file, teamkits_data, indent=2)
         
         print(f"Successfully updated colors for {team_name} (ID: {team_id})")
         return True
@@ -1,39 +1,25 @@
 from fastapi import APIRouter, Query, HTTPException
-from .utils import load_json_file, save_json_file
+from .utils import load_json_file
+from .utils.tables import replace_rows
+from .utils.id_allocator import allocate_ids
 from typing import List, Dict, Any
 import asyncio
-import os
 
 router = APIRouter()
 
-# Cache for loaded data
-_teamplayerlinks_cache: Dict[str, List[Dict[str, Any]]] = {}
-
 @router.get("/teamplayerlinks", tags=["teamplayerlinks"])
-async def get_teamplayerlinks(project_id: str = Query(None, description="Project ID to load teamplayerlinks from")):
-    """Get teamplayerlinks data from project folder or default file, using cache."""
-    file_to_load = '../fc25/data/fifa_ng_db/teamplayerlinks.json'
+async def get_teamplayerlinks(project_id: str = Query(None, description="Project ID to load teamplayerlinks from"),
+                              fields: str = Query(None, description="Comma-separated columns to return (default: all)")):
+    """Get teamplayerlinks data from project folder or default file (served from the shared table cache)."""
     if project_id:
-        project_file = f'../projects/{project_id}/data/fifa_ng_db/teamplayerlinks.json'
-        # Check cache first for project file
-        if project_file in _teamplayerlinks_cache:
-            return _teamplayerlinks_cache[project_file]
         try:
-            data = load_json_file(project_file)
-            _teamplayerlinks_cache[project_file] = data # Cache project data
-            return data
+            return load_json_file(f'../projects/{project_id}/data/fifa_ng_db/teamplayerlinks.json', fields)
         except HTTPException as e:
             if e.status_code != 404:
                 print(f"[ERROR] Error loading project teamplayerlinks: {e.detail}")
             # Fall through to default if project file not found or other non-404 http error during load
     
-    # If no project_id or project file failed, try default (checking cache first)
-    if file_to_load in _teamplayerlinks_cache:
-        return _teamplayerlinks_cache[file_to_load]
-    
-    data = load_json_file(file_to_load)
-    _teamplayerlinks_cache[file_to_load] = data # Cache default data
-    return data
+    return load_json_file('../fc25/data/fifa_ng_db/teamplayerlinks.json', fields)
 
 async def save_teamplayerlinks_with_jersey_numbers(
     project_name: str, 
@@ -47,37 +33,14 @@ async def save_teamplayerlinks_with_jersey_numbers(
     teamplayerlinks_file_path = f'../projects/{project_name}/data/fifa_ng_db/teamplayerlinks.json'
     
     try:
-        existing_links: List[Dict[str, Any]] = []
-        try:
-            # Try to load from cache first if available, otherwise load from file
-            if teamplayerlinks_file_path in _teamplayerlinks_cache:
-                existing_links = list(_teamplayerlinks_cache[teamplayerlinks_file_path]) # Use a copy
-            else:
-                existing_links = load_json_file(teamplayerlinks_file_path)
-        except FileNotFoundError:
-            os.makedirs(os.path.dirname(teamplayerlinks_file_path), exist_ok=True)
-        except HTTPException as e:
-            if e.status_code == 404: # File not found is okay, means we start fresh
-                os.makedirs(os.path.dirname(teamplayerlinks_file_path), exist_ok=True)
-            else: # Re-raise other HTTP exceptions
-                raise
-        
-        # Determine starting artificialkey
-        max_artificial_key = -1
-        if existing_links:
-            for link in existing_links:
-                try:
-                    key_val = int(link.get('artificialkey', -1))
-                    max_artificial_key = max(max_artificial_key, key_val)
-                except ValueError:
-                    continue
-        
-        # Remove any existing links for this team before adding new ones
-        updated_links_for_file = [link for link in existing_links if link.get('teamid') != team_id]
+        # Reserve one artificialkey per link (a fresh table starts at 0)
+        first_artificial_key = await asyncio.to_thread(
+            allocate_ids, project_name, "teamplayerlinks.artificialkey", len(player_links_info))
         
+        new_links_for_team: List[Dict[str, Any]] = []
         added_links_count = 0
         for idx, player_data in enumerate(player_links_info):
-            current_artificial_key = max_artificial_key + 1 + idx
+            current_artificial_key = first_artificial_key + idx
             link_data = {
                 # Order based on user's desired output
                 "isamongtopscorers": "0",
@@ -98,13 +61,11 @@ async def save_teamplayerlinks_with_jersey_numbers(
                 "reds": "0" # Changed from redcards and added
                 # Removed: cups, cupgoals, leaguegames, yellowcards, redcards
             }
-            updated_links_for_file.append(link_data)
+            new_links_for_team.append(link_data)
             added_links_count += 1
         
-        await asyncio.to_thread(save_json_file, teamplayerlinks_file_path, updated_links_for_file)
-        
-        # Update cache
-        _teamplayerlinks_cache[teamplayerlinks_file_path] = updated_links_for_file
+        # Replace any existing links for this team (found via the teamid index)
+        await asyncio.to_thread(replace_rows, teamplayerlinks_file_path, 'teamid', team_id, new_links_for_team)
         
         return {
             "status": "success",
@@ -1,6 +1,10 @@
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Query, HTTPException, status
 from .utils import load_json_file, save_json_file
-from .websocket import send_progress_sync
+from .utils.tables import get_index, get_row, get_rows, append_rows, row_exists
+from .utils.team_checkpoints import TeamCheckpoint, checkpoint_key, claim_checkpoints, release_checkpoints, start_checkpoint
+from .utils.id_allocator import allocate_ids
+from .websocket import drain_progress, send_progress_sync
+from .jobs import accepted_response, submit_job
 from .transfermarkt import download_and_process_team_crest, parse_tm_club_url, squad_url, scrape_squad, get_scraper, return_scraper # Assuming this can be async or wrapped
 from .teamkits import add_team_kits_internal
 from .teamstadiumlinks import add_team_stadiums_internal
@@ -23,6 +27,8 @@ from pathlib import Path
 import asyncio
 from datetime import datetime
 import functools # For functools.partial
+import uuid
+import weakref
 
 router = APIRouter()
 
@@ -42,6 +48,26 @@ class AddTeamsRequest(BaseModel):
     teams: List[TransfermarktTeam]
     project_id: Optional[str] = None
     league_id: str
+    concurrency: Optional[int] = None # Teams processed at once (default ADD_TEAMS_CONCURRENCY)
+    priority: Optional[int] = None # Job priority (default ADD_TEAMS_JOB_PRIORITY)
+    resume: bool = True # Continue the unfinished run of the same teams from its checkpoints
+
+# Teams of one add-teams request processed at the same time (each mostly waits on
+# squad scraping, photo downloads and ML), and the cap across all running requests
+ADD_TEAMS_CONCURRENCY = int(os.environ.get("FIFA_ADD_TEAMS_CONCURRENCY", "4"))
+MAX_CONCURRENT_TEAMS = int(os.environ.get("FIFA_MAX_CONCURRENT_TEAMS", "8"))
+# Add-teams runs are interactive: ahead of the background scrapes (priority 0) in the job queue
+ADD_TEAMS_JOB_PRIORITY = 10
+
+_team_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+def _global_team_slots() -> asyncio.Semaphore:
+    """Server-wide limit of teams being generated (one semaphore per event loop)"""
+    loop = asyncio.get_running_loop()
+    slots = _team_slots.get(loop)
+    if slots is None:
+        slots = _team_slots[loop] = asyncio.Semaphore(max(1, MAX_CONCURRENT_TEAMS))
+    return slots
 
 # --- Category Handler Functions ---
 
@@ -96,6 +122,11 @@ async def _handle_simple_data_category(generator_func: Callable, tm_team: Transf
     return generator_func(tm_team=tm_team, new_team_id=new_team_id, project_name=project_name, league_id=league_id)
 
 
+def _team_rows(project_name: str, table: str, column: str, team_id: str) -> List[Dict[str, Any]]:
+    """Rows of a project table belonging to a team (steps adding rows check them before adding again)"""
+    return get_rows(f'../projects/{project_name}/data/fifa_ng_db/{table}', column, team_id)
+
+
 # Category 13: League Connection
 async def _handle_cat13_league_connection(tm_team: TransfermarktTeam, new_team_id: str, project_name: Optional[str], league_id: str, **kwargs) -> Dict[str, Any]:
     data_to_return: Dict[str, Any] = {}
@@ -146,6 +177,12 @@ async def _handle_cat15_team_kits(tm_team: TransfermarktTeam, new_team_id: str,
     data_to_return: Dict[str, Any] = {}
     if project_name:
         try:
+            # A resumed run may have added the kits already
+            existing_kits = await asyncio.to_thread(_team_rows, project_name, "teamkits.json", "teamtechid", new_team_id)
+            if existing_kits:
+                print(f"        👕 Team {tm_team.teamname} already has {len(existing_kits)} kits")
+                return {"kits_status": "success", "kits_message": "Team kits already added.",
+                        "kits_count": str(len(existing_kits)), "teams_processed_for_kits": "0"}
             print(f"        👕 Adding team kits for team {tm_team.teamname}...")
             kits_result = await add_team_kits_internal(project_name, [new_team_id])
             print(f"        📋 Team kits result: {kits_result}")
@@ -169,14 +206,20 @@ async def _handle_cat16_manager(tm_team: TransfermarktTeam, new_team_id: str, pr
     data_to_return: Dict[str, Any] = {}
     if project_name:
         try:
+            # A resumed run may have created the manager already (found by its teamid)
+            existing_managers = await asyncio.to_thread(_team_rows, project_name, "manager.json", "teamid", new_team_id)
+            if existing_managers:
+                print(f"        👨‍💼 Team {tm_team.teamname} already has a manager")
+                return {"manager_status": "success", "manager_message": "Team manager already created.",
+                        "manager_count": "0", "manager_name_created": existing_managers[0].get("commonname")}
             print(f"        👨‍💼 Creating team manager for team {tm_team.teamname}...")
             manager_payload = {
                 "full_name": f"Manager {tm_team.teamname}", "firstname": "Manager",
-                "surname": tm_team.teamname[:20], "tm_trainer_id": "",
+                "surname": tm_team.teamname[:20], "tm_trainer_id": "", "team_id": new_team_id,
                 "nationality_name": "Unknown", "nationality_id": "0", # Placeholder
                 "birth_dt": datetime(1970, 1, 1), "profile_path": ""  # Placeholder
             }
-            manager_result = await add_managers_internal(project_name, [manager_payload]) # Pass team_id if needed
+            manager_result = await add_managers_internal(project_name, [manager_payload])
             print(f"        📋 Team manager result: {manager_result}")
             data_to_return = {
                 "manager_status": manager_result.get("status", "error"),
@@ -328,7 +371,7 @@ async def _handle_cat_process_players(tm_team: TransfermarktTeam, new_team_id: s
             await asyncio.to_thread(return_scraper, scraper) # return_scraper is sync
 
 # --- New Handler for Saving Players ---
-async def _handle_cat_save_players(tm_team: TransfermarktTeam, new_team_id: str, project_name: Optional[str], league_id: str, parsed_players_raw_data: Optional[List[Dict[str, Any]]] = None, **kwargs) -> Dict[str, Any]:
+async def _handle_cat_save_players(tm_team: TransfermarktTeam, new_team_id: str, project_name: Optional[str], league_id: str, parsed_players_raw_data: Optional[List[Dict[str, Any]]] = None, checkpoint: Optional[TeamCheckpoint] = None, **kwargs) -> Dict[str, Any]:
     print(f"        💾 Saving players for team {tm_team.teamname} (ID: {new_team_id})")
     
     if not parsed_players_raw_data:
@@ -344,9 +387,24 @@ async def _handle_cat_save_players(tm_team: TransfermarktTeam, new_team_id: str,
         }
     
     try:
-        print(f"        💾 Saving {len(parsed_players_raw_data)} players to project '{project_name}'...")
-        save_result = await save_players_to_project(project_name, parsed_players_raw_data, new_team_id, tm_team.teamname, league_id)
-        print(f"        📋 Save result: {save_result}")
+        # A resumed run may have saved the players already: the team's links are written
+        # last, so existing links mean the squad is on disk (new player IDs must not be reused)
+        existing_links = await asyncio.to_thread(_team_rows, project_name, "teamplayerlinks.json", "teamid", new_team_id)
+        if existing_links:
+            print(f"        💾 Players of {tm_team.teamname} already saved ({len(existing_links)} links)")
+            save_result = {"status": "success", "message": "Players already saved",
+                           "player_ids": [str(link.get("playerid")) for link in existing_links]}
+        else:
+            # The player IDs are checkpointed before any player is written: a run stopped
+            # between the players and the links saves the same IDs again (keeping the players
+            # already written) instead of adding the squad a second time
+            first_player_id = checkpoint.reserved_ids("playerid") if checkpoint else None
+            if checkpoint and first_player_id is None:
+                first_player_id = await asyncio.to_thread(allocate_ids, project_name, "playerid", len(parsed_players_raw_data))
+                await asyncio.to_thread(checkpoint.reserve_ids, "playerid", first_player_id)
+            print(f"        💾 Saving {len(parsed_players_raw_data)} players to project '{project_name}'...")
+            save_result = await save_players_to_project(project_name, parsed_players_raw_data, new_team_id, tm_team.teamname, league_id, first_player_id)
+            print(f"        📋 Save result: {save_result}")
         
         # Prepare player data with new IDs for tactics handler
         saved_player_data = []
@@ -354,13 +412,14 @@ async def _handle_cat_save_players(tm_team: TransfermarktTeam, new_team_id: str,
             # Load the saved players to get their full data including positions
             try:
                 players_file = f'../projects/{project_name}/data/fifa_ng_db/players.json'
-                all_players = await asyncio.to_thread(load_json_file, players_file)
+                players_index = await asyncio.to_thread(get_index, players_file)
                 
-                # Find the newly saved players by their IDs
+                # Find the newly saved players by their IDs (playerid index lookup)
                 saved_ids = save_result.get("player_ids", [])
-                for player in all_players:
-                    player_id = str(player.get("playerid", ""))
-                    if player_id in [str(sid) for sid in saved_ids]:
+                for sid in saved_ids:
+                    player = players_index.get(sid)
+                    if player:
+                        player_id = str(player.get("playerid", ""))
                         saved_player_data.append({
                             "playerid": player_id,  # Keep as string for tactics
                             "overallrating": int(player.get("overallrating", 65)),
@@ -424,7 +483,7 @@ async def _handle_cat_tactics(tm_team: TransfermarktTeam, new_team_id: str, proj
         
         # 1. Add formation
         try:
-            formation_result = _add_team_formation(data_dir, new_team_id, tactic)
+            formation_result = await asyncio.to_thread(_add_team_formation, data_dir, new_team_id, tactic)
             data_to_return["formation_status"] = "success" if formation_result else "error"
             data_to_return["formation_message"] = f"Formation {tactic} added"
         except Exception as e:
@@ -433,7 +492,7 @@ async def _handle_cat_tactics(tm_team: TransfermarktTeam, new_team_id: str, proj
         
         # 2. Add default team data
         try:
-            teamdata_result = _add_default_teamdata(data_dir, new_team_id, tactic)
+            teamdata_result = await asyncio.to_thread(_add_default_teamdata, data_dir, new_team_id, tactic)
             data_to_return["teamdata_status"] = "success" if teamdata_result else "error"
             data_to_return["teamdata_message"] = f"Team data {tactic} added"
         except Exception as e:
@@ -442,7 +501,7 @@ async def _handle_cat_tactics(tm_team: TransfermarktTeam, new_team_id: str, proj
         
         # 3. Add teamsheet with players
         try:
-            teamsheet_result = _add_default_teamsheet(data_dir, new_team_id, players_data, tactic)
+            teamsheet_result = await asyncio.to_thread(_add_default_teamsheet, data_dir, new_team_id, players_data, tactic)
             data_to_return["teamsheet_status"] = "success" if teamsheet_result else "error"
             data_to_return["teamsheet_message"] = f"Teamsheet {tactic} added with {len(players_data)} players"
         except Exception as e:
@@ -451,7 +510,7 @@ async def _handle_cat_tactics(tm_team: TransfermarktTeam, new_team_id: str, proj
         
         # 4. Add mentalities
         try:
-            mentalities_result = _add_default_mentalities(data_dir, new_team_id, players_data, tactic)
+            mentalities_result = await asyncio.to_thread(_add_default_mentalities, data_dir, new_team_id, players_data, tactic)
             data_to_return["mentalities_status"] = "success" if mentalities_result else "error"
             data_to_return["mentalities_message"] = f"Mentalities {tactic} added"
             data_to_return["mentalities_count"] = len(mentalities_result) if mentalities_result else 0
@@ -547,19 +606,27 @@ category_data_generators: Dict[int, GeneratorFuncType] = {
 # Each step has a 'name' for UI/logging and a 'handler' function.
 # functools.partial is used to adapt the generic _handle_simple_data_category
 # to specific generator functions from category_data_generators.
+# 'inputs'/'outputs' name what a step needs from / hands to other steps: outputs
+# present in a handler's result are taken out of it (not team fields) and passed
+# to the steps listing them as inputs, as keyword arguments. Markers such as
+# "crest" (logo file on disk) carry no value and only order the steps.
+# generate_team_data runs every step as soon as the steps producing its inputs
+# are done; steps without inputs start right away.
 
 TEAM_PROCESSING_STEPS = [
-    {"name": "📥 Downloading team logo", "handler": _handle_cat0_logo_download},
+    {"name": "📥 Downloading team logo", "handler": _handle_cat0_logo_download, "outputs": ("crest",)},
     {"name": "🏷️ Basic team info", "handler": functools.partial(_handle_simple_data_category, category_data_generators[1])},
     {"name": "🏟️ Stadium information", "handler": functools.partial(_handle_simple_data_category, category_data_generators[2])},
     {"name": "🧢 Branding and visual elements", "handler": functools.partial(_handle_simple_data_category, category_data_generators[3])},
-    {"name": "🎨 Team colors", "handler": _handle_cat4_team_colors},
+    {"name": "🎨 Team colors", "handler": _handle_cat4_team_colors, "inputs": ("crest",)}, # Colours are extracted from the downloaded logo
     {"name": "🥅 Goal net colors and styles", "handler": functools.partial(_handle_simple_data_category, category_data_generators[5])},
-    {"name": "⚽ Processing team players", "handler": _handle_cat_process_players},
-    {"name": "💾 Saving team players", "handler": _handle_cat_save_players},
-    {"name": "📊 Team ratings", "handler": functools.partial(_handle_simple_data_category, category_data_generators[6])},
+    {"name": "⚽ Processing team players", "handler": _handle_cat_process_players, "outputs": ("parsed_players_raw_data",)},
+    {"name": "💾 Saving team players", "handler": _handle_cat_save_players, "inputs": ("parsed_players_raw_data",), "outputs": ("saved_players_for_tactics",)},
+    {"name": "📊 Team ratings", "handler": functools.partial(_handle_simple_data_category, category_data_generators[6]), "outputs": ("team_ratings",)},
     {"name": "⚽ Tactics and gameplay style", "handler": functools.partial(_handle_simple_data_category, category_data_generators[7])},
-    {"name": "🎯 Team formations and tactics", "handler": lambda tm_team, new_team_id, project_name, league_id, **kwargs: _handle_cat_tactics(tm_team, new_team_id, project_name, league_id, **kwargs)},
+    # Tactics recalculate the team ratings from the saved players: they must override the generated ones
+    {"name": "🎯 Team formations and tactics", "handler": lambda tm_team, new_team_id, project_name, league_id, **kwargs: _handle_cat_tactics(tm_team, new_team_id, project_name, league_id, **kwargs),
+     "inputs": ("parsed_players_raw_data", "saved_players_for_tactics", "team_ratings")},
     {"name": "🧠 Player roles", "handler": functools.partial(_handle_simple_data_category, category_data_generators[8])},
     {"name": "🏆 Trophies and achievements", "handler": functools.partial(_handle_simple_data_category, category_data_generators[9])},
     {"name": "💰 Finances and prestige", "handler": functools.partial(_handle_simple_data_category, category_data_generators[10])},
@@ -567,12 +634,27 @@ TEAM_PROCESSING_STEPS = [
     {"name": "🧩 Miscellaneous parameters", "handler": functools.partial(_handle_simple_data_category, category_data_generators[12])},
     {"name": "🔗 Connecting to league", "handler": _handle_cat13_league_connection},
     {"name": "🏟️ Adding stadium link", "handler": _handle_cat14_stadium_link},
-    {"name": "👕 Adding team kits", "handler": _handle_cat15_team_kits},
+    {"name": "👕 Adding team kits", "handler": _handle_cat15_team_kits}, # Kits come from fixed templates, not the team colours
     {"name": "👨‍💼 Creating team manager", "handler": _handle_cat16_manager},
     {"name": "🌐 Processing language strings", "handler": _handle_cat17_language_strings},
 ]
 
 
+def _step_dependencies(steps: List[Dict[str, Any]]) -> List[List[int]]:
+    """For each step, the indexes of the steps producing its inputs (producers must come first: no cycles)"""
+    producers: Dict[str, int] = {}
+    dependencies = []
+    for i, step in enumerate(steps):
+        missing = [name for name in step.get("inputs", ()) if name not in producers]
+        if missing:
+            raise ValueError(f"Step '{step['name']}' needs {missing}, not produced by an earlier step")
+        dependencies.append(sorted({producers[name] for name in step.get("inputs", ())}))
+        for name in step.get("outputs", ()):
+            producers[name] = i
+    return dependencies
+
+TEAM_STEP_DEPENDENCIES = _step_dependencies(TEAM_PROCESSING_STEPS)
+
 def clean_team_data_for_fifa(team_data: Dict[str, Any]) -> Dict[str, Any]:
     """Clean team data to only include FIFA-needed fields, removing processing statuses"""
     
@@ -636,95 +718,146 @@ def clean_team_data_for_fifa(team_data: Dict[str, Any]) -> Dict[str, Any]:
     
     return cleaned_data
 
+STEP_SUCCESS_STATUSES = ("success", "completed")
+
+def _step_succeeded(step_result: Optional[Dict[str, Any]]) -> bool:
+    """
+    True when every *_status field of a step result reports success (steps
+    without status fields only generate values). Warnings and skipped work
+    (no squad parsed, nothing saved) are not success.
+    """
+    return all(value in STEP_SUCCESS_STATUSES for key, value in (step_result or {}).items() if key.endswith("_status"))
+
 async def generate_team_data(
     tm_team: TransfermarktTeam, 
     new_team_id: str, 
     league_id: str, 
     project_name: Optional[str] = None, 
     progress_callback: Optional[Callable] = None, 
-    team_data_callback: Optional[Callable] = None
+    team_data_callback: Optional[Callable] = None,
+    checkpoint: Optional[TeamCheckpoint] = None
 ) -> Dict[str, Any]:
-    """Generate FIFA team data from Transfermarkt team with categorized fields"""
+    """
+    Generate FIFA team data from Transfermarkt team with categorized fields.
+    Steps run concurrently along TEAM_STEP_DEPENDENCIES; progress_callback is
+    called as each step starts (with the step's position in TEAM_PROCESSING_STEPS)
+    and team_data_callback with each step's result.
+    With a checkpoint, every successful step is recorded in it and steps it already
+    holds are not run again: their recorded result and outputs are used.
+    """
+    total_steps = len(TEAM_PROCESSING_STEPS)
+    step_results: List[Optional[Dict[str, Any]]] = [None] * total_steps
+    step_outputs: Dict[str, Any] = {} # Values handed between steps (e.g. parsed_players_raw_data)
+    completed_steps = checkpoint.completed_steps() if checkpoint else {}
     
-    team_data: Dict[str, Any] = {}
-    parsed_players_raw_data: Optional[List[Dict[str, Any]]] = None
-    
-    for i, step_config in enumerate(TEAM_PROCESSING_STEPS):
+    async def run_step(i: int, dependency_tasks: List[asyncio.Task]):
+        if dependency_tasks:
+            await asyncio.gather(*dependency_tasks)
+        step_config = TEAM_PROCESSING_STEPS[i]
         category_name = step_config["name"]
-        handler_func = step_config["handler"]
         
         if progress_callback:
-            progress_callback(category_name, i, len(TEAM_PROCESSING_STEPS))
-        
-        # Pass parsed_players_raw_data to save handler and tactics handler
-        if category_name in ["💾 Saving team players", "🎯 Team formations and tactics"]:
-            if category_name == "🎯 Team formations and tactics":
-                # Pass both raw data and saved player data to tactics handler
-                category_result_data = await handler_func(
-                    tm_team=tm_team,
-                    new_team_id=new_team_id,
-                    project_name=project_name,
-                    league_id=league_id,
-                    parsed_players_raw_data=parsed_players_raw_data,
-                    saved_players_for_tactics=saved_players_for_tactics
-                )
-            else:
-                category_result_data = await handler_func(
-                    tm_team=tm_team,
-                    new_team_id=new_team_id,
-                    project_name=project_name,
-                    league_id=league_id,
-                    parsed_players_raw_data=parsed_players_raw_data
-                )
-        else:
-            # All handlers are async and share a common signature pattern
-            # (tm_team, new_team_id, project_name, league_id are passed)
-            # kwargs in handler signatures are for flexibility if some need more,
-            # or for functools.partial to pass pre-set arguments.
-            category_result_data = await handler_func(
-                tm_team=tm_team,
-                new_team_id=new_team_id,
-                project_name=project_name,
-                league_id=league_id
-                # team_data_callback is not passed to handlers in this version,
-                # as the main loop handles calling it with the result.
-                # If a handler needs *finer-grained* internal updates, it could be passed.
-            )
+            progress_callback(category_name, i, total_steps)
         
+        if category_name in completed_steps:
+            # Done by an earlier run of this team
+            category_result_data, outputs = completed_steps[category_name]
+            step_outputs.update(outputs)
+            if category_result_data:
+                step_results[i] = category_result_data
+                if team_data_callback:
+                    team_data_callback(tm_team.teamname, category_result_data)
+            return
+        
+        # All handlers are async and share a common signature pattern
+        # (tm_team, new_team_id, project_name, league_id, checkpoint are passed) plus the step's inputs;
+        # kwargs in handler signatures are for flexibility and for functools.partial
+        category_result_data = await step_config["handler"](
+            tm_team=tm_team,
+            new_team_id=new_team_id,
+            project_name=project_name,
+            league_id=league_id,
+            checkpoint=checkpoint,
+            **{name: step_outputs.get(name) for name in step_config.get("inputs", ())}
+        )
+        
+        outputs: Dict[str, Any] = {}
         if category_result_data: # If the handler returned data
-            # Extract parsed_players_raw_data if present
-            if "parsed_players_raw_data" in category_result_data:
-                parsed_players_raw_data = category_result_data.pop("parsed_players_raw_data")
-            # Extract saved_players_for_tactics if present
-            if "saved_players_for_tactics" in category_result_data:
-                saved_players_for_tactics = category_result_data.pop("saved_players_for_tactics")
-            
-            team_data.update(category_result_data)
+            # Values for later steps are not team fields
+            for name in step_config.get("outputs", ()):
+                if name in category_result_data:
+                    outputs[name] = category_result_data.pop(name)
+            step_outputs.update(outputs)
+            step_results[i] = category_result_data
             if team_data_callback:
                 # Send the data specific to this category/step
                 team_data_callback(tm_team.teamname, category_result_data)
-        
-        await asyncio.sleep(0.1) # Maintained from original code for pacing
+        # Only a successful step is kept: errors, warnings and skipped work are tried again on resume
+        if checkpoint and _step_succeeded(category_result_data):
+            await asyncio.to_thread(checkpoint.record_step, category_name, category_result_data, outputs)
+    
+    step_tasks: List[asyncio.Task] = []
+    for i, dependencies in enumerate(TEAM_STEP_DEPENDENCIES):
+        step_tasks.append(asyncio.create_task(run_step(i, [step_tasks[d] for d in dependencies])))
+    try:
+        await asyncio.gather(*step_tasks)
+    except BaseException:
+        # A failed step fails the team: stop its other steps
+        for task in step_tasks:
+            task.cancel()
+        await asyncio.gather(*step_tasks, return_exceptions=True)
+        raise
     
+    # Merged in step order: later steps override earlier fields, as in sequential processing
+    team_data: Dict[str, Any] = {}
+    for category_result_data in step_results:
+        if category_result_data:
+            team_data.update(category_result_data)
     return team_data
 
 
 @router.get("/teams", tags=["teams"])
-async def get_teams(project_id: str = Query(None, description="Project ID to load teams from")):
+async def get_teams(project_id: str = Query(None, description="Project ID to load teams from"),
+                    fields: str = Query(None, description="Comma-separated columns to return (default: all)")):
     """Get teams data from project folder or default file"""
     if project_id:
         try:
-            return load_json_file(f'../projects/{project_id}/data/fifa_ng_db/teams.json')
+            return load_json_file(f'../projects/{project_id}/data/fifa_ng_db/teams.json', fields)
         except HTTPException as e:
             if e.status_code != 404: # pragma: no cover
                 print(f"[ERROR] Error loading project teams: {e.detail}")
             # If 404, will fall through to default
-    return load_json_file('../fc25/data/fifa_ng_db/teams.json')
+    return load_json_file('../fc25/data/fifa_ng_db/teams.json', fields)
 
 
-@router.post("/teams/add-from-transfermarkt", tags=["teams"])
+@router.post("/teams/add-from-transfermarkt", status_code=status.HTTP_202_ACCEPTED, tags=["teams"])
 async def add_teams_from_transfermarkt(request: AddTeamsRequest):
-    """Add teams from Transfermarkt to the game"""
+    """
+    Add teams from Transfermarkt to the game. Runs as a background job: answers 202
+    with the job ID at once, progress comes over the WebSocket and GET /jobs/{job_id}
+    (the result holds the new team IDs). Teams of a run that did not finish are
+    resumed from their checkpoints when the same teams are added again.
+    """
+    if not request.teams:
+        raise HTTPException(status_code=400, detail="No teams to add")
+    if request.project_id and not (Path("projects") / request.project_id).is_dir():
+        raise HTTPException(status_code=404, detail=f"Project {request.project_id} not found")
+    
+    job = submit_job(
+        "add_teams", run_add_teams, request,
+        priority=ADD_TEAMS_JOB_PRIORITY if request.priority is None else request.priority,
+        params={"project_id": request.project_id, "league_id": request.league_id,
+                "teams": [team.teamname for team in request.teams]},
+    )
+    print(f"📥 Добавление {len(request.teams)} команд поставлено в очередь (job {job.id})")
+    return accepted_response(job, f"Adding {len(request.teams)} teams")
+
+
+async def run_add_teams(request: AddTeamsRequest) -> Dict[str, Any]:
+    """Add-teams job: creates the teams of the request, returns the new team IDs"""
+    run_id = uuid.uuid4().hex
+    checkpoint_keys = [checkpoint_key(request.league_id, team.team_id, team.team_url) for team in request.teams]
+    succeeded = False
     try:
         print(f"\n🚀 Начинается создание команд")
         print(f"📊 Проект: {request.project_id if request.project_id else 'default'}")
@@ -747,11 +880,6 @@ async def add_teams_from_transfermarkt(request: AddTeamsRequest):
         
         teams_file_path = f'../projects/{request.project_id}/data/fifa_ng_db/teams.json' if request.project_id else '../fc25/data/fifa_ng_db/teams.json'
         
-        try:
-            teams_data_list = load_json_file(teams_file_path) # Changed variable name
-        except HTTPException:
-            teams_data_list = []
-        
         send_progress_sync({
             "type": "progress", "function_name": "add_teams", "operation": "add_teams",
             "message": f"Starting to add {len(request.teams)} teams...",
@@ -759,37 +887,77 @@ async def add_teams_from_transfermarkt(request: AddTeamsRequest):
             "completed_teams": [], "current_team": None
         })
         
+        total_teams = len(request.teams)
+        concurrency = max(1, min(request.concurrency or ADD_TEAMS_CONCURRENCY, MAX_CONCURRENT_TEAMS))
+        print(f"⚙️ Параллельно обрабатывается команд: {concurrency}")
+        
+        # Teams of an unfinished earlier run keep their team ID and completed steps
+        checkpoints = claim_checkpoints(request.project_id, run_id, zip(checkpoint_keys, (team.teamname for team in request.teams)))
+        if not request.resume:
+            checkpoints = [None] * total_teams
+        resumed = sum(1 for checkpoint in checkpoints if checkpoint is not None)
+        if resumed:
+            print(f"♻️ Продолжение прерванного добавления: {resumed} команд из контрольных точек")
+        
+        # Team IDs of the other teams are reserved up front, in request order, so teams
+        # processed at the same time never share an ID. Project IDs come from the project's
+        # ID allocator (no table scan, and concurrent add-teams runs get different IDs)
+        new_indexes = [i for i, checkpoint in enumerate(checkpoints) if checkpoint is None]
+        if not new_indexes:
+            first_team_id = 0
+        elif request.project_id:
+            first_team_id = await asyncio.to_thread(allocate_ids, request.project_id, "teamid", len(new_indexes))
+        else:
+            try:
+                teams_data_list = load_json_file(teams_file_path) # Changed variable name
+            except HTTPException:
+                teams_data_list = []
+            first_team_id = int(get_next_team_id(teams_data_list))
+            # Resumed teams may not be in the table yet
+            first_team_id = max([first_team_id] + [int(checkpoint.teamid) + 1 for checkpoint in checkpoints if checkpoint is not None])
+        for n, i in enumerate(new_indexes):
+            checkpoints[i] = await asyncio.to_thread(
+                start_checkpoint, request.project_id, checkpoint_keys[i], str(first_team_id + n), request.teams[i].teamname)
+        new_team_ids = [checkpoint.teamid for checkpoint in checkpoints]
+        
         completed_teams_log = [] # Renamed to avoid conflict
         accumulated_team_data_for_ws = {} # Renamed for clarity
+        generated_teams: List[Optional[Dict[str, Any]]] = [None] * total_teams # Saved in request order
+        team_fractions = [0.0] * total_teams # Share of each team's steps done, for the overall percentage
+        request_slots = asyncio.Semaphore(concurrency)
+        
+        def overall_percentage() -> float:
+            return (sum(team_fractions) / total_teams) * 100
         
-        for i, tm_team_item in enumerate(request.teams): # Renamed loop var
+        async def process_team(i: int, tm_team_item: TransfermarktTeam, new_team_id: str):
             current_team_name = tm_team_item.teamname
+            # Initialize this team's data in the accumulator
+            if current_team_name not in accumulated_team_data_for_ws:
+                accumulated_team_data_for_ws[current_team_name] = {}
+            # Progress messages carry only their own team (clients merge team_data by
+            # team name and track per-team state by current_team); the final message
+            # carries every team
+            current_team_data_for_ws = {current_team_name: accumulated_team_data_for_ws[current_team_name]}
             send_progress_sync({
                 "type": "progress", "function_name": "add_teams", "operation": "add_teams",
-                "message": f"Processing team {i + 1} of {len(request.teams)}: {current_team_name}",
-                "current": i, "total": len(request.teams), "percentage": (i / len(request.teams)) * 100,
+                "message": f"Processing team {i + 1} of {total_teams}: {current_team_name}",
+                "current": i, "total": total_teams, "percentage": overall_percentage(),
                 "completed_teams": completed_teams_log, "current_team": current_team_name,
                 "current_category": None, "category_progress": 0,
-                "team_data": accumulated_team_data_for_ws # Send the whole accumulated data
+                "team_data": current_team_data_for_ws
             })
             
-            new_team_id = get_next_team_id(teams_data_list)
-            
-            # Initialize this team's data in the accumulator
-            if current_team_name not in accumulated_team_data_for_ws:
-                accumulated_team_data_for_ws[current_team_name] = {}
-            
             def category_progress_callback(category_name, category_index, total_categories):
                 category_percentage = ((category_index + 1) / total_categories) * 100
-                overall_percentage = ((i + (category_index + 1) / total_categories) / len(request.teams)) * 100
+                team_fractions[i] = (category_index + 1) / total_categories
                 
                 send_progress_sync({
                     "type": "progress", "function_name": "add_teams", "operation": "add_teams",
                     "message": f"Creating {current_team_name}: {category_name}",
-                    "current": i, "total": len(request.teams), "percentage": overall_percentage,
+                    "current": i, "total": total_teams, "percentage": overall_percentage(),
                     "completed_teams": completed_teams_log, "current_team": current_team_name,
                     "current_category": category_name, "category_progress": category_percentage,
-                    "team_data": accumulated_team_data_for_ws
+                    "team_data": current_team_data_for_ws
                 })
             
             def team_data_update_callback(team_name_cb: str, new_data_for_category: Dict[str, Any]):
@@ -803,36 +971,59 @@ async def add_teams_from_transfermarkt(request: AddTeamsRequest):
                 # The progress message has already been sent by category_progress_callback
                 # This is just updating the team_data
 
-            generated_team_full_data = await generate_team_data(
-                tm_team_item, new_team_id, request.league_id, request.project_id, 
-                category_progress_callback, team_data_update_callback
-            )
-            
-            # Clean team data to only include FIFA-relevant fields before saving
-            cleaned_team_data = clean_team_data_for_fifa(generated_team_full_data)
-            teams_data_list.append(cleaned_team_data)
+            # A team finished by an earlier run of the request is not processed again
+            saved_team = None
+            if checkpoints[i].completed:
+                saved_team = await asyncio.to_thread(get_row, teams_file_path, new_team_id)
+            if saved_team is not None:
+                print(f"♻️ Команда {current_team_name} уже добавлена (ID {new_team_id})")
+                generated_teams[i] = saved_team
+                accumulated_team_data_for_ws[current_team_name].update(saved_team)
+            else:
+                generated_team_full_data = await generate_team_data(
+                    tm_team_item, new_team_id, request.league_id, request.project_id, 
+                    category_progress_callback, team_data_update_callback, checkpoints[i]
+                )
+                
+                # Clean team data to only include FIFA-relevant fields before saving
+                generated_teams[i] = clean_team_data_for_fifa(generated_team_full_data)
+                # Saved as soon as the team is done, so a run stopped later keeps it (players,
+                # links and kits of the team are already on disk). A resumed team may be saved already
+                if not await asyncio.to_thread(row_exists, teams_file_path, new_team_id):
+                    await asyncio.to_thread(append_rows, teams_file_path, [generated_teams[i]])
+                await asyncio.to_thread(checkpoints[i].mark_completed)
+            team_fractions[i] = 1.0
             completed_teams_log.append(tm_team_item.team_id) # Using Transfermarkt's original ID for logging completion
             
             send_progress_sync({
                 "type": "progress", "function_name": "add_teams", "operation": "add_teams",
-                "message": f"Completed team {i + 1} of {len(request.teams)}: {current_team_name}",
-                "current": i + 1, "total": len(request.teams), "percentage": ((i + 1) / len(request.teams)) * 100,
+                "message": f"Completed team {i + 1} of {total_teams}: {current_team_name}",
+                "current": i + 1, "total": total_teams, "percentage": overall_percentage(),
                 "completed_teams": completed_teams_log, "current_team": None, # Current team finished
                 "current_category": "✅ Team completed", "category_progress": 100,
-                "team_data": accumulated_team_data_for_ws
+                "team_data": current_team_data_for_ws
             })
-            await asyncio.sleep(0.2) # Maintained pause
         
-        print(f"\n💾 Сохранение {len(teams_data_list)} команд...")
+        async def process_team_in_slot(i: int, tm_team_item: TransfermarktTeam):
+            # Per-request limit first: a request waiting for server-wide slots holds none of them
+            async with request_slots:
+                async with _global_team_slots():
+                    await process_team(i, tm_team_item, new_team_ids[i])
+        
+        team_tasks = [asyncio.create_task(process_team_in_slot(i, tm_team_item)) for i, tm_team_item in enumerate(request.teams)]
         try:
-            # save_json_file is sync, run in thread if it's significantly blocking
-            await asyncio.to_thread(save_json_file, teams_file_path, teams_data_list)
-            print(f"✅ Команды успешно сохранены!")
-        except Exception as e: # pragma: no cover
-            print(f"❌ Ошибка сохранения: {e}")
+            await asyncio.gather(*team_tasks)
+        except BaseException:
+            # One failed team fails the request: stop the others instead of leaving them running
+            for task in team_tasks:
+                task.cancel()
+            await asyncio.gather(*team_tasks, return_exceptions=True)
             raise
         
-        await asyncio.sleep(0.5)
+        print(f"✅ Команды успешно сохранены: {len(generated_teams)}")
+        succeeded = True
+        await asyncio.to_thread(release_checkpoints, request.project_id, run_id, checkpoint_keys, True)
+        
         send_progress_sync({
             "status": "completed", "type": "final_status", # Added type for clarity on client
             "function_name": "add_teams", "operation": "add_teams",
@@ -841,15 +1032,25 @@ async def add_teams_from_transfermarkt(request: AddTeamsRequest):
             "completed_teams": completed_teams_log,
             "team_data": accumulated_team_data_for_ws # Final state of all processed teams' data
         })
-        await asyncio.sleep(0.3)
+        # The clients get the final status (and everything before it) before the job finishes
+        await drain_progress()
         
-        newly_added_team_ids = [t.get("teamid", "unknown") for t in teams_data_list[-len(request.teams):]] if len(teams_data_list) >= len(request.teams) else []
+        newly_added_team_ids = [t.get("teamid", "unknown") for t in generated_teams]
         
         return {
             "status": "success", "message": f"Successfully added {len(request.teams)} teams",
             "teams_added": len(request.teams), "new_team_ids": newly_added_team_ids
         }
         
+    except asyncio.CancelledError:
+        print(f"⛔ Создание команд отменено")
+        send_progress_sync({
+            "status": "cancelled", "type": "final_status",
+            "function_name": "add_teams", "operation": "add_teams",
+            "message": "Adding teams was cancelled"
+        })
+        await drain_progress()
+        raise
     except Exception as e: # pragma: no cover
         print(f"❌ Ошибка при создании команд: {str(e)}")
         send_progress_sync({
@@ -857,4 +1058,9 @@ async def add_teams_from_transfermarkt(request: AddTeamsRequest):
             "function_name": "add_teams", "operation": "add_teams",
             "message": f"Error adding teams: {str(e)}"
         })
-        raise HTTPException(status_code=500, detail=f"Error adding teams: {str(e)}")
\ No newline at end of file
+        await drain_progress()
+        raise RuntimeError(f"Error adding teams: {str(e)}") from e
+    finally:
+        if not succeeded:
+            # Checkpoints stay for the next run of these teams
+            release_checkpoints(request.project_id, run_id, checkpoint_keys, False)
\ No newline at end of file
@@ -1,26 +1,28 @@
 from fastapi import APIRouter, Query, HTTPException, Body
 from .utils import load_json_file
+from .utils.tables import get_multi_index, get_rows, table_len, table_exists
+from .utils.unit_of_work import UnitOfWork
 from pathlib import Path
 import json
 from typing import List, Dict, Any
 import asyncio
-import aiofiles
 import time
 
 router = APIRouter()
 
 @router.get("/teamstadiumlinks", tags=["teamstadiumlinks"])
-async def get_teamstadiumlinks(project_id: str = Query(None, description="Project ID to load teamstadiumlinks from")):
+async def get_teamstadiumlinks(project_id: str = Query(None, description="Project ID to load teamstadiumlinks from"),
+                               fields: str = Query(None, description="Comma-separated columns to return (default: all)")):
     """Get teamstadiumlinks data from project folder or default file"""
     
     if project_id:
         try:
-            return load_json_file(f'../projects/{project_id}/data/fifa_ng_db/teamstadiumlinks.json')
+            return load_json_file(f'../projects/{project_id}/data/fifa_ng_db/teamstadiumlinks.json', fields)
         except HTTPException as e:
             if e.status_code != 404:
                 print(f"[ERROR] Error loading project teamstadiumlinks: {e.detail}")
     
-    return load_json_file('../fc25/data/fifa_ng_db/teamstadiumlinks.json')
+    return load_json_file('../fc25/data/fifa_ng_db/teamstadiumlinks.json', fields)
 
 @router.post("/{project_name}/add-team-stadiums")
 async def add_team_stadiums(
@@ -40,99 +42,76 @@ async def add_team_stadiums(
     
     # Путь к файлу teamstadiumlinks.json
     links_file = Path("projects") / project_name / "data" / "fifa_ng_db" / "teamstadiumlinks.json"
-    
-    
-    # Создаем папки если они не существуют
-    links_file.parent.mkdir(parents=True, exist_ok=True)
-    
-    # Если файл не существует, создаем пустой список
-    if not links_file.exists():
-        async with aiofiles.open(links_file, 'w', encoding='utf-8') as f:
-            await f.write('[]')
+    links_path = str(links_file.resolve())
     
     try:
         start_time = time.time()
         
-        # Асинхронно читаем данные из файла
-        async with aiofiles.open(links_file, 'r', encoding='utf-8') as f:
-            content = await f.read()
-            links = json.loads(content)
+        # Таблица заблокирована от проверки до записи: параллельные запросы не создадут две связи для команды
+        async with UnitOfWork(links_path) as uow:
+            # Индекс teamid -> связи (строится один раз на версию таблицы); нет таблицы - нет связей
+            try:
+                links_by_team = await asyncio.to_thread(get_multi_index, links_path, "teamid")
+            except FileNotFoundError:
+                links_by_team = {}
         
-        read_time = time.time() - start_time
-        
-        # Проверяем, что мы получили валидные данные
-        team_ids = []
-        for item in data:
-            if "teamid" in item:
-                # Преобразуем teamid в int, если это строка
-                team_id = item.get("teamid")
-                if isinstance(team_id, str):
-                    team_ids.append(int(team_id))
-                else:
-                    team_ids.append(team_id)
+            # Проверяем, что мы получили валидные данные
+            team_ids = []
+            for item in data:
+                if "teamid" in item:
+                    # Преобразуем teamid в int, если это строка
+                    team_id = item.get("teamid")
+                    if isinstance(team_id, str):
+                        team_ids.append(int(team_id))
+                    else:
+                        team_ids.append(team_id)
                     
-        if not team_ids:
-            raise HTTPException(status_code=400, detail="Не указаны ID команд для добавления стадионов")
-        
+            if not team_ids:
+                raise HTTPException(status_code=400, detail="Не указаны ID команд для добавления стадионов")
         
-        # Значения по умолчанию для стадиона
-        default_stadium_id = 34  # _Town Park
-        default_stadium_name = "_Town Park"
         
-        # Создаем набор существующих связей для быстрой проверки
-        existing_team_ids = set()
-        for link in links:
-            team_id = link.get("teamid")
-            if team_id is not None:
-                existing_team_ids.add(int(team_id))
+            # Значения по умолчанию для стадиона
+            default_stadium_id = 34  # _Town Park
+            default_stadium_name = "_Town Park"
         
-        
-        # Добавляем новые связи
-        added_count = 0
-        for team_data in data:
-            team_id = team_data.get("teamid")
-            # Преобразуем teamid в int, если это строка
-            if isinstance(team_id, str):
-                team_id = int(team_id)
+            # Добавляем новые связи
+            new_links = []
+            added_team_ids = set()
+            added_count = 0
+            for team_data in data:
+                team_id = team_data.get("teamid")
+                # Преобразуем teamid в int, если это строка
+                if isinstance(team_id, str):
+                    team_id = int(team_id)
                 
-            if team_id is None:
-                continue
+                if team_id is None:
+                    continue
                 
-            # Проверяем, существует ли уже связь для этой команды
-            if team_id in existing_team_ids:
-                continue
+                # Проверяем, существует ли уже связь для этой команды
+                if team_id in links_by_team or team_id in added_team_ids:
+                    continue
             
-            # Создаем новую связь
-            new_link = {
-                "swapcrowdplacement": 0,
-                "stadiumid": default_stadium_id,
-                "stadiumname": default_stadium_name,
-                "teamid": team_id,  # teamid как int
-                "forcedhome": 0
-            }
+                # Создаем новую связь
+                new_link = {
+                    "swapcrowdplacement": 0,
+                    "stadiumid": default_stadium_id,
+                    "stadiumname": default_stadium_name,
+                    "teamid": team_id,  # teamid как int
+                    "forcedhome": 0
+                }
             
-            links.append(new_link)
-            existing_team_ids.add(team_id)  # Добавляем в набор для предотвращения дублирования
-            added_count += 1
+                new_links.append(new_link)
+                added_team_ids.add(team_id)  # Добавляем в набор для предотвращения дублирования
+                added_count += 1
         
-        # Если были добавлены связи, сохраняем файл асинхронно
-        if added_count > 0:
-            write_start = time.time()
-            
-            # Сериализуем JSON с отступами для читаемости
-            json_content = json.dumps(links, ensure_ascii=False, indent=2)
-            
-            async with aiofiles.open(links_file, 'w', encoding='utf-8') as f:
-                await f.write(json_content)
-            
-            write_time = time.time() - write_start
-            total_time = time.time() - start_time
+            # Новые связи дописываются одним вызовом при выходе из блока (с отступами для читаемости)
+            uow.append(links_path, new_links, 2)
         
         return {
             "status": "success",
             "message": f"Добавлено {added_count} связей команд со стадионами",
             "added_count": added_count,
-            "total_records": len(links),
+            "total_records": table_len(links_path),
             "processing_time": f"{time.time() - start_time:.2f}s"
         }
         
@@ -172,22 +151,19 @@ async def get_team_stadium_link(project_name: str, team_id: int) -> dict:
     # Путь к файлу teamstadiumlinks.json
     links_file = Path("projects") / project_name / "data/fifa_ng_db/teamstadiumlinks.json"
     
-    if not links_file.exists():
+    if not table_exists(str(links_file.resolve())):
         raise HTTPException(status_code=404, detail="Файл teamstadiumlinks.json не найден")
     
     try:
-        with open(links_file, 'r', encoding='utf-8') as f:
-            links = json.load(f)
-            
-            # Ищем связь для команды
-            link = next((l for l in links if l.get("teamid") == team_id), None)
-            
-            if not link:
-                raise HTTPException(status_code=404, detail=f"Связь для команды {team_id} не найдена")
-            
-            return link
+        # Ищем связь для команды по индексу teamid
+        team_links = get_rows(str(links_file.resolve()), "teamid", team_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка при чтении файла: {str(e)}")
+    
+    if not team_links:
+        raise HTTPException(status_code=404, detail=f"Связь для команды {team_id} не найдена")
+    
+    return team_links[0]
 
 # Функция для добавления стадионов команды без HTTP запроса
 async def add_team_stadiums_internal(project_name: str, team_ids: List[str]) -> Dict[str, Any]:
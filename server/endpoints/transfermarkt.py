@@ -1,30 +1,34 @@
-from fastapi import APIRouter, BackgroundTasks, HTTPException
+from fastapi import APIRouter, HTTPException
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-import threading
 import os
 import json
-import cloudscraper # type: ignore
-from bs4 import BeautifulSoup, Tag
 import time
 import logging
 import random
 import re
 from datetime import datetime, timedelta, timezone
 from .websocket import send_progress_sync
+from .jobs import accepted_response, cancel_jobs, cancel_requested, kind_status, result_summary, submit_job
+from .utils import json_codec
+from .utils.lazy_import import lazy_module
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import queue
 from threading import Lock
 from pathlib import Path
 from typing import Any, Dict, List, Tuple, Optional
 from urllib.parse import urlparse, urljoin
-import requests
-from PIL import Image
 from io import BytesIO
-from nameparser import HumanName
 import traceback
 from fastapi import status
 
+# Scraping/image libraries load on first use (see utils/lazy_import.py)
+cloudscraper = lazy_module("cloudscraper")
+bs4 = lazy_module("bs4")
+requests = lazy_module("requests")
+Image = lazy_module("PIL.Image")
+nameparser = lazy_module("nameparser")
+
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
@@ -72,15 +76,12 @@ ACCEPT_LANGUAGE_HEADERS = [
     "en,de;q=0.9,fr;q=0.8"
 ]
 
-# Глобальные флаги для отмены процессов
-_cancel_flags = {
-    "process_transfermarkt_squads": False,
-    "process_transfermarkt_leagues": False,
-    "process_players_enhanced": False
-}
-
-# Блокировка для безопасного доступа к флагам
-_cancel_lock = threading.Lock()
+# Процессы, запускаемые как фоновые задачи (jobs); имя процесса = kind задачи
+CANCELLABLE_PROCESSES = (
+    "process_transfermarkt_squads",
+    "process_transfermarkt_leagues",
+    "process_players_enhanced"
+)
 
 # Пул scrapers для повторного использования
 _scraper_pool = queue.Queue()
@@ -106,7 +107,7 @@ def load_nation_mapping():
         mapping_file = os.path.join(os.path.dirname(__file__), "../db/tm_fifa_nation_map.json")
         if os.path.exists(mapping_file):
             with open(mapping_file, 'r', encoding='utf-8') as f:
-                NATION_MAPPING = json.load(f)
+                NATION_MAPPING = json_codec.load(f)
             logger.info(f"Loaded {len(NATION_MAPPING)} nation mappings")
         else:
             logger.warning(f"Nation mapping file not found: {mapping_file}")
@@ -255,7 +256,7 @@ def save_squads_safely(squads_data: list, filepath: str) -> bool:
         
         # Сохраняем напрямую в основной файл
         with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(sorted_squads, f, indent=2, ensure_ascii=False)
+            json_codec.dump(sorted_squads, f, indent=2)
         
         # Проверяем что файл создался и имеет содержимое
         if os.path.exists(filepath) and os.path.getsize(filepath) > 0:
@@ -284,7 +285,7 @@ def load_existing_squads(filepath: str) -> list:
             return []
         
         with open(filepath, "r", encoding="utf-8") as f:
-            data = json.load(f)
+            data = json_codec.load(f)
             
         if not isinstance(data, list):
             logger.warning(f"Output file does not contain a list: {filepath}")
@@ -325,21 +326,9 @@ def return_scraper(scraper):
     if _scraper_pool.qsize() < _max_scrapers:
         _scraper_pool.put(scraper)
 
-def set_cancel_flag(function_name: str, value: bool = True):
-    """Установить флаг отмены для функции"""
-    with _cancel_lock:
-        if function_name in _cancel_flags:
-            _cancel_flags[function_name] = value
-            logger.info(f"Cancel flag for {function_name} set to {value}")
-
 def get_cancel_flag(function_name: str) -> bool:
-    """Проверить флаг отмены для функции"""
-    with _cancel_lock:
-        return _cancel_flags.get(function_name, False)
-
-def reset_cancel_flag(function_name: str):
-    """Сбросить флаг отмены для функции"""
-    set_cancel_flag(function_name, False)
+    """Проверить, запрошена ли отмена задачи (job), в которой выполняется функция"""
+    return cancel_requested(function_name)
 
 def format_time_remaining(seconds):
     """Форматирует время в читаемый вид"""
@@ -402,7 +391,7 @@ def squad_url(slug: str | None, vid: str | None, name: str) -> str | None:
         slug = "arsenal-fc"
     return f"{BASE_URL}/{slug}/kader/verein/{vid}/saison_id/{SEASON_TO_SCRAPE}/plus/1"
 
-def get_html(url: str, scraper: cloudscraper.CloudScraper, retries: int = 5, function_name: str = "process_transfermarkt_squads") -> str:
+def get_html(url: str, scraper: "cloudscraper.CloudScraper", retries: int = 5, function_name: str = "process_transfermarkt_squads") -> str:
     """Fetch HTML with improved error handling, random headers and reduced delays"""
     for attempt in range(1, retries + 1):
         try:
@@ -478,7 +467,7 @@ def get_html(url: str, scraper: cloudscraper.CloudScraper, retries: int = 5, fun
     logger.error(f"Failed to fetch {url} after {retries} attempts")
     return ""
 
-def map_headers(row: Tag) -> Dict[str, int]:
+def map_headers(row: "bs4.Tag") -> Dict[str, int]:
     """Map table headers to column indices."""
     titles = [th.get_text(strip=True) for th in row.find_all("th")]
     idx: Dict[str, int] = {}
@@ -489,12 +478,12 @@ def map_headers(row: Tag) -> Dict[str, int]:
                 break
     return idx
 
-def td(cells: List[Tag], idx: Dict[str, int], key: str) -> Tag | None:
+def td(cells: "List[bs4.Tag]", idx: Dict[str, int], key: str) -> "Optional[bs4.Tag]":
     """Get table cell by header key."""
     i = idx.get(key)
     return cells[i] if i is not None and i < len(cells) else None
 
-def parse_player_row(tr: Tag, idx: Dict[str, int]) -> Optional[Dict[str, Any]]:
+def parse_player_row(tr: "bs4.Tag", idx: Dict[str, int]) -> Optional[Dict[str, Any]]:
     """Parse a single player row from the squad table."""
     cells = tr.find_all("td", recursive=False)
     if len(cells) < 10:  # Ensure we have enough columns
@@ -590,14 +579,14 @@ def parse_player_row(tr: Tag, idx: Dict[str, int]) -> Optional[Dict[str, Any]]:
         "player_photo_url": player_photo_url
     }
 
-def scrape_squad(url: str, scraper: cloudscraper.CloudScraper, function_name: str = "process_transfermarkt_squads") -> Tuple[List[Dict[str, Any]], str]:
+def scrape_squad(url: str, scraper: "cloudscraper.CloudScraper", function_name: str = "process_transfermarkt_squads") -> Tuple[List[Dict[str, Any]], str]:
     """Scrape squad data from a Transfermarkt team page."""
     try:
         logger.info(f"Scraping squad from: {url}")
         response = scraper.get(url, timeout=30)
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.content, "html.parser")
+        soup = bs4.BeautifulSoup(response.content, "html.parser")
         
         # Find the squad table
         table = soup.find("table", class_="items")
@@ -742,7 +731,6 @@ def process_single_team_squad(team_data_with_existing, function_name="process_tr
 def process_transfermarkt_squads():
     """Основная функция обработки составов команд с Transfermarkt"""
     function_name = "process_transfermarkt_squads"
-    reset_cancel_flag(function_name)
     
     try:
         # Проверяем флаг отмены
@@ -776,7 +764,7 @@ def process_transfermarkt_squads():
 
         try:
             with open(input_file, "r", encoding="utf-8") as f:
-                league_teams = json.load(f)
+                league_teams = json_codec.load(f)
         except Exception as e:
             error_msg = f"Ошибка чтения файла команд {input_file}: {str(e)}"
             logger.error(error_msg)
@@ -983,16 +971,16 @@ def process_transfermarkt_squads():
 def background_scrape_transfermarkt_squads():
     """Фоновая задача для скрапинга составов Transfermarkt"""
     logger.info("Starting background Transfermarkt squads scrape task")
-    process_transfermarkt_squads()
+    return result_summary(process_transfermarkt_squads(), OUTPUT_FILE)
 
-@router.post("/transfermarkt/scrape_squads", tags=["transfermarkt"])
-def scrape_transfermarkt_squads(background_tasks: BackgroundTasks):
+@router.post("/transfermarkt/scrape_squads", status_code=status.HTTP_202_ACCEPTED, tags=["transfermarkt"])
+async def scrape_transfermarkt_squads():
     """
-    Запускает процесс сбора составов команд с Transfermarkt в фоне.
+    Запускает процесс сбора составов команд с Transfermarkt в фоне (job, см. GET /jobs/{job_id}).
     """
-    background_tasks.add_task(background_scrape_transfermarkt_squads)
-    logger.info("Transfermarkt squads scrape task added to background tasks")
-    return {"status": "processing", "message": "Загрузка составов команд с Transfermarkt начата в фоне. Проверьте файл tm_league_squads.json позже."}
+    job = submit_job("process_transfermarkt_squads", background_scrape_transfermarkt_squads, unique=True)
+    logger.info(f"Transfermarkt squads scrape job {job.id} queued")
+    return accepted_response(job, "Загрузка составов команд с Transfermarkt начата в фоне. Проверьте файл tm_league_squads.json позже.")
 
 @router.get("/transfermarkt/squads", tags=["transfermarkt"])
 def get_transfermarkt_squads():
@@ -1001,7 +989,7 @@ def get_transfermarkt_squads():
     """
     if os.path.exists(OUTPUT_FILE):
         with open(OUTPUT_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
+            data = json_codec.load(f)
         return data
     else:
         return []
@@ -1009,15 +997,15 @@ def get_transfermarkt_squads():
 @router.post("/transfermarkt/cancel_process", tags=["transfermarkt"])
 def cancel_transfermarkt_process(function_name: str):
     """
-    Отменить выполняющийся процесс Transfermarkt по имени функции.
+    Отменить выполняющийся процесс Transfermarkt по имени функции (все его задачи).
     """
-    if function_name not in _cancel_flags:
+    if function_name not in CANCELLABLE_PROCESSES:
         return JSONResponse(
             status_code=400,
             content={"status": "error", "message": f"Unknown process: {function_name}"}
         )
     
-    set_cancel_flag(function_name, True)
+    cancel_jobs(function_name)
     
     # Отправляем уведомление об отмене через WebSocket
     send_progress_sync({
@@ -1035,9 +1023,7 @@ def get_transfermarkt_process_status():
     """
     Получить статус всех процессов Transfermarkt (активные/отмененные).
     """
-    with _cancel_lock:
-        status = {name: {"cancelled": flag} for name, flag in _cancel_flags.items()}
-    return status
+    return {name: kind_status(name) for name in CANCELLABLE_PROCESSES}
 
 def find_idx(headers: list, *keywords: str) -> int | None:
     """
@@ -1057,7 +1043,6 @@ def to_int(text: str) -> int:
 def process_transfermarkt_leagues():
     """Основная функция парсинга лиг с Transfermarkt (до 5 дивизионов)"""
     function_name = "process_transfermarkt_leagues"
-    reset_cancel_flag(function_name)
     
     try:
         # Проверяем флаг отмены
@@ -1123,7 +1108,7 @@ def process_transfermarkt_leagues():
                             logger.warning(f"Failed to get HTML for {url}")
                             break
                         
-                        soup = BeautifulSoup(html, "html.parser")
+                        soup = bs4.BeautifulSoup(html, "html.parser")
                         table = soup.find("table", class_="items")
                         if not table or not table.find("thead"):
                             logger.warning(f"No table found on page {page} of {conf['confederation_name']}")
@@ -1301,7 +1286,7 @@ def process_transfermarkt_leagues():
         }
 
         with open(LEAGUES_OUTPUT_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+            json_codec.dump(data, f, indent=2)
 
         # Финальный прогресс
         total_elapsed = (datetime.now() - start_time).total_seconds()
@@ -1336,16 +1321,16 @@ def process_transfermarkt_leagues():
 def background_scrape_transfermarkt_leagues():
     """Фоновая задача для парсинга лиг Transfermarkt"""
     logger.info("Starting background Transfermarkt leagues scrape task")
-    process_transfermarkt_leagues()
+    return result_summary(process_transfermarkt_leagues(), LEAGUES_OUTPUT_FILE)
 
-@router.post("/transfermarkt/scrape_leagues", tags=["transfermarkt"])
-def scrape_transfermarkt_leagues(background_tasks: BackgroundTasks):
+@router.post("/transfermarkt/scrape_leagues", status_code=status.HTTP_202_ACCEPTED, tags=["transfermarkt"])
+async def scrape_transfermarkt_leagues():
     """
-    Запускает процесс сбора лиг с Transfermarkt (до 5 дивизионов) в фоне.
+    Запускает процесс сбора лиг с Transfermarkt (до 5 дивизионов) в фоне (job, см. GET /jobs/{job_id}).
     """
-    background_tasks.add_task(background_scrape_transfermarkt_leagues)
-    logger.info("Transfermarkt leagues scrape task added to background tasks")
-    return {"status": "processing", "message": "Загрузка лиг с Transfermarkt начата в фоне. Проверьте файл LeaguesFromTransfermarkt.json позже."}
+    job = submit_job("process_transfermarkt_leagues", background_scrape_transfermarkt_leagues, unique=True)
+    logger.info(f"Transfermarkt leagues scrape job {job.id} queued")
+    return accepted_response(job, "Загрузка лиг с Transfermarkt начата в фоне. Проверьте файл LeaguesFromTransfermarkt.json позже.")
 
 @router.get("/transfermarkt/leagues", tags=["transfermarkt"])
 def get_transfermarkt_leagues():
@@ -1355,7 +1340,7 @@ def get_transfermarkt_leagues():
     if os.path.exists(LEAGUES_OUTPUT_FILE):
         try:
             with open(LEAGUES_OUTPUT_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
+                data = json_codec.load(f)
             return data
         except Exception as e:
             logger.error(f"Error reading leagues file: {e}")
@@ -1378,7 +1363,7 @@ def normalize_url(url: str, base_url: str = "https://sofifa.com") -> str:
     else:
         return urljoin(base_url, url)
 
-def extract_transfermarkt_urls_comprehensive(soup: BeautifulSoup) -> List[str]:
+def extract_transfermarkt_urls_comprehensive(soup: "bs4.BeautifulSoup") -> List[str]:
     """
     Comprehensive extraction of Transfermarkt URLs using multiple strategies
     """
@@ -1522,7 +1507,7 @@ def get_transfermarkt_playerlink_enhanced(playerid: int, scraper=None) -> str:
                     resp = scraper.get(url_format, timeout=timeout)
                     
                     if resp.status_code == 200:
-                        soup = BeautifulSoup(resp.text, "html.parser")
+                        soup = bs4.BeautifulSoup(resp.text, "html.parser")
                         
                         # Use comprehensive URL extraction
                         transfermarkt_urls = extract_transfermarkt_urls_comprehensive(soup)
@@ -1584,7 +1569,6 @@ def process_players_enhanced():
     Enhanced player processing with improved reliability and comprehensive URL detection
     """
     function_name = "process_players_enhanced"
-    reset_cancel_flag(function_name)
     
     try:
         # Check for cancellation
@@ -1626,7 +1610,7 @@ def process_players_enhanced():
         if os.path.exists(RESULT_FILE):
             try:
                 with open(RESULT_FILE, "r", encoding="utf-8") as f:
-                    all_results = json.load(f)
+                    all_results = json_codec.load(f)
                     for entry in all_results:
                         if isinstance(entry, dict) and "playerid" in entry:
                             processed_player_ids.add(str(entry["playerid"]))
@@ -1642,7 +1626,7 @@ def process_players_enhanced():
         # Load players data
         logger.info(f"Reading players from: {PLAYERS_FILE}")
         with open(PLAYERS_FILE, "r", encoding="utf-8") as f:
-            players_data = json.load(f)
+            players_data = json_codec.load(f)
         
         logger.info(f"Total players in source file: {len(players_data)}")
         
@@ -1782,7 +1766,7 @@ def process_players_enhanced():
                     if completed_count % ENHANCED_CONFIG["save_frequency"] == 0 or completed_count == len(players_to_process):
                         try:
                             with open(RESULT_FILE, "w", encoding="utf-8") as f:
-                                json.dump(all_results, f, indent=2, ensure_ascii=False)
+                                json_codec.dump(all_results, f, indent=2)
                             logger.info(f"Saved results after processing {completed_count} players")
                         except Exception as e:
                             logger.error(f"Error saving results: {e}")
@@ -1828,7 +1812,7 @@ def process_players_enhanced():
         # Final save
         try:
             with open(RESULT_FILE, "w", encoding="utf-8") as f:
-                json.dump(all_results, f, indent=2, ensure_ascii=False)
+                json_codec.dump(all_results, f, indent=2)
             logger.info(f"Final save completed: {len(all_results)} total results")
         except Exception as e:
             logger.error(f"Error in final save: {e}")
@@ -1869,20 +1853,17 @@ def process_players_enhanced():
 def background_process_players_enhanced():
     """Background task for enhanced player processing"""
     logger.info("Starting enhanced background player processing")
-    process_players_enhanced()
+    return result_summary(process_players_enhanced(), "playerlinks_from_tm_enhanced.json")
 
 # Enhanced player processing endpoints
-@router.post("/players/sofifa/scrape_transfermarkt_enhanced", tags=["players"])
-def scrape_transfermarkt_playerlinks_enhanced(background_tasks: BackgroundTasks):
+@router.post("/players/sofifa/scrape_transfermarkt_enhanced", status_code=status.HTTP_202_ACCEPTED, tags=["players"])
+async def scrape_transfermarkt_playerlinks_enhanced():
     """
-    Start enhanced Transfermarkt link scraping for players with improved reliability
+    Start enhanced Transfermarkt link scraping for players with improved reliability (job, see GET /jobs/{job_id})
     """
-    background_tasks.add_task(background_process_players_enhanced)
-    logger.info("Enhanced player scrape task added to background tasks")
-    return {
-        "status": "processing", 
-        "message": "Enhanced Transfermarkt link scraping started. Check playerlinks_from_tm_enhanced.json for results."
-    }
+    job = submit_job("process_players_enhanced", background_process_players_enhanced, unique=True)
+    logger.info(f"Enhanced player scrape job {job.id} queued")
+    return accepted_response(job, "Enhanced Transfermarkt link scraping started. Check playerlinks_from_tm_enhanced.json for results.")
 
 @router.get("/players/sofifa/transfermarkt_links_enhanced", tags=["players"])
 def get_transfermarkt_player_links_enhanced():
@@ -1894,7 +1875,7 @@ def get_transfermarkt_player_links_enhanced():
     
     if os.path.exists(RESULT_FILE):
         with open(RESULT_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
+            data = json_codec.load(f)
         return data
     else:
         return []
@@ -1904,7 +1885,7 @@ def cancel_enhanced_process():
     """
     Cancel the enhanced player processing
     """
-    set_cancel_flag("process_players_enhanced", True)
+    cancel_jobs("process_players_enhanced")
     
     send_progress_sync({
         "type": "progress",
@@ -1921,9 +1902,7 @@ def get_enhanced_process_status():
     """
     Get status of enhanced player processing
     """
-    with _cancel_lock:
-        status = {name: {"cancelled": flag} for name, flag in _cancel_flags.items()}
-    return status
+    return {name: kind_status(name) for name in CANCELLABLE_PROCESSES}
 
 def parse_transfermarkt_league_teams(league_url: str) -> List[Dict[str, Any]]:
     """
@@ -1982,7 +1961,7 @@ def parse_transfermarkt_league_teams(league_url: str) -> List[Dict[str, Any]]:
                 "percentage": 20
             })
             
-            soup = BeautifulSoup(html, "html.parser")
+            soup = bs4.BeautifulSoup(html, "html.parser")
             
             # Find the teams table
             table = soup.select_one("#yw1 table.items")
@@ -2382,7 +2361,7 @@ def download_and_process_team_crest(url: str, project_name: str, team_id: str, t
         logger.error(f"Непредвиденная ошибка при работе с логотипом {filename}: {str(e)}")
         return False
 
-def _make_request_with_retries(url: str, max_retries: int = 3) -> requests.Response:
+def _make_request_with_retries(url: str, max_retries: int = 3) -> "requests.Response":
     """Выполняет HTTP запрос с повторными попытками"""
     for attempt in range(max_retries):
         try:
@@ -2507,7 +2486,7 @@ async def get_manager_details(mitarbeiter_url: str) -> Dict[str, Any]:
         # 1. Получаем страницу персонала команды
         print(f"    1. Запрос страницы персонала: {mitarbeiter_url}")
         staff_response = _make_request_with_retries(str(mitarbeiter_url))
-        staff_soup = BeautifulSoup(staff_response.text, 'html.parser')
+        staff_soup = bs4.BeautifulSoup(staff_response.text, 'html.parser')
 
         # 2. Ищем блок "Coaching Staff"
         print("    2. Поиск блока 'Coaching Staff'")
@@ -2534,7 +2513,7 @@ async def get_manager_details(mitarbeiter_url: str) -> Dict[str, Any]:
         profile_url = f"https://www.transfermarkt.com{profile_path}" if profile_path.startswith('/') else profile_path
         print(f"    4. Запрос профиля менеджера: {profile_url}")
         profile_response = _make_request_with_retries(profile_url)
-        profile_soup = BeautifulSoup(profile_response.text, 'html.parser')
+        profile_soup = bs4.BeautifulSoup(profile_response.text, 'html.parser')
 
         # 5. Извлекаем дату рождения
         print("    5. Извлечение даты рождения")
@@ -2553,7 +2532,7 @@ async def get_manager_details(mitarbeiter_url: str) -> Dict[str, Any]:
 
         # 7. Парсинг имени и фамилии
         print("    7. Парсинг имени и фамилии")
-        name_parsed = HumanName(full_name)
+        name_parsed = nameparser.HumanName(full_name)
         firstname = name_parsed.first
         surname = name_parsed.last
         # Обработка мононимов (как в player-details)
@@ -2639,12 +2618,12 @@ def parse_player_main_positions_from_html() -> List[PlayerPosition]:
 <option value="14">Centre-Forward</option>
 </select>
 """
-    soup = BeautifulSoup(html_content, "html.parser")
+    soup = bs4.BeautifulSoup(html_content, "html.parser")
     positions: List[PlayerPosition] = []
     select_element = soup.find("select", {"id": "Detailsuche_hauptposition_id"})
-    if select_element and isinstance(select_element, Tag): # Type check for safety
+    if select_element and isinstance(select_element, bs4.Tag): # Type check for safety
         for option_tag in select_element.find_all("option"):
-            if isinstance(option_tag, Tag): # Type check for safety
+            if isinstance(option_tag, bs4.Tag): # Type check for safety
                 value = option_tag.get("value")
                 name = option_tag.get_text(strip=True)
                 if value: # Skip "doesn't matter" or options without a value
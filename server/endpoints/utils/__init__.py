@@ -1,30 +1,42 @@
-# This file makes the 'utils' directory a Python package 
+# This file makes the 'utils' directory a Python package
 
 import json
-import os
 from fastapi import HTTPException
+from .table_cache import table_cache
+from .tables import resolve_data_path, read_table, write_table, project_table
+from .table_index import Projection
 
-def load_json_file(relative_path: str):
+def parse_fields(fields):
+    """Column list of a ?fields=a,b,c parameter (None: all columns)."""
+    if not fields:
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    columns = [field.strip() for field in fields if field and field.strip()]
+    return columns or None
+
+def select_fields(rows, fields):
+    """Rows reduced to the ?fields= columns (not cached: for filtered subsets of a table)."""
+    columns = parse_fields(fields)
+    if not columns:
+        return rows
+    return Projection(tuple(dict.fromkeys(columns)), rows).rows
+
+def load_json_file(relative_path: str, fields=None):
     """
     Load JSON file with error handling and logging.
     Paths are relative to the server/endpoints/ directory.
+    Parsed tables are served from the shared table cache and re-read only
+    when the file's mtime or size changes.
+    `fields` ("a,b,c" or a list) keeps only those columns of each row; the
+    projection is cached per table version and field set.
     """
     try:
-        base_dir = os.path.dirname(__file__)  # server/endpoints/utils/
-        # Adjust base_dir to be server/endpoints/ for correct relative path resolution
-        # The __file__ in __init__.py will be .../utils/__init__.py
-        # We need to go up one level to make 'relative_path' work as intended (relative to 'endpoints')
-        endpoints_dir = os.path.dirname(base_dir) 
-        abs_path = os.path.abspath(os.path.join(endpoints_dir, relative_path))
-        
-        
-        if not os.path.exists(abs_path):
-            raise FileNotFoundError(f"File not found: {abs_path}")
-            
-        with open(abs_path, 'r', encoding='utf-8-sig') as file:
-            data = json.load(file)
-            return data
-            
+        columns = parse_fields(fields)
+        if columns:
+            return project_table(relative_path, columns)
+        return read_table(relative_path)
+
     except FileNotFoundError:
         print(f"[ERROR] File not found: {relative_path}")
         raise HTTPException(status_code=404, detail=f"File {relative_path} not found")
@@ -39,20 +51,15 @@ def save_json_file(relative_path: str, data):
     """
     Save JSON file with error handling and logging.
     Paths are relative to the server/endpoints/ directory.
+    The table cache entry for the file is replaced with the saved data.
     """
     try:
-        base_dir = os.path.dirname(__file__)  # server/endpoints/utils/
-        # Adjust base_dir similarly for saving
-        endpoints_dir = os.path.dirname(base_dir)
-        abs_path = os.path.abspath(os.path.join(endpoints_dir, relative_path))
-        
-        
-        # Ensure the directory exists
-        os.makedirs(os.path.dirname(abs_path), exist_ok=True)
-        
-        with open(abs_path, 'w', encoding='utf-8') as file:
-            json.dump(data, file, indent=4, ensure_ascii=False)
-            
+        write_table(relative_path, data)
+
     except Exception as e:
         print(f"[ERROR] Unexpected error saving {relative_path}: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error saving {relative_path}: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error saving {relative_path}: {str(e)}")
+
+def clear_table_cache(relative_path: str = None):
+    """Drop one cached table (or all of them when no path is given)."""
+    table_cache.invalidate(resolve_data_path(relative_path) if relative_path else None)
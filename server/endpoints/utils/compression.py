@@ -0,0 +1,132 @@
+"""
+gzip compression of large text responses (registered in server.py).
+
+Only responses of COMPRESSIBLE_TYPES of at least MIN_SIZE bytes are
+compressed, and only for clients that accept gzip. Responses with an ETag
+(every JSON response, see etag.py) keep their compressed body in an LRU cache
+keyed by that ETag, so an unchanged 2 MB table is gzipped once, not on every
+request. The compressed variant gets its own strong ETag ('"<etag>-gzip"');
+etag.py treats both spellings as the same validator.
+Streamed responses (NDJSON) are compressed chunk by chunk.
+"""
+
+import asyncio
+import gzip
+import threading
+import zlib
+from collections import OrderedDict
+from typing import AsyncIterator, Optional
+
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+
+from .etag import ENCODED_SUFFIX
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "application/javascript", "text/")
+MIN_SIZE = 1024            # Smaller bodies are sent as is
+GZIP_LEVEL = 6
+THREAD_MIN_SIZE = 256 * 1024  # Compress larger bodies off the event loop
+CACHE_MAX_BYTES = 64 * 1024 * 1024  # Budget of cached compressed bodies
+
+_cache: "OrderedDict[str, bytes]" = OrderedDict()
+_cache_bytes = 0
+_lock = threading.Lock()
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    for item in (accept_encoding or "").split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        if coding.lower() not in ("gzip", "*"):
+            continue
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+
+def _compressible(response: Response) -> bool:
+    content_type = response.headers.get("content-type", "")
+    return (response.status_code not in (204, 206, 304)
+            and "content-encoding" not in response.headers
+            and content_type.startswith(COMPRESSIBLE_TYPES))
+
+
+def _cached(etag: str) -> Optional[bytes]:
+    with _lock:
+        body = _cache.get(etag)
+        if body is not None:
+            _cache.move_to_end(etag)
+        return body
+
+
+def _remember(etag: str, body: bytes) -> None:
+    global _cache_bytes
+    if len(body) > CACHE_MAX_BYTES:
+        return
+    with _lock:
+        old = _cache.pop(etag, None)
+        if old is not None:
+            _cache_bytes -= len(old)
+        _cache[etag] = body
+        _cache_bytes += len(body)
+        while _cache_bytes > CACHE_MAX_BYTES:
+            _, evicted = _cache.popitem(last=False)
+            _cache_bytes -= len(evicted)
+
+
+def compress(body: bytes) -> bytes:
+    return gzip.compress(body, GZIP_LEVEL, mtime=0)
+
+
+async def _compress_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    async for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _encoded_headers(response: Response) -> dict:
+    headers = {name: value for name, value in response.headers.items() if name != "content-length"}
+    headers["content-encoding"] = "gzip"
+    vary = headers.get("vary")
+    headers["vary"] = f"{vary}, Accept-Encoding" if vary else "Accept-Encoding"
+    etag = headers.get("etag")
+    if etag and etag.endswith('"'):
+        headers["etag"] = etag[:-1] + ENCODED_SUFFIX + '"'
+    return headers
+
+
+async def compression_middleware(request: Request, call_next):
+    if request.headers.get("upgrade") == "websocket":
+        return await call_next(request)
+    response = await call_next(request)
+    if not accepts_gzip(request.headers.get("accept-encoding")) or not _compressible(response):
+        return response
+
+    content_length = response.headers.get("content-length")
+    if content_length is None:
+        return StreamingResponse(_compress_stream(response.body_iterator), status_code=response.status_code,
+                                 headers=_encoded_headers(response))
+    if int(content_length) < MIN_SIZE:
+        return response
+
+    etag = response.headers.get("etag")
+    compressed = _cached(etag) if etag else None
+    if compressed is None:
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        if len(body) >= THREAD_MIN_SIZE:
+            compressed = await asyncio.to_thread(compress, body)
+        else:
+            compressed = compress(body)
+        if etag:
+            _remember(etag, compressed)
+    return Response(content=compressed, status_code=response.status_code, headers=_encoded_headers(response))
@@ -0,0 +1,81 @@
+"""
+Copy-on-write cloning of the FC25 base data into new projects.
+
+Instead of copying every file, clone_tree() shares unchanged files with the
+base directory. Per file it tries, in order:
+- reflink (FICLONE ioctl on Btrfs/XFS/...): an independent copy sharing disk blocks
+- hardlink: the same inode appears in both trees
+- plain copy: when the filesystem supports neither (or base and projects
+  live on different volumes)
+
+Hardlinked files must never be modified in place: utils.tables writes every
+table to a temp file and renames it over the old one, which detaches the
+project's file from the base on its first write and leaves the base intact.
+FIFA_PROJECT_CLONE=copy disables sharing.
+"""
+
+import errno
+import os
+import shutil
+from typing import Dict
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+FICLONE = 0x40049409  # _IOW(0x94, 9, int) from linux/fs.h
+
+CLONE_MODE = os.environ.get("FIFA_PROJECT_CLONE", "auto").lower()
+
+# Errors meaning "this filesystem/volume can't do it" - stop trying that method
+_UNSUPPORTED = {errno.EXDEV, errno.EPERM, errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.EMLINK,
+                getattr(errno, "ENOTSUP", errno.EOPNOTSUPP)}
+
+
+def _reflink(src: str, dst: str) -> None:
+    with open(src, 'rb') as source, open(dst, 'wb') as target:
+        try:
+            fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+        except OSError:
+            target.close()
+            os.remove(dst)
+            raise
+    shutil.copystat(src, dst)
+
+
+def clone_tree(src_dir: str, dst_dir: str) -> Dict[str, int]:
+    """
+    Recreate src_dir at dst_dir sharing file contents where possible.
+    Returns how many files were cloned with each method.
+    """
+    methods = []
+    if CLONE_MODE in ("auto", "reflink") and fcntl is not None:
+        methods.append("reflink")
+    if CLONE_MODE in ("auto", "hardlink"):
+        methods.append("hardlink")
+    counts = {"reflink": 0, "hardlink": 0, "copy": 0}
+
+    for root, _, files in os.walk(src_dir):
+        target_root = os.path.join(dst_dir, os.path.relpath(root, src_dir))
+        os.makedirs(target_root, exist_ok=True)
+        for file_name in files:
+            src = os.path.join(root, file_name)
+            dst = os.path.join(target_root, file_name)
+            for method in list(methods):
+                try:
+                    if method == "reflink":
+                        _reflink(src, dst)
+                    else:
+                        os.link(src, dst)
+                    counts[method] += 1
+                    break
+                except OSError as e:
+                    if e.errno not in _UNSUPPORTED:
+                        raise
+                    methods.remove(method)
+            else:
+                shutil.copy2(src, dst)
+                counts["copy"] += 1
+    return counts
+
@@ -0,0 +1,133 @@
+"""
+ETag / If-None-Match support for GET endpoints (registered in server.py).
+
+- JSON responses get a strong ETag: a hash of the response body. A request
+  whose If-None-Match matches it gets 304 with no body.
+- Responses that already carry an ETag (FileResponse: /images/*, exports)
+  keep it and are answered the same way, so an image revalidation costs a stat.
+- Table-backed routes (TABLE_ROUTES) also remember, per URL, which files and
+  tables the endpoint read and at which stamp (see read_tracker.py). While
+  none of them has changed, a matching If-None-Match is answered with 304
+  before the endpoint runs: a repeat load costs a few stat calls instead of
+  parsing and re-serializing multi-MB tables.
+
+Every response with an ETag is sent with Cache-Control: no-cache, so browsers
+keep the body and revalidate it on each use. Validators sent back for the
+gzip variant ('"<etag>-gzip"', see compression.py) match the plain ETag.
+"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from fastapi import Request, Response
+
+from . import read_tracker
+from .table_cache import file_stamp
+from .tables import table_stamp
+
+# GET routes whose response depends only on the request URL and the JSON
+# files/tables they read (no scraping, no in-memory job state)
+TABLE_ROUTES = re.compile(
+    r"^/(teams|leagues|leagues/original|nations|players|players/lazy|players/query|"
+    r"leagueteamlinks|leagueteamlinks/transferable-teams|teamnationlinks|teamplayerlinks|"
+    r"teamstadiumlinks|stadiumassignments|playernames|manager|language-strings/[^/]+|"
+    r"default_mentalities|default_teamsheets|defaultteamdata|formations|mentalities|"
+    r"db/[A-Za-z0-9_]+|projects/[^/]+/(formations|teamsheets|teams/[^/]+/bundle)|"
+    r"[^/]+/manager/[^/]+|[^/]+/team/[^/]+)$"
+)
+
+ENCODED_SUFFIX = "-gzip"  # Appended to the ETag of compressed responses
+
+MAX_VALIDATORS = 4096  # URLs whose validators are remembered (LRU)
+
+_validators: "OrderedDict[str, Tuple[str, read_tracker.Reads]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def body_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def _opaque(etag: str) -> str:
+    # Weak prefix and the compressed-variant suffix (see compression.py) do not change the validator
+    etag = etag.strip()
+    if etag.startswith("W/"):
+        etag = etag[2:]
+    if etag.endswith(ENCODED_SUFFIX + '"'):
+        etag = etag[:-len(ENCODED_SUFFIX) - 1] + '"'
+    return etag
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match comparison (weak, as RFC 9110 requires for this header)."""
+    if if_none_match.strip() == "*":
+        return True
+    bare = _opaque(etag)
+    return any(_opaque(candidate) == bare for candidate in if_none_match.split(","))
+
+
+def _current_stamp(kind: str, abs_path: str) -> Any:
+    return file_stamp(abs_path) if kind == "file" else table_stamp(abs_path)
+
+
+def _unchanged(reads: read_tracker.Reads) -> bool:
+    return all(_current_stamp(kind, path) == stamp for (kind, path), stamp in reads.items())
+
+
+def _remembered(key: str) -> Optional[Tuple[str, read_tracker.Reads]]:
+    with _lock:
+        cached = _validators.get(key)
+        if cached is not None:
+            _validators.move_to_end(key)
+        return cached
+
+
+def _remember(key: str, etag: str, reads: read_tracker.Reads) -> None:
+    with _lock:
+        _validators[key] = (etag, dict(reads))
+        _validators.move_to_end(key)
+        while len(_validators) > MAX_VALIDATORS:
+            _validators.popitem(last=False)
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+async def etag_middleware(request: Request, call_next):
+    if request.method != "GET" or request.headers.get("upgrade") == "websocket":
+        return await call_next(request)
+
+    key = request.url.path + "?" + request.url.query
+    if_none_match = request.headers.get("if-none-match")
+    trackable = TABLE_ROUTES.match(request.url.path) is not None
+
+    if if_none_match and trackable:
+        cached = _remembered(key)
+        if cached is not None and etag_matches(if_none_match, cached[0]) and _unchanged(cached[1]):
+            return _not_modified(cached[0])
+
+    with read_tracker.track_reads() as reads:
+        response = await call_next(request)
+
+    if response.status_code != 200:
+        return response
+
+    etag = response.headers.get("etag")
+    if etag is None:
+        if not response.headers.get("content-type", "").startswith("application/json"):
+            return response  # Streams (NDJSON, progress) are not buffered
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        etag = body_etag(body)
+        response = Response(content=body, status_code=response.status_code, headers=dict(response.headers))
+        response.headers["ETag"] = etag
+        if trackable and reads and read_tracker.CHANGED not in reads.values():
+            _remember(key, etag, reads)
+    response.headers["Cache-Control"] = "no-cache"
+
+    if if_none_match and etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+    return response
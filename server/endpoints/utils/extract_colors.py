@@ -1,10 +1,12 @@
 import os
 from typing import List, Tuple
-from PIL import Image
-import numpy as np
 from collections import Counter
 import colorsys
-from sklearn.cluster import KMeans
+from .lazy_import import lazy_module
+
+# Image/numeric libraries load on first use (see lazy_import.py)
+Image = lazy_module("PIL.Image")
+np = lazy_module("numpy")
 
 # Parameters for color extraction
 NUM_COLORS = 5
@@ -86,6 +88,7 @@ def extract_dominant_colors(image_path: str, n_colors=NUM_COLORS) -> List[Tuple[
             pixels = pixels[indices]
         
         # Cluster the colors with K-means
+        from sklearn.cluster import KMeans
         kmeans = KMeans(n_clusters=n_colors, random_state=42, n_init=10)
         kmeans.fit(pixels)
         
@@ -0,0 +1,91 @@
+"""
+Per-project allocation of new row IDs.
+
+Every ID space (player IDs, team IDs, link artificial keys, ...) has a
+high-water mark: the first ID not handed out yet. allocate_ids() reserves a
+contiguous range and moves the mark past it under one lock, so concurrent
+add-teams runs never get the same IDs even when they write their rows much
+later (players are appended at the end of a squad).
+
+Marks are persisted in projects/<project>/id_allocator.json. On each call the
+mark is also raised to the table's current maximum + 1, taken from the key
+index cached with the table (built once per file version and patched on
+append, so this is O(1) after the first use). Rows added by other means (file
+edits, imports) therefore never collide with allocated IDs.
+"""
+
+import os
+import threading
+from typing import Dict, Tuple
+
+from . import json_codec
+from .tables import get_index, resolve_data_path
+
+# ID space -> (table file, key column, first ID of the space)
+ID_SPACES: Dict[str, Tuple[str, str, int]] = {
+    "playerid": ("players.json", "playerid", 300000),  # Custom players start at 300000
+    "teamid": ("teams.json", "teamid", 1),
+    "managerid": ("manager.json", "managerid", 100000),
+    "teamkitid": ("teamkits.json", "teamkitid", 1),
+    "formations.formationid": ("formations.json", "formationid", 1),
+    "teamplayerlinks.artificialkey": ("teamplayerlinks.json", "artificialkey", 0),
+    "leagueteamlinks.artificialkey": ("leagueteamlinks.json", "artificialkey", 1),
+}
+
+STATE_FILE = "id_allocator.json"
+
+_lock = threading.Lock()
+_states: Dict[str, Dict[str, int]] = {}
+
+
+def _project_dir(project_name: str) -> str:
+    return resolve_data_path(f'../projects/{project_name}')
+
+
+def _state(project_dir: str) -> Dict[str, int]:
+    state = _states.get(project_dir)
+    if state is None:
+        try:
+            state = {space: int(mark) for space, mark in json_codec.load_file(os.path.join(project_dir, STATE_FILE)).items()}
+        except (FileNotFoundError, ValueError, AttributeError):
+            state = {}
+        _states[project_dir] = state
+    return state
+
+
+def _table_next(project_dir: str, space: str) -> int:
+    """First ID above every row currently in the table."""
+    table, column, start = ID_SPACES[space]
+    try:
+        index = get_index(os.path.join(project_dir, "data", "fifa_ng_db", table), column)
+    except FileNotFoundError:
+        return start
+    max_int = index.max_int
+    if max_int == 0 and not len(index):
+        return start  # Empty table
+    return max(start, max_int + 1)
+
+
+def allocate_ids(project_name: str, space: str, count: int = 1) -> int:
+    """
+    Reserve `count` consecutive IDs in an ID space of a project.
+    Returns the first one; the range is never handed out again.
+    """
+    if space not in ID_SPACES:
+        raise ValueError(f"Unknown ID space: {space}")
+    project_dir = _project_dir(project_name)
+    with _lock:
+        state = _state(project_dir)
+        first = max(state.get(space, ID_SPACES[space][2]), _table_next(project_dir, space))
+        if count <= 0:
+            return first
+        state[space] = first + count
+        if os.path.isdir(project_dir):
+            json_codec.dump_file(os.path.join(project_dir, STATE_FILE), state, 2, atomic=True)
+    return first
+
+
+def forget_project(project_name: str) -> None:
+    """Drop the in-memory marks of a project (after it is deleted or replaced)."""
+    with _lock:
+        _states.pop(_project_dir(project_name), None)
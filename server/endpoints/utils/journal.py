@@ -0,0 +1,219 @@
+"""
+Append-only change journal for large JSON tables.
+
+Tables listed in JOURNALED_TABLES are not rewritten on every row-level
+change. Instead utils.tables appends the change as JSON-lines operations to
+<table>.json.journal next to the base file:
+
+    {"op": "append", "row": {...}}
+    {"op": "upsert", "column": "stringid", "row": {...}}
+    {"op": "delete", "column": "teamid", "key": "131072"}
+
+Readers replay the journal on top of the base file, so write cost is
+proportional to the rows changed. Once a journal grows past
+COMPACT_THRESHOLD_BYTES it is folded back into the base file by a
+background thread (base written to a temp file and swapped in atomically,
+then the journal is removed).
+"""
+
+import os
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from . import json_codec
+from .table_index import index_key
+
+JOURNAL_SUFFIX = ".journal"
+
+# Table file names that are journaled (JSON projects only; the SQLite engine writes rows in place)
+JOURNALED_TABLES = {
+    "players.json",
+    "teamplayerlinks.json",
+    "default_teamsheets.json",
+    "LanguageStrings2.json",
+}
+
+# Override with FIFA_JOURNAL_COMPACT_KB
+COMPACT_THRESHOLD_BYTES = int(os.environ.get("FIFA_JOURNAL_COMPACT_KB", "2048")) * 1024
+
+_locks: Dict[str, threading.RLock] = {}
+_locks_guard = threading.Lock()
+_pending_compactions: set = set()
+
+
+def is_journaled(abs_path: str) -> bool:
+    return os.path.basename(abs_path) in JOURNALED_TABLES
+
+
+def journal_path(abs_path: str) -> str:
+    return abs_path + JOURNAL_SUFFIX
+
+
+def lock_for(abs_path: str) -> threading.RLock:
+    """Lock serializing updates (and journal appends, replays and compaction) of one table."""
+    with _locks_guard:
+        lock = _locks.get(abs_path)
+        if lock is None:
+            lock = _locks[abs_path] = threading.RLock()
+        return lock
+
+
+def journal_size(abs_path: str) -> int:
+    try:
+        return os.path.getsize(journal_path(abs_path))
+    except OSError:
+        return 0
+
+
+def stamp(abs_path: str) -> Optional[Tuple[int, ...]]:
+    """
+    Cache validator covering base file and journal:
+    (base mtime_ns, base size + journal size, journal mtime_ns).
+    None if the base file is missing.
+    """
+    with lock_for(abs_path):
+        try:
+            base = os.stat(abs_path)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        try:
+            jst = os.stat(journal_path(abs_path))
+            return (base.st_mtime_ns, base.st_size + jst.st_size, jst.st_mtime_ns)
+        except FileNotFoundError:
+            return (base.st_mtime_ns, base.st_size, 0)
+
+
+def operation(op: str, row: Optional[Dict[str, Any]] = None, column: Optional[str] = None, key: Any = None) -> Dict[str, Any]:
+    """Build one journal operation."""
+    entry: Dict[str, Any] = {"op": op}
+    if column is not None:
+        entry["column"] = column
+    if key is not None:
+        entry["key"] = index_key(key)
+    if row is not None:
+        entry["row"] = row
+    return entry
+
+
+def read_ops(abs_path: str) -> List[Dict[str, Any]]:
+    ops = []
+    try:
+        with open(journal_path(abs_path), 'r', encoding='utf-8') as file:
+            for line in file:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    ops.append(json_codec.loads(line))
+                except json_codec.JSONDecodeError:
+                    # A torn last line (crash mid-append) - everything before it is valid
+                    print(f"[WARNING] Ignoring truncated journal entry in {journal_path(abs_path)}")
+                    break
+    except FileNotFoundError:
+        pass
+    return ops
+
+
+def write_ops(abs_path: str, ops: Iterable[Dict[str, Any]]) -> None:
+    """Append operations to the table's journal (one flush per call)."""
+    lines = "".join(json_codec.dumps(op) + "\n" for op in ops)
+    with lock_for(abs_path):
+        with open(journal_path(abs_path), 'a', encoding='utf-8') as file:
+            file.write(lines)
+            file.flush()
+            os.fsync(file.fileno())
+
+
+def replay(data: List[Dict[str, Any]], ops: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Apply journal operations to a base row list; returns a new list."""
+    rows: List[Optional[Dict[str, Any]]] = list(data)
+    positions: Dict[str, Dict[str, List[int]]] = {}
+
+    def positions_for(column: str) -> Dict[str, List[int]]:
+        index = positions.get(column)
+        if index is None:
+            index = positions[column] = {}
+            for pos, row in enumerate(rows):
+                if row is not None:
+                    index.setdefault(index_key(row.get(column)), []).append(pos)
+        return index
+
+    def live(column: str, key: str) -> List[int]:
+        # Positions go stale when rows are deleted or upserted; re-check them
+        return [pos for pos in positions_for(column).get(key, ())
+                if rows[pos] is not None and index_key(rows[pos].get(column)) == key]
+
+    def add(row: Dict[str, Any]) -> None:
+        rows.append(row)
+        for column, index in positions.items():
+            index.setdefault(index_key(row.get(column)), []).append(len(rows) - 1)
+
+    for entry in ops:
+        op = entry.get("op")
+        if op == "append":
+            add(entry["row"])
+        elif op == "delete":
+            for pos in live(entry["column"], entry["key"]):
+                rows[pos] = None
+        elif op == "upsert":
+            column, row = entry["column"], entry["row"]
+            existing = live(column, index_key(row.get(column)))
+            if existing:
+                pos = existing[0]
+                rows[pos] = {**rows[pos], **row}
+                for other, index in positions.items():
+                    if other != column:
+                        index.setdefault(index_key(rows[pos].get(other)), []).append(pos)
+            else:
+                add(row)
+    return [row for row in rows if row is not None]
+
+
+def load(abs_path: str, read_base: Callable[[str], Any]) -> Any:
+    """Base table with the journal replayed on top of it."""
+    with lock_for(abs_path):
+        data = read_base(abs_path)
+        ops = read_ops(abs_path)
+    return replay(data, ops) if ops else data
+
+
+def write_base(abs_path: str, data: Any, write_json: Callable[[str, Any, Optional[int]], None], indent: Optional[int]) -> None:
+    """
+    Replace the base file and drop the journal, which is folded into `data`.
+    `write_json` must replace the file atomically (tables._write_json does).
+    """
+    with lock_for(abs_path):
+        write_json(abs_path, data, indent)
+        try:
+            os.remove(journal_path(abs_path))
+        except FileNotFoundError:
+            pass
+
+
+def schedule_compaction(abs_path: str, compact: Callable[[], None]) -> None:
+    """Run `compact` on a background thread unless one is already queued for this table."""
+    with _locks_guard:
+        if abs_path in _pending_compactions:
+            return
+        _pending_compactions.add(abs_path)
+
+    def run():
+        try:
+            compact()
+        except Exception as e:
+            print(f"[ERROR] Journal compaction failed for {abs_path}: {e}")
+        finally:
+            with _locks_guard:
+                _pending_compactions.discard(abs_path)
+
+    threading.Thread(target=run, name=f"compact:{os.path.basename(abs_path)}", daemon=True).start()
+
+
+def journaled_tables(directory: str) -> List[str]:
+    """Base paths of every table under `directory` that has a pending journal."""
+    found = []
+    for root, _, files in os.walk(directory):
+        for file_name in files:
+            if file_name.endswith(JOURNAL_SUFFIX):
+                found.append(os.path.join(root, file_name[:-len(JOURNAL_SUFFIX)]))
+    return found
@@ -0,0 +1,129 @@
+"""
+JSON codec used by every table read/write path.
+
+Uses orjson when it is installed (several times faster on the multi-MB
+fifa_ng_db tables) and falls back to the stdlib json module otherwise.
+FIFA_JSON_BACKEND=json forces the stdlib backend.
+
+Two write modes:
+- compact (indent=None): no whitespace, separators (',', ':')
+- pretty (indent=N): one value per line, same layout as json.dump(indent=N)
+
+Output is always UTF-8 text with non-ASCII characters kept as is
+(the equivalent of ensure_ascii=False). Decode errors raise
+json.JSONDecodeError with both backends.
+"""
+
+import json
+import os
+import threading
+from typing import IO, Any, Optional, Union
+
+from . import read_tracker
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # Optional dependency
+    orjson = None
+
+if os.environ.get("FIFA_JSON_BACKEND", "").lower() == "json":
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+JSONDecodeError = json.JSONDecodeError
+
+_BOM = "\ufeff"
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Parse JSON text (a leading UTF-8 BOM is ignored)."""
+    if isinstance(data, (bytes, bytearray)):
+        if data[:3] == b"\xef\xbb\xbf":
+            data = data[3:]
+    elif data.startswith(_BOM):
+        data = data[1:]
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumpb(data: Any, indent: Optional[int] = None) -> bytes:
+    """Serialize to UTF-8 bytes; indent=None is compact, otherwise pretty-printed."""
+    if orjson is not None:
+        try:
+            if indent is None:
+                return orjson.dumps(data)
+            out = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+            return out if indent == 2 else _reindent(out, indent)
+        except TypeError:
+            pass  # Types orjson refuses (non-str keys, >64-bit ints): use stdlib
+    return _stdlib_dumps(data, indent).encode("utf-8")
+
+
+def _reindent(out: bytes, indent: int) -> bytes:
+    """
+    Turn orjson's 2-space indentation into `indent` spaces. JSON strings cannot
+    contain raw newlines, so every "\n" + spaces run is pure indentation.
+    Pass k widens all lines nested at depth >= k by (indent - 2) spaces,
+    using one C-level bytes.replace per nesting level.
+    """
+    extra = indent - 2
+    if extra < 0:
+        return _stdlib_dumps(orjson.loads(out), indent).encode("utf-8")
+    depth = 1
+    while True:
+        prefix = b"\n" + b" " * (2 * depth + extra * (depth - 1))
+        if prefix not in out:
+            return out
+        out = out.replace(prefix, prefix + b" " * extra)
+        depth += 1
+
+
+def dumps(data: Any, indent: Optional[int] = None) -> str:
+    """Serialize to str; indent=None is compact, otherwise pretty-printed."""
+    if orjson is None:
+        return _stdlib_dumps(data, indent)
+    return dumpb(data, indent).decode("utf-8")
+
+
+def _stdlib_dumps(data: Any, indent: Optional[int]) -> str:
+    separators = (',', ':') if indent is None else None
+    return json.dumps(data, indent=indent, ensure_ascii=False, separators=separators)
+
+
+def load(fp: IO) -> Any:
+    """json.load() replacement for files opened in text or binary mode."""
+    read_tracker.record_open_file(fp)
+    return loads(fp.read())
+
+
+def dump(data: Any, fp: IO, indent: Optional[int] = None) -> None:
+    """json.dump() replacement for files opened in text mode ('w', encoding='utf-8')."""
+    fp.write(dumps(data, indent))
+
+
+def load_file(path: str) -> Any:
+    """Read and parse a JSON file. Raises FileNotFoundError / json.JSONDecodeError."""
+    try:
+        file = open(path, 'rb')
+    except FileNotFoundError:
+        read_tracker.record("file", os.path.abspath(path), None)
+        raise
+    with file:
+        read_tracker.record_open_file(file)
+        return loads(file.read())
+
+
+def dump_file(path: str, data: Any, indent: Optional[int] = None, atomic: bool = False) -> None:
+    """
+    Serialize data into a JSON file (overwritten). With atomic=True the data is
+    written to a temp file that is then renamed over `path`, so readers never
+    see a half-written file and a hardlinked file gets a new inode.
+    """
+    payload = dumpb(data, indent)
+    target = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp" if atomic else path
+    with open(target, 'wb') as file:
+        file.write(payload)
+    if atomic:
+        os.replace(target, path)
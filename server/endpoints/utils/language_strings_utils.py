@@ -1,7 +1,8 @@
+import os
 import re
 from pathlib import Path
-import json
 from typing import List # Keep List if it's used by other functions in this file, or remove if only for type hints in moved functions
+from .tables import upsert_rows
 
 def create_abbreviated_name(team_name: str, max_length: int) -> str:
     """Create abbreviated team name with specified max length."""
@@ -38,20 +39,6 @@ async def process_language_strings(team_name: str, team_id: str, project_name: s
     try:
         language_strings2_file = Path("projects") / project_name / "data/loc/LanguageStrings2.json"
         
-        # Ensure directory exists
-        language_strings2_file.parent.mkdir(parents=True, exist_ok=True)
-        
-        # Load existing language strings or create empty list
-        language_strings2 = []
-        if language_strings2_file.exists():
-            try:
-                with open(language_strings2_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    if content.strip():
-                        language_strings2 = json.loads(content)
-            except Exception as e:
-                print(f"    ⚠️ Error reading LanguageStrings2.json: {str(e)}. Starting with empty file.")
-        
         # Remove " (number)" from the end of team_name if it exists
         team_name_clean = re.sub(r'\s*\(\d+\)$', '', team_name)
         
@@ -79,17 +66,8 @@ async def process_language_strings(team_name: str, team_id: str, project_name: s
             }
         ]
         
-        # Update or add each entry
-        for entry in team_entries:
-            existing_entry = next((e for e in language_strings2 if e['stringid'] == entry['stringid']), None)
-            if existing_entry:
-                existing_entry.update(entry)
-            else:
-                language_strings2.append(entry)
-        
-        # Save the updated language strings
-        with open(language_strings2_file, 'w', encoding='utf-8') as f:
-            json.dump(language_strings2, f, indent=2, ensure_ascii=False)
+        # Update or add each entry (journaled upsert keyed by stringid, no full rewrite)
+        upsert_rows(os.path.abspath(language_strings2_file), "stringid", team_entries, 2)
             
         print(f"    ✅ Language strings for team {team_name} successfully processed")
         
@@ -0,0 +1,75 @@
+"""
+Deferred imports of heavy optional packages (numpy, Pillow, scikit-learn,
+cloudscraper, BeautifulSoup, requests, ...).
+
+    np = lazy_module("numpy")
+    Image = lazy_module("PIL.Image")
+
+returns a stand-in that imports the real module on the first attribute access
+(np.array, Image.open, ...), so importing a router does not pay for libraries
+only some of its endpoints use. Availability is still checked up front: a
+missing package raises ModuleNotFoundError at lazy_module() time, exactly
+where the plain import used to fail. Only the top-level package is looked up
+(find_spec of "PIL.Image" would import PIL); a missing submodule of an
+installed package fails on first access.
+
+Annotations naming lazy types (bs4.Tag, requests.Response, np.ndarray) must be
+quoted, otherwise evaluating the signature at def time loads the module.
+"""
+
+import importlib
+import importlib.util
+import sys
+import threading
+import types
+from typing import Any, Optional
+
+
+class LazyModule(types.ModuleType):
+    """Module facade importing `name` on first attribute access (thread-safe)."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._lazy_lock = threading.Lock()
+        self._lazy_module: Optional[types.ModuleType] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self._lazy_module
+        if module is None:
+            with self._lazy_lock:
+                if self._lazy_module is None:
+                    self._lazy_module = importlib.import_module(self.__name__)
+                module = self._lazy_module
+        return module
+
+    def __getattr__(self, attr: str) -> Any:
+        # Only called for attributes not set in __init__
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._lazy_module is not None else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_module(name: str) -> types.ModuleType:
+    """
+    Facade for module `name` (dotted names allowed: "PIL.Image"). Returns the
+    module itself when it is already imported. Raises ModuleNotFoundError if
+    its top-level package is not installed.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    package = name.partition(".")[0]
+    # find_spec of a submodule imports its parent packages: look up the top level only
+    if package not in sys.modules and importlib.util.find_spec(package) is None:
+        raise ModuleNotFoundError(f"No module named '{package}'", name=package)
+    return LazyModule(name)
+
+
+def is_loaded(module: types.ModuleType) -> bool:
+    """False for a lazy_module() facade whose module has not been imported yet."""
+    return not isinstance(module, LazyModule) or module._lazy_module is not None
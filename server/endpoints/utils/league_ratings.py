@@ -0,0 +1,231 @@
+"""
+Materialized league ratings view: average/min/max team overallrating per
+Transfermarkt country and league level (the /db/fc25_league_ratings payload).
+
+The view keeps, per league, a multiset of the ratings of its linked teams.
+It is built once per project from teams.json and leagueteamlinks.json and
+attached to both tables' cache entries (see tables.attach_index), so row-level
+writes (added teams, moved or new league links) update it incrementally
+instead of triggering a recomputation. When either table is rewritten or
+changes on disk the attachment disappears and the view is rebuilt on next
+use; overlay tables, which have no cache entry of their own, are checked by
+stamp instead. The final per-country result is assembled from the per-league
+multisets (a few hundred leagues) and cached until something changes.
+"""
+
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .tables import attach_index, attached_index, read_table, resolve_data_path, table_exists, table_stamp
+
+VIEW_KEY = "view:league_ratings"
+
+NATION_MAP_FILE = '../db/tm_fifa_nation_map.json'
+
+
+def _decrement(counter: Counter, key: Any, count: int = 1) -> None:
+    remaining = counter[key] - count
+    if remaining > 0:
+        counter[key] = remaining
+    else:
+        del counter[key]
+
+
+class _TableListener:
+    """Index-protocol adapter forwarding row changes of one table to the view."""
+
+    def __init__(self, view: "LeagueRatingsView", on_add, on_remove):
+        self.view = view
+        self._on_add = on_add
+        self._on_remove = on_remove
+
+    def add_rows(self, rows: Iterable[Dict[str, Any]]) -> None:
+        with self.view.lock:
+            self._on_add(rows)
+            self.view.version += 1
+
+    def remove_rows(self, rows: Iterable[Dict[str, Any]]) -> bool:
+        with self.view.lock:
+            self.view.version += 1
+            return self._on_remove(rows)
+
+
+class LeagueRatingsView:
+    """Ratings of the teams linked to each league, kept up to date row by row."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.version = 0
+        self.team_rating: Dict[str, int] = {}              # teamid -> overallrating (last row wins)
+        self.team_rows: Counter = Counter()                # teamid -> rated rows (duplicates)
+        self.team_leagues: Dict[str, Counter] = {}         # teamid -> Counter(leagueid)
+        self.league_ratings: Dict[str, Counter] = {}       # leagueid -> Counter(rating)
+        self.listeners: Dict[str, Optional[_TableListener]] = {}
+        self.stamps: Dict[str, Any] = {}                   # For overlay tables only
+        self.result: Optional[Dict[str, Any]] = None
+        self.result_key: Optional[Tuple] = None
+
+    # --- teams.json ---
+
+    @staticmethod
+    def _team_rating(row: Dict[str, Any]) -> Tuple[str, Optional[int]]:
+        team_id = str(row.get('teamid', ''))
+        overall_rating = row.get('overallrating', 0)
+        if team_id and overall_rating:
+            return team_id, int(overall_rating)
+        return team_id, None
+
+    def _move_team(self, team_id: str, old: Optional[int], new: Optional[int]) -> None:
+        for league_id, links in self.team_leagues.get(team_id, {}).items():
+            ratings = self.league_ratings.setdefault(league_id, Counter())
+            if old is not None:
+                _decrement(ratings, old, links)
+            if new is not None:
+                ratings[new] += links
+
+    def add_teams(self, rows: Iterable[Dict[str, Any]]) -> None:
+        for row in rows:
+            team_id, rating = self._team_rating(row)
+            if rating is None:
+                continue
+            self.team_rows[team_id] += 1
+            self._move_team(team_id, self.team_rating.get(team_id), rating)
+            self.team_rating[team_id] = rating
+
+    def remove_teams(self, rows: Iterable[Dict[str, Any]]) -> bool:
+        for row in rows:
+            team_id, rating = self._team_rating(row)
+            if rating is None:
+                continue
+            if self.team_rows[team_id] > 1:
+                return False  # Another row of the same team may have to surface: rebuild
+            _decrement(self.team_rows, team_id)
+            self._move_team(team_id, self.team_rating.pop(team_id, None), None)
+        return True
+
+    # --- leagueteamlinks.json ---
+
+    def add_links(self, rows: Iterable[Dict[str, Any]]) -> None:
+        for row in rows:
+            league_id, team_id = str(row.get('leagueid', '')), str(row.get('teamid', ''))
+            if not league_id:
+                continue
+            self.team_leagues.setdefault(team_id, Counter())[league_id] += 1
+            ratings = self.league_ratings.setdefault(league_id, Counter())
+            if team_id in self.team_rating:
+                ratings[self.team_rating[team_id]] += 1
+
+    def remove_links(self, rows: Iterable[Dict[str, Any]]) -> bool:
+        for row in rows:
+            league_id, team_id = str(row.get('leagueid', '')), str(row.get('teamid', ''))
+            leagues = self.team_leagues.get(team_id)
+            if not league_id or not leagues or not leagues[league_id]:
+                continue
+            _decrement(leagues, league_id)
+            if team_id in self.team_rating:
+                _decrement(self.league_ratings[league_id], self.team_rating[team_id])
+        return True
+
+    # --- Result ---
+
+    def assemble(self, leagues: List[Dict[str, Any]], tm_fifa_nation_map: Dict[str, Any]) -> Dict[str, Any]:
+        """Per-country/per-level statistics in the /db/fc25_league_ratings format."""
+        league_info = {}
+        for league in leagues:
+            league_id = str(league.get('leagueid', ''))
+            if league_id and league.get('iswomencompetition', '0') != '1':  # Only men's leagues
+                league_info[league_id] = (str(league.get('countryid', '')), int(league.get('level', 1)))
+
+        # FC25 country ID -> Transfermarkt country names (several TM countries may share one)
+        fc25_to_tm_country: Dict[str, List[str]] = {}
+        for tm_country, fc25_country_id in tm_fifa_nation_map.items():
+            fc25_to_tm_country.setdefault(str(fc25_country_id), []).append(tm_country)
+
+        country_level_ratings: Dict[str, Dict[int, Counter]] = {}
+        with self.lock:
+            for league_id, ratings in self.league_ratings.items():
+                if not ratings or league_id not in league_info:
+                    continue
+                country_id, level = league_info[league_id]
+                for tm_country_name in fc25_to_tm_country.get(country_id, []):
+                    country_level_ratings.setdefault(tm_country_name, {}).setdefault(level, Counter()).update(ratings)
+
+        result = {}
+        for tm_country_name, levels in country_level_ratings.items():
+            result[tm_country_name] = {}
+            for level, ratings in levels.items():
+                team_count = sum(ratings.values())
+                result[tm_country_name][level] = {
+                    'average_rating': round(sum(rating * count for rating, count in ratings.items()) / team_count, 1),
+                    'team_count': team_count,
+                    'min_rating': min(ratings),
+                    'max_rating': max(ratings),
+                    'level': level
+                }
+        return result
+
+
+_views: Dict[Tuple[str, str], LeagueRatingsView] = {}
+_views_lock = threading.Lock()
+
+
+def _source_paths(project_id: Optional[str]) -> Tuple[str, str, str]:
+    """(teams, leagueteamlinks, leagues) of the project, or FC25 when any of them is missing."""
+    tables = ('teams.json', 'leagueteamlinks.json', 'leagues.json')
+    if project_id:
+        paths = tuple(f'../projects/{project_id}/data/fifa_ng_db/{table}' for table in tables)
+        if all(table_exists(path) for path in paths):
+            return paths
+    return tuple(f'../fc25/data/fifa_ng_db/{table}' for table in tables)
+
+
+def _is_current(view: LeagueRatingsView, path: str) -> bool:
+    listener = view.listeners.get(path)
+    if listener is not None:
+        return attached_index(path, VIEW_KEY) is listener
+    return table_stamp(path) == view.stamps.get(path)
+
+
+def _attach(view: LeagueRatingsView, path: str, load, on_remove) -> None:
+    def build(rows):
+        load(rows)
+        return _TableListener(view, load, on_remove)
+    view.listeners[path] = attach_index(path, VIEW_KEY, build)
+    if view.listeners[path] is None:
+        # Overlay table: load the merged rows and validate by stamp
+        view.stamps[path] = table_stamp(path)
+        load(read_table(path))
+
+
+def _build(teams_path: str, links_path: str) -> LeagueRatingsView:
+    view = LeagueRatingsView()
+    with view.lock:
+        # Teams first: links look up the ratings of already known teams
+        _attach(view, teams_path, view.add_teams, view.remove_teams)
+        _attach(view, links_path, view.add_links, view.remove_links)
+    return view
+
+
+def get_league_ratings_view(project_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    League ratings of a project (FC25 when it has no teams/links/leagues tables),
+    served from the materialized view. Raises FileNotFoundError when a source
+    table is missing.
+    """
+    teams_path, links_path, leagues_path = _source_paths(project_id)
+    key = (resolve_data_path(teams_path), resolve_data_path(links_path))
+    with _views_lock:
+        view = _views.get(key)
+        if view is None or not (_is_current(view, teams_path) and _is_current(view, links_path)):
+            view = _views[key] = _build(teams_path, links_path)
+
+    result_key = (view.version, table_stamp(leagues_path), table_stamp(NATION_MAP_FILE))
+    with view.lock:
+        if view.result is not None and view.result_key == result_key:
+            return view.result
+    result = view.assemble(read_table(leagues_path), read_table(NATION_MAP_FILE))
+    with view.lock:
+        if view.version == result_key[0]:
+            view.result, view.result_key = result, result_key
+    return result
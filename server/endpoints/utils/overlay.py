@@ -0,0 +1,265 @@
+"""
+Overlay tables: a project table stored as a row-level delta over FC25.
+
+A project using the overlay engine keeps, instead of <table>.json, a small
+<table>.json.overlay file next to where the table would be:
+
+    {"key": "teamid", "indent": 4,
+     "deleted": ["101"],              # FC25 rows removed from the project
+     "rows": [{...}, {...}]}          # rows updated (same key as an FC25 row) or inserted
+
+Reads merge the immutable FC25 base table - parsed once by the table cache
+and shared by every project - with the delta: updated rows keep their FC25
+position, inserted rows follow in insertion order. Writes made through
+utils.tables only rewrite the delta, so memory and I/O per project scale
+with the number of edits. Tables without an FC25 base (players, teamkits,
+...) stay plain JSON files.
+"""
+
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from . import json_codec
+from .table_index import KeyIndex, MultiIndex, index_key
+
+OVERLAY_SUFFIX = ".overlay"
+
+FC25_TABLES_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "fc25", "data", "fifa_ng_db")
+
+TABLES_SUBDIR = os.path.join("data", "fifa_ng_db")
+
+# Table file name -> unique key column the delta is keyed by
+OVERLAY_KEYS: Dict[str, str] = {
+    "teams.json": "teamid",
+    "formations.json": "formationid",
+    "defaultteamdata.json": "teamid",
+    "default_teamsheets.json": "teamid",
+    "leagues.json": "leagueid",
+    "leagueteamlinks.json": "artificialkey",
+    "manager.json": "managerid",
+    "nations.json": "nationid",
+    "teamnationlinks.json": "teamid",
+    "teamstadiumlinks.json": "teamid",
+}
+
+
+def overlay_path(abs_path: str) -> str:
+    return abs_path + OVERLAY_SUFFIX
+
+
+def base_path(abs_path: str) -> str:
+    """FC25 table the project table overlays."""
+    return os.path.join(FC25_TABLES_DIR, os.path.basename(abs_path))
+
+
+def locate(abs_path: str) -> Optional[str]:
+    """Path of the delta file when `abs_path` is an overlay table, else None."""
+    if os.path.basename(abs_path) not in OVERLAY_KEYS:
+        return None
+    path = overlay_path(abs_path)
+    return path if os.path.isfile(path) and not os.path.isfile(abs_path) else None
+
+
+class Delta:
+    """Parsed delta of one overlay table."""
+    __slots__ = ("key", "indent", "rows", "deleted")
+
+    def __init__(self, key: str, indent: Optional[int] = 4, rows: Optional[Dict[str, Dict[str, Any]]] = None,
+                 deleted: Optional[set] = None):
+        self.key = key
+        self.indent = indent
+        self.rows: Dict[str, Dict[str, Any]] = rows if rows is not None else {}
+        self.deleted: set = deleted if deleted is not None else set()
+
+    @classmethod
+    def from_doc(cls, doc: Dict[str, Any]) -> "Delta":
+        key = doc["key"]
+        rows = {index_key(row.get(key)): row for row in doc.get("rows", [])}
+        return cls(key, doc.get("indent", 4), rows, set(doc.get("deleted", [])))
+
+    def to_doc(self) -> Dict[str, Any]:
+        return {"key": self.key, "indent": self.indent, "deleted": sorted(self.deleted), "rows": list(self.rows.values())}
+
+    def copy(self) -> "Delta":
+        return Delta(self.key, self.indent, dict(self.rows), set(self.deleted))
+
+    def row_key(self, row: Dict[str, Any]) -> Optional[str]:
+        return index_key(row.get(self.key))
+
+    def shadows(self, row: Dict[str, Any]) -> bool:
+        """True if this FC25 row is replaced or deleted by the delta."""
+        key = self.row_key(row)
+        return key in self.rows or key in self.deleted
+
+    def __len__(self) -> int:
+        return len(self.rows) + len(self.deleted)
+
+    def merge(self, base_rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Merged table (new list; rows are the shared FC25 and delta row objects: copy before editing)."""
+        if not self.rows and not self.deleted:
+            return list(base_rows)
+        merged, placed = [], set()
+        for row in base_rows:
+            key = self.row_key(row)
+            if key in self.deleted:
+                continue
+            if key in self.rows:
+                if key not in placed:  # Duplicate FC25 keys collapse into the updated row
+                    placed.add(key)
+                    merged.append(self.rows[key])
+                continue
+            merged.append(row)
+        merged.extend(row for key, row in self.rows.items() if key not in placed)
+        return merged
+
+    def apply(self, removed: Iterable[Dict[str, Any]], added: Iterable[Dict[str, Any]], base_index: KeyIndex) -> None:
+        """Record a row-level change (rows removed from / added to the merged table)."""
+        for row in removed:
+            key = self.row_key(row)
+            if key is None:
+                continue
+            self.rows.pop(key, None)
+            if key in base_index:
+                self.deleted.add(key)
+        for row in added:
+            key = self.row_key(row)
+            if key is None:
+                raise ValueError(f"Overlay table rows need a '{self.key}' value")
+            self.deleted.discard(key)
+            if base_index.get(key) == row:
+                self.rows.pop(key, None)  # Back to the FC25 row
+            else:
+                self.rows[key] = row
+
+    @classmethod
+    def diff(cls, key: str, base_rows: List[Dict[str, Any]], rows: List[Dict[str, Any]],
+             indent: Optional[int] = 4) -> "Delta":
+        """Delta turning `base_rows` into `rows` (row order beyond inserts is not kept)."""
+        base_index = KeyIndex(key, base_rows)
+        delta = cls(key, indent)
+        seen = set()
+        for row in rows:
+            row_key = index_key(row.get(key))
+            if row_key is None:
+                raise ValueError(f"Overlay table rows need a '{key}' value")
+            if row_key in seen:
+                print(f"[WARNING] Duplicate {key} '{row_key}' dropped from overlay delta")
+                continue
+            seen.add(row_key)
+            if base_index.get(row_key) != row:
+                delta.rows[row_key] = dict(row)  # The caller's rows may be edited again later
+        delta.deleted = set(base_index) - seen
+        return delta
+
+
+class OverlayMultiIndex:
+    """MultiIndex-compatible view: FC25 index minus shadowed rows, plus delta rows."""
+
+    def __init__(self, base: MultiIndex, delta: Delta, delta_index: MultiIndex):
+        self.base, self.delta, self.delta_index = base, delta, delta_index
+
+    def _rows(self, key: Any) -> List[Dict[str, Any]]:
+        rows = [row for row in self.base.get(key) if not self.delta.shadows(row)]
+        rows.extend(self.delta_index.get(key))
+        return rows
+
+    def get(self, key: Any) -> List[Dict[str, Any]]:
+        return self._rows(key)
+
+    def first(self, key: Any, default: Any = None) -> Any:
+        rows = self._rows(key)
+        return rows[0] if rows else default
+
+    def __contains__(self, key: Any) -> bool:
+        return bool(self._rows(key))
+
+    def __iter__(self) -> Iterator[str]:
+        keys = [key for key in self.base if self._rows(key)] + list(self.delta_index)
+        return iter(dict.fromkeys(keys))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+class OverlayKeyIndex(OverlayMultiIndex):
+    """KeyIndex-compatible view (first row wins, like KeyIndex)."""
+
+    def __init__(self, base: MultiIndex, base_keys: KeyIndex, delta: Delta, delta_index: MultiIndex):
+        super().__init__(base, delta, delta_index)
+        self.base_keys = base_keys
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        return self.first(key, default)
+
+    @property
+    def max_int(self) -> int:
+        # High-water mark: deleted FC25 keys still count, so they are never reused
+        delta_max = max((int(key) for key in self.delta_index if key.lstrip('-').isdigit()), default=0)
+        return max(self.base_keys.max_int, delta_max)
+
+
+# --- Conversion ---
+
+def _write_doc(path: str, doc: Any, indent: Optional[int]) -> None:
+    json_codec.dump_file(path, doc, indent, atomic=True)
+
+
+def overlay_tables(tables_dir: str) -> List[str]:
+    """Table paths (as addressed by readers) of every overlay table in a directory."""
+    if not os.path.isdir(tables_dir):
+        return []
+    return sorted(os.path.join(tables_dir, name[:-len(OVERLAY_SUFFIX)])
+                  for name in os.listdir(tables_dir) if name.endswith(OVERLAY_SUFFIX))
+
+
+def is_overlay_project(project_dir: str) -> bool:
+    return bool(overlay_tables(os.path.join(project_dir, TABLES_SUBDIR)))
+
+
+def convert_project_to_overlay(project_dir: str) -> List[str]:
+    """
+    Replace every project table that has an FC25 base with its delta.
+    Tables still hardlinked to FC25 (see cow.py) are known to be unchanged
+    and get an empty delta without being parsed.
+    """
+    from .sqlite_store import detect_indent
+
+    tables_dir = os.path.join(os.path.abspath(project_dir), TABLES_SUBDIR)
+    converted = []
+    for name, key in OVERLAY_KEYS.items():
+        abs_path = os.path.join(tables_dir, name)
+        base = base_path(abs_path)
+        if not os.path.isfile(abs_path) or not os.path.isfile(base):
+            continue
+        indent = detect_indent(abs_path)
+        if os.path.samefile(abs_path, base):
+            delta = Delta(key, indent)
+        else:
+            delta = Delta.diff(key, json_codec.load_file(base), json_codec.load_file(abs_path), indent)
+        _write_doc(overlay_path(abs_path), delta.to_doc(), None)
+        os.remove(abs_path)
+        converted.append(name)
+    return converted
+
+
+def convert_project_to_json(project_dir: str) -> List[str]:
+    """Materialize every overlay table of a project as a full JSON file."""
+    converted = []
+    for abs_path in overlay_tables(os.path.join(os.path.abspath(project_dir), TABLES_SUBDIR)):
+        materialize(abs_path, abs_path)
+        os.remove(overlay_path(abs_path))
+        converted.append(os.path.basename(abs_path))
+    return converted
+
+
+def load_delta(path: str) -> Delta:
+    return Delta.from_doc(json_codec.load_file(path))
+
+
+def materialize(abs_path: str, target_path: str) -> int:
+    """Write the merged table at `abs_path` as a full JSON file; returns the row count."""
+    delta = load_delta(overlay_path(abs_path))
+    rows = delta.merge(json_codec.load_file(base_path(abs_path)))
+    _write_doc(target_path, rows, delta.indent)
+    return len(rows)
@@ -0,0 +1,172 @@
+"""
+Filtered, sorted and paginated queries over a players table.
+
+Pages are addressed with keyset cursors: the cursor is the (sort value,
+playerid) key of the last row of the previous page, so fetching page N costs
+the same as page 1 and rows added meanwhile never shift a page.
+
+The work is served from indexes cached with the tables (see table_index.py):
+- team filter: teamplayerlinks teamid index + players playerid index
+- nationality / position filters: multi-valued indexes on those columns
+- sort order: a SortedIndex per sort column (kept ordered on append)
+Range filters (overall, potential, age) are checked on the candidate rows.
+"""
+
+import base64
+import json
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from .table_index import int_value
+from .tables import get_index, get_multi_index, get_sorted_index
+
+# Sort key -> (players column, True when ascending key order is descending column order)
+SORT_COLUMNS: Dict[str, Tuple[str, bool]] = {
+    "playerid": ("playerid", False),
+    "overallrating": ("overallrating", False),
+    "potentialrating": ("potentialrating", False),
+    "age": ("birthdate", True),  # Older players have smaller birthdates
+}
+
+FIFA_EPOCH = date(1582, 10, 14)  # Day 0 of FIFA date integers (birthdate, joindate, ...)
+
+
+@dataclass
+class PlayerFilters:
+    team_id: Optional[str] = None
+    nationality: Optional[str] = None
+    position: Optional[str] = None
+    min_overall: Optional[int] = None
+    max_overall: Optional[int] = None
+    min_potential: Optional[int] = None
+    max_potential: Optional[int] = None
+    min_age: Optional[int] = None
+    max_age: Optional[int] = None
+
+
+def _years_before(day: date, years: int) -> date:
+    try:
+        return day.replace(year=day.year - years)
+    except ValueError:  # Feb 29
+        return day.replace(year=day.year - years, day=28)
+
+
+def birthdate_bounds(min_age: Optional[int], max_age: Optional[int], today: Optional[date] = None):
+    """FIFA birthdate range (inclusive, None = open) of players aged min_age..max_age today."""
+    today = today or date.today()
+    latest = (_years_before(today, min_age) - FIFA_EPOCH).days if min_age is not None else None
+    earliest = (_years_before(today, max_age + 1) - FIFA_EPOCH).days + 1 if max_age is not None else None
+    return earliest, latest
+
+
+def encode_cursor(key: Tuple[int, int]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, int]:
+    """Raises ValueError for a malformed cursor."""
+    try:
+        value, player_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return int(value), int(player_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def _range_check(filters: PlayerFilters, today: Optional[date] = None):
+    """Predicate for the range filters (None when there are none)."""
+    earliest, latest = birthdate_bounds(filters.min_age, filters.max_age, today)
+    checks = [(column, low, high) for column, low, high in (
+        ("overallrating", filters.min_overall, filters.max_overall),
+        ("potentialrating", filters.min_potential, filters.max_potential),
+        ("birthdate", earliest, latest),
+    ) if low is not None or high is not None]
+    if not checks:
+        return None
+
+    def matches(row: Dict[str, Any]) -> bool:
+        for column, low, high in checks:
+            value = int_value(row.get(column))
+            if (low is not None and value < low) or (high is not None and value > high):
+                return False
+        return True
+    return matches
+
+
+def _candidates(players_file: str, links_file: str, filters: PlayerFilters) -> Optional[List[Dict[str, Any]]]:
+    """Rows selected by the indexed equality filters, or None when there are none (= whole table)."""
+    candidates = None
+    if filters.team_id:
+        try:
+            team_links = get_multi_index(links_file, "teamid").get(filters.team_id)
+        except FileNotFoundError:
+            team_links = []
+        players_index = get_index(players_file)
+        player_ids = dict.fromkeys(link.get("playerid") for link in team_links)
+        candidates = [players_index.get(pid) for pid in player_ids if pid in players_index]
+    for column, value in (("nationality", filters.nationality), ("preferredposition1", filters.position)):
+        if not value:
+            continue
+        if candidates is None:
+            candidates = list(get_multi_index(players_file, column).get(value))
+        else:
+            candidates = [row for row in candidates if str(row.get(column)) == str(value)]
+    return candidates
+
+
+def query_players(players_file: str, links_file: str, filters: PlayerFilters, sort: str = "overallrating",
+                  order: str = "desc", limit: int = 50, cursor: Optional[str] = None) -> Dict[str, Any]:
+    """
+    One page of players matching `filters` in (sort, playerid) order.
+    Returns {"items", "total", "next_cursor", ...}; next_cursor is None on the last page.
+    Raises ValueError for an unknown sort key or a malformed cursor and
+    FileNotFoundError when the players table does not exist.
+    """
+    if sort not in SORT_COLUMNS:
+        raise ValueError(f"Unknown sort key: {sort} (expected one of {', '.join(SORT_COLUMNS)})")
+    column, inverted = SORT_COLUMNS[sort]
+    descending = (order == "desc") != inverted
+    after = decode_cursor(cursor) if cursor else None
+    matches = _range_check(filters)
+
+    index = get_sorted_index(players_file, column, "playerid")
+    candidates = _candidates(players_file, links_file, filters)
+    if candidates is None:
+        keys, rows = index.keys, index.rows
+    else:
+        entries = sorted(((index.key_of(row), row) for row in candidates), key=lambda entry: entry[0])
+        keys, rows = [key for key, _ in entries], [row for _, row in entries]
+
+    # Position of the first row after the cursor, walking in page order
+    if descending:
+        positions = range((bisect_left(keys, after) if after else len(keys)) - 1, -1, -1)
+    else:
+        positions = range(bisect_right(keys, after) if after else 0, len(keys))
+
+    items: List[Dict[str, Any]] = []
+    last_key = None
+    for position in positions:
+        row = rows[position]
+        if matches is not None and not matches(row):
+            continue
+        if len(items) == limit:
+            break
+        items.append(row)
+        last_key = keys[position]
+    else:
+        last_key = None  # Walked off the end: this is the last page
+
+    if matches is None:
+        total = len(rows)
+    else:
+        total = sum(1 for row in rows if matches(row))
+
+    return {
+        "items": items,
+        "total": total,
+        "limit": limit,
+        "sort": sort,
+        "order": order,
+        "next_cursor": encode_cursor(last_key) if last_key is not None else None,
+    }
@@ -0,0 +1,59 @@
+"""
+Records which files and tables the current request reads, together with the
+validator (stamp) each one was read at.
+
+etag.py wraps table-backed GET requests in track_reads(); if a later request
+finds every recorded stamp unchanged, the response it would build is known to
+be the same and can be answered with 304 without running the endpoint.
+Tracking is per context (asyncio task / to_thread copies share the dict), and
+record() is a no-op when nobody is tracking.
+"""
+
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import IO, Any, Dict, Iterator, Optional, Tuple
+
+# (kind, abs_path) -> stamp; kind is "file" (raw JSON file) or "table" (utils.tables validator)
+Reads = Dict[Tuple[str, str], Any]
+
+_reads: ContextVar[Optional[Reads]] = ContextVar("table_reads", default=None)
+
+CHANGED = ("changed",)  # Read at two different versions: never revalidates
+
+
+@contextmanager
+def track_reads() -> Iterator[Reads]:
+    reads: Reads = {}
+    token = _reads.set(reads)
+    try:
+        yield reads
+    finally:
+        _reads.reset(token)
+
+
+def active() -> bool:
+    return _reads.get() is not None
+
+
+def record(kind: str, abs_path: str, stamp: Any) -> None:
+    reads = _reads.get()
+    if reads is None:
+        return
+    key = (kind, abs_path)
+    if reads.setdefault(key, stamp) != stamp:
+        reads[key] = CHANGED
+
+
+def record_open_file(fp: IO) -> None:
+    """Record a JSON file being parsed from an open file object (stamp of the opened inode)."""
+    if _reads.get() is None:
+        return
+    name = getattr(fp, "name", None)
+    if not isinstance(name, str):
+        return
+    try:
+        st = os.fstat(fp.fileno())
+    except (OSError, ValueError, AttributeError):
+        return
+    record("file", os.path.abspath(name), (st.st_mtime_ns, st.st_size))
@@ -0,0 +1,423 @@
+"""
+Optional SQLite storage engine for project tables.
+
+A project that uses it keeps every fifa_ng_db table in a single
+<project>/project.sqlite file instead of one JSON array per table.
+Each row is stored as its JSON text (key order and value types are kept,
+so import/export is lossless) together with its position in the table.
+Primary/secondary key columns (see table_index.py) plus artificialkey are
+copied into an indexed `keys` table for per-row lookups, and every change
+bumps the table's version, which the table cache uses as its validator.
+
+The engine is selected per project: a project is SQLite-backed exactly when
+project.sqlite exists. utils.tables dispatches to it transparently, so
+endpoint code keeps using fifa_ng_db JSON paths.
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from . import json_codec
+from .table_index import PRIMARY_KEYS, SECONDARY_KEYS, index_key
+
+STORE_FILE_NAME = "project.sqlite"
+TABLES_SUBDIR = os.path.join("data", "fifa_ng_db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tables (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    nbytes INTEGER NOT NULL DEFAULT 0,
+    indent INTEGER,                      -- indent used when exported as JSON (NULL = compact)
+    kind TEXT NOT NULL DEFAULT 'list',   -- 'list': rows below; 'value': whole JSON value in doc
+    doc TEXT
+);
+CREATE TABLE IF NOT EXISTS rows (
+    tbl TEXT NOT NULL,
+    rid INTEGER NOT NULL,
+    doc TEXT NOT NULL,
+    PRIMARY KEY (tbl, rid)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS keys (
+    tbl TEXT NOT NULL,
+    col TEXT NOT NULL,
+    key TEXT NOT NULL,
+    num INTEGER,
+    rid INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS keys_lookup ON keys (tbl, col, key, rid);
+CREATE INDEX IF NOT EXISTS keys_num ON keys (tbl, col, num);
+CREATE INDEX IF NOT EXISTS keys_rid ON keys (tbl, rid);
+"""
+
+
+def key_columns(name: str) -> Tuple[str, ...]:
+    """Columns of a table that get an SQL index."""
+    columns = [PRIMARY_KEYS.get(name)] + list(SECONDARY_KEYS.get(name, ())) + ["artificialkey"]
+    return tuple(dict.fromkeys(c for c in columns if c))
+
+
+def _dumps(value: Any) -> str:
+    return json_codec.dumps(value)
+
+
+def detect_indent(abs_path: str) -> Optional[int]:
+    """Indent of an existing JSON file (None for compact files)."""
+    with open(abs_path, 'r', encoding='utf-8-sig') as file:
+        head = file.read(4096)
+    lines = head.splitlines()
+    if len(lines) < 2:
+        return None
+    second = lines[1]
+    return len(second) - len(second.lstrip(' ')) or None
+
+
+class ProjectStore:
+    """All fifa_ng_db tables of one project in one SQLite database."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # --- Transactions ---
+
+    @contextmanager
+    def transaction(self) -> Iterator["ProjectStore"]:
+        """
+        Group writes (to any number of tables) into one SQLite transaction.
+        Nested calls join the outer transaction.
+        """
+        with self._lock:
+            if self._depth == 0:
+                self._conn.execute("BEGIN IMMEDIATE")
+            self._depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._conn.execute("ROLLBACK")
+                raise
+            self._depth -= 1
+            if self._depth == 0:
+                self._conn.execute("COMMIT")
+
+    def _query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # --- Table level ---
+
+    def table_names(self) -> List[str]:
+        return [row[0] for row in self._query("SELECT name FROM tables ORDER BY name")]
+
+    def has_table(self, name: str) -> bool:
+        return bool(self._query("SELECT 1 FROM tables WHERE name = ?", (name,)))
+
+    def stamp(self, name: str) -> Optional[Tuple[int, int]]:
+        """(version, nbytes) of a table, or None if it does not exist."""
+        rows = self._query("SELECT version, nbytes FROM tables WHERE name = ?", (name,))
+        return (rows[0][0], rows[0][1]) if rows else None
+
+    def indent(self, name: str) -> Optional[int]:
+        rows = self._query("SELECT indent FROM tables WHERE name = ?", (name,))
+        return rows[0][0] if rows else 4
+
+    def read(self, name: str) -> Any:
+        """Whole table as parsed JSON. Raises FileNotFoundError if it does not exist."""
+        with self._lock:
+            meta = self._conn.execute("SELECT kind, doc FROM tables WHERE name = ?", (name,)).fetchone()
+            if meta is None:
+                raise FileNotFoundError(name)
+            if meta[0] != 'list':
+                return json_codec.loads(meta[1])
+            docs = self._conn.execute("SELECT doc FROM rows WHERE tbl = ? ORDER BY rid", (name,)).fetchall()
+        return [json_codec.loads(doc) for (doc,) in docs]
+
+    def iter_rows(self, name: str, batch_size: int = 1000) -> Iterator[List[Any]]:
+        """
+        Rows of a table in table order, fetched `batch_size` rows at a time
+        (keyset on rid, the lock is only held per batch). A 'value' table yields
+        its whole value as a single row. Raises FileNotFoundError if it does not exist.
+        """
+        meta = self._query("SELECT kind, doc FROM tables WHERE name = ?", (name,))
+        if not meta:
+            raise FileNotFoundError(name)
+        if meta[0][0] != 'list':
+            yield [json_codec.loads(meta[0][1])]
+            return
+        last_rid = -1
+        while True:
+            docs = self._query("SELECT rid, doc FROM rows WHERE tbl = ? AND rid > ? ORDER BY rid LIMIT ?",
+                               (name, last_rid, batch_size))
+            if not docs:
+                return
+            last_rid = docs[-1][0]
+            yield [json_codec.loads(doc) for _, doc in docs]
+
+    def row_count(self, name: str) -> int:
+        return self._query("SELECT COUNT(*) FROM rows WHERE tbl = ?", (name,))[0][0]
+
+    def _touch(self, name: str, added_bytes: int, indent: Optional[int], reset: bool = False) -> None:
+        # Bump the version; a full rewrite (reset) also replaces nbytes and the export indent,
+        # row-level changes keep the layout the table was created/imported with
+        self._conn.execute(
+            "INSERT INTO tables (name, version, nbytes, indent) VALUES (?, 1, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET version = version + 1, "
+            "nbytes = CASE WHEN ? THEN excluded.nbytes ELSE nbytes + excluded.nbytes END, "
+            "indent = CASE WHEN ? THEN excluded.indent ELSE indent END",
+            (name, added_bytes, indent, reset, reset),
+        )
+
+    def _insert_rows(self, name: str, rows: List[Dict[str, Any]], first_rid: int) -> int:
+        docs, keys = [], []
+        columns = key_columns(name)
+        nbytes = 0
+        for offset, row in enumerate(rows):
+            rid = first_rid + offset
+            doc = _dumps(row)
+            nbytes += len(doc)
+            docs.append((name, rid, doc))
+            for column in columns:
+                key = index_key(row.get(column)) if isinstance(row, dict) else None
+                if key is None:
+                    continue
+                try:
+                    num = int(key)
+                except ValueError:
+                    num = None
+                keys.append((name, column, key, num, rid))
+        self._conn.executemany("INSERT INTO rows (tbl, rid, doc) VALUES (?, ?, ?)", docs)
+        self._conn.executemany("INSERT INTO keys (tbl, col, key, num, rid) VALUES (?, ?, ?, ?, ?)", keys)
+        return nbytes
+
+    def _next_rid(self, name: str) -> int:
+        return self._conn.execute("SELECT COALESCE(MAX(rid), -1) + 1 FROM rows WHERE tbl = ?", (name,)).fetchone()[0]
+
+    def write(self, name: str, data: Any, indent: Optional[int] = 4) -> None:
+        """Replace a whole table."""
+        with self.transaction():
+            self._conn.execute("DELETE FROM rows WHERE tbl = ?", (name,))
+            self._conn.execute("DELETE FROM keys WHERE tbl = ?", (name,))
+            if isinstance(data, list):
+                nbytes = self._insert_rows(name, data, 0)
+                self._touch(name, nbytes, indent, reset=True)
+                self._conn.execute("UPDATE tables SET kind = 'list', doc = NULL WHERE name = ?", (name,))
+            else:
+                doc = _dumps(data)
+                self._touch(name, len(doc), indent, reset=True)
+                self._conn.execute("UPDATE tables SET kind = 'value', doc = ? WHERE name = ?", (doc, name))
+
+    def append(self, name: str, rows: List[Dict[str, Any]], indent: Optional[int] = 4) -> None:
+        """Insert rows at the end of a list table (created if missing)."""
+        with self.transaction():
+            nbytes = self._insert_rows(name, rows, self._next_rid(name))
+            self._touch(name, nbytes, indent)
+
+    def replace(self, name: str, column: str, key: Any, rows: List[Dict[str, Any]], indent: Optional[int] = 4) -> int:
+        """Delete rows whose `column` equals `key`, then append `rows`. Returns the number removed."""
+        key = index_key(key)
+        with self.transaction():
+            if column in key_columns(name):
+                rids = [r for (r,) in self._conn.execute(
+                    "SELECT rid FROM keys WHERE tbl = ? AND col = ? AND key = ?", (name, column, key))]
+            else:
+                rids = [rid for rid, doc in self._conn.execute(
+                    "SELECT rid, doc FROM rows WHERE tbl = ?", (name,))
+                    if index_key(json_codec.loads(doc).get(column)) == key]
+            removed_bytes = 0
+            for rid in rids:
+                removed_bytes += self._conn.execute(
+                    "SELECT LENGTH(doc) FROM rows WHERE tbl = ? AND rid = ?", (name, rid)).fetchone()[0]
+                self._conn.execute("DELETE FROM rows WHERE tbl = ? AND rid = ?", (name, rid))
+                self._conn.execute("DELETE FROM keys WHERE tbl = ? AND rid = ?", (name, rid))
+            nbytes = self._insert_rows(name, rows, self._next_rid(name))
+            self._touch(name, nbytes - removed_bytes, indent)
+        return len(rids)
+
+    # --- Indexed lookups ---
+
+    def lookup(self, name: str, column: str, key: Any, limit: int = -1) -> List[Dict[str, Any]]:
+        """Rows whose indexed `column` equals `key`, in table order."""
+        docs = self._query(
+            "SELECT r.doc FROM keys k JOIN rows r ON r.tbl = k.tbl AND r.rid = k.rid "
+            "WHERE k.tbl = ? AND k.col = ? AND k.key = ? ORDER BY k.rid LIMIT ?",
+            (name, column, index_key(key), limit),
+        )
+        return [json_codec.loads(doc) for (doc,) in docs]
+
+    def contains(self, name: str, column: str, key: Any) -> bool:
+        return bool(self._query(
+            "SELECT 1 FROM keys WHERE tbl = ? AND col = ? AND key = ? LIMIT 1", (name, column, index_key(key))))
+
+    def distinct_keys(self, name: str, column: str) -> int:
+        return self._query("SELECT COUNT(DISTINCT key) FROM keys WHERE tbl = ? AND col = ?", (name, column))[0][0]
+
+    def max_num(self, name: str, column: str) -> int:
+        value = self._query("SELECT MAX(num) FROM keys WHERE tbl = ? AND col = ?", (name, column))[0][0]
+        return max(value or 0, 0)
+
+    # --- JSON import/export ---
+
+    def import_dir(self, tables_dir: str) -> List[str]:
+        """Load every *.json table of a fifa_ng_db directory (one transaction)."""
+        imported = []
+        with self.transaction():
+            for file_name in sorted(os.listdir(tables_dir)):
+                if not file_name.endswith('.json'):
+                    continue
+                abs_path = os.path.join(tables_dir, file_name)
+                data = json_codec.load_file(abs_path)
+                self.write(file_name, data, detect_indent(abs_path))
+                imported.append(file_name)
+        return imported
+
+    def export_table(self, name: str, abs_path: str) -> None:
+        """Materialize one table as a JSON file in its original layout."""
+        os.makedirs(os.path.dirname(abs_path), exist_ok=True)
+        json_codec.dump_file(abs_path, self.read(name), self.indent(name))
+
+    def export_dir(self, tables_dir: str) -> List[str]:
+        names = self.table_names()
+        for name in names:
+            self.export_table(name, os.path.join(tables_dir, name))
+        return names
+
+
+class StoreKeyIndex:
+    """KeyIndex-compatible view answered by SQL (first row wins, like KeyIndex)."""
+
+    def __init__(self, store: ProjectStore, name: str, column: str):
+        self.store, self.name, self.column = store, name, column
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        rows = self.store.lookup(self.name, self.column, key, limit=1)
+        return rows[0] if rows else default
+
+    def __contains__(self, key: Any) -> bool:
+        return self.store.contains(self.name, self.column, key)
+
+    def __len__(self) -> int:
+        return self.store.distinct_keys(self.name, self.column)
+
+    @property
+    def max_int(self) -> int:
+        return self.store.max_num(self.name, self.column)
+
+
+class StoreMultiIndex:
+    """MultiIndex-compatible view answered by SQL."""
+
+    def __init__(self, store: ProjectStore, name: str, column: str):
+        self.store, self.name, self.column = store, name, column
+
+    def get(self, key: Any) -> List[Dict[str, Any]]:
+        return self.store.lookup(self.name, self.column, key)
+
+    def first(self, key: Any, default: Any = None) -> Any:
+        rows = self.store.lookup(self.name, self.column, key, limit=1)
+        return rows[0] if rows else default
+
+    def __contains__(self, key: Any) -> bool:
+        return self.store.contains(self.name, self.column, key)
+
+    def __len__(self) -> int:
+        return self.store.distinct_keys(self.name, self.column)
+
+
+# --- Store registry ---
+
+_stores: Dict[str, ProjectStore] = {}
+_stores_lock = threading.Lock()
+
+
+def store_path(project_dir: str) -> str:
+    return os.path.join(project_dir, STORE_FILE_NAME)
+
+
+def open_store(project_dir: str) -> Optional[ProjectStore]:
+    """The project's store if it uses the SQLite engine, else None."""
+    project_dir = os.path.abspath(project_dir)
+    db_path = store_path(project_dir)
+    if not os.path.exists(db_path):
+        if project_dir in _stores:
+            close_store(project_dir)
+        return None
+    with _stores_lock:
+        store = _stores.get(project_dir)
+        if store is None:
+            store = _stores[project_dir] = ProjectStore(db_path)
+        return store
+
+
+def close_store(project_dir: str) -> None:
+    with _stores_lock:
+        store = _stores.pop(os.path.abspath(project_dir), None)
+    if store is not None:
+        store.close()
+
+
+def locate(abs_path: str) -> Tuple[Optional[ProjectStore], Optional[str]]:
+    """
+    Map a fifa_ng_db table path to (store, table name) when its project is
+    SQLite-backed; (None, None) for JSON projects and every other file.
+    """
+    tables_dir, name = os.path.split(abs_path)
+    if os.path.basename(tables_dir) != "fifa_ng_db" or not name.endswith(".json"):
+        return None, None
+    project_dir = os.path.dirname(os.path.dirname(tables_dir))
+    store = open_store(project_dir)
+    return (store, name) if store is not None else (None, None)
+
+
+def convert_project_to_sqlite(project_dir: str) -> List[str]:
+    """
+    Switch a project to the SQLite engine: import its fifa_ng_db JSON tables
+    into project.sqlite, then remove the JSON files (the store is authoritative).
+    """
+    project_dir = os.path.abspath(project_dir)
+    tables_dir = os.path.join(project_dir, TABLES_SUBDIR)
+    db_path = store_path(project_dir)
+    if os.path.exists(db_path):
+        return []
+    tmp_path = db_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    store = ProjectStore(tmp_path)
+    try:
+        imported = store.import_dir(tables_dir) if os.path.isdir(tables_dir) else []
+        store._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        store._conn.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        store.close()
+    os.replace(tmp_path, db_path)
+    for name in imported:
+        os.remove(os.path.join(tables_dir, name))
+    return imported
+
+
+def convert_project_to_json(project_dir: str) -> List[str]:
+    """Switch a project back to JSON files: export every table, then drop project.sqlite."""
+    project_dir = os.path.abspath(project_dir)
+    store = open_store(project_dir)
+    if store is None:
+        return []
+    exported = store.export_dir(os.path.join(project_dir, TABLES_SUBDIR))
+    close_store(project_dir)
+    db_path = store_path(project_dir)
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    return exported
@@ -0,0 +1,158 @@
+"""
+Shared in-process cache for parsed fifa_ng_db / db JSON tables.
+
+Entries are keyed by absolute path and validated against the file's
+(mtime_ns, size) on every lookup, so a write made by any module - through
+save_json_file or directly on disk - is picked up on the next read.
+The cache has a memory budget (measured in on-disk JSON bytes) and evicts
+the least recently used tables once it is exceeded.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from . import read_tracker
+
+# Budget can be overridden with FIFA_TABLE_CACHE_MB (0 disables caching)
+DEFAULT_MAX_BYTES = int(os.environ.get("FIFA_TABLE_CACHE_MB", "512")) * 1024 * 1024
+
+Stamp = Tuple[int, int]
+
+
+def file_stamp(abs_path: str) -> Optional[Stamp]:
+    """Return the (mtime_ns, size) validator for a file, or None if it is missing."""
+    try:
+        st = os.stat(abs_path)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class CacheEntry:
+    """
+    One parsed table together with the stamp it was loaded at.
+    `indexes` holds lazily built lookup structures (see table_index.py);
+    they live and die with the entry, so a reload can never serve a stale index.
+    """
+    __slots__ = ("data", "stamp", "nbytes", "indexes")
+
+    def __init__(self, data: Any, stamp: Stamp, nbytes: int, indexes: Optional[Dict[str, Any]] = None):
+        self.data = data
+        self.stamp = stamp
+        self.nbytes = nbytes
+        self.indexes = indexes if indexes is not None else {}
+
+
+class TableCache:
+    """LRU cache of parsed tables validated by file stamp."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, abs_path: str, loader: Callable[[str], Any]) -> Any:
+        """
+        Return the parsed table at abs_path, calling loader(abs_path) on a miss.
+        Raises FileNotFoundError if the file does not exist.
+        """
+        return self.get_entry(abs_path, loader).data
+
+    def get_entry(self, abs_path: str, loader: Callable[[str], Any], stamp: Optional[Stamp] = None) -> CacheEntry:
+        """
+        Like get(), but returns the whole entry so callers can attach indexes.
+        Tables larger than the budget still get an (uncached) entry.
+        `stamp` overrides the file stamp for tables not stored as files
+        (e.g. SQLite-backed projects); it must still be None for missing tables.
+        """
+        stamp = stamp if stamp is not None else file_stamp(abs_path)
+        read_tracker.record("table", abs_path, stamp)
+        if stamp is None:
+            self.invalidate(abs_path)
+            raise FileNotFoundError(abs_path)
+
+        with self._lock:
+            entry = self._entries.get(abs_path)
+            if entry is not None and entry.stamp == stamp:
+                self._entries.move_to_end(abs_path)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # Parse outside the lock so one large table does not block the others.
+        # The stamp is taken before reading: if the file changes mid-read the
+        # entry simply fails validation on the next lookup.
+        data = loader(abs_path)
+        return self._store(abs_path, data, stamp)
+
+    def peek(self, abs_path: str, stamp: Optional[Stamp]) -> Optional[CacheEntry]:
+        """The cached entry if it is still valid for `stamp`, without loading anything."""
+        with self._lock:
+            entry = self._entries.get(abs_path)
+            return entry if entry is not None and entry.stamp == stamp else None
+
+    def put(self, abs_path: str, data: Any, indexes: Optional[Dict[str, Any]] = None, stamp: Optional[Stamp] = None) -> None:
+        """
+        Store freshly written data for abs_path (write-through after a save).
+        Pass `indexes` only when they were updated to match `data`.
+        """
+        stamp = stamp if stamp is not None else file_stamp(abs_path)
+        if stamp is None:
+            self.invalidate(abs_path)
+            return
+        self._store(abs_path, data, stamp, indexes)
+
+    def invalidate(self, abs_path: Optional[str] = None) -> None:
+        """Drop one table, or every table when abs_path is None."""
+        with self._lock:
+            if abs_path is None:
+                self._entries.clear()
+                self._total_bytes = 0
+                return
+            entry = self._entries.pop(abs_path, None)
+            if entry is not None:
+                self._total_bytes -= entry.nbytes
+
+    def configure(self, max_bytes: int) -> None:
+        """Change the memory budget, evicting immediately if needed."""
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "tables": len(self._entries),
+                "total_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _store(self, abs_path: str, data: Any, stamp: Stamp, indexes: Optional[Dict[str, Any]] = None) -> CacheEntry:
+        nbytes = stamp[1]
+        entry = CacheEntry(data, stamp, nbytes, indexes)
+        with self._lock:
+            old = self._entries.pop(abs_path, None)
+            if old is not None:
+                self._total_bytes -= old.nbytes
+            if nbytes > self.max_bytes:
+                return entry  # Larger than the whole budget - never cache it
+            self._entries[abs_path] = entry
+            self._total_bytes += nbytes
+            self._evict()
+        return entry
+
+    def _evict(self) -> None:
+        while self._total_bytes > self.max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self._total_bytes -= entry.nbytes
+
+
+# Process-wide instance shared by every endpoint module
+table_cache = TableCache()
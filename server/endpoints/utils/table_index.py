@@ -0,0 +1,269 @@
+"""
+Lookup indexes for fifa_ng_db tables.
+
+Indexes are built lazily the first time a table is queried and are stored on
+the table's cache entry, so they are rebuilt automatically whenever the file
+changes on disk. Writes made through utils.tables update them incrementally.
+Keys are always normalized to strings (some tables store ids as ints).
+"""
+
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Table file name -> primary key column
+PRIMARY_KEYS: Dict[str, str] = {
+    "players.json": "playerid",
+    "teams.json": "teamid",
+    "formations.json": "teamid",
+    "defaultteamdata.json": "teamid",
+    "default_teamsheets.json": "teamid",
+    "manager.json": "managerid",
+    "playernames.json": "nameid",
+}
+
+# Link table file name -> columns with a multi-valued (key -> rows) index
+SECONDARY_KEYS: Dict[str, Tuple[str, ...]] = {
+    "teamplayerlinks.json": ("teamid", "playerid"),
+    "leagueteamlinks.json": ("leagueid", "teamid"),
+    "teamstadiumlinks.json": ("teamid",),
+    "teamnationlinks.json": ("teamid", "nationid"),
+    "teamkits.json": ("teamtechid",),
+}
+
+
+def index_key(value: Any) -> Optional[str]:
+    """Normalize a key column value; None/empty values are not indexed."""
+    if value is None or value == "":
+        return None
+    return str(value)
+
+
+class KeyIndex:
+    """
+    Unique index over one column. When a table holds several rows with the
+    same key the first one wins, matching the `next(...)` lookups it replaces.
+    Also tracks the highest numeric key seen so id allocation needs no table scan.
+    """
+
+    def __init__(self, column: str, rows: Iterable[Dict[str, Any]] = ()):
+        self.column = column
+        self.rows: Dict[str, Dict[str, Any]] = {}
+        self.duplicate_keys: set = set()
+        self.max_int = 0
+        self.add_rows(rows)
+
+    def add_rows(self, rows: Iterable[Dict[str, Any]]) -> None:
+        for row in rows:
+            self.add(row)
+
+    def remove_rows(self, rows: Iterable[Dict[str, Any]]) -> bool:
+        """
+        Remove these row objects. Returns False when the index can no longer be
+        patched (a removed key had duplicates that may now have to surface);
+        the caller then drops it and it is rebuilt on next use.
+        max_int is kept as a high-water mark so freed ids are not reused.
+        """
+        for row in rows:
+            key = index_key(row.get(self.column))
+            if key is not None and self.rows.get(key) is row:
+                if key in self.duplicate_keys:
+                    return False
+                del self.rows[key]
+        return True
+
+    def add(self, row: Dict[str, Any]) -> None:
+        key = index_key(row.get(self.column))
+        if key is None:
+            return
+        if key in self.rows:
+            self.duplicate_keys.add(key)
+        else:
+            self.rows[key] = row
+        try:
+            self.max_int = max(self.max_int, int(key))
+        except ValueError:
+            pass
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        return self.rows.get(index_key(key), default)
+
+    def __contains__(self, key: Any) -> bool:
+        return index_key(key) in self.rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.rows)
+
+
+class MultiIndex:
+    """
+    Non-unique index over one column: key -> rows in table order.
+    Supports incremental insert and delete, so link-table updates cost
+    O(rows for the affected key) rather than O(table).
+    """
+
+    def __init__(self, column: str, rows: Iterable[Dict[str, Any]] = ()):
+        self.column = column
+        self.rows: Dict[str, List[Dict[str, Any]]] = {}
+        self.add_rows(rows)
+
+    def add_rows(self, rows: Iterable[Dict[str, Any]]) -> None:
+        for row in rows:
+            key = index_key(row.get(self.column))
+            if key is not None:
+                self.rows.setdefault(key, []).append(row)
+
+    def remove_rows(self, rows: Iterable[Dict[str, Any]]) -> bool:
+        """Remove exactly these row objects (matched by identity). Always stays valid."""
+        by_key: Dict[str, set] = {}
+        for row in rows:
+            key = index_key(row.get(self.column))
+            if key is not None:
+                by_key.setdefault(key, set()).add(id(row))
+        for key, ids in by_key.items():
+            remaining = [row for row in self.rows.get(key, ()) if id(row) not in ids]
+            if remaining:
+                self.rows[key] = remaining
+            else:
+                self.rows.pop(key, None)
+        return True
+
+    def update_rows(self, pairs: Iterable[Tuple[Dict[str, Any], Dict[str, Any]]]) -> bool:
+        """
+        Swap updated rows (old, new) in place, keeping table order. Returns False
+        when a row changed its key (the caller drops the index).
+        """
+        for old, new in pairs:
+            key = index_key(old.get(self.column))
+            if key != index_key(new.get(self.column)):
+                return False
+            if key is not None:
+                rows = self.rows[key]
+                rows[next(i for i, row in enumerate(rows) if row is old)] = new
+        return True
+
+    def get(self, key: Any) -> List[Dict[str, Any]]:
+        return self.rows.get(index_key(key), [])
+
+    def first(self, key: Any, default: Any = None) -> Any:
+        rows = self.get(key)
+        return rows[0] if rows else default
+
+    def __contains__(self, key: Any) -> bool:
+        return index_key(key) in self.rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.rows)
+
+
+class NameIndex:
+    """
+    Case-insensitive name -> id index of a names table (playernames.json).
+    The first row wins for names stored twice; max_id is the high-water mark
+    of ids in use (never below `min_id`), so new names get fresh ids without
+    a table scan.
+    """
+
+    def __init__(self, column: str, id_column: str, rows: Iterable[Dict[str, Any]] = (), min_id: int = 999):
+        self.column = column
+        self.id_column = id_column
+        self.ids: Dict[str, int] = {}
+        self.max_id = min_id
+        self.add_rows(rows)
+
+    def add_rows(self, rows: Iterable[Dict[str, Any]]) -> None:
+        for row in rows:
+            name = row.get(self.column) or ""
+            if not name:
+                continue
+            try:
+                name_id = int(row.get(self.id_column, -1))
+            except (ValueError, TypeError):
+                continue
+            self.ids.setdefault(name.lower(), name_id)
+            self.max_id = max(self.max_id, name_id)
+
+    def remove_rows(self, rows: Iterable[Dict[str, Any]]) -> bool:
+        # A removed name may uncover a later duplicate: rebuild on next use
+        return not list(rows)
+
+    def get(self, name: str, default: Any = None) -> Any:
+        return self.ids.get(name.lower(), default)
+
+    def __contains__(self, name: str) -> bool:
+        return name.lower() in self.ids
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def int_value(value: Any, default: int = 0) -> int:
+    """Integer value of a numeric table cell (tables store numbers as strings)."""
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return default
+
+
+class SortedIndex:
+    """
+    Rows ordered by an integer column, ties broken by an integer id column,
+    for keyset pagination: `keys[i]` is the (value, id) sort key of `rows[i]`.
+    Appended rows are inserted in place; removals drop the index (rebuilt on next use).
+    """
+
+    def __init__(self, column: str, id_column: str, rows: Iterable[Dict[str, Any]] = ()):
+        self.column = column
+        self.id_column = id_column
+        entries = sorted(((self.key_of(row), row) for row in rows), key=lambda entry: entry[0])
+        self.keys: List[Tuple[int, int]] = [key for key, _ in entries]
+        self.rows: List[Dict[str, Any]] = [row for _, row in entries]
+
+    def key_of(self, row: Dict[str, Any]) -> Tuple[int, int]:
+        return int_value(row.get(self.column)), int_value(row.get(self.id_column))
+
+    def add_rows(self, rows: Iterable[Dict[str, Any]]) -> None:
+        for row in rows:
+            key = self.key_of(row)
+            position = bisect_right(self.keys, key)
+            self.keys.insert(position, key)
+            self.rows.insert(position, row)
+
+    def remove_rows(self, rows: Iterable[Dict[str, Any]]) -> bool:
+        return not list(rows)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+class Projection:
+    """
+    Rows of a table reduced to some columns, in table order (for ?fields= responses).
+    The projected rows are shared between requests and must not be modified.
+    Appended rows are projected in place; removals drop it (rebuilt on next use).
+    """
+
+    def __init__(self, columns: Tuple[str, ...], rows: Iterable[Dict[str, Any]] = ()):
+        self.columns = columns
+        self.rows: List[Dict[str, Any]] = []
+        self.add_rows(rows)
+
+    def add_rows(self, rows: Iterable[Dict[str, Any]]) -> None:
+        columns = self.columns
+        self.rows.extend({column: row[column] for column in columns if column in row} for row in rows)
+
+    def remove_rows(self, rows: Iterable[Dict[str, Any]]) -> bool:
+        return not list(rows)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+def primary_key_for(file_name: str) -> Optional[str]:
+    """Primary key column for a table file name (e.g. 'players.json')."""
+    return PRIMARY_KEYS.get(file_name)
@@ -0,0 +1,638 @@
+"""
+Shared data layer for JSON tables.
+
+Every read goes through the process-wide table cache and every write keeps
+the cache (and any indexes built on it) in sync. Functions here raise plain
+exceptions (FileNotFoundError, json.JSONDecodeError, OSError); the HTTP-facing
+wrappers load_json_file/save_json_file live in utils/__init__.py.
+
+Paths may be absolute or relative to the server/endpoints/ directory.
+fifa_ng_db tables of projects using the SQLite engine (see sqlite_store.py)
+are addressed by the same paths and served from the project's store.
+Large tables listed in journal.JOURNALED_TABLES take row-level writes as
+journal appends instead of full rewrites (see journal.py), and projects using
+the overlay engine keep FC25 tables as row-level deltas (see overlay.py).
+"""
+
+import os
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from .table_cache import CacheEntry, file_stamp, table_cache
+from .table_index import KeyIndex, MultiIndex, NameIndex, Projection, SortedIndex, index_key, primary_key_for
+from . import journal, json_codec, overlay, read_tracker, sqlite_store
+from .overlay import OverlayKeyIndex, OverlayMultiIndex
+from .sqlite_store import StoreKeyIndex, StoreMultiIndex
+
+
+def resolve_data_path(path: str) -> str:
+    """
+    Resolve a path relative to the server/endpoints/ directory to an absolute path.
+    Absolute paths are returned unchanged (normalized).
+    """
+    endpoints_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.abspath(os.path.join(endpoints_dir, str(path)))
+
+
+def _read_json(abs_path: str) -> Any:
+    return json_codec.load_file(abs_path)
+
+
+def _write_json(abs_path: str, data: Any, indent: Optional[int] = 4) -> None:
+    # indent=None writes compact JSON (used by tables that are stored minified).
+    # Written to a temp file and renamed over the table: readers never see a
+    # half-written file, and a project file hardlinked to the FC25 base
+    # (see cow.py) gets its own inode instead of modifying the base.
+    os.makedirs(os.path.dirname(abs_path), exist_ok=True)
+    json_codec.dump_file(abs_path, data, indent, atomic=True)
+
+
+def _shallow_copy(data: Any) -> Any:
+    # Rows are shared with the cache; the container is copied so callers can
+    # append/extend/filter without touching the cached table.
+    if isinstance(data, list):
+        return list(data)
+    if isinstance(data, dict):
+        return dict(data)
+    return data
+
+
+def _entry_at(abs_path: str) -> CacheEntry:
+    store, name = sqlite_store.locate(abs_path)
+    if store is None:
+        if journal.is_journaled(abs_path):
+            return table_cache.get_entry(abs_path, _read_journaled, journal.stamp(abs_path))
+        return table_cache.get_entry(abs_path, _read_json)
+    stamp = store.stamp(name)
+    if stamp is None:
+        read_tracker.record("table", abs_path, None)
+        table_cache.invalidate(abs_path)
+        raise FileNotFoundError(abs_path)
+    return table_cache.get_entry(abs_path, lambda _: store.read(name), stamp)
+
+
+def _read_journaled(abs_path: str) -> Any:
+    return journal.load(abs_path, _read_json)
+
+
+def table_stamp(path: str) -> Optional[tuple]:
+    """
+    Current cache validator of a table without reading it: the store version,
+    the delta and base stamps of an overlay, the journal stamp or the file's
+    (mtime_ns, size); None when it does not exist.
+    """
+    abs_path = resolve_data_path(path)
+    store, name = sqlite_store.locate(abs_path)
+    if store is not None:
+        return store.stamp(name)
+    delta_path = overlay.locate(abs_path)
+    if delta_path is not None:
+        return file_stamp(delta_path), table_stamp(overlay.base_path(abs_path))
+    if journal.is_journaled(abs_path):
+        return journal.stamp(abs_path)
+    return file_stamp(abs_path)
+
+
+def table_exists(path: str) -> bool:
+    """True if the table exists (as a JSON file, an overlay or in the project's store)."""
+    abs_path = resolve_data_path(path)
+    if read_tracker.active():
+        read_tracker.record("table", abs_path, table_stamp(abs_path))
+    store, name = sqlite_store.locate(abs_path)
+    if store is None:
+        return os.path.isfile(abs_path) or overlay.locate(abs_path) is not None
+    return store.has_table(name)
+
+
+@contextmanager
+def transaction(path: str) -> Iterator[None]:
+    """
+    Context manager grouping writes to several tables of the project that
+    owns `path` into one transaction. SQLite-backed projects commit or roll
+    back atomically; for JSON projects it is a no-op.
+    """
+    store, _ = sqlite_store.locate(resolve_data_path(path))
+    if store is None:
+        yield
+        return
+    try:
+        with store.transaction():
+            yield
+    except BaseException:
+        # Entries written inside the rolled-back transaction are no longer valid
+        table_cache.invalidate()
+        raise
+
+
+def read_table(path: str) -> Any:
+    """Parsed contents of a JSON table (cached; container is a private copy)."""
+    abs_path = resolve_data_path(path)
+    delta_path = overlay.locate(abs_path)
+    if delta_path is not None:
+        return _overlay_rows(abs_path, delta_path)
+    return _shallow_copy(_entry_at(abs_path).data)
+
+
+def table_len(path: str) -> int:
+    """Number of rows in a table without copying it."""
+    abs_path = resolve_data_path(path)
+    store, name = sqlite_store.locate(abs_path)
+    if store is not None and store.has_table(name):
+        return store.row_count(name)
+    delta_path = overlay.locate(abs_path)
+    if delta_path is not None:
+        return len(_overlay_rows(abs_path, delta_path))
+    return len(_entry_at(abs_path).data)
+
+
+def iter_rows(path: str, batch_size: int = 1000) -> Iterator[List[Any]]:
+    """
+    Rows of a table in batches of up to `batch_size`, for streaming.
+    SQLite-backed tables are paged straight from the store (nothing is cached);
+    file tables are sliced from the cached rows, so the table is never copied.
+    A table that is not a list yields its whole value as one row.
+    Raises FileNotFoundError when the table does not exist (before the first batch).
+    """
+    abs_path = resolve_data_path(path)
+    store, name = sqlite_store.locate(abs_path)
+    if store is not None:
+        batches = store.iter_rows(name, batch_size)
+        first = next(batches, None)  # Surfaces FileNotFoundError now, not mid-stream
+        return _chain_batches(first, batches)
+    delta_path = overlay.locate(abs_path)
+    data = _overlay_rows(abs_path, delta_path) if delta_path is not None else _entry_at(abs_path).data
+    if not isinstance(data, list):
+        return iter([[data]])
+    return (data[start:start + batch_size] for start in range(0, len(data), batch_size))
+
+
+def _chain_batches(first: Optional[List[Any]], rest: Iterator[List[Any]]) -> Iterator[List[Any]]:
+    if first is None:
+        return
+    yield first
+    yield from rest
+
+
+def write_table(path: str, data: Any, indent: Optional[int] = 4) -> None:
+    """Write a whole table and replace its cache entry."""
+    abs_path = resolve_data_path(path)
+    store, name = sqlite_store.locate(abs_path)
+    delta_path = overlay.locate(abs_path) if store is None else None
+    if delta_path is not None:
+        # Only the difference to FC25 is stored
+        with journal.lock_for(delta_path):
+            current = _delta_entry(delta_path).data
+            base_rows = _entry_at(overlay.base_path(abs_path)).data
+            _write_delta(delta_path, overlay.Delta.diff(current.key, base_rows, data, current.indent))
+        return
+    try:
+        if store is not None:
+            store.write(name, data, indent)
+        elif journal.is_journaled(abs_path):
+            journal.write_base(abs_path, data, _write_json, indent)
+        else:
+            _write_json(abs_path, data, indent)
+    except Exception:
+        table_cache.invalidate(abs_path)
+        raise
+    stamp = store.stamp(name) if store is not None else _file_stamp(abs_path)
+    table_cache.put(abs_path, _shallow_copy(data), stamp=stamp)
+
+
+def _file_stamp(abs_path: str):
+    return journal.stamp(abs_path) if journal.is_journaled(abs_path) else None
+
+
+def _update_lock(abs_path: str):
+    # Serializes load-modify-commit of one table across threads (asyncio.to_thread
+    # callers); for journaled tables it also keeps the cached copy in step with the journal
+    return journal.lock_for(abs_path)
+
+
+def _load_for_update(abs_path: str):
+    # Private copy of the row list plus the indexes built on the cached version
+    try:
+        entry = _entry_at(abs_path)
+        return list(entry.data), entry.indexes
+    except FileNotFoundError:
+        return [], {}
+
+
+def _commit(abs_path: str, data: List[Dict[str, Any]], indexes: Dict[str, Any], indent: Optional[int],
+            ops: Optional[List[Dict[str, Any]]] = None) -> None:
+    """
+    Persist an updated list table. For journaled tables whose base file exists
+    only `ops` are appended to the journal; otherwise the file is rewritten.
+    """
+    journaled = journal.is_journaled(abs_path)
+    try:
+        if journaled and ops is not None and os.path.isfile(abs_path):
+            journal.write_ops(abs_path, ops)
+            if journal.journal_size(abs_path) > journal.COMPACT_THRESHOLD_BYTES:
+                journal.schedule_compaction(abs_path, lambda: _compact(abs_path, indent))
+        elif journaled:
+            journal.write_base(abs_path, data, _write_json, indent)
+        else:
+            _write_json(abs_path, data, indent)
+    except Exception:
+        table_cache.invalidate(abs_path)
+        raise
+    table_cache.put(abs_path, data, indexes, stamp=_file_stamp(abs_path))
+
+
+def _compact(abs_path: str, indent: Optional[int]) -> None:
+    # Fold the journal into the base file; a valid cached copy is re-stamped, not reloaded
+    with journal.lock_for(abs_path):
+        entry = table_cache.peek(abs_path, journal.stamp(abs_path))
+        data = entry.data if entry is not None else _read_journaled(abs_path)
+        journal.write_base(abs_path, data, _write_json, indent)
+        if entry is not None:
+            table_cache.put(abs_path, entry.data, entry.indexes, stamp=journal.stamp(abs_path))
+        print(f"[INFO] Compacted journal into {abs_path} ({len(data)} rows)")
+
+
+def compact_journals(directory: str) -> List[str]:
+    """
+    Synchronously fold every pending journal under `directory` into its base
+    file (before exports/conversions that read the JSON files directly).
+    Returns the compacted table paths.
+    """
+    compacted = []
+    for abs_path in journal.journaled_tables(os.path.abspath(directory)):
+        if os.path.isfile(abs_path):
+            _compact(abs_path, sqlite_store.detect_indent(abs_path))
+            compacted.append(abs_path)
+    return compacted
+
+
+def append_rows(path: str, rows: List[Dict[str, Any]], indent: Optional[int] = 4) -> None:
+    """
+    Append rows to a list table (created if missing), updating any indexes
+    already built on it instead of discarding them.
+    """
+    abs_path = resolve_data_path(path)
+    store, name = sqlite_store.locate(abs_path)
+    if store is not None:
+        # Per-row insert; a cached copy of the table is patched rather than reloaded
+        entry = table_cache.peek(abs_path, store.stamp(name))
+        try:
+            store.append(name, rows, indent)
+        except Exception:
+            table_cache.invalidate(abs_path)
+            raise
+        if entry is None:
+            table_cache.invalidate(abs_path)
+            return
+        data = list(entry.data) + list(rows)
+        for index in entry.indexes.values():
+            index.add_rows(rows)
+        table_cache.put(abs_path, data, entry.indexes, stamp=store.stamp(name))
+        return
+    delta_path = overlay.locate(abs_path)
+    if delta_path is not None:
+        with journal.lock_for(delta_path):
+            _overlay_commit(abs_path, delta_path, [], rows)
+        return
+
+    with _update_lock(abs_path):
+        data, indexes = _load_for_update(abs_path)
+        data.extend(rows)
+        for index in indexes.values():
+            index.add_rows(rows)
+        _commit(abs_path, data, indexes, indent, [journal.operation("append", row) for row in rows])
+
+
+def replace_rows(path: str, column: str, key: Any, rows: List[Dict[str, Any]], indent: Optional[int] = 4) -> int:
+    """
+    Delete every row whose `column` equals `key` and append `rows` in their
+    place (e.g. replace all links of one team). The rows to drop are found
+    through the column's multi-valued index and the other indexes are patched
+    incrementally. Returns the number of removed rows.
+    """
+    abs_path = resolve_data_path(path)
+    store, name = sqlite_store.locate(abs_path)
+    if store is not None:
+        # Per-row delete/insert in the store; the cached copy is simply dropped
+        try:
+            return store.replace(name, column, key, rows, indent)
+        finally:
+            table_cache.invalidate(abs_path)
+    delta_path = overlay.locate(abs_path)
+    if delta_path is not None:
+        with journal.lock_for(delta_path):
+            removed = _overlay_multi_index(abs_path, delta_path, column).get(key)
+            _overlay_commit(abs_path, delta_path, removed, rows)
+        return len(removed)
+
+    with _update_lock(abs_path):
+        try:
+            entry = _entry_at(abs_path)
+            data, indexes = list(entry.data), entry.indexes
+            removed = list(_multi_index_on(entry, column).get(key))
+        except FileNotFoundError:
+            data, indexes, removed = [], {}, []
+        if removed:
+            removed_ids = {id(row) for row in removed}
+            data = [row for row in data if id(row) not in removed_ids]
+            for index_name, index in list(indexes.items()):
+                if not index.remove_rows(removed):
+                    del indexes[index_name]
+        data.extend(rows)
+        for index in indexes.values():
+            index.add_rows(rows)
+        ops = [journal.operation("delete", column=column, key=key)] if removed else []
+        ops += [journal.operation("append", row) for row in rows]
+        _commit(abs_path, data, indexes, indent, ops)
+    return len(removed)
+
+
+def upsert_rows(path: str, column: str, rows: List[Dict[str, Any]], indent: Optional[int] = 4) -> None:
+    """
+    Insert-or-update rows keyed by `column`: an existing row with the same key
+    is updated in place with the new fields (dict.update semantics), other rows
+    are appended. Creates the table if missing.
+    """
+    abs_path = resolve_data_path(path)
+    store, name = sqlite_store.locate(abs_path)
+    if store is not None:
+        if column not in sqlite_store.key_columns(name):
+            raise ValueError(f"{column} is not an indexed column of {name}")
+        with store.transaction():
+            for row in rows:
+                existing = store.lookup(name, column, row.get(column)) if store.has_table(name) else []
+                merged = {**existing[0], **row} if existing else row
+                store.replace(name, column, row.get(column), [merged], indent)
+        table_cache.invalidate(abs_path)
+        return
+    delta_path = overlay.locate(abs_path)
+    if delta_path is not None:
+        with journal.lock_for(delta_path):
+            replaced, appended = _plan_upsert(_overlay_multi_index(abs_path, delta_path, column), column, rows)
+            _overlay_commit(abs_path, delta_path, [old for old, _ in replaced.values()],
+                            [new for _, new in replaced.values()] + appended)
+        return
+
+    with _update_lock(abs_path):
+        try:
+            entry = _entry_at(abs_path)
+            data, indexes = list(entry.data), entry.indexes
+            by_key = _multi_index_on(entry, column)
+        except FileNotFoundError:
+            data, indexes, by_key = [], {}, MultiIndex(column)
+        replaced, appended = _plan_upsert(by_key, column, rows)
+        # Updated rows keep their position in the table (and in indexes that keep table order)
+        data = [replaced[id(row)][1] if id(row) in replaced else row for row in data]
+        data.extend(appended)
+        for index_name, index in list(indexes.items()):
+            if hasattr(index, "update_rows"):
+                kept = index.update_rows(replaced.values())
+            else:
+                kept = index.remove_rows([old for old, _ in replaced.values()])
+                if kept:
+                    index.add_rows([new for _, new in replaced.values()])
+            if not kept:
+                del indexes[index_name]
+        for index in indexes.values():
+            index.add_rows(appended)
+        _commit(abs_path, data, indexes, indent, [journal.operation("upsert", row, column=column) for row in rows])
+
+
+def _plan_upsert(by_key: Any, column: str, rows: List[Dict[str, Any]]):
+    """
+    Split upserted rows into updates of existing rows and appends.
+    Returns ({id(original row): (original, merged)}, rows to append).
+    """
+    replaced: Dict[int, Any] = {}
+    appended: List[Dict[str, Any]] = []
+    appended_by_key: Dict[str, int] = {}
+    for row in rows:
+        key = index_key(row.get(column))
+        if key in appended_by_key:
+            pos = appended_by_key[key]
+            appended[pos] = {**appended[pos], **row}
+            continue
+        original = by_key.first(key) if key is not None else None
+        if original is None:
+            if key is not None:
+                appended_by_key[key] = len(appended)
+            appended.append(row)
+        else:
+            previous = replaced.get(id(original))
+            replaced[id(original)] = (original, {**(previous[1] if previous else original), **row})
+    return replaced, appended
+
+
+# --- Overlay tables ---
+
+def _delta_entry(delta_path: str) -> CacheEntry:
+    return table_cache.get_entry(delta_path, overlay.load_delta)
+
+
+def _overlay_rows(abs_path: str, delta_path: str) -> List[Dict[str, Any]]:
+    # The FC25 base is cached once under its own path and shared by every project:
+    # callers get private rows, so editing them in place can't change the base
+    # (nor hide the edit from Delta.diff in write_table)
+    merged = _delta_entry(delta_path).data.merge(_entry_at(overlay.base_path(abs_path)).data)
+    return [dict(row) for row in merged]
+
+
+def _delta_index_on(entry: CacheEntry, column: str) -> MultiIndex:
+    index = entry.indexes.get(f"multi:{column}")
+    if index is None:
+        index = entry.indexes.setdefault(f"multi:{column}", MultiIndex(column, entry.data.rows.values()))
+    return index
+
+
+def _overlay_multi_index(abs_path: str, delta_path: str, column: str) -> OverlayMultiIndex:
+    base_entry, delta_entry = _entry_at(overlay.base_path(abs_path)), _delta_entry(delta_path)
+    return OverlayMultiIndex(_multi_index_on(base_entry, column), delta_entry.data, _delta_index_on(delta_entry, column))
+
+
+def _overlay_key_index(abs_path: str, delta_path: str, column: str) -> OverlayKeyIndex:
+    base_entry, delta_entry = _entry_at(overlay.base_path(abs_path)), _delta_entry(delta_path)
+    return OverlayKeyIndex(_multi_index_on(base_entry, column), _key_index_on(base_entry, column),
+                           delta_entry.data, _delta_index_on(delta_entry, column))
+
+
+def _write_delta(delta_path: str, delta: "overlay.Delta") -> None:
+    try:
+        _write_json(delta_path, delta.to_doc(), None)
+    except Exception:
+        table_cache.invalidate(delta_path)
+        raise
+    table_cache.put(delta_path, delta)
+
+
+def _overlay_commit(abs_path: str, delta_path: str, removed: List[Dict[str, Any]], added: List[Dict[str, Any]]) -> None:
+    # Apply a row-level change to a copy of the delta and persist only the delta
+    delta = _delta_entry(delta_path).data.copy()
+    delta.apply(removed, added, _key_index_on(_entry_at(overlay.base_path(abs_path)), delta.key))
+    _write_delta(delta_path, delta)
+
+
+# --- Indexes ---
+
+def _key_index_on(entry: CacheEntry, column: str) -> KeyIndex:
+    index = entry.indexes.get(f"pk:{column}")
+    if index is None:
+        index = entry.indexes.setdefault(f"pk:{column}", KeyIndex(column, entry.data))
+    return index
+
+
+def _multi_index_on(entry: CacheEntry, column: str) -> MultiIndex:
+    index = entry.indexes.get(f"multi:{column}")
+    if index is None:
+        index = entry.indexes.setdefault(f"multi:{column}", MultiIndex(column, entry.data))
+    return index
+
+
+def _store_view(abs_path: str, column: str):
+    # (store, table name) when the column is indexed in SQL; the table must exist
+    store, name = sqlite_store.locate(abs_path)
+    if store is None or column not in sqlite_store.key_columns(name):
+        return None, None
+    if not store.has_table(name):
+        raise FileNotFoundError(abs_path)
+    return store, name
+
+
+def get_index(path: str, column: Optional[str] = None) -> KeyIndex:
+    """
+    Unique index for a table, built on first use and cached with the table.
+    `column` defaults to the table's primary key (see table_index.PRIMARY_KEYS).
+    For SQLite-backed projects key columns are answered by SQL instead, and
+    overlay tables get a view combining the FC25 index with the delta.
+    Raises FileNotFoundError if the table does not exist.
+    """
+    column = column or primary_key_for(os.path.basename(str(path)))
+    if not column:
+        raise ValueError(f"No primary key defined for {path}")
+    abs_path = resolve_data_path(path)
+    store, name = _store_view(abs_path, column)
+    if store is not None:
+        return StoreKeyIndex(store, name, column)
+    delta_path = overlay.locate(abs_path)
+    if delta_path is not None:
+        return _overlay_key_index(abs_path, delta_path, column)
+    return _key_index_on(_entry_at(abs_path), column)
+
+
+def get_row(path: str, key: Any, column: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Row with the given key, or None (also None when the table is missing)."""
+    try:
+        return get_index(path, column).get(key)
+    except FileNotFoundError:
+        return None
+
+
+def row_exists(path: str, key: Any, column: Optional[str] = None) -> bool:
+    """True if a row with the given key exists (False when the table is missing)."""
+    try:
+        return key in get_index(path, column)
+    except FileNotFoundError:
+        return False
+
+
+def get_multi_index(path: str, column: str) -> MultiIndex:
+    """
+    Multi-valued index (key -> rows) on a link-table column, built on first
+    use and cached with the table (see table_index.SECONDARY_KEYS).
+    For SQLite-backed projects key columns are answered by SQL instead.
+    Raises FileNotFoundError if the table does not exist.
+    """
+    abs_path = resolve_data_path(path)
+    store, name = _store_view(abs_path, column)
+    if store is not None:
+        return StoreMultiIndex(store, name, column)
+    delta_path = overlay.locate(abs_path)
+    if delta_path is not None:
+        return _overlay_multi_index(abs_path, delta_path, column)
+    return _multi_index_on(_entry_at(abs_path), column)
+
+
+def get_name_index(path: str, column: str = "name", id_column: str = "nameid") -> NameIndex:
+    """
+    Case-insensitive name -> id index of a names table (playernames.json),
+    built on first use and cached with the table like the other indexes.
+    Raises FileNotFoundError if the table does not exist.
+    """
+    entry = _entry_at(resolve_data_path(path))
+    key = f"names:{column}:{id_column}"
+    index = entry.indexes.get(key)
+    if index is None:
+        index = entry.indexes.setdefault(key, NameIndex(column, id_column, entry.data))
+    return index
+
+
+def get_sorted_index(path: str, column: str, id_column: str) -> SortedIndex:
+    """
+    Rows of a table ordered by an integer column (ties by `id_column`), built
+    on first use and cached with the table like the other indexes.
+    Raises FileNotFoundError if the table does not exist.
+    """
+    entry = _entry_at(resolve_data_path(path))
+    key = f"sorted:{column}:{id_column}"
+    index = entry.indexes.get(key)
+    if index is None:
+        index = entry.indexes.setdefault(key, SortedIndex(column, id_column, entry.data))
+    return index
+
+
+def attach_index(path: str, key: str, build: Callable[[List[Dict[str, Any]]], Any]) -> Optional[Any]:
+    """
+    Register `build(rows)` under `key` on the table's cache entry, replacing any
+    previous one. Like the lookup indexes it is patched through add_rows/
+    remove_rows on row-level writes and disappears when the table is rewritten
+    or changes on disk. Returns None (nothing attached) for overlay tables,
+    whose rows are merged per read. Raises FileNotFoundError for missing tables.
+    """
+    abs_path = resolve_data_path(path)
+    if overlay.locate(abs_path) is not None:
+        return None
+    with _update_lock(abs_path):
+        entry = _entry_at(abs_path)
+        index = entry.indexes[key] = build(entry.data)
+    return index
+
+
+def attached_index(path: str, key: str) -> Optional[Any]:
+    """What attach_index() registered under `key` on the current version of the table, if anything."""
+    abs_path = resolve_data_path(path)
+    if overlay.locate(abs_path) is not None:
+        return None
+    return _entry_at(abs_path).indexes.get(key)
+
+
+MAX_PROJECTIONS = 16  # Cached field sets per table version
+
+
+def project_table(path: str, fields: Sequence[str]) -> Any:
+    """
+    Rows of a list table with only the columns in `fields` (missing columns are
+    left out). Cached with the table per field set, so it is built once per
+    table version; the list is a private copy, the rows are shared.
+    A table that is not a list is returned as is.
+    """
+    abs_path = resolve_data_path(path)
+    columns = tuple(dict.fromkeys(fields))
+    delta_path = overlay.locate(abs_path)
+    if delta_path is not None:
+        return Projection(columns, _overlay_rows(abs_path, delta_path)).rows
+    entry = _entry_at(abs_path)
+    if not isinstance(entry.data, list):
+        return _shallow_copy(entry.data)
+    key = "fields:" + ",".join(columns)
+    projection = entry.indexes.get(key)
+    if projection is None:
+        projection = Projection(columns, entry.data)
+        if sum(1 for name in entry.indexes if name.startswith("fields:")) < MAX_PROJECTIONS:
+            projection = entry.indexes.setdefault(key, projection)
+    return list(projection.rows)
+
+
+def get_rows(path: str, column: str, key: Any) -> List[Dict[str, Any]]:
+    """Rows whose `column` equals `key` (empty when the table is missing)."""
+    try:
+        return list(get_multi_index(path, column).get(key))
+    except FileNotFoundError:
+        return []
@@ -0,0 +1,166 @@
+"""
+Checkpoints of add-teams runs.
+
+Every team of a run gets a checkpoint as soon as its team ID is reserved:
+the ID, the pipeline steps completed so far with their results and the values
+they handed to later steps (parsed squad, saved players), and the IDs reserved
+for rows a step writes in more than one go (the squad's player IDs). Steps are recorded
+as they finish and the team row is written to teams.json when the team is
+done, so a run that stops halfway (server restart, failed scrape, cancelled
+job) leaves no finished work behind: running the same teams again for the
+same league reuses the team IDs, skips completed teams and completed steps,
+and only redoes the rest.
+
+Checkpoints are kept in projects/<project>/add_teams_checkpoints.json (FC25:
+fc25/add_teams_checkpoints.json), keyed by league and Transfermarkt team, and
+removed when the run that owns them finishes successfully.
+"""
+
+import copy
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from . import json_codec
+from .tables import resolve_data_path
+
+STATE_FILE = "add_teams_checkpoints.json"
+
+IN_PROGRESS, COMPLETED = "in_progress", "completed"
+
+_lock = threading.Lock()
+_states: Dict[str, Dict[str, Dict[str, Any]]] = {}  # Checkpoint file -> key -> checkpoint
+_claimed: Dict[str, str] = {}  # "<file>|<key>" -> run holding the team
+
+
+def _state_path(project_name: Optional[str]) -> str:
+    return resolve_data_path(f'../projects/{project_name}/{STATE_FILE}' if project_name else f'../fc25/{STATE_FILE}')
+
+
+def _state(path: str) -> Dict[str, Dict[str, Any]]:
+    state = _states.get(path)
+    if state is None:
+        try:
+            state = dict(json_codec.load_file(path))
+        except (FileNotFoundError, ValueError, TypeError):
+            state = {}
+        _states[path] = state
+    return state
+
+
+def _save(path: str) -> None:
+    state = _states.get(path, {})
+    try:
+        if state:
+            json_codec.dump_file(path, state, 2, atomic=True)
+        elif os.path.exists(path):
+            os.remove(path)
+    except Exception as e:
+        # A lost checkpoint only means redoing steps on resume
+        print(f"⚠️ Could not save add-teams checkpoints to {path}: {e}")
+
+
+def checkpoint_key(league_id: str, tm_team_id: str, team_url: str = "") -> str:
+    return f"{league_id or '-'}:{tm_team_id or team_url}"
+
+
+class TeamCheckpoint:
+    """Checkpoint of one team: reserved team ID and completed steps."""
+
+    def __init__(self, path: str, key: str):
+        self.path = path
+        self.key = key
+
+    def _row(self) -> Dict[str, Any]:
+        return _state(self.path)[self.key]
+
+    @property
+    def teamid(self) -> str:
+        with _lock:
+            return self._row()["teamid"]
+
+    @property
+    def completed(self) -> bool:
+        with _lock:
+            return self._row()["status"] == COMPLETED
+
+    def completed_steps(self) -> Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Step name -> (result, outputs) of the steps already done"""
+        with _lock:
+            steps = self._row()["steps"]
+            return {name: (copy.deepcopy(step["result"]), copy.deepcopy(step["outputs"])) for name, step in steps.items()}
+
+    def record_step(self, name: str, result: Optional[Dict[str, Any]], outputs: Dict[str, Any]) -> None:
+        with _lock:
+            row = self._row()
+            row["steps"][name] = {"result": copy.deepcopy(result or {}), "outputs": copy.deepcopy(outputs)}
+            row["updated_at"] = time.time()
+            _save(self.path)
+
+    def reserved_ids(self, space: str) -> Optional[int]:
+        """First ID the team reserved in an ID space (see reserve_ids), or None"""
+        with _lock:
+            return self._row().get("reserved", {}).get(space)
+
+    def reserve_ids(self, space: str, first_id: int) -> None:
+        """Remember IDs reserved for the team before rows using them are written"""
+        with _lock:
+            row = self._row()
+            row.setdefault("reserved", {})[space] = first_id
+            row["updated_at"] = time.time()
+            _save(self.path)
+
+    def mark_completed(self) -> None:
+        with _lock:
+            row = self._row()
+            row["status"], row["updated_at"] = COMPLETED, time.time()
+            _save(self.path)
+
+
+def claim_checkpoints(project_name: Optional[str], run_id: str, teams: Iterable[Tuple[str, str]]) -> List[Optional[TeamCheckpoint]]:
+    """
+    Claim the teams (key, team name) for a run: returns the existing checkpoint
+    of each team, None for teams without one. Raises RuntimeError when another
+    running add-teams run is working on one of them.
+    """
+    path = _state_path(project_name)
+    teams = list(teams)
+    with _lock:
+        busy = [name for key, name in teams if _claimed.get(f"{path}|{key}", run_id) != run_id]
+        if busy:
+            raise RuntimeError(f"Teams already being added by another run: {', '.join(busy)}")
+        for key, _ in teams:
+            _claimed[f"{path}|{key}"] = run_id
+        state = _state(path)
+        return [TeamCheckpoint(path, key) if key in state else None for key, _ in teams]
+
+
+def start_checkpoint(project_name: Optional[str], key: str, teamid: str, teamname: str) -> TeamCheckpoint:
+    """New checkpoint (replacing an old one) for a team whose ID was just reserved"""
+    path = _state_path(project_name)
+    with _lock:
+        _state(path)[key] = {"teamid": str(teamid), "teamname": teamname, "status": IN_PROGRESS,
+                             "steps": {}, "updated_at": time.time()}
+        _save(path)
+    return TeamCheckpoint(path, key)
+
+
+def release_checkpoints(project_name: Optional[str], run_id: str, keys: Iterable[str], discard: bool) -> None:
+    """End of a run: give the teams back; discard=True also deletes their checkpoints (run succeeded)"""
+    path = _state_path(project_name)
+    with _lock:
+        state = _state(path)
+        for key in keys:
+            if _claimed.get(f"{path}|{key}") == run_id:
+                del _claimed[f"{path}|{key}"]
+            if discard:
+                state.pop(key, None)
+        if discard:
+            _save(path)
+
+
+def forget_project(project_name: str) -> None:
+    """Drop the in-memory checkpoints of a project (after it is deleted or replaced)."""
+    with _lock:
+        _states.pop(_state_path(project_name), None)
@@ -0,0 +1,128 @@
+"""
+Coordinated read-modify-write of project tables from async endpoints.
+
+utils.tables keeps every single call consistent, but an endpoint that reads a
+table, derives new rows from it (next free ID, "already linked?" checks) and
+writes them back needs the whole sequence to be exclusive, or two concurrent
+add-teams requests hand out the same IDs and clobber each other.
+
+- table_lock(path): asyncio.Lock per table path (one registry per event loop)
+- UnitOfWork(*paths): holds the locks of its tables (acquired in path order,
+  so overlapping units never deadlock), loads each table at most once, keeps
+  the mutations in memory and flushes every touched table once on commit:
+  appends go through append_rows (journal/index friendly), replaced tables
+  through write_table, all inside one tables.transaction().
+
+    async with UnitOfWork(kits_path) as uow:
+        kits = await uow.rows(kits_path)
+        uow.append(kits_path, new_kits, indent=2)
+    # committed here; an exception inside the block discards the changes
+"""
+
+import asyncio
+import weakref
+from typing import Any, Dict, List, Optional
+
+from .tables import append_rows, read_table, resolve_data_path, transaction, write_table
+
+_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Lock]]" = weakref.WeakKeyDictionary()
+
+
+def table_lock(path: str) -> asyncio.Lock:
+    """The asyncio lock guarding read-modify-write sequences on a table."""
+    loop_locks = _locks.setdefault(asyncio.get_running_loop(), {})
+    abs_path = resolve_data_path(path)
+    lock = loop_locks.get(abs_path)
+    if lock is None:
+        lock = loop_locks[abs_path] = asyncio.Lock()
+    return lock
+
+
+class _PendingTable:
+    __slots__ = ("rows", "appended", "replaced", "indent")
+
+    def __init__(self, rows: Optional[List[Dict[str, Any]]]):
+        self.rows = rows            # Current contents (None until loaded)
+        self.appended: List[Dict[str, Any]] = []
+        self.replaced = False       # True: rewrite the whole table on commit
+        self.indent: Optional[int] = 4
+
+
+class UnitOfWork:
+    """Exclusive, load-once / flush-once access to a set of tables."""
+
+    def __init__(self, *paths: str):
+        self.paths = sorted({resolve_data_path(path) for path in paths})
+        self._tables: Dict[str, _PendingTable] = {}
+        self._held: List[asyncio.Lock] = []
+
+    async def __aenter__(self) -> "UnitOfWork":
+        try:
+            for abs_path in self.paths:
+                lock = table_lock(abs_path)
+                await lock.acquire()
+                self._held.append(lock)
+        except BaseException:
+            self._release()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc_type is None:
+                await self.commit()
+        finally:
+            self._tables.clear()
+            self._release()
+
+    def _release(self) -> None:
+        while self._held:
+            self._held.pop().release()
+
+    def _table(self, path: str) -> _PendingTable:
+        abs_path = resolve_data_path(path)
+        if abs_path not in self.paths:
+            raise KeyError(f"{abs_path} is not part of this unit of work")
+        return self._tables.setdefault(abs_path, _PendingTable(None))
+
+    async def rows(self, path: str) -> List[Dict[str, Any]]:
+        """Rows of the table including pending changes (loaded once; a missing table is empty)."""
+        table = self._table(path)
+        if table.rows is None:
+            try:
+                table.rows = await asyncio.to_thread(read_table, path)
+            except FileNotFoundError:
+                table.rows = []
+            table.rows.extend(table.appended)
+        return table.rows
+
+    def append(self, path: str, rows: List[Dict[str, Any]], indent: Optional[int] = 4) -> None:
+        """Queue rows to append to the table."""
+        table = self._table(path)
+        table.appended.extend(rows)
+        table.indent = indent
+        if table.rows is not None:
+            table.rows.extend(rows)
+
+    def replace(self, path: str, rows: List[Dict[str, Any]], indent: Optional[int] = 4) -> None:
+        """Queue a rewrite of the whole table with `rows`."""
+        table = self._table(path)
+        table.rows, table.replaced, table.indent = list(rows), True, indent
+        table.appended = []
+
+    async def commit(self) -> None:
+        """Flush every touched table once (called automatically on a clean exit)."""
+        pending = {path: table for path, table in self._tables.items() if table.replaced or table.appended}
+        if pending:
+            await asyncio.to_thread(self._flush, pending)
+        for table in pending.values():
+            table.appended, table.replaced = [], False
+
+    @staticmethod
+    def _flush(pending: Dict[str, _PendingTable]) -> None:
+        with transaction(next(iter(pending))):
+            for abs_path, table in pending.items():
+                if table.replaced:
+                    write_table(abs_path, table.rows, table.indent)
+                else:
+                    append_rows(abs_path, table.appended, table.indent)
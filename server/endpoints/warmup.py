@@ -0,0 +1,145 @@
+"""
+Startup warm-up and readiness.
+
+Right after the server starts, a background task preloads what the first user
+requests would otherwise pay for: the FC25 base tables and their indexes, the
+nation/position maps, the league ratings view and the ML predictor (torch
+import, models/ scan). Components are warmed in worker threads, at most
+WARMUP_CONCURRENCY at a time, so the event loop keeps serving requests
+meanwhile. GET /ready reports the state of every component; /status stays a
+plain liveness check.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from .utils.tables import get_index, get_multi_index, read_table, resolve_data_path
+from .utils.table_index import SECONDARY_KEYS, primary_key_for
+
+router = APIRouter()
+
+FC25_TABLES_DIR = '../fc25/data/fifa_ng_db'
+
+WARMUP_CONCURRENCY = 4  # Components warmed at the same time
+
+PENDING, WARMING, READY, FAILED = "pending", "warming", "ready", "failed"
+
+_components: Dict[str, Dict[str, Any]] = {}
+_started_at: Optional[float] = None
+_finished_at: Optional[float] = None
+_task: Optional[asyncio.Task] = None
+
+
+def _warm_table(file_name: str) -> None:
+    path = f'{FC25_TABLES_DIR}/{file_name}'
+    read_table(path)
+    if primary_key_for(file_name):
+        get_index(path)
+    for column in SECONDARY_KEYS.get(file_name, ()):
+        get_multi_index(path, column)
+
+
+def _warm_nation_map() -> None:
+    from .players import get_nationality_map
+    get_nationality_map()
+
+
+def _warm_position_map() -> None:
+    from .players import get_position_map
+    get_position_map()
+
+
+def _warm_league_ratings() -> None:
+    from .utils.league_ratings import get_league_ratings_view
+    get_league_ratings_view()
+
+
+def _warm_ml_predictor() -> None:
+    from .player_parameters import get_predictor
+    get_predictor()
+
+
+def warmup_components() -> List[Tuple[str, Callable[[], None]]]:
+    """(name, function) of every component to warm, in start order."""
+    components: List[Tuple[str, Callable[[], None]]] = []
+    tables_dir = resolve_data_path(FC25_TABLES_DIR)
+    if os.path.isdir(tables_dir):
+        for file_name in sorted(os.listdir(tables_dir)):
+            if file_name.endswith('.json'):
+                components.append((f'fc25:{file_name}', lambda file_name=file_name: _warm_table(file_name)))
+    components += [
+        ('nation_map', _warm_nation_map),
+        ('position_map', _warm_position_map),
+        ('league_ratings', _warm_league_ratings),
+        ('ml_predictor', _warm_ml_predictor),
+    ]
+    return components
+
+
+async def _warm(name: str, fn: Callable[[], None], semaphore: asyncio.Semaphore) -> None:
+    async with semaphore:
+        state = _components[name]
+        state["status"] = WARMING
+        start = time.perf_counter()
+        try:
+            await asyncio.to_thread(fn)
+            state["status"] = READY
+        except Exception as e:
+            state["status"] = FAILED
+            state["error"] = str(e)
+            print(f"[WARMUP] {name} failed: {e}")
+        state["elapsed"] = round(time.perf_counter() - start, 3)
+
+
+async def run_warmup() -> None:
+    global _started_at, _finished_at
+    components = warmup_components()
+    _started_at, _finished_at = time.perf_counter(), None
+    _components.clear()
+    for name, _ in components:
+        _components[name] = {"status": PENDING, "elapsed": None}
+
+    semaphore = asyncio.Semaphore(WARMUP_CONCURRENCY)
+    await asyncio.gather(*(_warm(name, fn, semaphore) for name, fn in components))
+    _finished_at = time.perf_counter()
+    failed = [name for name, state in _components.items() if state["status"] == FAILED]
+    print(f"[WARMUP] {len(components)} components warmed in {_finished_at - _started_at:.2f}s"
+          + (f" ({len(failed)} failed: {', '.join(failed)})" if failed else ""))
+
+
+def start_warmup() -> asyncio.Task:
+    """Start the warm-up in the background (called on server startup)."""
+    global _task
+    if _task is None or _task.done():
+        _task = asyncio.get_running_loop().create_task(run_warmup())
+    return _task
+
+
+def is_ready() -> bool:
+    """True once every component has been warmed (failed ones count: they are loaded on demand)."""
+    return _finished_at is not None
+
+
+def readiness() -> Dict[str, Any]:
+    now = _finished_at if _finished_at is not None else time.perf_counter()
+    return {
+        "ready": is_ready(),
+        "started": _started_at is not None,
+        "elapsed": round(now - _started_at, 3) if _started_at is not None else None,
+        "components": {name: dict(state) for name, state in _components.items()},
+    }
+
+
+@router.get("/ready", tags=["status"])
+async def ready():
+    """
+    Readiness of the server: 200 once the startup warm-up has finished,
+    503 while it is still running. Lists every component with its status
+    (pending/warming/ready/failed) and warm-up time in seconds.
+    """
+    return JSONResponse(readiness(), status_code=200 if is_ready() else 503)
@@ -8,8 +8,11 @@ import time
 import threading
 import sys
 from collections import deque
+from concurrent.futures import Future
 import uuid
 
+from .jobs import record_progress
+
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
@@ -26,10 +29,20 @@ last_team_name = None
 last_player_count = 0
 last_operation = None
 
-# Message queue and processing flag to prevent message concatenation
+# Канал прогресса: сообщения ставятся в очередь из любого потока (send_progress_sync
+# вызывается и из event loop, и из worker threads) и отправляются по порядку одной задачей
+# на event loop сервера. Ничего не прореживается и не теряется, поэтому производителям не
+# нужно делать паузы между сообщениями; `await drain_progress()` ждёт, пока всё, что уже
+# поставлено в очередь, будет отправлено.
+MAX_QUEUED_MESSAGES = 10000  # Backstop only: the sender empties the queue as fast as clients read
+
 message_queue = deque()
 queue_lock = threading.Lock()
 queue_processor_running = False
+_queued_count = 0        # Messages queued since start
+_delivered_count = 0     # Messages sent (or discarded) since start
+_drain_waiters = []      # [(queued count to reach, Future)]
+_server_loop = None      # Event loop the WebSocket clients live on
 
 def _format_progress_output(progress_data):
     """Форматирует красивый вывод прогресса создания команд и игроков"""
@@ -120,52 +133,133 @@ def _format_progress_output(progress_data):
         logger.debug(f"Error formatting progress output: {e}")
         pass
 
+def _bind_server_loop(force: bool = False):
+    """Remember the running event loop as the one WebSocket clients are served on"""
+    global _server_loop
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    if force or _server_loop is None or _server_loop.is_closed():
+        _server_loop = loop
+
+def _mark_delivered(count: int):
+    """Count sent messages and release drain_progress() callers that are now flushed"""
+    global _delivered_count
+    with queue_lock:
+        _delivered_count += count
+        released = [waiter for target, waiter in _drain_waiters if target <= _delivered_count]
+        _drain_waiters[:] = [(target, waiter) for target, waiter in _drain_waiters if target > _delivered_count]
+    for waiter in released:
+        if not waiter.done():
+            try:
+                waiter.set_result(None)
+            except Exception:
+                pass  # Cancelled by a timed out drain_progress() meanwhile
+
+def _discard_queue():
+    """No server loop to deliver on (no client has ever connected): drop queued messages"""
+    global queue_processor_running
+    with queue_lock:
+        discarded = len(message_queue)
+        message_queue.clear()
+        queue_processor_running = False
+    _mark_delivered(discarded)
+
+def _start_processor():
+    # Runs on the server loop
+    asyncio.get_running_loop().create_task(process_message_queue())
+
+def _enqueue_message(message: str):
+    """Queue a serialized message and make sure the sender is running (thread-safe)"""
+    global _queued_count, queue_processor_running
+    _bind_server_loop()
+    overflow = 0
+    with queue_lock:
+        message_queue.append(message)
+        _queued_count += 1
+        while len(message_queue) > MAX_QUEUED_MESSAGES:
+            message_queue.popleft()
+            overflow += 1
+        start_processor = not queue_processor_running
+        queue_processor_running = True
+    if overflow:
+        _mark_delivered(overflow)
+    if not start_processor:
+        return
+
+    loop = _server_loop
+    if loop is None or loop.is_closed():
+        _discard_queue()
+        return
+    try:
+        running_loop = asyncio.get_running_loop()
+    except RuntimeError:
+        running_loop = None
+    if running_loop is loop:
+        _start_processor()
+    else:
+        try:
+            loop.call_soon_threadsafe(_start_processor)
+        except RuntimeError:  # Loop closed meanwhile
+            _discard_queue()
+
+async def _send_to_connections(message: str):
+    with connections_lock:
+        connections = active_connections.copy()
+    if not connections:
+        return
+
+    to_remove = set()
+    await asyncio.gather(*(send_with_timeout(ws, message, to_remove) for ws in connections), return_exceptions=True)
+
+    # Remove inactive connections
+    if to_remove:
+        with connections_lock:
+            for ws in to_remove:
+                active_connections.discard(ws)
+                logger.info("Removed inactive WebSocket connection")
+
 async def process_message_queue():
-    """Process messages from queue sequentially to prevent concatenation"""
+    """Send queued messages one by one, in order, until the queue is empty (single sender)"""
     global queue_processor_running
     
-    queue_processor_running = True
-    
     try:
         while True:
-            message_to_send = None
-            
-            # Get next message from queue
             with queue_lock:
-                if message_queue:
-                    message_to_send = message_queue.popleft()
-                elif not message_queue:
-                    # Queue is empty, we can stop processing
-                    break
+                if not message_queue:
+                    queue_processor_running = False
+                    return
+                batch = list(message_queue)
+                message_queue.clear()
             
-            if message_to_send:
-                # Get current connections
-                with connections_lock:
-                    connections = active_connections.copy()
-                
-                if connections:
-                    # Send message to all connections
-                    to_remove = set()
-                    send_tasks = []
-                    
-                    for ws in connections:
-                        send_tasks.append(send_with_timeout(ws, message_to_send, to_remove))
-                    
-                    # Wait for all sends to complete
-                    await asyncio.gather(*send_tasks, return_exceptions=True)
-                    
-                    # Remove inactive connections
-                    if to_remove:
-                        with connections_lock:
-                            for ws in to_remove:
-                                active_connections.discard(ws)
-                                logger.info("Removed inactive WebSocket connection")
-                
-                # Small delay between messages to prevent overwhelming
-                await asyncio.sleep(0.01)
-    
-    finally:
-        queue_processor_running = False
+            try:
+                for message in batch:
+                    await _send_to_connections(message)
+            finally:
+                _mark_delivered(len(batch))
+    except BaseException:
+        with queue_lock:
+            queue_processor_running = False
+        raise
+
+async def drain_progress(timeout: float = 5.0) -> bool:
+    """
+    Дождаться отправки всех сообщений прогресса, поставленных в очередь до вызова.
+    Returns False if they are still pending after `timeout` seconds (slow client).
+    """
+    with queue_lock:
+        target = _queued_count
+        if _delivered_count >= target:
+            return True
+        waiter = Future()
+        _drain_waiters.append((target, waiter))
+    try:
+        await asyncio.wait_for(asyncio.wrap_future(waiter), timeout)
+        return True
+    except asyncio.TimeoutError:
+        logger.warning(f"Progress messages still pending after {timeout}s")
+        return False
 
 async def broadcast_progress(progress_data):
     """Отправка данных прогресса всем подключенным клиентам через очередь"""
@@ -178,15 +272,8 @@ async def broadcast_progress(progress_data):
         elif progress_data.get("status") == "completed":
             current_progress = None
     
-    # Add message to queue instead of sending directly
-    message = json.dumps(progress_data)
-    
-    with queue_lock:
-        message_queue.append(message)
-    
-    # Start queue processor if not running
-    if not queue_processor_running:
-        asyncio.create_task(process_message_queue())
+    record_progress(progress_data)
+    _enqueue_message(json.dumps(progress_data))
 
 async def send_with_timeout(ws: WebSocket, message: str, to_remove: set, timeout: float = 5.0):
     """Отправка сообщения с таймаутом"""
@@ -203,6 +290,7 @@ async def send_with_timeout(ws: WebSocket, message: str, to_remove: set, timeout
 @router.websocket("/ws/progress")
 async def websocket_progress(websocket: WebSocket):
     await websocket.accept()
+    _bind_server_loop(force=True)
     
     with connections_lock:
         active_connections.add(websocket)
@@ -237,6 +325,7 @@ async def websocket_main(websocket: WebSocket):
     """Основной WebSocket endpoint с улучшенной обработкой ошибок"""
     try:
         await websocket.accept()
+        _bind_server_loop(force=True)
         
         # Добавляем соединение с блокировкой
         with connections_lock:
@@ -324,26 +413,12 @@ async def websocket_main(websocket: WebSocket):
         except Exception as e:
             logger.debug(f"Error closing websocket: {e}")
 
-# Rate limiter for progress messages
-_last_progress_time = {}
-_min_progress_interval = 0.1  # Minimum 100ms between messages
-
 # Функция для безопасной отправки прогресса из синхронного кода
 def send_progress_sync(progress_data):
-    """Синхронная функция для отправки прогресса с rate limiting"""
+    """Синхронная функция для отправки прогресса (из event loop или из потока)"""
     try:
-        # Rate limiting - prevent too frequent updates
-        message_key = f"{progress_data.get('function_name', 'unknown')}_{progress_data.get('current_team', 'unknown')}"
         current_time = time.time()
         
-        if message_key in _last_progress_time:
-            time_since_last = current_time - _last_progress_time[message_key]
-            if time_since_last < _min_progress_interval:
-                # Skip this message to prevent overwhelming
-                return
-        
-        _last_progress_time[message_key] = current_time
-        
         # Добавляем timestamp если его нет
         if 'timestamp' not in progress_data:
             progress_data['timestamp'] = current_time
@@ -362,28 +437,11 @@ def send_progress_sync(progress_data):
             elif progress_data.get("status") == "completed":
                 current_progress = None
         
-        # Add to message queue instead of direct sending
-        message = json.dumps(progress_data)
-        
-        with queue_lock:
-            message_queue.append(message)
-            # Limit queue size to prevent memory issues
-            if len(message_queue) > 100:
-                message_queue.popleft()  # Remove oldest message
+        # Progress of the background job sending it (GET /jobs/{job_id})
+        record_progress(progress_data)
         
-        # Start queue processor if not running
-        if not queue_processor_running:
-            def start_processor():
-                try:
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    loop.run_until_complete(process_message_queue())
-                    loop.close()
-                except Exception as e:
-                    logger.debug(f"Error in queue processor: {e}")
-            
-            thread = threading.Thread(target=start_processor, daemon=True)
-            thread.start()
+        # Serialized now: callers keep mutating the dicts they pass in
+        _enqueue_message(json.dumps(progress_data))
         
     except Exception as e:
         logger.error(f"Critical error in send_progress_sync: {type(e).__name__}: {e}")
@@ -408,5 +466,7 @@ async def websocket_status():
             "active_connections": len(active_connections),
             "has_current_progress": current_progress is not None,
             "queue_size": len(message_queue),
-            "queue_processor_running": queue_processor_running
+            "queue_processor_running": queue_processor_running,
+            "messages_queued": _queued_count,
+            "messages_delivered": _delivered_count
         }
\ No newline at end of file
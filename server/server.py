@@ -22,18 +22,28 @@ from endpoints.websocket import router as websocket_router
 from endpoints.projects import router as projects_router
 from endpoints.images import router as images_router
 from endpoints.db import router as db_router
+from endpoints.tables import router as tables_router
+from endpoints.team_bundle import router as team_bundle_router
+from endpoints.warmup import router as warmup_router, start_warmup, is_ready
+from endpoints.jobs import router as jobs_router, start_job_workers
+from endpoints.utils.etag import etag_middleware
+from endpoints.utils.compression import compression_middleware
 from endpoints.LanguageStrings2 import router as language_strings_router
-try:
-    from endpoints.PlayerParametersPredictionsModel import router as ml_predictions_router
-except ImportError:
-    # Fallback to mock version if PyTorch is not available
-    from endpoints.PlayerParametersPredictionsModelMock import router as ml_predictions_router
+# ML predictions router: the PyTorch engine (with its own mock fallback) loads on first use
+from endpoints.player_parameters import router as ml_predictions_router
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = FastAPI()
 
+# ETag / If-None-Match for GET endpoints. Registered before CORS so it runs inside it
+# and 304 responses still get the CORS headers
+app.middleware("http")(etag_middleware)
+# gzip for large JSON/text responses; wraps the ETag middleware so compressed bodies
+# can be cached per ETag
+app.middleware("http")(compression_middleware)
+
 # CORS Configuration - MUST be added before other middleware and routes
 origins = [
     "http://localhost:5173",
@@ -92,13 +102,27 @@ app.include_router(websocket_router, prefix="")
 app.include_router(projects_router, prefix="/projects")
 app.include_router(images_router)
 app.include_router(db_router)
+app.include_router(tables_router)
+app.include_router(team_bundle_router)
 app.include_router(language_strings_router)
 app.include_router(ml_predictions_router)
+app.include_router(warmup_router)
+app.include_router(jobs_router)
+
+@app.on_event("startup")
+async def warmup():
+    """Preload FC25 tables, maps and the ML predictor in the background (see GET /ready)"""
+    start_warmup()
+
+@app.on_event("startup")
+async def job_workers():
+    """Start the background job workers (see endpoints/jobs.py)"""
+    start_job_workers()
 
 @app.get("/status")
 def status():
-    """Проверка статуса подключения"""
-    return {"status": "ok"}
+    """Проверка статуса подключения (готовность к быстрым ответам: GET /ready)"""
+    return {"status": "ok", "ready": is_ready()}
 
 if __name__ == "__main__":
     uvicorn.run("server:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,129 @@
+"""
+Shared fixtures of the server tests.
+
+Run from server/ with `python -m pytest -q`. Tests work on temporary projects
+under pytest's tmp_path (table paths may be absolute); the FC25 tables in
+server/fc25 are only read, as overlay bases and clone sources.
+"""
+
+import io
+import os
+import sys
+import zipfile
+
+import pytest
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SERVER_DIR not in sys.path:
+    sys.path.insert(0, SERVER_DIR)
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from endpoints import projects  # noqa: E402
+from endpoints.utils import sqlite_store  # noqa: E402
+from endpoints.utils.table_cache import table_cache  # noqa: E402
+from endpoints.utils.tables import append_rows, get_rows, read_table, replace_rows, upsert_rows  # noqa: E402
+
+PROJECT_ID = "test_project"
+NEW_KEYS = ("900001", "900002")  # Keys of the rows the round trip adds
+
+
+@pytest.fixture(autouse=True)
+def clean_table_cache():
+    """Every test starts and ends with an empty table cache."""
+    table_cache.invalidate()
+    yield
+    table_cache.invalidate()
+
+
+@pytest.fixture
+def tables_dir(tmp_path):
+    """data/fifa_ng_db directory of an empty temporary project."""
+    path = tmp_path / "project" / "data" / "fifa_ng_db"
+    path.mkdir(parents=True)
+    return path
+
+
+@pytest.fixture
+def projects_dir(tmp_path, monkeypatch):
+    """Temporary projects/ directory used by the projects endpoints."""
+    path = tmp_path / "projects"
+    path.mkdir()
+    monkeypatch.setattr(projects, "PROJECTS_DIR", path)
+    return path
+
+
+@pytest.fixture
+def make_project(projects_dir):
+    """Factory: project cloned from FC25 (as on creation) using a storage engine; returns its directory."""
+    created = []
+
+    def make(engine="json", project_id=PROJECT_ID):
+        path = projects.create_project_directory(project_id)
+        created.append(path)
+        if engine != "json":
+            projects.set_storage_engine(path, engine)
+        return path
+
+    yield make
+    for path in created:
+        sqlite_store.close_store(str(path))
+
+
+@pytest.fixture
+def export_project(projects_dir):
+    """Export a project through GET /projects/{id}/export-data: table name -> rows of its TSV file."""
+    app = FastAPI()
+    app.include_router(projects.router, prefix="/projects")
+    client = TestClient(app)
+
+    def export(project_id=PROJECT_ID):
+        response = client.get(f"/projects/{project_id}/export-data")
+        assert response.status_code == 200, response.text
+        tables = {}
+        with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+            for name in archive.namelist():
+                if os.path.dirname(name) == "fifa_ng_db" and name.endswith(".txt"):
+                    header, *lines = archive.read(name).decode("utf-8").splitlines()
+                    columns = header.split("\t")
+                    table = os.path.basename(name)[:-len(".txt")] + ".json"
+                    tables[table] = [dict(zip(columns, line.split("\t"))) for line in lines]
+        return tables
+
+    return export
+
+
+@pytest.fixture
+def round_trip():
+    """
+    Run read -> append -> replace -> upsert -> read after clearing the cache
+    on a table keyed by `column`, checking each step; returns the final rows.
+    """
+    def run(path, column):
+        rows = read_table(path)
+        assert rows, "round trip needs a table with rows"
+        field = next(name for name in rows[0] if name not in (column, "artificialkey"))
+        first, second = NEW_KEYS
+
+        added = {**rows[0], column: first}
+        append_rows(path, [added])
+        assert len(read_table(path)) == len(rows) + 1
+        assert get_rows(path, column, first) == [added]
+
+        replaced = {**added, field: "replaced"}
+        assert replace_rows(path, column, first, [replaced]) == 1
+        assert get_rows(path, column, first) == [replaced]
+
+        upsert_rows(path, column, [{column: first, field: "upserted"}, {**rows[0], column: second}])
+        assert get_rows(path, column, first) == [{**replaced, field: "upserted"}]
+
+        table_cache.invalidate()
+        final = read_table(path)
+        assert len(final) == len(rows) + 2
+        assert [row for row in final if row[column] not in NEW_KEYS] == rows
+        assert get_rows(path, column, first) == [{**replaced, field: "upserted"}]
+        assert get_rows(path, column, second) == [{**rows[0], column: second}]
+        return final
+
+    return run
@@ -0,0 +1,134 @@
+import asyncio
+import os
+import weakref
+
+import pytest
+
+from endpoints import teams
+from endpoints.utils import id_allocator, team_checkpoints
+from endpoints.utils.tables import read_table, resolve_data_path, write_table
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(team_checkpoints, "_states", {})
+    monkeypatch.setattr(team_checkpoints, "_claimed", {})
+    monkeypatch.setattr(id_allocator, "_states", {})
+    monkeypatch.setattr(teams, "_team_slots", weakref.WeakKeyDictionary())
+
+
+def _team(n):
+    return teams.TransfermarktTeam(teamname=f"Team {n}", teamlogo="", team_url=f"https://example.invalid/team-{n}/startseite/verein/{n}",
+                                   team_id=str(n), squad=25, avg_age=25.0, foreigners=5, avg_market_value="1m",
+                                   total_market_value="25m")
+
+
+def test_teams_run_within_the_request_and_server_limits(tmp_path, monkeypatch):
+    projects = []
+    for name in ("first", "second"):
+        project_dir = tmp_path / "projects" / name
+        write_table(str(project_dir / "data" / "fifa_ng_db" / "teams.json"), [])
+        projects.append((project_dir, os.path.relpath(project_dir, resolve_data_path("../projects"))))
+
+    running = {}  # Project -> teams being generated now
+    peaks = {"total": 0}
+
+    async def generate_team_data(tm_team, new_team_id, league_id, project_name, *callbacks):
+        running[project_name] = running.get(project_name, 0) + 1
+        peaks[project_name] = max(peaks.get(project_name, 0), running[project_name])
+        peaks["total"] = max(peaks["total"], sum(running.values()))
+        await asyncio.sleep(0.01)
+        running[project_name] -= 1
+        return {"teamid": new_team_id, "teamname": tm_team.teamname}
+
+    monkeypatch.setattr(teams, "generate_team_data", generate_team_data)
+    monkeypatch.setattr(teams, "MAX_CONCURRENT_TEAMS", 3)
+
+    async def main():
+        return await asyncio.gather(*(
+            teams.run_add_teams(teams.AddTeamsRequest(teams=[_team(n) for n in range(5)], project_id=project_id,
+                                                      league_id="13", concurrency=2))
+            for _, project_id in projects))
+
+    results = asyncio.run(main())
+
+    _, first_id = projects[0]
+    assert peaks[first_id] == 2
+    assert peaks["total"] == 3
+    for (project_dir, _), result in zip(projects, results):
+        assert result["teams_added"] == 5
+        saved = read_table(str(project_dir / "data" / "fifa_ng_db" / "teams.json"))
+        # Saved as each team finished, but every team got its ID in request order
+        ids = {row["teamname"]: row["teamid"] for row in saved}
+        assert [ids[f"Team {n}"] for n in range(5)] == result["new_team_ids"]
+        assert result["new_team_ids"] == [str(int(result["new_team_ids"][0]) + n) for n in range(5)]
+
+
+def test_request_concurrency_is_capped_by_the_server_limit(tmp_path, monkeypatch):
+    project_dir = tmp_path / "projects" / "test_project"
+    write_table(str(project_dir / "data" / "fifa_ng_db" / "teams.json"), [])
+    project_id = os.path.relpath(project_dir, resolve_data_path("../projects"))
+    running = []
+    peak = []
+
+    async def generate_team_data(tm_team, new_team_id, *args):
+        running.append(new_team_id)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(new_team_id)
+        return {"teamid": new_team_id, "teamname": tm_team.teamname}
+
+    monkeypatch.setattr(teams, "generate_team_data", generate_team_data)
+    monkeypatch.setattr(teams, "MAX_CONCURRENT_TEAMS", 2)
+
+    request = teams.AddTeamsRequest(teams=[_team(n) for n in range(4)], project_id=project_id, league_id="13", concurrency=50)
+    asyncio.run(teams.run_add_teams(request))
+    assert max(peak) == 2
+
+
+def test_steps_run_along_their_dependencies(monkeypatch):
+    events = []
+    release_squad = asyncio.Event()
+
+    async def scrape_squad(**kwargs):
+        events.append("scrape squad")
+        await release_squad.wait()
+        events.append("squad scraped")
+        return {"kit": "home", "squad": ["Player 1", "Player 2"]}
+
+    async def stadium(**kwargs):
+        events.append("stadium")
+        release_squad.set()  # Runs while the squad is still being scraped
+        return {"kit": "stadium", "stadiumname": "Test Park"}
+
+    async def save_players(squad, **kwargs):
+        events.append("save players")
+        return {"players_saved": len(squad)}
+
+    steps = [
+        {"name": "squad", "handler": scrape_squad, "outputs": ["squad"]},
+        {"name": "stadium", "handler": stadium},
+        {"name": "players", "handler": save_players, "inputs": ["squad"]},
+    ]
+    monkeypatch.setattr(teams, "TEAM_PROCESSING_STEPS", steps)
+    monkeypatch.setattr(teams, "TEAM_STEP_DEPENDENCIES", teams._step_dependencies(steps))
+    progress = []
+
+    team_data = asyncio.run(teams.generate_team_data(
+        _team(1), "131072", "13", progress_callback=lambda name, i, total: progress.append((name, i, total))))
+
+    assert events == ["scrape squad", "stadium", "squad scraped", "save players"]
+    # Each step reports its own position, whatever order the steps start in
+    assert sorted(progress) == sorted([("squad", 0, 3), ("stadium", 1, 3), ("players", 2, 3)])
+    # Step outputs are handed over, not kept as team fields; later steps win on shared fields
+    assert team_data == {"kit": "stadium", "stadiumname": "Test Park", "players_saved": 2}
+
+
+def test_step_dependencies_follow_inputs_and_outputs():
+    for i, (step, dependencies) in enumerate(zip(teams.TEAM_PROCESSING_STEPS, teams.TEAM_STEP_DEPENDENCIES)):
+        produced = {output for d in dependencies for output in teams.TEAM_PROCESSING_STEPS[d].get("outputs", ())}
+        assert all(d < i for d in dependencies)
+        assert set(step.get("inputs", ())) <= produced
+
+    with pytest.raises(ValueError):
+        teams._step_dependencies([{"name": "players", "inputs": ["squad"]}, {"name": "squad", "outputs": ["squad"]}])
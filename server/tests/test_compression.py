@@ -0,0 +1,83 @@
+import gzip
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from endpoints.utils import compression, etag
+
+ROWS = [{"teamid": str(i), "teamname": f"Team {i}"} for i in range(200)]
+
+
+def _client():
+    app = FastAPI()
+    app.middleware("http")(etag.etag_middleware)
+    app.middleware("http")(compression.compression_middleware)  # Outermost, as in server.py
+
+    @app.get("/big")
+    async def big():
+        return ROWS
+
+    @app.get("/small")
+    async def small():
+        return {"status": "ok"}
+
+    return TestClient(app)
+
+
+def test_accept_encoding_negotiation():
+    assert compression.accepts_gzip("gzip, deflate, br")
+    assert compression.accepts_gzip("br;q=1.0, gzip;q=0.5")
+    assert compression.accepts_gzip("*")
+    assert not compression.accepts_gzip("gzip;q=0")
+    assert not compression.accepts_gzip("identity")
+    assert not compression.accepts_gzip(None)
+
+
+def test_large_json_is_gzipped_with_its_own_etag(monkeypatch):
+    monkeypatch.setattr(compression, "_cache", compression.OrderedDict())
+    monkeypatch.setattr(etag, "_validators", etag.OrderedDict())
+    client = _client()
+
+    plain = client.get("/big", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+    encoded = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert encoded.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in encoded.headers["vary"]
+    assert encoded.headers["etag"] == plain.headers["etag"][:-1] + '-gzip"'
+    assert encoded.json() == ROWS
+    assert int(encoded.headers["content-length"]) < len(plain.content)
+
+    # Either spelling of the validator revalidates either variant
+    for validator in (plain.headers["etag"], encoded.headers["etag"]):
+        assert client.get("/big", headers={"Accept-Encoding": "gzip", "If-None-Match": validator}).status_code == 304
+        assert client.get("/big", headers={"Accept-Encoding": "identity", "If-None-Match": validator}).status_code == 304
+
+
+def test_compressed_body_is_cached_per_etag(monkeypatch):
+    monkeypatch.setattr(compression, "_cache", compression.OrderedDict())
+    compressed = []
+    compress = compression.compress
+
+    def counting_compress(body):
+        compressed.append(len(body))
+        return compress(body)
+
+    monkeypatch.setattr(compression, "compress", counting_compress)
+    client = _client()
+    first = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    second = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert len(compressed) == 1
+    assert first.headers["content-length"] == second.headers["content-length"]
+
+
+def test_small_responses_are_sent_as_is():
+    response = _client().get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.json() == {"status": "ok"}
+
+
+def test_gzip_output_is_deterministic():
+    body = b'{"teamid": "1"}' * 100
+    assert compression.compress(body) == compression.compress(body)
+    assert gzip.decompress(compression.compress(body)) == body
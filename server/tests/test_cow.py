@@ -0,0 +1,30 @@
+import os
+
+from endpoints import projects
+from endpoints.utils import json_codec
+
+FC25_TABLES_DIR = projects.FC25_DATA_DIR / "fifa_ng_db"
+
+
+def test_new_project_shares_fc25_tables(make_project):
+    project = make_project()
+    for name in os.listdir(FC25_TABLES_DIR):
+        assert os.path.samefile(project / "data" / "fifa_ng_db" / name, FC25_TABLES_DIR / name)
+
+
+def test_round_trip_detaches_the_table_and_keeps_fc25(make_project, round_trip, export_project):
+    project = make_project()
+    path = str(project / "data" / "fifa_ng_db" / "teams.json")
+    fc25_path = str(FC25_TABLES_DIR / "teams.json")
+    fc25_rows = json_codec.load_file(fc25_path)
+
+    final = round_trip(path, "teamid")
+
+    assert not os.path.samefile(path, fc25_path)
+    assert json_codec.load_file(fc25_path) == fc25_rows
+    assert json_codec.load_file(path) == final
+    # Untouched tables stay shared
+    assert os.path.samefile(project / "data" / "fifa_ng_db" / "leagues.json", FC25_TABLES_DIR / "leagues.json")
+
+    exported = export_project()["teams.json"]
+    assert [row["teamid"] for row in exported] == [row["teamid"] for row in final]
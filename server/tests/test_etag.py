@@ -0,0 +1,65 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from endpoints.utils import etag, load_json_file
+from endpoints.utils.tables import write_table
+
+
+def _app(path, calls):
+    app = FastAPI()
+    app.middleware("http")(etag.etag_middleware)
+
+    @app.get("/teams")
+    async def teams():  # Table route: revalidated from the recorded reads
+        calls.append("teams")
+        return load_json_file(path)
+
+    @app.get("/scrape")
+    async def scrape():  # Not a table route: always runs
+        calls.append("scrape")
+        return {"status": "ok"}
+
+    return TestClient(app)
+
+
+def test_table_route_is_revalidated_without_running_the_endpoint(tables_dir, monkeypatch):
+    monkeypatch.setattr(etag, "_validators", etag.OrderedDict())
+    path = str(tables_dir / "teams.json")
+    write_table(path, [{"teamid": "1"}])
+    calls = []
+    client = _app(path, calls)
+
+    first = client.get("/teams")
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == "no-cache"
+    validator = first.headers["etag"]
+
+    revalidated = client.get("/teams", headers={"If-None-Match": validator})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert calls == ["teams"]
+
+    write_table(path, [{"teamid": "1"}, {"teamid": "2"}])
+    changed = client.get("/teams", headers={"If-None-Match": validator})
+    assert changed.status_code == 200
+    assert changed.json() == [{"teamid": "1"}, {"teamid": "2"}]
+    assert changed.headers["etag"] != validator
+    assert calls == ["teams", "teams"]
+
+
+def test_other_routes_answer_304_after_running(tables_dir, monkeypatch):
+    monkeypatch.setattr(etag, "_validators", etag.OrderedDict())
+    calls = []
+    client = _app(str(tables_dir / "teams.json"), calls)
+
+    validator = client.get("/scrape").headers["etag"]
+    assert client.get("/scrape", headers={"If-None-Match": validator}).status_code == 304
+    assert calls == ["scrape", "scrape"]
+
+
+def test_weak_and_gzip_variants_of_a_validator_match():
+    assert etag.etag_matches('W/"abc"', '"abc"')
+    assert etag.etag_matches('"abc-gzip"', '"abc"')
+    assert etag.etag_matches('"xyz", "abc"', '"abc"')
+    assert etag.etag_matches("*", '"abc"')
+    assert not etag.etag_matches('"abd"', '"abc"')
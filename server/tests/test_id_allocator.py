@@ -0,0 +1,48 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from endpoints.utils import id_allocator
+from endpoints.utils.tables import append_rows, replace_rows
+
+
+@pytest.fixture(autouse=True)
+def allocator_state(tmp_path, monkeypatch):
+    """Marks of projects under tmp_path, none loaded yet."""
+    monkeypatch.setattr(id_allocator, "_project_dir", lambda project_name: str(tmp_path / project_name))
+    monkeypatch.setattr(id_allocator, "_states", {})
+    (tmp_path / "test_project" / "data" / "fifa_ng_db").mkdir(parents=True)
+    return tmp_path / "test_project"
+
+
+def test_ranges_start_at_the_space_start_and_never_overlap():
+    assert id_allocator.allocate_ids("test_project", "playerid", 3) == 300000
+    assert id_allocator.allocate_ids("test_project", "playerid", 2) == 300003
+    assert id_allocator.allocate_ids("test_project", "playerid") == 300005
+    assert id_allocator.allocate_ids("test_project", "teamplayerlinks.artificialkey", 5) == 0
+    with pytest.raises(ValueError):
+        id_allocator.allocate_ids("test_project", "nationid")
+
+
+def test_high_water_mark_survives_a_restart_without_rows(monkeypatch):
+    id_allocator.allocate_ids("test_project", "teamid", 10)
+    monkeypatch.setattr(id_allocator, "_states", {})
+    assert id_allocator.allocate_ids("test_project", "teamid") == 11
+
+
+def test_rows_added_by_other_means_raise_the_mark(allocator_state):
+    players = str(allocator_state / "data" / "fifa_ng_db" / "players.json")
+    assert id_allocator.allocate_ids("test_project", "playerid") == 300000
+    append_rows(players, [{"playerid": "300500", "teamid": "1"}])
+    assert id_allocator.allocate_ids("test_project", "playerid") == 300501
+
+    # Deleting the rows frees nothing: the mark only moves up
+    replace_rows(players, "teamid", "1", [])
+    assert id_allocator.allocate_ids("test_project", "playerid") == 300502
+
+
+def test_concurrent_allocations_get_disjoint_ranges():
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        firsts = list(pool.map(lambda _: id_allocator.allocate_ids("test_project", "managerid", 4), range(32)))
+    reserved = [first + i for first in firsts for i in range(4)]
+    assert sorted(reserved) == list(range(100000, 100000 + 4 * 32))
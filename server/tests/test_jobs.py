@@ -0,0 +1,166 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from endpoints import jobs
+
+
+@pytest.fixture(autouse=True)
+def job_state(tmp_path, monkeypatch):
+    """Fresh job module state and job table; one worker so queue order is observable."""
+    monkeypatch.setattr(jobs, "JOBS_TABLE", str(tmp_path / "jobs.json"))
+    monkeypatch.setattr(jobs, "JOB_WORKERS", 1)
+    monkeypatch.setattr(jobs, "_jobs", {})
+    monkeypatch.setattr(jobs, "_queue", None)
+    monkeypatch.setattr(jobs, "_workers", [])
+    monkeypatch.setattr(jobs, "_table_loaded", False)
+
+
+async def _until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def test_jobs_run_by_priority_then_submission_order():
+    ran = []
+
+    async def main():
+        release = asyncio.Event()
+
+        async def blocker():
+            await release.wait()
+
+        async def record(name):
+            ran.append(name)
+
+        first = jobs.submit_job("test", blocker)
+        await _until(lambda: first.status == jobs.RUNNING)
+        submitted = [jobs.submit_job("test", record, name, priority=priority)
+                     for name, priority in [("low", 0), ("high", 10), ("mid", 5), ("low2", 0)]]
+        release.set()
+        await _until(lambda: all(job.finished for job in submitted))
+        return submitted
+
+    submitted = asyncio.run(main())
+    assert ran == ["high", "mid", "low", "low2"]
+    assert all(job.status == jobs.SUCCEEDED for job in submitted)
+
+
+def test_cancel_queued_job_never_runs():
+    ran = []
+
+    async def main():
+        release = asyncio.Event()
+
+        async def blocker():
+            await release.wait()
+
+        first = jobs.submit_job("test", blocker)
+        await _until(lambda: first.status == jobs.RUNNING)
+        queued = jobs.submit_job("test", ran.append, "queued")
+        jobs.cancel_job(queued)
+        assert queued.status == jobs.CANCELLED
+        release.set()
+        await _until(lambda: first.finished)
+        await asyncio.sleep(0.05)
+        return queued
+
+    queued = asyncio.run(main())
+    assert ran == []
+    assert jobs.get_job(queued.id)["status"] == jobs.CANCELLED
+
+
+def test_cancel_running_coroutine_job():
+    async def main():
+        async def forever():
+            await asyncio.sleep(60)
+
+        job = jobs.submit_job("test", forever)
+        await _until(lambda: job.status == jobs.RUNNING)
+        jobs.cancel_job(job)
+        await _until(lambda: job.finished)
+        return job
+
+    job = asyncio.run(main())
+    assert job.status == jobs.CANCELLED
+    assert jobs.get_job(job.id)["cancel_requested"] is True
+
+
+def test_cancel_running_thread_job_stops_at_its_next_check():
+    stopped = threading.Event()
+
+    def work():
+        while not jobs.cancel_requested():
+            time.sleep(0.01)
+        stopped.set()
+        return "partial"
+
+    async def main():
+        job = jobs.submit_job("test", work)
+        await _until(lambda: job.status == jobs.RUNNING)
+        jobs.cancel_job(job)
+        await _until(lambda: job.finished)
+        return job
+
+    job = asyncio.run(main())
+    assert stopped.is_set()
+    assert job.status == jobs.CANCELLED
+    assert job.result == "partial"
+
+
+def test_active_jobs_are_interrupted_after_restart():
+    async def main():
+        release = asyncio.Event()
+
+        async def blocker():
+            await release.wait()
+
+        running = jobs.submit_job("test", blocker)
+        await _until(lambda: running.status == jobs.RUNNING)
+        queued = jobs.submit_job("test", blocker)
+        return running.id, queued.id
+
+    running_id, queued_id = asyncio.run(main())
+    assert jobs.get_job(running_id)["status"] == jobs.RUNNING
+
+    # Restart: the new server run knows only the job table
+    jobs._jobs.clear()
+    jobs._table_loaded = False
+    jobs._load_table()
+
+    for job_id in (running_id, queued_id):
+        row = jobs.get_job(job_id)
+        assert row["status"] == jobs.INTERRUPTED
+        assert row["finished_at"]
+
+
+def test_finished_jobs_are_pruned_as_they_finish(monkeypatch):
+    monkeypatch.setattr(jobs, "MAX_FINISHED_JOBS", 2)
+
+    async def main():
+        submitted = [jobs.submit_job("test", lambda: None) for _ in range(4)]
+        await _until(lambda: all(job.finished for job in submitted))
+        return submitted
+
+    submitted = asyncio.run(main())
+    rows = jobs.read_table(jobs.JOBS_TABLE)
+    assert len(rows) == 2
+    assert {row["job_id"] for row in rows} <= {job.id for job in submitted}
+
+
+def test_finished_jobs_leave_memory_but_stay_queryable():
+    async def main():
+        submitted = [jobs.submit_job("test", lambda i=i: i) for i in range(3)]
+        await _until(lambda: all(job.finished for job in submitted))
+        return submitted
+
+    first, _, last = asyncio.run(main())
+    # Only the latest job of the kind stays in memory (for kind_status)
+    assert list(jobs._jobs) == [last.id]
+    assert jobs.kind_status("test")["job_id"] == last.id
+    assert jobs.get_job(first.id)["status"] == jobs.SUCCEEDED
+    assert jobs.get_job(first.id)["result"] == 0
@@ -0,0 +1,33 @@
+import os
+
+from endpoints import projects
+from endpoints.utils import journal, json_codec
+from endpoints.utils.table_cache import table_cache
+from endpoints.utils.tables import compact_journals, read_table
+
+TABLE = "default_teamsheets.json"  # Journaled and present in FC25
+
+
+def test_round_trip_with_compaction_and_export(make_project, round_trip, export_project):
+    project = make_project()
+    path = str(project / "data" / "fifa_ng_db" / TABLE)
+    fc25_path = str(projects.FC25_DATA_DIR / "fifa_ng_db" / TABLE)
+    fc25_rows = json_codec.load_file(fc25_path)
+    assert journal.is_journaled(path)
+
+    final = round_trip(path, "teamid")
+
+    # Changes went to the journal; the base file (still shared with FC25) is untouched
+    assert os.path.getsize(journal.journal_path(path)) > 0
+    assert json_codec.load_file(path) == fc25_rows
+
+    assert compact_journals(str(project / "data")) == [path]
+    assert not os.path.exists(journal.journal_path(path))
+    assert json_codec.load_file(path) == final
+    assert json_codec.load_file(fc25_path) == fc25_rows
+
+    table_cache.invalidate()
+    assert read_table(path) == final
+
+    exported = export_project()[TABLE]
+    assert [row["teamid"] for row in exported] == [row["teamid"] for row in final]
@@ -0,0 +1,51 @@
+import json
+import os
+
+import pytest
+
+from endpoints.utils import json_codec
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKENDS = ["json"] + (["orjson"] if orjson is not None else [])
+
+DATA = [
+    {"teamid": "1", "teamname": "Münster", "nested": {"list": [1, 2.5, None, True], "empty": {}}},
+    {"teamid": "2", "teamname": "Ελλάδα", "nested": {"list": [], "text": "a\nb \"q\""}},
+]
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request, monkeypatch):
+    monkeypatch.setattr(json_codec, "orjson", orjson if request.param == "orjson" else None)
+    return request.param
+
+
+@pytest.mark.parametrize("indent", [None, 2, 4])
+def test_output_matches_stdlib_layout(backend, indent):
+    separators = (',', ':') if indent is None else None
+    expected = json.dumps(DATA, indent=indent, ensure_ascii=False, separators=separators)
+    assert json_codec.dumps(DATA, indent) == expected
+    assert json_codec.dumpb(DATA, indent) == expected.encode("utf-8")
+
+
+def test_file_round_trip(backend, tmp_path):
+    path = str(tmp_path / "table.json")
+    json_codec.dump_file(path, DATA, 4, atomic=True)
+    assert json_codec.load_file(path) == DATA
+    assert os.listdir(tmp_path) == ["table.json"]  # No temp file left behind
+
+
+def test_leading_bom_is_ignored(backend, tmp_path):
+    path = tmp_path / "table.json"
+    path.write_bytes(b"\xef\xbb\xbf" + json.dumps(DATA).encode("utf-8"))
+    assert json_codec.load_file(str(path)) == DATA
+    assert json_codec.loads("﻿" + json.dumps(DATA)) == DATA
+
+
+def test_decode_errors_are_json_decode_errors(backend):
+    with pytest.raises(json.JSONDecodeError):
+        json_codec.loads(b"[{")
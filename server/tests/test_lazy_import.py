@@ -0,0 +1,43 @@
+import sys
+
+import pytest
+
+from endpoints.utils.lazy_import import is_loaded, lazy_module
+
+
+@pytest.fixture
+def heavy_package(tmp_path, monkeypatch):
+    """Importable package `heavy_pkg` with a submodule, not imported yet."""
+    package = tmp_path / "heavy_pkg"
+    package.mkdir()
+    (package / "__init__.py").write_text("LOADED = True\n")
+    (package / "core.py").write_text("def answer():\n    return 42\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield "heavy_pkg"
+    for name in ("heavy_pkg", "heavy_pkg.core"):
+        sys.modules.pop(name, None)
+
+
+def test_module_is_imported_on_first_attribute_access(heavy_package):
+    core = lazy_module("heavy_pkg.core")
+    assert "heavy_pkg" not in sys.modules and "heavy_pkg.core" not in sys.modules
+    assert not is_loaded(core)
+
+    assert core.answer() == 42
+    assert is_loaded(core)
+    assert "heavy_pkg.core" in sys.modules
+    # Once imported, the real module is handed out
+    assert lazy_module("heavy_pkg.core") is sys.modules["heavy_pkg.core"]
+
+
+def test_missing_packages_fail_where_the_import_was():
+    with pytest.raises(ModuleNotFoundError):
+        lazy_module("no_such_heavy_package")
+    with pytest.raises(ModuleNotFoundError):
+        lazy_module("no_such_heavy_package.submodule")
+
+
+def test_missing_submodule_of_an_installed_package_fails_on_first_use(heavy_package):
+    missing = lazy_module("heavy_pkg.missing")
+    with pytest.raises(ModuleNotFoundError):
+        missing.anything
@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+from endpoints.utils import league_ratings
+from endpoints.utils.tables import append_rows, read_table, replace_rows, resolve_data_path, upsert_rows, write_table
+
+
+@pytest.fixture(autouse=True)
+def no_views(monkeypatch):
+    monkeypatch.setattr(league_ratings, "_views", {})
+
+
+def _recomputed(tables):
+    """The view built from scratch from the tables on disk."""
+    view = league_ratings.LeagueRatingsView()
+    view.add_teams(read_table(str(tables / "teams.json")))
+    view.add_links(read_table(str(tables / "leagueteamlinks.json")))
+    return view.assemble(read_table(str(tables / "leagues.json")), read_table(league_ratings.NATION_MAP_FILE))
+
+
+def test_row_writes_update_the_view_like_a_full_recompute(tmp_path):
+    project_dir = tmp_path / "projects" / "test_project"
+    tables = project_dir / "data" / "fifa_ng_db"
+    # Albania (FC25 country 1): a first and a second division
+    write_table(str(tables / "leagues.json"), [{"leagueid": "100", "countryid": "1", "level": "1"},
+                                               {"leagueid": "101", "countryid": "1", "level": "2"}])
+    write_table(str(tables / "teams.json"), [{"teamid": "1", "overallrating": "70"},
+                                             {"teamid": "2", "overallrating": "74"},
+                                             {"teamid": "3", "overallrating": "60"}])
+    write_table(str(tables / "leagueteamlinks.json"), [{"artificialkey": "1", "leagueid": "100", "teamid": "1"},
+                                                       {"artificialkey": "2", "leagueid": "100", "teamid": "2"},
+                                                       {"artificialkey": "3", "leagueid": "101", "teamid": "3"}])
+    project_id = os.path.relpath(project_dir, resolve_data_path("../projects"))
+
+    result = league_ratings.get_league_ratings_view(project_id)
+    assert result["Albania"][1] == {"average_rating": 72.0, "team_count": 2, "min_rating": 70, "max_rating": 74, "level": 1}
+    assert result == _recomputed(tables)
+    (view,) = league_ratings._views.values()
+
+    writes = [
+        # A new team and its link, a rating change, a team promoted to the first division
+        lambda: append_rows(str(tables / "teams.json"), [{"teamid": "4", "overallrating": "66"}]),
+        lambda: append_rows(str(tables / "leagueteamlinks.json"), [{"artificialkey": "4", "leagueid": "101", "teamid": "4"}]),
+        lambda: upsert_rows(str(tables / "teams.json"), "teamid", [{"teamid": "1", "overallrating": "78"}]),
+        lambda: replace_rows(str(tables / "leagueteamlinks.json"), "teamid", "3",
+                             [{"artificialkey": "3", "leagueid": "100", "teamid": "3"}]),
+    ]
+    for write in writes:
+        write()
+        assert league_ratings.get_league_ratings_view(project_id) == _recomputed(tables)
+        assert list(league_ratings._views.values()) == [view]  # Updated in place, not rebuilt
+
+    result = league_ratings.get_league_ratings_view(project_id)
+    assert result["Albania"][1]["team_count"] == 3
+    assert result["Albania"][1]["max_rating"] == 78
+    assert result["Albania"][2] == {"average_rating": 66.0, "team_count": 1, "min_rating": 66, "max_rating": 66, "level": 2}
+
+    # A rewritten table rebuilds the view
+    write_table(str(tables / "teams.json"), [{"teamid": "1", "overallrating": "50"}])
+    assert league_ratings.get_league_ratings_view(project_id) == _recomputed(tables)
+    assert list(league_ratings._views.values()) != [view]
@@ -0,0 +1,108 @@
+import json
+import os
+import shutil
+
+from conftest import NEW_KEYS
+from endpoints import projects
+from endpoints.utils import json_codec, overlay
+from endpoints.utils.table_cache import table_cache
+from endpoints.utils.tables import read_table, write_table
+
+TABLE = "leagueteamlinks.json"
+
+
+def _overlay_table(tables_dir):
+    shutil.copyfile(overlay.base_path(TABLE), tables_dir / TABLE)
+    assert overlay.convert_project_to_overlay(str(tables_dir.parent.parent)) == [TABLE]
+    return str(tables_dir / TABLE)
+
+
+def test_in_place_edit_is_saved_and_keeps_fc25_intact(tables_dir):
+    path = _overlay_table(tables_dir)
+    base_rows = read_table(overlay.base_path(TABLE))
+    original = dict(base_rows[0])
+
+    rows = read_table(path)
+    rows[0]["leagueid"] = "999"
+    rows[0]["prevleagueid"] = "999"
+    write_table(path, rows)
+
+    # The FC25 base (shared by every overlay project) is untouched
+    assert read_table(overlay.base_path(TABLE))[0] == original
+    with open(overlay.overlay_path(path), encoding="utf-8") as f:
+        delta = json.load(f)
+    assert [row["artificialkey"] for row in delta["rows"]] == [original["artificialkey"]]
+
+    table_cache.invalidate()
+    reread = read_table(path)
+    assert reread[0]["leagueid"] == "999"
+    assert reread[1:] == read_table(overlay.base_path(TABLE))[1:]
+
+
+def test_unsaved_edit_does_not_leak_into_later_reads(tables_dir):
+    path = _overlay_table(tables_dir)
+    original = dict(read_table(path)[0])
+
+    read_table(path)[0]["leagueid"] = "999"
+
+    assert read_table(path)[0] == original
+    assert read_table(overlay.base_path(TABLE))[0] == original
+
+
+def test_second_edit_of_written_row_is_saved(tables_dir):
+    path = _overlay_table(tables_dir)
+    rows = read_table(path)
+    rows[0]["leagueid"] = "998"
+    write_table(path, rows)
+
+    rows[0]["leagueid"] = "999"  # Same objects the first diff saw
+    write_table(path, rows)
+
+    table_cache.invalidate()
+    assert read_table(path)[0]["leagueid"] == "999"
+
+
+def test_round_trip_and_export(make_project, round_trip, export_project):
+    project = make_project("overlay")
+    path = str(project / "data" / "fifa_ng_db" / "teams.json")
+    fc25_rows = json_codec.load_file(overlay.base_path(path))
+    assert not os.path.exists(path)
+
+    final = round_trip(path, "teamid")
+
+    # Only the added rows are in the delta; FC25 is untouched
+    delta = json_codec.load_file(overlay.overlay_path(path))
+    assert sorted(row["teamid"] for row in delta["rows"]) == list(NEW_KEYS)
+    assert delta["deleted"] == []
+    assert json_codec.load_file(overlay.base_path(path)) == fc25_rows
+
+    exported = export_project()["teams.json"]
+    assert [row["teamid"] for row in exported] == [row["teamid"] for row in final]
+
+    projects.set_storage_engine(project, "json")
+    assert not os.path.exists(overlay.overlay_path(path))
+    assert read_table(path) == final
+
+
+def test_added_teams_get_their_own_formations(make_project, projects_dir, monkeypatch):
+    from endpoints.tactics import _add_team_formation
+    from endpoints.utils import id_allocator
+
+    monkeypatch.setattr(id_allocator, "_project_dir", lambda project_name: str(projects_dir / project_name))
+    monkeypatch.setattr(id_allocator, "_states", {})
+    project = make_project("overlay")
+    data_dir = str(project / "data" / "fifa_ng_db")
+    path = os.path.join(data_dir, "formations.json")
+    fc25_rows = read_table(overlay.base_path(path))
+    fc25_formation = next(row for row in fc25_rows if row["formationid"] == "617")
+
+    for team_id in ("900001", "900002"):
+        _add_team_formation(data_dir, team_id)
+
+    table_cache.invalidate()
+    rows = read_table(path)
+    assert len(rows) == len(fc25_rows) + 2
+    by_team = {row["teamid"]: row for row in rows}
+    assert by_team[fc25_formation["teamid"]] == fc25_formation
+    assert by_team["900001"]["formationid"] != by_team["900002"]["formationid"]
+    assert len({row["formationid"] for row in rows}) == len(rows)
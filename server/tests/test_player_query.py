@@ -0,0 +1,72 @@
+import os
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from endpoints import players
+from endpoints.utils.tables import append_rows, get_sorted_index, resolve_data_path, write_table
+
+# playerid -> overallrating; two ties on 80 are ordered by playerid
+RATINGS = {"1": 70, "2": 80, "3": 65, "4": 80, "5": 90, "6": 75, "7": 60}
+
+
+def _client(tmp_path):
+    project_dir = tmp_path / "projects" / "test_project"
+    data_dir = project_dir / "data" / "fifa_ng_db"
+    data_dir.mkdir(parents=True)
+    write_table(str(data_dir / "players.json"),
+                [{"playerid": pid, "overallrating": str(ovr), "nationality": "14" if int(pid) % 2 else "21"}
+                 for pid, ovr in RATINGS.items()])
+    write_table(str(data_dir / "teamplayerlinks.json"),
+                [{"artificialkey": str(i), "teamid": "10", "playerid": pid} for i, pid in enumerate(("1", "2", "4", "6"))])
+    app = FastAPI()
+    app.include_router(players.router)
+    # The endpoint reads ../projects/<project_id>/...; a relative ID reaches the temporary project
+    project_id = os.path.relpath(project_dir, resolve_data_path("../projects"))
+    return TestClient(app), project_id, data_dir
+
+
+def _all_pages(client, **params):
+    pages, cursor = [], None
+    while True:
+        page = client.get("/players/query", params={**params, **({"cursor": cursor} if cursor else {})}).json()
+        pages.append([row["playerid"] for row in page["items"]])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages, page["total"]
+
+
+def test_pages_follow_the_sort_order_without_gaps_or_repeats(tmp_path):
+    client, project_id, _ = _client(tmp_path)
+
+    pages, total = _all_pages(client, project_id=project_id, limit=3)
+    assert pages == [["5", "4", "2"], ["6", "1", "3"], ["7"]]
+    assert total == 7
+
+    pages, total = _all_pages(client, project_id=project_id, sort="overallrating", order="asc", limit=4,
+                              team_id="10", min_overall=70)
+    assert pages == [["1", "6", "2", "4"]]
+    assert total == 4
+
+
+def test_rows_added_between_pages_do_not_shift_the_next_page(tmp_path):
+    client, project_id, data_dir = _client(tmp_path)
+    index = get_sorted_index(str(data_dir / "players.json"), "overallrating", "playerid")
+
+    first = client.get("/players/query", params={"project_id": project_id, "limit": 3}).json()
+    assert [row["playerid"] for row in first["items"]] == ["5", "4", "2"]
+
+    append_rows(str(data_dir / "players.json"), [{"playerid": "8", "overallrating": "85"},
+                                                  {"playerid": "9", "overallrating": "72"}])
+    assert get_sorted_index(str(data_dir / "players.json"), "overallrating", "playerid") is index
+
+    second = client.get("/players/query", params={"project_id": project_id, "limit": 3,
+                                                  "cursor": first["next_cursor"]}).json()
+    assert [row["playerid"] for row in second["items"]] == ["6", "9", "1"]
+    assert second["total"] == 9
+
+
+def test_malformed_cursor_is_rejected(tmp_path):
+    client, project_id, _ = _client(tmp_path)
+    response = client.get("/players/query", params={"project_id": project_id, "cursor": "not-a-cursor"})
+    assert response.status_code == 400
@@ -0,0 +1,44 @@
+import asyncio
+import os
+
+from endpoints.playernames import resolve_names
+from endpoints.utils.tables import append_rows, get_name_index, read_table, resolve_data_path, write_table
+
+NAMES = [{"nameid": "0", "commentaryid": "900000", "name": ""},
+         {"nameid": "1000", "commentaryid": "900000", "name": "Silva"},
+         {"nameid": "1001", "commentaryid": "900000", "name": "SILVA"},
+         {"nameid": "1005", "commentaryid": "900000", "name": "Kane"}]
+
+
+def test_name_index_is_case_insensitive_and_patched_on_append(tables_dir):
+    path = str(tables_dir / "playernames.json")
+    write_table(path, NAMES)
+    index = get_name_index(path)
+    assert index.get("silva") == 1000  # The first of a name stored twice wins
+    assert index.get("KANE") == 1005
+    assert index.max_id == 1005
+
+    append_rows(path, [{"nameid": "1006", "commentaryid": "900000", "name": "Saka"}])
+    assert get_name_index(path) is index
+    assert index.get("saka") == 1006
+    assert index.max_id == 1006
+
+
+def test_resolve_names_creates_missing_names_in_one_batch(tmp_path):
+    project_dir = tmp_path / "projects" / "test_project"
+    path = project_dir / "data" / "fifa_ng_db" / "playernames.json"
+    path.parent.mkdir(parents=True)
+    write_table(str(path), NAMES)
+    # Project tables are found as ../projects/<project name>: name the temporary project relative to that
+    project_name = os.path.relpath(project_dir, resolve_data_path("../projects"))
+
+    ids = asyncio.run(resolve_names(project_name, ["Kane", "Rice", "", "silva", "rice", "Foden"]))
+
+    assert ids == [1005, 1006, 0, 1000, 1006, 1007]
+    rows = read_table(str(path))
+    assert rows[:len(NAMES)] == NAMES
+    assert [(row["nameid"], row["name"]) for row in rows[len(NAMES):]] == [("1006", "Rice"), ("1007", "Foden")]
+
+    # Resolving again finds every name and adds nothing
+    assert asyncio.run(resolve_names(project_name, ["RICE", "Foden"])) == [1006, 1007]
+    assert len(read_table(str(path))) == len(NAMES) + 2
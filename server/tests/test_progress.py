@@ -0,0 +1,74 @@
+import asyncio
+import json
+from collections import deque
+
+import pytest
+
+from endpoints import websocket
+
+
+@pytest.fixture(autouse=True)
+def progress_channel(monkeypatch):
+    monkeypatch.setattr(websocket, "active_connections", set())
+    monkeypatch.setattr(websocket, "message_queue", deque())
+    monkeypatch.setattr(websocket, "queue_processor_running", False)
+    monkeypatch.setattr(websocket, "_queued_count", 0)
+    monkeypatch.setattr(websocket, "_delivered_count", 0)
+    monkeypatch.setattr(websocket, "_drain_waiters", [])
+    monkeypatch.setattr(websocket, "_server_loop", None)
+
+
+class Client:
+    """Connected WebSocket that keeps what it was sent; sends wait until `resumed` is set."""
+
+    def __init__(self):
+        self.received = []
+        self.resumed = asyncio.Event()
+        self.resumed.set()
+
+    async def send_text(self, message):
+        await self.resumed.wait()
+        await asyncio.sleep(0)
+        self.received.append(json.loads(message)["current"])
+
+
+def test_drain_waits_until_everything_queued_before_it_is_sent():
+    client = Client()
+    websocket.active_connections.add(client)
+
+    async def main():
+        websocket.send_progress_sync({"type": "progress", "current": 0})
+        # Worker threads queue onto the same channel
+        await asyncio.to_thread(lambda: [websocket.send_progress_sync({"type": "progress", "current": n}) for n in range(1, 50)])
+        websocket.send_progress_sync({"type": "progress", "current": 50})
+        assert await websocket.drain_progress()
+        assert client.received == list(range(51))
+
+    asyncio.run(main())
+
+
+def test_drain_gives_up_on_a_slow_client_without_losing_messages():
+    client = Client()
+    websocket.active_connections.add(client)
+
+    async def main():
+        client.resumed.clear()
+        for n in range(3):
+            websocket.send_progress_sync({"type": "progress", "current": n})
+        assert not await websocket.drain_progress(timeout=0.05)
+        assert client.received == []
+
+        client.resumed.set()
+        assert await websocket.drain_progress()
+        assert client.received == [0, 1, 2]
+
+    asyncio.run(main())
+
+
+def test_drain_returns_at_once_when_nothing_is_pending():
+    async def main():
+        assert await websocket.drain_progress(timeout=0.01)
+        websocket.send_progress_sync({"type": "progress", "current": 0})  # No client: sent to nobody
+        assert await websocket.drain_progress(timeout=1)
+
+    asyncio.run(main())
@@ -0,0 +1,37 @@
+import os
+
+from conftest import NEW_KEYS
+from endpoints import projects
+from endpoints.utils import sqlite_store
+from endpoints.utils.table_cache import table_cache
+from endpoints.utils.tables import read_table
+
+
+def test_round_trip_and_export(make_project, round_trip, export_project):
+    project = make_project("sqlite")
+    path = str(project / "data" / "fifa_ng_db" / "teams.json")
+    assert os.path.isfile(sqlite_store.store_path(str(project)))
+    assert not os.path.exists(path)  # Rows live in project.sqlite
+
+    final = round_trip(path, "teamid")
+
+    # Reopened store (as after a restart) serves the same rows
+    sqlite_store.close_store(str(project))
+    table_cache.invalidate()
+    assert read_table(path) == final
+
+    exported = export_project()["teams.json"]
+    assert [row["teamid"] for row in exported] == [row["teamid"] for row in final]
+    assert exported[-2]["teamid"] == NEW_KEYS[0]
+
+
+def test_convert_back_to_json_keeps_rows(make_project, round_trip):
+    project = make_project("sqlite")
+    path = str(project / "data" / "fifa_ng_db" / "teams.json")
+    final = round_trip(path, "teamid")
+
+    projects.set_storage_engine(project, "json")
+
+    assert not os.path.exists(sqlite_store.store_path(str(project)))
+    assert os.path.isfile(path)
+    assert read_table(path) == final
@@ -0,0 +1,82 @@
+import json
+import os
+
+import pytest
+
+from endpoints.utils import json_codec
+from endpoints.utils.table_cache import TableCache, file_stamp
+from endpoints.utils.tables import read_table, write_table
+
+
+def _write(path, rows):
+    path.write_text(json.dumps(rows))
+    return str(path)
+
+
+def _counting_loader(loads):
+    def load(abs_path):
+        loads.append(abs_path)
+        return json_codec.load_file(abs_path)
+    return load
+
+
+def test_entry_is_reloaded_when_the_file_stamp_changes(tmp_path):
+    cache, loads = TableCache(), []
+    path = _write(tmp_path / "teams.json", [{"teamid": "1"}])
+
+    assert cache.get(path, _counting_loader(loads)) == [{"teamid": "1"}]
+    assert cache.get(path, _counting_loader(loads)) == [{"teamid": "1"}]
+    assert len(loads) == 1
+
+    # Same size, newer mtime: the stamp alone tells the file changed
+    _write(tmp_path / "teams.json", [{"teamid": "2"}])
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert cache.get(path, _counting_loader(loads)) == [{"teamid": "2"}]
+    assert len(loads) == 2
+
+    os.remove(path)
+    with pytest.raises(FileNotFoundError):
+        cache.get(path, _counting_loader(loads))
+    assert cache.stats()["tables"] == 0
+
+
+def test_least_recently_used_tables_are_evicted_over_budget(tmp_path):
+    paths = [_write(tmp_path / f"{name}.json", [{"id": name * 10}]) for name in "abc"]
+    size = os.path.getsize(paths[0])
+    cache, loads = TableCache(max_bytes=2 * size), []
+    a, b, c = paths
+
+    cache.get(a, _counting_loader(loads))
+    cache.get(b, _counting_loader(loads))
+    cache.get(a, _counting_loader(loads))  # b is now the least recently used
+    cache.get(c, _counting_loader(loads))
+
+    assert cache.peek(a, file_stamp(a)) is not None
+    assert cache.peek(b, file_stamp(b)) is None
+    assert cache.peek(c, file_stamp(c)) is not None
+    assert cache.stats()["total_bytes"] == 2 * size
+
+
+def test_table_larger_than_the_budget_is_served_but_not_cached(tmp_path):
+    path = _write(tmp_path / "players.json", [{"playerid": str(i)} for i in range(100)])
+    cache, loads = TableCache(max_bytes=10), []
+
+    assert len(cache.get(path, _counting_loader(loads))) == 100
+    assert len(cache.get(path, _counting_loader(loads))) == 100
+    assert len(loads) == 2
+    assert cache.stats()["tables"] == 0
+
+
+def test_read_table_shares_rows_but_not_the_list(tables_dir):
+    path = str(tables_dir / "teams.json")
+    write_table(path, [{"teamid": "1"}, {"teamid": "2"}])
+
+    first, second = read_table(path), read_table(path)
+    assert first is not second
+    assert all(a is b for a, b in zip(first, second))
+
+    # Callers may reshape their list without touching the cached table
+    first.append({"teamid": "3"})
+    del first[0]
+    assert read_table(path) == [{"teamid": "1"}, {"teamid": "2"}]
@@ -0,0 +1,94 @@
+from endpoints.utils.table_cache import table_cache
+from endpoints.utils.tables import (append_rows, get_index, get_multi_index, get_row, get_rows, replace_rows,
+                                    upsert_rows, write_table)
+
+
+def _players(tables_dir):
+    path = str(tables_dir / "players.json")
+    write_table(path, [{"playerid": "1", "teamid": "10", "overallrating": "60"},
+                       {"playerid": "2", "teamid": "10", "overallrating": "70"},
+                       {"playerid": "3", "teamid": "20", "overallrating": "80"}])
+    return path
+
+
+def _rebuilt(path, column=None):
+    """Index built from the file alone, to compare the patched one with."""
+    table_cache.invalidate()
+    return get_index(path, column)
+
+
+def _links(tables_dir):
+    path = str(tables_dir / "teamplayerlinks.json")
+    write_table(path, [{"artificialkey": "0", "teamid": "10", "playerid": "1"},
+                       {"artificialkey": "1", "teamid": "10", "playerid": "2"},
+                       {"artificialkey": "2", "teamid": "20", "playerid": "3"},
+                       {"artificialkey": "3", "teamid": "30", "playerid": "1"}])
+    return path
+
+
+def test_primary_key_index_is_patched_by_row_writes(tables_dir):
+    path = _players(tables_dir)
+    index = get_index(path)
+    assert index.column == "playerid"
+    assert get_row(path, 2) == {"playerid": "2", "teamid": "10", "overallrating": "70"}
+
+    append_rows(path, [{"playerid": "4", "teamid": "20", "overallrating": "65"}])
+    replace_rows(path, "teamid", "10", [{"playerid": "5", "teamid": "10", "overallrating": "75"}])
+    upsert_rows(path, "playerid", [{"playerid": "3", "overallrating": "85"}, {"playerid": "6", "teamid": "30"}])
+
+    patched = get_index(path)
+    assert patched is index  # Updated in place, not rebuilt
+    assert sorted(patched) == ["3", "4", "5", "6"]
+    assert patched.get("3") == {"playerid": "3", "teamid": "20", "overallrating": "85"}
+    assert "1" not in patched and "2" not in patched
+    assert patched.max_int == 6
+
+    rebuilt = _rebuilt(path)
+    assert {key: rebuilt.get(key) for key in rebuilt} == {key: patched.get(key) for key in patched}
+
+
+def test_freed_ids_stay_below_the_high_water_mark(tables_dir):
+    path = _players(tables_dir)
+    assert get_index(path).max_int == 3
+    replace_rows(path, "teamid", "20", [])
+    assert "3" not in get_index(path)
+    assert get_index(path).max_int == 3
+
+
+def test_first_of_duplicate_keys_wins_and_resurfaces_the_next_on_removal(tables_dir):
+    path = str(tables_dir / "teams.json")
+    write_table(path, [{"teamid": "1", "teamname": "first", "group": "a"},
+                       {"teamid": "1", "teamname": "second", "group": "b"}])
+    assert get_row(path, "1")["teamname"] == "first"
+
+    replace_rows(path, "group", "a", [])
+    assert get_row(path, "1")["teamname"] == "second"
+    assert get_row(path, "1") == _rebuilt(path).get("1")
+
+
+def test_link_indexes_are_patched_by_row_writes(tables_dir):
+    path = _links(tables_dir)
+    by_team, by_player = get_multi_index(path, "teamid"), get_multi_index(path, "playerid")
+    assert [row["playerid"] for row in by_team.get("10")] == ["1", "2"]
+    assert [row["teamid"] for row in by_player.get(1)] == ["10", "30"]
+
+    append_rows(path, [{"artificialkey": "4", "teamid": "20", "playerid": "4"}])
+    assert replace_rows(path, "teamid", "10", [{"artificialkey": "5", "teamid": "10", "playerid": "5"}]) == 2
+    upsert_rows(path, "artificialkey", [{"artificialkey": "2", "playerid": "6"}])
+
+    assert get_multi_index(path, "teamid") is by_team
+    # The upsert moved a row to another playerid: that index is rebuilt rather than patched
+    assert get_multi_index(path, "playerid") is not by_player
+    assert [row["playerid"] for row in get_rows(path, "teamid", "10")] == ["5"]
+    assert [row["playerid"] for row in get_rows(path, "teamid", "20")] == ["6", "4"]
+    assert [row["teamid"] for row in get_rows(path, "playerid", "1")] == ["30"]
+    assert get_rows(path, "playerid", "2") == [] and get_rows(path, "playerid", "3") == []
+
+    patched = {key: by_team.get(key) for key in by_team}
+    table_cache.invalidate()
+    rebuilt = get_multi_index(path, "teamid")
+    assert {key: rebuilt.get(key) for key in rebuilt} == patched
+
+
+def test_rows_of_a_missing_link_table_are_empty(tables_dir):
+    assert get_rows(str(tables_dir / "teamstadiumlinks.json"), "teamid", "10") == []
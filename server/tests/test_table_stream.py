@@ -0,0 +1,68 @@
+import json
+import os
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from endpoints import tables as table_endpoints
+from endpoints.utils import load_json_file
+from endpoints.utils.tables import append_rows, read_table, resolve_data_path, write_table
+
+app = FastAPI()
+app.include_router(table_endpoints.router)
+client = TestClient(app)
+
+FC25_TEAMS = resolve_data_path("../fc25/data/fifa_ng_db/teams.json")
+
+
+def _lines(response):
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "application/x-ndjson"
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_project_table_is_streamed_one_row_per_line_in_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(table_endpoints, "STREAM_BATCH_SIZE", 2)
+    project_dir = tmp_path / "projects" / "test_project"
+    rows = [{"teamid": str(i), "teamname": f"Team {i}"} for i in range(5)]
+    write_table(str(project_dir / "data" / "fifa_ng_db" / "teams.json"), rows)
+    project_id = os.path.relpath(project_dir, resolve_data_path("../projects"))
+
+    assert _lines(client.get("/tables/teams/stream", params={"project_id": project_id})) == rows
+
+
+def test_missing_project_table_falls_back_to_fc25(tmp_path):
+    (tmp_path / "projects" / "test_project").mkdir(parents=True)
+    project_id = os.path.relpath(tmp_path / "projects" / "test_project", resolve_data_path("../projects"))
+
+    assert _lines(client.get("/tables/teams/stream", params={"project_id": project_id})) == read_table(FC25_TEAMS)
+
+
+def test_unknown_and_invalid_table_names():
+    assert client.get("/tables/no_such_table/stream").status_code == 404
+    assert client.get("/tables/teams.json/stream").status_code == 400
+
+
+def test_fields_select_columns_of_the_stream(tmp_path):
+    project_dir = tmp_path / "projects" / "test_project"
+    path = str(project_dir / "data" / "fifa_ng_db" / "teams.json")
+    write_table(path, [{"teamid": "1", "teamname": "One", "foundationyear": "1900"},
+                       {"teamid": "2", "teamname": "Two"}])
+    project_id = os.path.relpath(project_dir, resolve_data_path("../projects"))
+
+    lines = _lines(client.get("/tables/teams/stream", params={"project_id": project_id, "fields": "teamid,foundationyear"}))
+    assert lines == [{"teamid": "1", "foundationyear": "1900"}, {"teamid": "2"}]
+    assert _lines(client.get("/tables/teams/stream", params={"project_id": project_id, "columns": "teamname"})) == [
+        {"teamname": "One"}, {"teamname": "Two"}]
+
+
+def test_cached_projection_follows_appends(tables_dir):
+    path = str(tables_dir / "teams.json")
+    write_table(path, [{"teamid": "1", "teamname": "One"}])
+    assert load_json_file(path, "teamid") == [{"teamid": "1"}]
+
+    append_rows(path, [{"teamid": "2", "teamname": "Two"}])
+    assert load_json_file(path, ["teamid"]) == [{"teamid": "1"}, {"teamid": "2"}]
+    # Callers get their own list
+    load_json_file(path, "teamid").clear()
+    assert load_json_file(path, " teamid ,") == [{"teamid": "1"}, {"teamid": "2"}]
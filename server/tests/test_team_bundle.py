@@ -0,0 +1,64 @@
+import os
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from endpoints import team_bundle
+from endpoints.utils.tables import get_rows, read_table, resolve_data_path, write_table
+
+app = FastAPI()
+app.include_router(team_bundle.router)
+client = TestClient(app)
+
+
+def _project(tmp_path):
+    # The bundle reads ../projects/<project_id>/...: a relative ID reaches the temporary
+    # project (only outside a URL path, hence the direct build_team_bundle calls)
+    project_dir = tmp_path / "projects" / "test_project"
+    (project_dir / "data" / "fifa_ng_db").mkdir(parents=True)
+    return project_dir, os.path.relpath(project_dir, resolve_data_path("../projects"))
+
+
+def test_unknown_project_and_team(tmp_path):
+    response = client.get("/projects/no_such_project/teams/1/bundle")
+    assert response.status_code == 404
+    assert "no_such_project" in response.json()["detail"]
+    _, project_id = _project(tmp_path)
+    assert team_bundle.build_team_bundle(project_id, "999999999") is None
+
+
+def test_tables_the_project_lacks_come_from_fc25(tmp_path):
+    _, project_id = _project(tmp_path)
+    fc25_team = read_table(resolve_data_path("../fc25/data/fifa_ng_db/teams.json"))[0]
+    team_id = fc25_team["teamid"]
+
+    bundle = team_bundle.build_team_bundle(project_id, team_id)
+
+    assert bundle["team"] == fc25_team
+    assert bundle["links"]["leagueteamlinks"] == get_rows(
+        resolve_data_path("../fc25/data/fifa_ng_db/leagueteamlinks.json"), "teamid", team_id)
+
+
+def test_project_team_with_players_and_names(tmp_path):
+    project_dir, project_id = _project(tmp_path)
+    tables = project_dir / "data" / "fifa_ng_db"
+    write_table(str(tables / "teams.json"), [{"teamid": "900001", "teamname": "Test FC"}])
+    write_table(str(tables / "teamplayerlinks.json"),
+                [{"artificialkey": "0", "teamid": "900001", "playerid": "300000"},
+                 {"artificialkey": "1", "teamid": "900001", "playerid": "300404"}])  # No such player
+    write_table(str(tables / "players.json"),
+                [{"playerid": "300000", "firstnameid": "1000", "lastnameid": "1001", "commonnameid": "0"}])
+    write_table(str(tables / "playernames.json"),
+                [{"nameid": "1000", "name": "Harry"}, {"nameid": "1001", "name": "Kane"}])
+    write_table(str(tables / "manager.json"), [{"managerid": "100000", "teamid": "900001"}])
+
+    bundle = team_bundle.build_team_bundle(project_id, "900001")
+
+    assert bundle["team"]["teamname"] == "Test FC"
+    assert [player["playerid"] for player in bundle["players"]] == ["300000"]
+    player = bundle["players"][0]
+    assert (player["firstname"], player["lastname"], player["commonname"]) == ("Harry", "Kane", "")
+    assert len(bundle["links"]["teamplayerlinks"]) == 2
+    assert bundle["manager"] == {"managerid": "100000", "teamid": "900001"}
+    # Names were added to the bundle's copy, not to the cached players table
+    assert "firstname" not in read_table(str(tables / "players.json"))[0]
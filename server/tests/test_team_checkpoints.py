@@ -0,0 +1,173 @@
+import asyncio
+import os
+
+import pytest
+
+from endpoints import players, teams
+from endpoints.utils import id_allocator, team_checkpoints
+from endpoints.utils.tables import read_table, resolve_data_path
+
+STEP_NAMES = [step["name"] for step in teams.TEAM_PROCESSING_STEPS]
+
+TEAM = teams.TransfermarktTeam(teamname="Test FC", teamlogo="", team_url="https://example.invalid/test-fc/startseite/verein/1",
+                               team_id="1", squad=25, avg_age=25.0, foreigners=5, avg_market_value="1m",
+                               total_market_value="25m")
+
+
+@pytest.fixture(autouse=True)
+def checkpoint_state(tmp_path, monkeypatch):
+    """Checkpoints kept in tmp_path instead of the project directory."""
+    monkeypatch.setattr(team_checkpoints, "_states", {})
+    monkeypatch.setattr(team_checkpoints, "_claimed", {})
+    monkeypatch.setattr(team_checkpoints, "_state_path", lambda project_name: str(tmp_path / team_checkpoints.STATE_FILE))
+
+
+class StubSteps:
+    """Replaces the step handlers: records calls, fails the steps in `failing`."""
+
+    def __init__(self, monkeypatch):
+        self.calls = []
+        self.inputs = {}
+        self.failing = {}  # Step name -> status it reports, or an exception to raise
+        steps = [{**step, "handler": self._handler(step)} for step in teams.TEAM_PROCESSING_STEPS]
+        monkeypatch.setattr(teams, "TEAM_PROCESSING_STEPS", steps)
+
+    def _handler(self, step):
+        async def handler(tm_team, new_team_id, project_name, league_id, checkpoint=None, **inputs):
+            name = step["name"]
+            self.calls.append(name)
+            self.inputs[name] = inputs
+            failure = self.failing.get(name)
+            if isinstance(failure, Exception):
+                raise failure
+            result = {f"step{STEP_NAMES.index(name)}_status": failure or "success"}
+            result.update({output: f"{output} of {new_team_id}" for output in step.get("outputs", ())})
+            return result
+        return handler
+
+
+def _run(checkpoint):
+    return asyncio.run(teams.generate_team_data(TEAM, checkpoint.teamid, "13", "test_project", checkpoint=checkpoint))
+
+
+@pytest.mark.parametrize("failed_step", STEP_NAMES)
+def test_resume_reruns_only_the_failed_step(monkeypatch, failed_step):
+    stubs = StubSteps(monkeypatch)
+    checkpoint = team_checkpoints.start_checkpoint("test_project", "13:1", "131072", TEAM.teamname)
+
+    stubs.failing[failed_step] = "error"
+    _run(checkpoint)
+    assert sorted(stubs.calls) == sorted(STEP_NAMES)
+    assert set(checkpoint.completed_steps()) == set(STEP_NAMES) - {failed_step}
+
+    stubs.calls.clear()
+    stubs.failing.clear()
+    team_data = _run(checkpoint)
+
+    assert stubs.calls == [failed_step]
+    # The step got the values the earlier run's steps handed over
+    step = next(step for step in teams.TEAM_PROCESSING_STEPS if step["name"] == failed_step)
+    assert stubs.inputs[failed_step] == {name: f"{name} of 131072" for name in step.get("inputs", ())}
+    # Restored results are merged as if every step had run now
+    assert all(team_data[f"step{i}_status"] == "success" for i in range(len(STEP_NAMES)))
+    assert set(checkpoint.completed_steps()) == set(STEP_NAMES)
+
+
+@pytest.mark.parametrize("status", ["warning", "skipped"])
+def test_warning_and_skipped_steps_are_not_checkpointed(monkeypatch, status):
+    stubs = StubSteps(monkeypatch)
+    checkpoint = team_checkpoints.start_checkpoint("test_project", "13:1", "131072", TEAM.teamname)
+    step = "⚽ Processing team players"
+
+    stubs.failing[step] = status
+    _run(checkpoint)
+    stubs.calls.clear()
+    stubs.failing.clear()
+    _run(checkpoint)
+
+    assert stubs.calls == [step]
+
+
+def test_resume_after_a_raising_step_skips_recorded_steps(monkeypatch):
+    stubs = StubSteps(monkeypatch)
+    checkpoint = team_checkpoints.start_checkpoint("test_project", "13:1", "131072", TEAM.teamname)
+    failed_step = "💾 Saving team players"
+
+    stubs.failing[failed_step] = RuntimeError("scrape failed")
+    with pytest.raises(RuntimeError):
+        _run(checkpoint)
+    recorded = set(checkpoint.completed_steps())
+    assert failed_step not in recorded
+    assert "⚽ Processing team players" in recorded
+
+    stubs.calls.clear()
+    stubs.failing.clear()
+    _run(checkpoint)
+
+    assert failed_step in stubs.calls
+    assert set(stubs.calls) == set(STEP_NAMES) - recorded
+    assert stubs.inputs[failed_step] == {"parsed_players_raw_data": "parsed_players_raw_data of 131072"}
+
+
+def test_checkpoint_survives_reload(monkeypatch):
+    stubs = StubSteps(monkeypatch)
+    checkpoint = team_checkpoints.start_checkpoint("test_project", "13:1", "131072", TEAM.teamname)
+    stubs.failing[STEP_NAMES[-1]] = "error"
+    _run(checkpoint)
+
+    # Restart: the checkpoint file is read again and the team is claimed by a new run
+    monkeypatch.setattr(team_checkpoints, "_states", {})
+    (resumed,) = team_checkpoints.claim_checkpoints("test_project", "run-2", [("13:1", TEAM.teamname)])
+    assert resumed.teamid == "131072"
+    assert not resumed.completed
+
+    stubs.calls.clear()
+    stubs.failing.clear()
+    _run(resumed)
+    assert stubs.calls == [STEP_NAMES[-1]]
+
+
+def test_resume_after_a_crash_between_players_and_links_saves_the_squad_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(id_allocator, "_states", {})
+    project_dir = tmp_path / "projects" / "test_project"
+    data_dir = project_dir / "data" / "fifa_ng_db"
+    data_dir.mkdir(parents=True)
+    for table in ("players.json", "teamplayerlinks.json"):
+        (data_dir / table).write_text("[]")
+    # Project tables are found as ../projects/<project name>: name the temporary project relative to that
+    project_name = os.path.relpath(project_dir, resolve_data_path("../projects"))
+
+    async def resolve_names(project_name, names):
+        return [str(30000 + i) for i in range(len(names))]
+
+    async def stop_before_links(*args):
+        raise RuntimeError("server stopped")
+
+    monkeypatch.setattr(players, "resolve_names", resolve_names)
+    save_links = players.save_tpl_extended
+    monkeypatch.setattr(players, "save_tpl_extended", stop_before_links)
+    squad = [{"player_name": f"Player {i}", "player_number": str(i + 1), "player_position": "Centre-Back"} for i in range(3)]
+    checkpoint = team_checkpoints.start_checkpoint("test_project", "13:1", "131072", TEAM.teamname)
+
+    def save(checkpoint):
+        return asyncio.run(teams._handle_cat_save_players(TEAM, checkpoint.teamid, project_name, "13",
+                                                          parsed_players_raw_data=squad, checkpoint=checkpoint))
+
+    assert save(checkpoint)["player_save_status"] == "error"
+    assert len(read_table(str(data_dir / "players.json"))) == 3
+    assert read_table(str(data_dir / "teamplayerlinks.json")) == []
+
+    # Restart: checkpoints and ID high-water marks are read from disk again
+    monkeypatch.setattr(team_checkpoints, "_states", {})
+    monkeypatch.setattr(id_allocator, "_states", {})
+    monkeypatch.setattr(players, "save_tpl_extended", save_links)
+    (resumed,) = team_checkpoints.claim_checkpoints("test_project", "run-2", [("13:1", TEAM.teamname)])
+    result = save(resumed)
+
+    assert result["player_save_status"] == "success"
+    player_ids = [row["playerid"] for row in read_table(str(data_dir / "players.json"))]
+    assert len(player_ids) == 3
+    assert result["saved_player_ids"] == player_ids
+    links = read_table(str(data_dir / "teamplayerlinks.json"))
+    assert sorted(link["playerid"] for link in links) == sorted(player_ids)
+    assert {link["teamid"] for link in links} == {"131072"}
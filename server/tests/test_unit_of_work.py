@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from endpoints.utils import unit_of_work
+from endpoints.utils.tables import read_table, write_table
+from endpoints.utils.unit_of_work import UnitOfWork
+
+
+def test_tables_are_loaded_once_and_flushed_once(tables_dir, monkeypatch):
+    kits, links = str(tables_dir / "teamkits.json"), str(tables_dir / "teamstadiumlinks.json")
+    write_table(kits, [{"teamkitid": "1"}])
+    write_table(links, [{"teamid": "1", "stadiumid": "1"}])
+    reads, appends = [], []
+    append_rows = unit_of_work.append_rows
+
+    def counting_read(path):
+        reads.append(path)
+        return read_table(path)
+
+    def counting_append(path, rows, indent=4):
+        appends.append(path)
+        append_rows(path, rows, indent)
+
+    monkeypatch.setattr(unit_of_work, "read_table", counting_read)
+    monkeypatch.setattr(unit_of_work, "append_rows", counting_append)
+
+    async def main():
+        async with UnitOfWork(kits, links) as uow:
+            for _ in range(3):
+                next_id = max(int(row["teamkitid"]) for row in await uow.rows(kits)) + 1
+                uow.append(kits, [{"teamkitid": str(next_id)}])
+            uow.append(links, [{"teamid": "2", "stadiumid": "1"}])
+            uow.append(links, [{"teamid": "3", "stadiumid": "1"}])
+            assert appends == []  # Nothing is written before the commit
+
+    asyncio.run(main())
+    assert reads == [kits]
+    assert sorted(appends) == sorted([kits, links])
+    assert [row["teamkitid"] for row in read_table(kits)] == ["1", "2", "3", "4"]
+    assert [row["teamid"] for row in read_table(links)] == ["1", "2", "3"]
+
+
+def test_an_exception_discards_the_changes(tables_dir):
+    path = str(tables_dir / "teamkits.json")
+    write_table(path, [{"teamkitid": "1"}])
+
+    async def main():
+        async with UnitOfWork(path) as uow:
+            uow.append(path, [{"teamkitid": "2"}])
+            raise RuntimeError("validation failed")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(main())
+    assert read_table(path) == [{"teamkitid": "1"}]
+
+
+def test_concurrent_units_on_a_table_do_not_hand_out_the_same_id(tables_dir):
+    path = str(tables_dir / "teamkits.json")
+    write_table(path, [{"teamkitid": "1"}])
+
+    async def add_kit():
+        async with UnitOfWork(path) as uow:
+            next_id = max(int(row["teamkitid"]) for row in await uow.rows(path)) + 1
+            await asyncio.sleep(0)  # Let the other units try to read in between
+            uow.append(path, [{"teamkitid": str(next_id)}])
+
+    async def main():
+        await asyncio.gather(*(add_kit() for _ in range(5)))
+
+    asyncio.run(main())
+    assert sorted(int(row["teamkitid"]) for row in read_table(path)) == [1, 2, 3, 4, 5, 6]
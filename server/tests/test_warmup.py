@@ -0,0 +1,70 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from endpoints import warmup
+
+
+@pytest.fixture(autouse=True)
+def warmup_state(monkeypatch):
+    monkeypatch.setattr(warmup, "_components", {})
+    monkeypatch.setattr(warmup, "_started_at", None)
+    monkeypatch.setattr(warmup, "_finished_at", None)
+    monkeypatch.setattr(warmup, "_task", None)
+
+
+async def _ready():
+    response = await warmup.ready()
+    return response.status_code, json.loads(response.body)
+
+
+async def _until(condition):
+    for _ in range(500):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("timed out")
+
+
+def test_ready_reports_each_component_until_the_warmup_finishes(monkeypatch):
+    release = threading.Event()
+
+    def broken():
+        raise RuntimeError("models/ missing")
+
+    monkeypatch.setattr(warmup, "WARMUP_CONCURRENCY", 1)
+    monkeypatch.setattr(warmup, "warmup_components", lambda: [
+        ("tables", lambda: None), ("slow", lambda: release.wait(5)), ("ml_predictor", broken)])
+
+    async def main():
+        status, body = await _ready()
+        assert status == 503
+        assert body == {"ready": False, "started": False, "elapsed": None, "components": {}}
+
+        task = warmup.start_warmup()
+        assert warmup.start_warmup() is task  # A second start joins the running warm-up
+        await _until(lambda: warmup._components.get("slow", {}).get("status") == warmup.WARMING)
+        status, body = await _ready()
+        assert status == 503
+        assert body["started"] and not body["ready"]
+        assert {name: state["status"] for name, state in body["components"].items()} == {
+            "tables": "ready", "slow": "warming", "ml_predictor": "pending"}
+
+        release.set()
+        await task
+        status, body = await _ready()
+        assert status == 200
+        assert body["ready"]
+        components = body["components"]
+        assert components["slow"]["status"] == "ready"
+        # A failed component does not hold readiness back: it is loaded on demand
+        assert components["ml_predictor"]["status"] == "failed"
+        assert components["ml_predictor"]["error"] == "models/ missing"
+        assert all(state["elapsed"] is not None for state in components.values())
+
+    try:
+        asyncio.run(main())
+    finally:
+        release.set()